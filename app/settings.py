@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricasRequisicaoMiddleware',  # primeiro: mede a requisição inteira
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,7 +45,7 @@ ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metricas.TemplatesMedidos',  # DjangoTemplates + tempo de renderização (core/metricas.py)
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -67,6 +68,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Banco de teste em arquivo: os testes de concorrência usam várias threads, e o SQLite
+        # em memória compartilhada falha na hora ("table is locked") em vez de esperar a vez
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -128,3 +132,156 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 OPENAI_API_KEY = config('OPENAI_API_KEY')
+# Outro endereço compatível com a API da OpenAI (ex: o servidor falso do `manage.py benchmark`); vazio = api.openai.com
+OPENAI_BASE_URL = config('OPENAI_BASE_URL', default='') or None
+
+# Fila de processamento de reuniões (python manage.py processar_reunioes)
+REUNIAO_WORKER_INTERVALO = 5  # segundos entre consultas quando a fila está vazia
+REUNIAO_WORKER_TIMEOUT = 10 * 60  # reunião em 'PROCESSANDO' sem batimento há mais tempo que isso volta para a fila
+REUNIAO_WORKER_BATIMENTO = 60  # segundos entre as renovações do worker que está com a reunião
+REUNIAO_WORKER_MAX_TENTATIVAS = 3
+# Reunião devolvida por falha passageira da IA espera antes da próxima tentativa (dobra a cada uma);
+# o Retry-After da API, quando vem, é respeitado
+REUNIAO_WORKER_ESPERA_BASE = 60
+REUNIAO_WORKER_ESPERA_MAXIMA = 30 * 60
+REUNIAO_WORKER_SQLITE_TIMEOUT = 20  # segundos que cada thread do worker espera pelo lock de escrita do SQLite
+
+# Uploads: calcula o SHA-256 do áudio enquanto ele chega (storage endereçado por conteúdo)
+FILE_UPLOAD_HANDLERS = [
+    'core.storage.HashMemoryFileUploadHandler',
+    'core.storage.HashTemporaryFileUploadHandler',
+]
+
+# Upload retomável em blocos (core/upload_retomavel.py)
+UPLOAD_AUDIO_TAMANHO_BLOCO = 4 * 1024 * 1024  # sugerido ao navegador
+UPLOAD_AUDIO_TAMANHO_BLOCO_MAXIMO = 16 * 1024 * 1024
+UPLOAD_AUDIO_TAMANHO_MAXIMO = 2 * 1024 * 1024 * 1024  # 2 GB por gravação
+
+# Transcrição em trechos (gravações longas): corta nas pausas e envia em paralelo ao Whisper
+TRANSCRICAO_TRECHO_SEGUNDOS = 10 * 60  # tamanho alvo de cada trecho
+TRANSCRICAO_JANELA_CORTE_SEGUNDOS = 60  # procura uma pausa no último minuto antes do limite
+TRANSCRICAO_SILENCIO_MIN_MS = 700
+TRANSCRICAO_SILENCIO_LIMIAR_DB = 16  # dB abaixo do volume médio do trecho
+TRANSCRICAO_MAX_THREADS = 4
+
+# Pré-processamento do áudio antes do Whisper (core/audio.py)
+AUDIO_FFMPEG = 'ffmpeg'  # executável usado para decodificar/exportar em fluxo (caminho completo se não estiver no PATH)
+AUDIO_TAXA_AMOSTRAGEM = 16000  # Hz, mono: o Whisper reamostra para isso de qualquer forma
+AUDIO_QUADRO_MS = 100  # resolução da detecção de silêncio
+AUDIO_SILENCIO_LIMIAR_DB = 20  # dB abaixo do volume médio da gravação conta como silêncio
+AUDIO_SILENCIO_LONGO_MS = 2000  # pausas maiores que isso são encurtadas
+AUDIO_MARGEM_FALA_MS = 300  # mantida antes/depois de cada trecho de fala (pausa longa vira 2x isso)
+AUDIO_FORMATO_TRANSCRICAO = 'mp3'
+AUDIO_BITRATE_TRANSCRICAO = '32k'  # voz mono 16 kHz não ganha nada acima disso
+AUDIO_PICOS_QUANTIDADE = 2000  # barras da forma de onda do player (1 byte cada)
+
+# Entrega do áudio no player (core/servir_audio.py), com HTTP Range
+AUDIO_CACHE_SEGUNDOS = 24 * 60 * 60
+# Em produção, deixe o servidor web entregar os bytes (sendfile):
+# Nginx: 'X-Accel-Redirect' + uma location internal apontando AUDIO_SENDFILE_PREFIXO para MEDIA_ROOT
+# Apache (mod_xsendfile): 'X-Sendfile'
+AUDIO_SENDFILE_CABECALHO = None
+AUDIO_SENDFILE_PREFIXO = '/media-interna/'
+
+# Ata inteligente: transcrições maiores que uma janela seguem em map-reduce
+ATA_TOKENS_POR_JANELA = 6000  # orçamento de tokens de entrada por chamada
+ATA_SOBREPOSICAO_TOKENS = 300  # cada janela repete o fim da anterior (dentro do orçamento acima)
+ATA_MAX_THREADS = 4
+# Página de detalhes da reunião: HTML (ata, transcrição) em cache de fragmento; a chave inclui updated_at
+DETALHE_CACHE_SEGUNDOS = 24 * 60 * 60
+
+# Cache das respostas da IA (core/cache.py).
+# 'ia' é compartilhado entre os processos: crie a tabela com `python manage.py createcachetable`.
+# Em produção, prefira Redis (django.core.cache.backends.redis.RedisCache) com maxmemory-policy allkeys-lru.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'ia': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'cache_ia',
+        'TIMEOUT': 7 * 24 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 20000, 'CULL_FREQUENCY': 4},
+    },
+}
+CACHE_IA_TTL = 7 * 24 * 60 * 60  # segundos
+CACHE_IA_MAX_LOCAL = 512  # entradas no LRU em memória de cada processo
+CACHE_IA_ESPERA_MAXIMA = 60  # segundos aguardando outro processo que já chama a IA com a mesma entrada
+CACHE_IA_INTERVALO_ESPERA = 0.2
+
+# Checagem de feedback ao vivo (HTMX): só o texto mais recente de cada sessão vai para a IA (core/coalescencia.py)
+COALESCENCIA_ESPERA_MAXIMA = 30  # segundos aguardando a análise anterior da mesma sessão
+COALESCENCIA_INTERVALO = 0.1
+
+# Banco de Termos do Glossário Cultural (busca textual em core/busca_glossario.py)
+GLOSSARIO_POR_PAGINA = 30
+
+# Dashboard (paginação por chave em core/paginacao.py; números de EstatisticaReunioes)
+DASHBOARD_REUNIOES_POR_PAGINA = 20
+DASHBOARD_MESES_EXIBIDOS = 6
+# Análise de participação (RH): semanas exibidas e tamanho do ranking de ideias
+PARTICIPACAO_SEMANAS_EXIBIDAS = 12
+PARTICIPACAO_RANKING = 10
+
+# Transcrição na página de detalhes: segmentos carregados em janelas via HTMX
+TRANSCRICAO_SEGMENTOS_POR_JANELA = 200
+
+# Cliente da OpenAI (core/cliente_ia.py): pool de conexões, timeouts, retentativas e disjuntor
+IA_MAX_CONEXOES = 50
+IA_MAX_CONEXOES_OCIOSAS = 20  # conexões keep-alive reaproveitadas entre chamadas
+IA_KEEPALIVE_SEGUNDOS = 30
+IA_TIMEOUT_CONEXAO = 5  # segundos para abrir a conexão
+IA_TIMEOUTS = {  # segundos por operação
+    'padrao': 60,
+    'transcricao': 300,
+    'ata': 180,
+    'ata_parcial': 120,
+    'vies': 30,
+    'tradutor': 30,
+}
+IA_TENTATIVAS = 4  # por chamada, só para erros transitórios (timeout, conexão, 429, 5xx)
+IA_ESPERA_BASE = 1.0  # segundos; dobra a cada tentativa (com jitter)
+IA_ESPERA_MAXIMA = 30
+IA_DISJUNTOR_FALHAS = 5  # falhas seguidas que abrem o disjuntor
+IA_DISJUNTOR_PAUSA = 30  # segundos falhando na hora antes de testar a API de novo
+
+# Orçamento da IA por minuto (core/orcamento_ia.py), compartilhado por views e workers.
+# Deixe um pouco abaixo dos limites da conta na OpenAI; None desliga o controle.
+IA_LIMITE_TOKENS_POR_MINUTO = 180_000
+IA_LIMITE_REQUISICOES_POR_MINUTO = 450
+IA_RESERVA_INTERATIVA = 0.3  # fração do orçamento que os workers nunca usam
+IA_FAIXAS = {  # operações fora daqui (ex: transcrição, que tem limites próprios no Whisper) não passam pelo orçamento
+    'vies': 'interativa',
+    'tradutor': 'interativa',
+    'ata': 'fundo',
+    'ata_parcial': 'fundo',
+}
+IA_ORCAMENTO_ESPERA_MAXIMA = {  # segundos aguardando vaga antes de desistir (LimiteTaxaIA)
+    'interativa': 10,
+    'fundo': 120,
+}
+
+# Métricas (core/metricas.py) em /metrics, no formato do Prometheus.
+# Com token, o Prometheus precisa mandar "Authorization: Bearer <token>"; vazio = aberto (só em rede interna!)
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+# Custo estimado: US$ por 1M de tokens (entrada, saída) e por minuto de áudio transcrito
+IA_PRECOS = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+}
+IA_PRECO_TRANSCRICAO_MINUTO = 0.006
+
+# Logs do app (core.*) no console: avisos de IA, cache e worker, com traceback nas falhas
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simples': {'format': '{asctime} {levelname} {name}: {message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simples'},
+    },
+    'loggers': {
+        'core': {'handlers': ['console'], 'level': config('LOG_LEVEL', default='INFO')},
+    },
+}
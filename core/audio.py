@@ -0,0 +1,368 @@
+"""
+Utilitários de manipulação de áudio usados no pipeline das reuniões.
+O ffmpeg é chamado direto (subprocess) e o áudio é lido em fluxo: uma gravação de horas
+nunca é decodificada inteira na memória. Sem ffmpeg (ou sem o pydub, de onde vem o audioop)
+as funções levantam AudioIndisponivel e quem chama segue com o arquivo original.
+
+Antes da transcrição o áudio é preparado: mono 16 kHz (o que o Whisper usa internamente),
+sem o silêncio do começo/fim e com as pausas longas encurtadas, reexportado num formato
+compacto. Um mapa de tempos leva os timestamps do Whisper de volta à gravação original.
+"""
+
+import bisect
+import math
+import os
+import subprocess
+import tempfile
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from .metricas import ETAPA_SEGUNDOS
+
+PICOS_FATIA_MS = 10  # resolução guardada na análise; as barras do player são o máximo de várias fatias
+
+
+class AudioIndisponivel(Exception):
+    """pydub/ffmpeg não instalados ou formato que não conseguimos decodificar."""
+
+
+class MapaTempos:
+    """
+    Blocos mantidos pelo pré-processamento: (início no áudio preparado, início no original, duração), em ms.
+    Converte um instante do áudio preparado para o instante correspondente da gravação original.
+    """
+
+    def __init__(self, blocos):
+        self.blocos = blocos
+        self._inicios = [b[0] for b in blocos]
+
+    def para_original(self, ms):
+        if not self.blocos:
+            return ms
+        i = max(0, bisect.bisect_right(self._inicios, ms) - 1)
+        inicio_preparado, inicio_original, duracao = self.blocos[i]
+        return inicio_original + min(max(ms - inicio_preparado, 0), duracao)
+
+    def partes_originais(self, inicio_ms, fim_ms):
+        """Trechos (início no original, duração), em ms, que formam o intervalo [inicio_ms, fim_ms) do áudio preparado."""
+        if not self.blocos:
+            return [(inicio_ms, fim_ms - inicio_ms)]
+        partes = []
+        for inicio_preparado, inicio_original, duracao in self.blocos[max(0, bisect.bisect_right(self._inicios, inicio_ms) - 1):]:
+            if inicio_preparado >= fim_ms:
+                break
+            a, b = max(inicio_ms, inicio_preparado), min(fim_ms, inicio_preparado + duracao)
+            if a < b:
+                partes.append((inicio_original + a - inicio_preparado, b - a))
+        return partes
+
+
+@dataclass
+class RelatorioAudio:
+    bytes_originais: int
+    segundos_originais: float
+    segundos_finais: float
+    bytes_finais: int = 0  # somado conforme os trechos são exportados
+    picos: bytes = field(default=b'', repr=False)  # forma de onda da gravação original (calcular_picos)
+
+    @property
+    def bytes_economizados(self):
+        return max(0, self.bytes_originais - self.bytes_finais)
+
+    @property
+    def segundos_removidos(self):
+        return round(self.segundos_originais - self.segundos_finais, 1)
+
+    def como_dict(self):
+        return {
+            'bytes_originais': self.bytes_originais,
+            'bytes_finais': self.bytes_finais,
+            'bytes_economizados': self.bytes_economizados,
+            'segundos_originais': round(self.segundos_originais, 1),
+            'segundos_finais': round(self.segundos_finais, 1),
+            'segundos_removidos': self.segundos_removidos,
+        }
+
+
+@dataclass
+class TrechoAudio:
+    indice: int
+    inicio: float  # segundos desde o começo do áudio preparado
+    fim: float
+    caminho: str  # onde exportar() grava o trecho
+    mapa: MapaTempos = field(default_factory=lambda: MapaTempos([]), repr=False)
+    origem: str = ''  # gravação original
+    tamanho: int = 0  # bytes do arquivo exportado
+
+    def tempo_original(self, segundos):
+        """Instante (em segundos, relativo ao trecho) -> segundos na gravação original."""
+        return self.mapa.para_original(round((self.inicio + segundos) * 1000)) / 1000
+
+    def exportar(self):
+        """
+        Extrai o trecho da gravação original: o ffmpeg pula direto para o começo dele (-ss/-t)
+        e mantém só os blocos com fala do mapa de tempos. Cada trecho é exportado por conta
+        própria, então uma falha aqui afeta só ele.
+        Retorna: o caminho do arquivo exportado.
+        """
+        partes = self.mapa.partes_originais(round(self.inicio * 1000), round(self.fim * 1000))
+        inicio = partes[0][0]
+        fim = partes[-1][0] + partes[-1][1]
+        selecao = '+'.join(
+            f"between(t,{(o - inicio) / 1000:.3f},{(o + d - inicio) / 1000:.3f})" for o, d in partes
+        )
+        with ETAPA_SEGUNDOS.medir(etapa='exportacao_trecho'):
+            _executar_ffmpeg([
+                '-ss', f"{inicio / 1000:.3f}", '-t', f"{(fim - inicio) / 1000:.3f}", '-i', self.origem,
+                '-ac', '1', '-ar', str(settings.AUDIO_TAXA_AMOSTRAGEM),
+                '-af', f"aselect='{selecao}',asetpts=N/SR/TB",
+                '-b:a', settings.AUDIO_BITRATE_TRANSCRICAO, self.caminho,
+            ])
+        self.tamanho = os.path.getsize(self.caminho)
+        return self.caminho
+
+
+@dataclass
+class AnaliseAudio:
+    """
+    Resultado de uma passada pelo áudio decodificado (mono, AUDIO_TAXA_AMOSTRAGEM Hz):
+    o volume de cada quadro e o pico de cada fatia. É tudo o que a detecção de silêncio,
+    os pontos de corte e a forma de onda precisam; as amostras em si são descartadas.
+    """
+    niveis: array = field(default_factory=lambda: array('d'), repr=False)  # RMS por quadro de AUDIO_QUADRO_MS
+    picos: array = field(default_factory=lambda: array('H'), repr=False)  # pico por fatia de PICOS_FATIA_MS
+    soma_quadrados: float = 0.0
+    amostras: int = 0
+
+    @property
+    def duracao_ms(self):
+        return self.amostras * 1000 // settings.AUDIO_TAXA_AMOSTRAGEM
+
+    @property
+    def rms(self):
+        return math.sqrt(self.soma_quadrados / self.amostras) if self.amostras else 0.0
+
+    def nivel_em(self, ms):
+        return self.niveis[min(ms // settings.AUDIO_QUADRO_MS, len(self.niveis) - 1)]
+
+
+def _audioop():
+    try:
+        # O pydub traz o audioop (ou um substituto em Python puro, onde o módulo não existe mais)
+        from pydub.utils import audioop
+    except ImportError as e:
+        raise AudioIndisponivel("pydub não está instalado.") from e
+    return audioop
+
+
+def _comando_ffmpeg(argumentos):
+    return [settings.AUDIO_FFMPEG, '-nostdin', '-hide_banner', '-v', 'error', '-y', *argumentos]
+
+
+def _erro_ffmpeg(codigo, saida_erro):
+    mensagem = saida_erro.decode('utf-8', errors='replace').strip()[-500:]
+    return AudioIndisponivel(f"ffmpeg terminou com código {codigo}: {mensagem}")
+
+
+def _executar_ffmpeg(argumentos):
+    try:
+        resultado = subprocess.run(_comando_ffmpeg(argumentos), capture_output=True)
+    except OSError as e:
+        raise AudioIndisponivel(f"ffmpeg indisponível: {e}") from e
+    if resultado.returncode != 0:
+        raise _erro_ffmpeg(resultado.returncode, resultado.stderr)
+
+
+@contextmanager
+def _decodificar(caminho):
+    """Entrega a saída do ffmpeg (PCM 16 bits mono) para leitura em blocos, enquanto ele decodifica."""
+    with tempfile.TemporaryFile() as saida_erro:
+        try:
+            processo = subprocess.Popen(
+                _comando_ffmpeg([
+                    '-i', caminho, '-ac', '1', '-ar', str(settings.AUDIO_TAXA_AMOSTRAGEM), '-f', 's16le', '-',
+                ]),
+                stdout=subprocess.PIPE, stderr=saida_erro,
+            )
+        except OSError as e:
+            raise AudioIndisponivel(f"ffmpeg indisponível: {e}") from e
+        try:
+            yield processo.stdout
+        except BaseException:
+            processo.kill()
+            raise
+        finally:
+            processo.stdout.close()
+            codigo = processo.wait()
+        if codigo != 0:
+            saida_erro.seek(0)
+            raise _erro_ffmpeg(codigo, saida_erro.read())
+
+
+def analisar_audio(caminho):
+    """
+    Decodifica a gravação em fluxo e guarda só o volume de cada quadro e os picos.
+    A memória usada é proporcional à duração em quadros (alguns MB para horas de áudio), não às amostras.
+    """
+    audioop = _audioop()
+    bytes_quadro = settings.AUDIO_TAXA_AMOSTRAGEM * settings.AUDIO_QUADRO_MS // 1000 * 2
+    bytes_fatia = max(2, settings.AUDIO_TAXA_AMOSTRAGEM * PICOS_FATIA_MS // 1000 * 2)
+    analise = AnaliseAudio()
+    with _decodificar(caminho) as pcm:
+        while True:
+            bloco = pcm.read(bytes_quadro)
+            if len(bloco) < 2:
+                break
+            bloco = bloco[:len(bloco) - len(bloco) % 2]
+            amostras = len(bloco) // 2
+            rms = audioop.rms(bloco, 2)
+            analise.niveis.append(rms)
+            analise.soma_quadrados += rms * rms * amostras
+            analise.amostras += amostras
+            for i in range(0, len(bloco), bytes_fatia):
+                analise.picos.append(audioop.max(bloco[i:i + bytes_fatia], 2))
+    return analise
+
+
+def _ponto_de_corte(analise, mapa, alvo_ms, janela_ms):
+    """
+    Procura o silêncio mais longo na janela [alvo - janela, alvo] do áudio preparado e devolve o meio dele.
+    Usa os volumes por quadro da análise (a janela é levada à gravação original pelo mapa de tempos).
+    """
+    quadro = settings.AUDIO_QUADRO_MS
+    inicio_janela = max(0, alvo_ms - janela_ms)
+    niveis = [analise.nivel_em(mapa.para_original(ms)) for ms in range(inicio_janela, alvo_ms, quadro)]
+    if not niveis:
+        return alvo_ms
+    rms_janela = math.sqrt(sum(n * n for n in niveis) / len(niveis))
+    limiar = rms_janela * 10 ** (-settings.TRANSCRICAO_SILENCIO_LIMIAR_DB / 20)
+    minimo = max(1, -(-settings.TRANSCRICAO_SILENCIO_MIN_MS // quadro))
+
+    melhor, inicio = None, None
+    for i, nivel in enumerate([*niveis, math.inf]):  # o infinito fecha um silêncio que vai até o fim da janela
+        if nivel < limiar:
+            inicio = i if inicio is None else inicio
+            continue
+        if inicio is not None and i - inicio >= minimo and (melhor is None or i - inicio > melhor[1] - melhor[0]):
+            melhor = (inicio, i)
+        inicio = None
+    if melhor is None:
+        return alvo_ms  # Sem pausa na janela: corte seco no limite
+    return inicio_janela + (melhor[0] + melhor[1]) * quadro // 2
+
+
+def _trechos_com_fala(analise):
+    """
+    Intervalos (ms) com fala, com uma margem de cada lado. Silêncios menores que
+    AUDIO_SILENCIO_LONGO_MS ficam dentro do intervalo; os maiores (e o começo/fim mudos) ficam de fora.
+    Usa o volume de cada quadro de AUDIO_QUADRO_MS medido na análise.
+    """
+    quadro = settings.AUDIO_QUADRO_MS
+    limiar = analise.rms * 10 ** (-settings.AUDIO_SILENCIO_LIMIAR_DB / 20)
+    quadros_longos = max(1, settings.AUDIO_SILENCIO_LONGO_MS // quadro)
+    margem = settings.AUDIO_MARGEM_FALA_MS
+    duracao = analise.duracao_ms
+
+    com_fala = [nivel > limiar for nivel in analise.niveis]
+
+    intervalos, inicio, silencio = [], None, 0
+    for n, fala in enumerate(com_fala):
+        if fala:
+            if inicio is None:
+                inicio = n
+            silencio = 0
+        elif inicio is not None:
+            silencio += 1
+            if silencio >= quadros_longos:
+                intervalos.append((inicio, n - silencio + 1))
+                inicio, silencio = None, 0
+    if inicio is not None:
+        intervalos.append((inicio, len(com_fala) - silencio))
+
+    # Quadros -> ms, com margem; margens que se encostam viram um único intervalo
+    unidos = []
+    for a, b in intervalos:
+        a, b = max(0, a * quadro - margem), min(duracao, b * quadro + margem)
+        if unidos and a <= unidos[-1][1]:
+            unidos[-1] = (unidos[-1][0], b)
+        else:
+            unidos.append((a, b))
+    return unidos
+
+
+def calcular_picos(picos_fatias, quantidade=None):
+    """
+    Forma de onda para o player: o pico de cada uma de `quantidade` fatias iguais do áudio,
+    normalizado pelo maior pico e guardado como um byte (0-255) por fatia.
+    Retorna: bytes (AUDIO_PICOS_QUANTIDADE bytes; menos se o áudio for muito curto).
+    """
+    quantidade = quantidade or settings.AUDIO_PICOS_QUANTIDADE
+    if not picos_fatias:
+        return b''
+    passo = max(1, -(-len(picos_fatias) // quantidade))  # divisão arredondando para cima
+    # max em fatias de array roda em C: sem laço Python por fatia da análise
+    picos = [max(picos_fatias[i:i + passo]) for i in range(0, len(picos_fatias), passo)]
+    maior = max(picos) or 1
+    return bytes(min(255, p * 255 // maior) for p in picos)
+
+
+def preparar_audio(caminho):
+    """
+    Analisa a gravação (mono AUDIO_TAXA_AMOSTRAGEM Hz) e decide o que fica: os silêncios longos saem.
+    Os picos da forma de onda (linha do tempo original) saem da mesma passada.
+    Retorna: (AnaliseAudio, MapaTempos, RelatorioAudio sem os bytes finais).
+    """
+    analise = analisar_audio(caminho)
+    duracao = analise.duracao_ms
+
+    intervalos = _trechos_com_fala(analise) if duracao else []
+    if not intervalos:
+        # Nada acima do limiar (gravação muda ou muito baixa): manda o áudio inteiro
+        intervalos = [(0, duracao)]
+
+    blocos, posicao = [], 0
+    for a, b in intervalos:
+        blocos.append((posicao, a, b - a))
+        posicao += b - a
+
+    relatorio = RelatorioAudio(
+        bytes_originais=os.path.getsize(caminho),
+        segundos_originais=duracao / 1000,
+        segundos_finais=posicao / 1000,
+        picos=calcular_picos(analise.picos),
+    )
+    return analise, MapaTempos(blocos), relatorio
+
+
+@ETAPA_SEGUNDOS.medir(etapa='preprocessamento')
+def dividir_em_trechos(caminho, pasta_destino):
+    """
+    Prepara a gravação (preparar_audio) e a divide em trechos de até TRANSCRICAO_TRECHO_SEGUNDOS
+    do áudio preparado, cortando nas pausas de fala. Os trechos ainda não estão no disco:
+    cada um é exportado para `pasta_destino` com TrechoAudio.exportar(), na hora de transcrever.
+    Retorna: (lista de TrechoAudio em ordem; RelatorioAudio).
+    """
+    analise, mapa, relatorio = preparar_audio(caminho)
+    duracao_ms = round(relatorio.segundos_finais * 1000)
+    alvo_ms = settings.TRANSCRICAO_TRECHO_SEGUNDOS * 1000
+    janela_ms = settings.TRANSCRICAO_JANELA_CORTE_SEGUNDOS * 1000
+    formato = settings.AUDIO_FORMATO_TRANSCRICAO
+
+    trechos, inicio_ms = [], 0
+    while inicio_ms < duracao_ms:
+        fim_ms = duracao_ms
+        if duracao_ms - inicio_ms > alvo_ms:
+            fim_ms = max(_ponto_de_corte(analise, mapa, inicio_ms + alvo_ms, janela_ms), inicio_ms + 1)
+
+        destino = os.path.join(pasta_destino, f"trecho_{len(trechos):04d}.{formato}")
+        trechos.append(TrechoAudio(len(trechos), inicio_ms / 1000, fim_ms / 1000, destino, mapa, origem=caminho))
+        inicio_ms = fim_ms
+
+    return trechos, relatorio
+
+
+def pasta_temporaria():
+    return tempfile.TemporaryDirectory(prefix='reuniao_')
@@ -0,0 +1,529 @@
+# core/benchmark.py
+
+"""
+Benchmark e teste de carga de ponta a ponta (python manage.py benchmark).
+- Banco de teste separado, populado em volume realista (reuniões, termos do glossário, usuários).
+- A OpenAI é substituída pelo servidor local de core/openai_falso.py (latência e erros configuráveis).
+- Cada cenário dispara requisições reais (django.test.Client, middleware e templates inclusos)
+  em várias threads e mede: vazão, latência p50/p95/p99, respostas com erro, erros da IA,
+  consultas ao banco por requisição (cabeçalho Server-Timing de core/middleware.py) e pico de RSS.
+- O resultado pode ser salvo como baseline e comparado nas execuções seguintes (modo CI).
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import resource
+import statistics
+import threading
+import time
+import uuid
+import wave
+from array import array
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .cache import cache_ia
+from .metricas import ETAPA_SEGUNDOS, IA_ERROS
+from .models import EstatisticaReunioes, GlossarioCultural, PerfilColaborador, ReuniaoAcessivel
+from .paginacao import codificar_cursor
+from .tasks import FilaReunioes
+
+logger = logging.getLogger(__name__)
+
+AQUECIMENTO = 10  # requisições por cenário antes de começar a medir
+AMOSTRA_MINIMA = 30  # abaixo disso, percentis e vazão oscilam demais: compara só o tempo total
+FOLGA_MS = 20  # latências poucos ms maiores não são regressão, mesmo que passem da tolerância (ruído da máquina)
+_RE_CONSULTAS = re.compile(r'db;desc="(\d+) consultas"')
+_SILABAS = ('ba', 'ce', 'di', 'fo', 'gu', 'la', 'me', 'ni', 'po', 'ru', 'sa', 'te', 'vi', 'zo', 'ma', 're', 'lu', 'da')
+_FRASES_FEEDBACK = (
+    "Ela é muito emocional nas reuniões e precisa se controlar mais",
+    "O trabalho entregue no trimestre superou as metas combinadas",
+    "Ele poderia ser mais parecido com o Pedro na hora de apresentar",
+    "A comunicação com o time melhorou bastante depois do treinamento",
+)
+_DEPARTAMENTOS = ('Engenharia', 'Produto', 'Financeiro', 'RH', 'Comercial')
+_LIGACOES = ('o time revisou', 'precisamos entender', 'segundo a diretoria', 'vale acompanhar', 'na pauta de hoje')
+
+
+# --- Medições ---
+
+def percentil(valores, p):
+    """Percentil pelo método do posto mais próximo (valores já ordenados)."""
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, max(0, math.ceil(p / 100 * len(valores)) - 1))]
+
+
+class PicoMemoria:
+    """
+    Pico de memória residente (RSS) do processo durante um trecho do benchmark.
+    No Linux, /proc/self/clear_refs zera o pico (VmHWM) no início; sem isso, vale o pico do processo todo.
+    """
+
+    def __enter__(self):
+        try:
+            with open('/proc/self/clear_refs', 'w') as arquivo:
+                arquivo.write('5')
+        except OSError:
+            pass
+        return self
+
+    def __exit__(self, *exc):
+        self.mb = self.atual_mb()
+
+    @staticmethod
+    def atual_mb():
+        try:
+            with open('/proc/self/status') as arquivo:
+                for linha in arquivo:
+                    if linha.startswith('VmHWM:'):
+                        return int(linha.split()[1]) / 1024
+        except OSError:
+            pass
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB no Linux
+
+
+def _total_erros_ia():
+    return sum(IA_ERROS.valores().values())
+
+
+@dataclass
+class Resultado:
+    requisicoes: int = 0
+    erros: int = 0  # respostas 4xx/5xx ou exceções
+    erros_ia: int = 0  # chamadas à IA que falharam de vez (a view mostra a mensagem ao usuário)
+    segundos: float = 0.0
+    vazao: float = 0.0  # requisições por segundo
+    p50_ms: float = 0.0
+    p95_ms: float = 0.0
+    p99_ms: float = 0.0
+    consultas_media: float = 0.0
+    consultas_max: int = 0
+    rss_pico_mb: float = 0.0
+    extras: dict = field(default_factory=dict)
+
+    @classmethod
+    def calcular(cls, duracoes, consultas, erros, erros_ia, segundos, rss_pico_mb, extras=None):
+        duracoes = sorted(duracoes)
+        return cls(
+            requisicoes=len(duracoes),
+            erros=erros,
+            erros_ia=erros_ia,
+            segundos=round(segundos, 3),
+            vazao=round(len(duracoes) / segundos, 2) if segundos else 0.0,
+            p50_ms=round(percentil(duracoes, 50) * 1000, 1),
+            p95_ms=round(percentil(duracoes, 95) * 1000, 1),
+            p99_ms=round(percentil(duracoes, 99) * 1000, 1),
+            consultas_media=round(sum(consultas) / len(consultas), 1) if consultas else 0.0,
+            consultas_max=max(consultas, default=0),
+            rss_pico_mb=round(rss_pico_mb, 1),
+            extras=extras or {},
+        )
+
+    @classmethod
+    def mediana(cls, resultados):
+        """Combina repetições do mesmo cenário: a mediana de cada número (um pico isolado não decide)."""
+        if len(resultados) == 1:
+            return resultados[0]
+        combinado = cls(extras={'repeticoes': len(resultados)})
+        for campo in asdict(combinado):
+            if campo != 'extras':
+                setattr(combinado, campo, statistics.median(getattr(r, campo) for r in resultados))
+        return combinado
+
+    def como_dict(self):
+        return asdict(self)
+
+
+def _consumir(resposta):
+    """
+    Respostas em streaming só terminam quando o corpo é consumido. Streams async (views async)
+    são lidos num event loop desta thread, e as consultas ao banco do gerador voltam para ela.
+    """
+    if getattr(resposta, 'streaming', False):
+        if resposta.is_async:
+            async def ler():
+                return [pedaco async for pedaco in resposta.streaming_content]
+            async_to_sync(ler)()
+        else:
+            b''.join(resposta.streaming_content)
+    return resposta
+
+
+def executar_carga(requisicao, total, concorrencia, aquecimento=AQUECIMENTO):
+    """
+    Dispara `total` chamadas de requisicao(cliente, indice) em `concorrencia` threads,
+    cada uma com o seu Client (sessão e cookies próprios, como usuários diferentes).
+    Antes, `aquecimento` chamadas fora da medição (índices negativos): templates compilados,
+    índice do glossário montado e conexões abertas não entram nos números.
+    Retorna: Resultado.
+    """
+    cliente = Client()
+    for indice in range(-aquecimento, 0):
+        _consumir(requisicao(cliente, indice))
+
+    duracoes, consultas = [], []
+    erros = 0
+    proximo = iter(range(total))
+    trava = threading.Lock()
+
+    def trabalhar():
+        nonlocal erros
+        cliente = Client()
+        try:
+            while True:
+                with trava:
+                    indice = next(proximo, None)
+                if indice is None:
+                    return
+                inicio = time.perf_counter()
+                try:
+                    resposta = _consumir(requisicao(cliente, indice))
+                    falhou = resposta.status_code >= 400
+                except Exception as e:
+                    logger.warning("Benchmark: requisição %s falhou: %s", indice, e)
+                    resposta, falhou = None, True
+                duracao = time.perf_counter() - inicio
+                encontrado = _RE_CONSULTAS.search(resposta.get('Server-Timing', '')) if resposta is not None else None
+                with trava:
+                    duracoes.append(duracao)
+                    erros += falhou
+                    if encontrado:
+                        consultas.append(int(encontrado.group(1)))
+        finally:
+            connection.close()
+
+    erros_ia = _total_erros_ia()
+    with PicoMemoria() as memoria:
+        inicio = time.perf_counter()
+        threads = [threading.Thread(target=trabalhar, name=f'benchmark-{n}') for n in range(max(1, concorrencia))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        segundos = time.perf_counter() - inicio
+    return Resultado.calcular(duracoes, consultas, erros, _total_erros_ia() - erros_ia, segundos, memoria.mb)
+
+
+# --- Dados ---
+
+def _palavra(gerador, silabas):
+    return ''.join(gerador.choice(_SILABAS) for _ in range(silabas))
+
+
+def popular_usuarios(quantidade):
+    """Retorna: os pks dos usuários do benchmark (criados só se ainda não existirem)."""
+    existentes = list(User.objects.filter(username__startswith='benchmark.').values_list('pk', flat=True))
+    if len(existentes) >= quantidade:
+        return existentes[:quantidade]
+    novos = User.objects.bulk_create([
+        User(username=f'benchmark.{n}', first_name=f'Pessoa {n}', last_name='Benchmark')
+        for n in range(len(existentes), quantidade)
+    ])
+    PerfilColaborador.objects.bulk_create(
+        [
+            PerfilColaborador(user=usuario, cargo="Analista", departamento=_DEPARTAMENTOS[usuario.pk % len(_DEPARTAMENTOS)])
+            for usuario in novos
+        ],
+        ignore_conflicts=True,
+    )
+    return existentes + [usuario.pk for usuario in novos]
+
+
+def popular_reunioes(quantidade, usuarios, lote=5000, participantes=4, anos=3, semente=0):
+    """
+    Completa a tabela até `quantidade` reuniões já processadas (CONCLUIDO/ERRO, para o worker
+    não pegá-las), espalhadas pelos últimos `anos`, com participantes. bulk_create não dispara
+    os signals: os contadores do dashboard são recalculados no final.
+    Retorna: quantas reuniões foram criadas.
+    """
+    faltam = quantidade - ReuniaoAcessivel.objects.count()
+    if faltam <= 0:
+        return 0
+    gerador = random.Random(semente)
+    agora = timezone.now()
+    minutos = anos * 365 * 24 * 60
+    Participantes = ReuniaoAcessivel.participantes.through
+    for inicio in range(0, faltam, lote):
+        with transaction.atomic():
+            reunioes = ReuniaoAcessivel.objects.bulk_create([
+                ReuniaoAcessivel(
+                    titulo=f"Reunião {_palavra(gerador, 3).capitalize()} #{inicio + n}",
+                    data_reuniao=agora - timedelta(minutes=gerador.randrange(minutos)),
+                    status_ia='CONCLUIDO' if gerador.random() < 0.95 else 'ERRO',
+                    pontos_destaque={'resumo': "Reunião gerada pelo benchmark.", 'decisoes': [], 'autoria': [],
+                                     'apropriacoes': [], 'atencao': []},
+                )
+                for n in range(min(lote, faltam - inicio))
+            ])
+            Participantes.objects.bulk_create([
+                Participantes(reuniaoacessivel_id=reuniao.pk, user_id=usuario)
+                for reuniao in reunioes
+                for usuario in gerador.sample(usuarios, min(participantes, len(usuarios)))
+            ])
+    EstatisticaReunioes.recalcular()
+    return faltam
+
+
+def popular_glossario(quantidade, lote=5000, semente=0):
+    """
+    Completa o glossário até `quantidade` termos (palavras inventadas, únicas) e invalida
+    o índice em memória e as traduções em cache (bulk_create não dispara os signals).
+    Retorna: quantos termos foram criados.
+    """
+    faltam = quantidade - GlossarioCultural.objects.count()
+    if faltam > 0:
+        gerador = random.Random(semente)
+        existentes = set(GlossarioCultural.objects.values_list('termo_tecnico', flat=True))
+        novos = []
+        while len(novos) < faltam:
+            termo = _palavra(gerador, gerador.randint(3, 5)).capitalize()
+            if termo not in existentes:
+                existentes.add(termo)
+                novos.append(GlossarioCultural(
+                    termo_tecnico=termo,
+                    explicacao_simples=f"Explicação simples de {termo} para quem está chegando.",
+                    exemplo_uso=f"O {termo} foi discutido na reunião.",
+                    tags=gerador.choice(('Financeiro', 'TI', 'Siglas', 'RH', 'Produto')),
+                ))
+        GlossarioCultural.objects.bulk_create(novos, batch_size=lote)
+    cache_ia.nova_versao_glossario()
+    return max(faltam, 0)
+
+
+def gerar_wav(caminho, segundos, taxa=16000, semente=0):
+    """
+    Grava um WAV mono 16 bits de `segundos` em blocos (sem montar o áudio inteiro na memória):
+    rajadas de "fala" (ruído modulado) com pausas curtas e, a cada ~30 s, uma pausa longa
+    para o pré-processamento ter silêncio a remover.
+    """
+    gerador = random.Random(semente)
+    fala = array('h', (int(gerador.gauss(0, 6000) * abs(math.sin(n / taxa * 7))) for n in range(taxa * 3)))
+    fala = array('h', (max(-32768, min(32767, amostra)) for amostra in fala)).tobytes()
+    pausa_curta = bytes(2 * taxa // 2)
+    pausa_longa = bytes(2 * taxa * 3)
+    ciclo = (fala + pausa_curta) * 8 + pausa_longa  # ~31 s
+    total = int(segundos * taxa) * 2
+    with wave.open(caminho, 'wb') as arquivo:
+        arquivo.setnchannels(1)
+        arquivo.setsampwidth(2)
+        arquivo.setframerate(taxa)
+        escritos = 0
+        while escritos < total:
+            pedaco = ciclo[:total - escritos]
+            arquivo.writeframes(pedaco)
+            escritos += len(pedaco)
+    return caminho
+
+
+# --- Cenários ---
+
+def _data_aleatoria(gerador, anos=3):
+    return timezone.now() - timedelta(minutes=gerador.randrange(anos * 365 * 24 * 60))
+
+
+def cenario_dashboard(total, concorrencia):
+    """Primeira página e páginas antigas (cursor em datas aleatórias): custo do keyset em qualquer ponto."""
+    url = reverse('dashboard')
+
+    def requisicao(cliente, indice):
+        if indice % 2 == 0:
+            return cliente.get(url)
+        gerador = random.Random(indice)
+        return cliente.get(url, {'antes': codificar_cursor(_data_aleatoria(gerador), 10 ** 12)})
+
+    return executar_carga(requisicao, total, concorrencia)
+
+
+def cenario_glossario_busca(total, concorrencia, termos):
+    """Busca textual (FTS) por termos existentes e por prefixos, e listagem alfabética em páginas profundas."""
+    url = reverse('glossario')
+
+    def requisicao(cliente, indice):
+        gerador = random.Random(indice)
+        if indice % 3 == 0:
+            return cliente.get(url, {'page': gerador.randint(1, 500)})
+        termo = gerador.choice(termos)
+        return cliente.get(url, {'q': termo if indice % 3 == 1 else termo[:4]})
+
+    return executar_carga(requisicao, total, concorrencia)
+
+
+def _texto_com_termos(gerador, termos, quantidade=4):
+    partes = []
+    for termo in gerador.sample(termos, quantidade):
+        partes.append(f"{gerador.choice(_LIGACOES)} o {termo}")
+    return ', '.join(partes).capitalize() + '.'
+
+
+def cenario_glossario_traducao(total, concorrencia, termos, fracao_ia=0.2):
+    """
+    POST do Tradutor Cultural com textos que citam termos do glossário: a maioria resolve
+    pela anotação local (índice Aho-Corasick com todos os termos); `fracao_ia` pede reescrita (IA).
+    """
+    url = reverse('glossario')
+    rodada = uuid.uuid4().hex[:8]  # Textos inéditos: o cache da IA não responde por execuções anteriores
+
+    def requisicao(cliente, indice):
+        gerador = random.Random(indice)
+        texto = f"{_texto_com_termos(gerador, termos)} Pauta {rodada}-{indice}."
+        dados = {'texto_complexo': texto}
+        if gerador.random() < fracao_ia:
+            dados['reescrever'] = 'on'
+        return cliente.post(url, dados)
+
+    return executar_carga(requisicao, total, concorrencia)
+
+
+def cenario_feedback(total, concorrencia, fracao_repetidos=0.2):
+    """
+    checar_feedback_stream (como o formulário da mentoria) com textos inéditos (vão à IA) e uma
+    fração de textos repetidos (respondidos pelo cache da IA, como quando vários gestores colam o mesmo modelo).
+    A latência inclui ler o card inteiro.
+    """
+    url = reverse('checar_feedback_stream')
+    rodada = uuid.uuid4().hex[:8]
+
+    def requisicao(cliente, indice):
+        gerador = random.Random(indice)
+        frase = gerador.choice(_FRASES_FEEDBACK)
+        if gerador.random() >= fracao_repetidos:
+            frase = f"{frase} (avaliação {rodada}-{indice})"
+        return cliente.post(url, {'texto_original': frase})
+
+    return executar_carga(requisicao, total, concorrencia)
+
+
+def cenario_upload(caminho_audio, usuarios):
+    """
+    Pipeline completo de uma gravação longa, como o navegador faz: upload em blocos
+    (com checksum), envio do formulário e processamento pelo worker (pré-processamento,
+    transcrição e ata contra o servidor falso).
+    Retorna: Resultado com a latência de cada bloco do upload; `extras` traz o tempo
+    de cada etapa (core/metricas.py) e o status final da reunião.
+    """
+    cliente = Client()
+    tamanho = os.path.getsize(caminho_audio)
+    etapas_antes = ETAPA_SEGUNDOS.valores()
+    erros_ia = _total_erros_ia()
+    duracoes, consultas, erros = [], [], 0
+    extras = {'audio_mb': round(tamanho / 1e6, 1)}
+
+    with PicoMemoria() as memoria:
+        inicio = time.perf_counter()
+        resposta = cliente.post(reverse('iniciar_upload_audio'), {'nome': os.path.basename(caminho_audio), 'tamanho': tamanho})
+        if resposta.status_code != 201:
+            raise RuntimeError(f"Início do upload recusado ({resposta.status_code}): {resposta.content[:200]!r}")
+        dados = resposta.json()
+        url_bloco = reverse('upload_audio_bloco', args=[dados['id']])
+        with open(caminho_audio, 'rb') as arquivo:
+            offset = 0
+            while offset < tamanho:
+                bloco = arquivo.read(dados['tamanho_bloco'])
+                comeco = time.perf_counter()
+                resposta = cliente.put(url_bloco, bloco, content_type='application/octet-stream', headers={
+                    'Upload-Offset': str(offset), 'Upload-Checksum': hashlib.sha256(bloco).hexdigest(),
+                })
+                duracoes.append(time.perf_counter() - comeco)
+                encontrado = _RE_CONSULTAS.search(resposta.get('Server-Timing', ''))
+                if encontrado:
+                    consultas.append(int(encontrado.group(1)))
+                if resposta.status_code >= 400:
+                    raise RuntimeError(f"Bloco em {offset} recusado ({resposta.status_code}): {resposta.content[:200]!r}")
+                offset += len(bloco)
+        extras['upload_segundos'] = round(time.perf_counter() - inicio, 3)
+        extras['upload_mb_s'] = round(tamanho / 1e6 / extras['upload_segundos'], 1)
+
+        resposta = cliente.post(reverse('upload_reuniao'), {
+            'titulo': "Gravação longa do benchmark",
+            'data_reuniao': timezone.localtime().strftime('%Y-%m-%dT%H:%M'),
+            'participantes': usuarios[:5],
+            'upload_id': dados['id'],
+        })
+        erros += resposta.status_code >= 400
+        reuniao = ReuniaoAcessivel.objects.filter(status_ia='PENDENTE').order_by('-pk').first()
+        if reuniao is None:
+            raise RuntimeError(f"O formulário de upload não criou a reunião ({resposta.status_code}).")
+
+        comeco = time.perf_counter()
+        FilaReunioes.executar_worker(uma_vez=True)
+        extras['processamento_segundos'] = round(time.perf_counter() - comeco, 3)
+        segundos = time.perf_counter() - inicio
+
+    reuniao.refresh_from_db()
+    extras['status_final'] = reuniao.status_ia
+    erros += reuniao.status_ia != 'CONCLUIDO'
+    etapas_depois = ETAPA_SEGUNDOS.valores()
+    extras['etapas_segundos'] = {
+        chave[0]: round(soma - etapas_antes.get(chave, (0.0, 0))[0], 3)
+        for chave, (soma, _) in etapas_depois.items()
+        if soma != etapas_antes.get(chave, (0.0, 0))[0]
+    }
+    return Resultado.calcular(duracoes, consultas, erros, _total_erros_ia() - erros_ia, segundos, memoria.mb, extras)
+
+
+# --- Baseline ---
+
+METRICAS_COMPARADAS = (
+    # (campo, maior é pior?)
+    # O p99 fica só no relatório: com poucas centenas de requisições ele é uma ou duas amostras
+    ('p50_ms', True),
+    ('p95_ms', True),
+    ('vazao', False),
+    ('rss_pico_mb', True),
+    ('consultas_media', True),  # Um N+1 novo multiplica a média, muito além da tolerância
+)
+METRICAS_AMOSTRA_PEQUENA = (
+    ('segundos', True),
+    ('rss_pico_mb', True),
+    ('consultas_media', True),
+)
+
+
+def comparar(relatorio, baseline, tolerancia):
+    """
+    Compara cada cenário com o da baseline.
+    Retorna: lista de regressões em texto (vazia = tudo dentro da tolerância).
+    """
+    regressoes = []
+    for nome, atual in relatorio['cenarios'].items():
+        anterior = baseline.get('cenarios', {}).get(nome)
+        if anterior is None:
+            continue
+        metricas = METRICAS_COMPARADAS if atual.get('requisicoes', 0) >= AMOSTRA_MINIMA else METRICAS_AMOSTRA_PEQUENA
+        for campo, maior_pior in metricas:
+            valor, referencia = atual.get(campo), anterior.get(campo)
+            if valor is None or not referencia:
+                continue
+            if campo.endswith('_ms') and valor - referencia <= FOLGA_MS:
+                continue
+            if maior_pior and valor > referencia * (1 + tolerancia):
+                regressoes.append(f"{nome}.{campo}: {valor} > {referencia} (+{tolerancia:.0%})")
+            elif not maior_pior and valor < referencia * (1 - tolerancia):
+                regressoes.append(f"{nome}.{campo}: {valor} < {referencia} (-{tolerancia:.0%})")
+        if atual.get('erros', 0) > anterior.get('erros', 0):
+            regressoes.append(f"{nome}.erros: {atual['erros']} > {anterior['erros']}")
+    return regressoes
+
+
+def ler_baseline(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def salvar_baseline(caminho, relatorio):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2, sort_keys=True)
+        arquivo.write('\n')
@@ -0,0 +1,187 @@
+# core/busca_glossario.py
+
+"""
+Busca textual do Glossário Cultural (termo, explicação, exemplo e tags).
+- SQLite: tabela virtual FTS5 'core_glossario_fts' (tokenizer sem acento), mantida por triggers.
+- PostgreSQL: índice GIN sobre to_tsvector('portuguese', f_unaccent(...)).
+- Outros bancos: icontains simples, sem ranking.
+As tabelas/índices são criados na migração 0004.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+
+# Marcadores que não aparecem em texto digitado; trocados por <mark> depois do escape
+INICIO_DESTAQUE = '\x02'
+FIM_DESTAQUE = '\x03'
+
+_RE_PALAVRA = re.compile(r'\w+', re.UNICODE)
+
+
+def destacar(texto):
+    """Escapa o HTML do trecho e converte os marcadores em <mark>."""
+    return escape(texto or '').replace(INICIO_DESTAQUE, '<mark>').replace(FIM_DESTAQUE, '</mark>')
+
+
+def _palavras(consulta):
+    return _RE_PALAVRA.findall(consulta or '')[:10]
+
+
+class ResultadoBusca:
+    """
+    Resultado preguiçoso compatível com o django.core.paginator.Paginator:
+    count() e fatias fazem uma consulta cada (LIMIT/OFFSET), nunca carregam tudo.
+    Cada item é um dict com pk, termo_tecnico, tags, explicacao_simples, termo_html e trecho_html.
+    """
+
+    def __init__(self, consulta):
+        self.palavras = _palavras(consulta)
+        self._total = None
+
+    def count(self):
+        if self._total is None:
+            self._total = _backend().contar(self.palavras) if self.palavras else 0
+        return self._total
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, fatia):
+        if not isinstance(fatia, slice):
+            return self[fatia:fatia + 1][0]
+        inicio = fatia.start or 0
+        limite = (fatia.stop - inicio) if fatia.stop is not None else self.count() - inicio
+        if not self.palavras or limite <= 0:
+            return []
+        return _backend().buscar(self.palavras, limite, inicio)
+
+
+class _BuscaSQLite:
+    # Pesos do bm25 por coluna: termo, explicação, exemplo, tags
+    PESOS = '10.0, 2.0, 1.0, 5.0'
+
+    @staticmethod
+    def _match(palavras):
+        # Cada palavra vira um prefixo entre aspas ("budg"*): aceita digitação parcial e neutraliza a sintaxe do FTS5
+        return " ".join(f'"{p}"*' for p in palavras)
+
+    def contar(self, palavras):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM core_glossario_fts WHERE core_glossario_fts MATCH %s", [self._match(palavras)])
+            return cursor.fetchone()[0]
+
+    def buscar(self, palavras, limite, deslocamento):
+        # Ordena só os rowids; highlight/snippet (caros) são calculados apenas para a página
+        sql = f"""
+            WITH pagina AS (
+                SELECT rowid AS id, bm25(core_glossario_fts, {self.PESOS}) AS relevancia
+                FROM core_glossario_fts
+                WHERE core_glossario_fts MATCH %s
+                ORDER BY relevancia
+                LIMIT %s OFFSET %s
+            )
+            SELECT g.id, g.termo_tecnico, g.tags, g.explicacao_simples,
+                   highlight(core_glossario_fts, 0, %s, %s),
+                   snippet(core_glossario_fts, 1, %s, %s, '…', 16)
+            FROM pagina
+            JOIN core_glossario_fts ON core_glossario_fts.rowid = pagina.id
+            JOIN core_glossariocultural g ON g.id = pagina.id
+            WHERE core_glossario_fts MATCH %s
+            ORDER BY pagina.relevancia
+        """
+        match = self._match(palavras)
+        parametros = [match, limite, deslocamento, INICIO_DESTAQUE, FIM_DESTAQUE, INICIO_DESTAQUE, FIM_DESTAQUE, match]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, parametros)
+            return [_linha_para_item(linha) for linha in cursor.fetchall()]
+
+
+class _BuscaPostgres:
+    DOCUMENTO = (
+        "setweight(to_tsvector('portuguese', f_unaccent(g.termo_tecnico)), 'A') || "
+        "setweight(to_tsvector('portuguese', f_unaccent(g.tags)), 'B') || "
+        "setweight(to_tsvector('portuguese', f_unaccent(g.explicacao_simples)), 'C') || "
+        "setweight(to_tsvector('portuguese', f_unaccent(g.exemplo_uso)), 'D')"
+    )
+    OPCOES_DESTAQUE = f"StartSel={INICIO_DESTAQUE}, StopSel={FIM_DESTAQUE}, MaxWords=30, MinWords=10"
+
+    @staticmethod
+    def _consulta(palavras):
+        return " & ".join(f"{p}:*" for p in palavras)
+
+    def contar(self, palavras):
+        sql = f"""
+            SELECT count(*) FROM core_glossariocultural g
+            WHERE {self.DOCUMENTO} @@ to_tsquery('portuguese', f_unaccent(%s))
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self._consulta(palavras)])
+            return cursor.fetchone()[0]
+
+    def buscar(self, palavras, limite, deslocamento):
+        sql = f"""
+            SELECT g.id, g.termo_tecnico, g.tags, g.explicacao_simples,
+                   ts_headline('portuguese', g.termo_tecnico, q, %s),
+                   ts_headline('portuguese', g.explicacao_simples || ' ' || g.exemplo_uso, q, %s)
+            FROM core_glossariocultural g, to_tsquery('portuguese', f_unaccent(%s)) q
+            WHERE {self.DOCUMENTO} @@ q
+            ORDER BY ts_rank({self.DOCUMENTO}, q) DESC
+            LIMIT %s OFFSET %s
+        """
+        parametros = [self.OPCOES_DESTAQUE, self.OPCOES_DESTAQUE, self._consulta(palavras), limite, deslocamento]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, parametros)
+            return [_linha_para_item(linha) for linha in cursor.fetchall()]
+
+
+class _BuscaSimples:
+    """Fallback para outros bancos: sem índice, sem ranking."""
+
+    @staticmethod
+    def _queryset(palavras):
+        from .models import GlossarioCultural
+
+        filtro = Q()
+        for p in palavras:
+            filtro &= (
+                Q(termo_tecnico__icontains=p) | Q(explicacao_simples__icontains=p)
+                | Q(exemplo_uso__icontains=p) | Q(tags__icontains=p)
+            )
+        return GlossarioCultural.objects.filter(filtro).order_by('termo_tecnico')
+
+    def contar(self, palavras):
+        return self._queryset(palavras).count()
+
+    def buscar(self, palavras, limite, deslocamento):
+        return [
+            _linha_para_item((t.pk, t.termo_tecnico, t.tags, t.explicacao_simples, t.termo_tecnico, t.explicacao_simples))
+            for t in self._queryset(palavras)[deslocamento:deslocamento + limite]
+        ]
+
+
+def _linha_para_item(linha):
+    pk, termo, tags, explicacao, termo_destacado, trecho = linha
+    return {
+        'pk': pk,
+        'termo_tecnico': termo,
+        'tags': tags,
+        'explicacao_simples': explicacao,
+        'termo_html': destacar(termo_destacado),
+        'trecho_html': destacar(trecho),
+    }
+
+
+def _backend():
+    if connection.vendor == 'sqlite':
+        return _BuscaSQLite()
+    if connection.vendor == 'postgresql':
+        return _BuscaPostgres()
+    return _BuscaSimples()
+
+
+def buscar_glossario(consulta):
+    """Retorna: ResultadoBusca ordenado por relevância (use com Paginator)."""
+    return ResultadoBusca(consulta)
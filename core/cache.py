@@ -0,0 +1,287 @@
+# core/cache.py
+
+"""
+Cache das respostas da IA.
+Dois níveis: um LRU em memória (limitado por quantidade, com TTL) na frente do
+cache do Django (alias 'ia'), que é compartilhado entre todos os processos.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from .metricas import IA_CACHE
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar_entrada(texto):
+    """Colapsa espaços e normaliza acentos (NFC) para que colagens 'iguais' gerem a mesma chave."""
+    texto = unicodedata.normalize('NFC', texto or '')
+    return " ".join(texto.split())
+
+
+def versao_prompt(*partes):
+    """Hash curto do texto do prompt: editar o prompt invalida as respostas antigas automaticamente."""
+    return hashlib.sha256("\x1f".join(str(p) for p in partes).encode('utf-8')).hexdigest()[:16]
+
+
+class CacheIA:
+    def __init__(self, alias='ia', max_local=None, ttl=None):
+        self.alias = alias
+        self.max_local = settings.CACHE_IA_MAX_LOCAL if max_local is None else max_local
+        self.ttl = settings.CACHE_IA_TTL if ttl is None else ttl
+        self._local = OrderedDict()  # chave -> (expira_em, valor)
+        self._lock = threading.Lock()
+        self._em_andamento = {}  # chave -> Future da chamada que já está no ar neste processo
+        self._em_andamento_async = {}  # (event loop, chave) -> asyncio.Future, para as versões async
+
+    @property
+    def compartilhado(self):
+        return caches[self.alias]
+
+    def chave(self, operacao, entrada, modelo, temperatura, versao, extra=''):
+        bruto = json.dumps(
+            [operacao, normalizar_entrada(entrada), modelo, temperatura, versao, extra],
+            ensure_ascii=False,
+        )
+        return f"ia:{operacao}:{hashlib.sha256(bruto.encode('utf-8')).hexdigest()}"
+
+    def _obter_local(self, chave):
+        agora = time.monotonic()
+        with self._lock:
+            item = self._local.get(chave)
+            if item is not None:
+                if item[0] > agora:
+                    self._local.move_to_end(chave)  # Marca como usado recentemente (LRU)
+                    return item[1]
+                del self._local[chave]
+        return None
+
+    @staticmethod
+    def _contar(chave, valor):
+        # Chaves no formato ia:<operacao>:<hash>
+        IA_CACHE.incrementar(operacao=chave.split(':')[1], resultado='falta' if valor is None else 'acerto')
+        return valor
+
+    def obter(self, chave):
+        return self._contar(chave, self._ler(chave))
+
+    def _ler(self, chave):
+        valor = self._obter_local(chave)
+        if valor is not None:
+            return valor
+
+        try:
+            valor = self.compartilhado.get(chave)
+        except Exception as e:
+            # Cache fora do ar não pode derrubar a funcionalidade de IA
+            logger.warning("Cache IA indisponível: %s", e)
+            return None
+        if valor is not None:
+            self._guardar_local(chave, valor)
+        return valor
+
+    def definir(self, chave, valor):
+        self._guardar_local(chave, valor)
+        try:
+            self.compartilhado.set(chave, valor, self.ttl)
+        except Exception as e:
+            logger.warning("Cache IA indisponível: %s", e)
+
+    def obter_ou_calcular(self, chave, calcular):
+        """
+        Devolve o valor em cache ou executa `calcular()` uma única vez por chave (single-flight):
+        pedidos idênticos simultâneos, no mesmo processo ou em outros, esperam a mesma chamada.
+        Exceções de `calcular` são repassadas a todos os que esperavam e nada é guardado.
+        """
+        valor = self.obter(chave)
+        if valor is not None:
+            return valor
+
+        with self._lock:
+            futuro = self._em_andamento.get(chave)
+            lider = futuro is None
+            if lider:
+                futuro = self._em_andamento[chave] = Future()
+
+        if not lider:
+            return futuro.result()
+
+        try:
+            valor = self._calcular_entre_processos(chave, calcular)
+            futuro.set_result(valor)
+            return valor
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._em_andamento.pop(chave, None)
+
+    def _calcular_entre_processos(self, chave, calcular):
+        trava = f"{chave}:calculando"
+        espera = settings.CACHE_IA_ESPERA_MAXIMA
+        try:
+            dono = self.compartilhado.add(trava, 1, espera)
+        except Exception:
+            dono = True  # Sem cache compartilhado: cada processo calcula sozinho
+
+        if not dono:
+            # Outro processo já está chamando a IA com a mesma entrada: aguarda o resultado dele
+            limite = time.monotonic() + espera
+            while time.monotonic() < limite:
+                time.sleep(settings.CACHE_IA_INTERVALO_ESPERA)
+                valor = self._ler(chave)
+                if valor is not None:
+                    return valor
+                try:
+                    if self.compartilhado.get(trava) is None:
+                        break  # O outro processo falhou; calcula aqui mesmo
+                except Exception:
+                    break
+            valor = self._ler(chave)
+            if valor is not None:
+                return valor
+
+        try:
+            valor = calcular()
+            self.definir(chave, valor)
+            return valor
+        finally:
+            if dono:
+                try:
+                    self.compartilhado.delete(trava)
+                except Exception:
+                    pass
+
+    # --- Versões async (views ASGI): mesmo comportamento, sem bloquear o event loop ---
+
+    async def obter_async(self, chave):
+        return self._contar(chave, await self._ler_async(chave))
+
+    async def _ler_async(self, chave):
+        valor = self._obter_local(chave)
+        if valor is not None:
+            return valor
+        try:
+            valor = await self.compartilhado.aget(chave)
+        except Exception as e:
+            logger.warning("Cache IA indisponível: %s", e)
+            return None
+        if valor is not None:
+            self._guardar_local(chave, valor)
+        return valor
+
+    async def definir_async(self, chave, valor):
+        self._guardar_local(chave, valor)
+        try:
+            await self.compartilhado.aset(chave, valor, self.ttl)
+        except Exception as e:
+            logger.warning("Cache IA indisponível: %s", e)
+
+    async def obter_ou_calcular_async(self, chave, calcular):
+        """
+        Igual a obter_ou_calcular, mas `calcular` é uma função async.
+        Corrotinas do mesmo event loop com a mesma chave aguardam uma única chamada.
+        """
+        valor = await self.obter_async(chave)
+        if valor is not None:
+            return valor
+
+        id_andamento = (id(asyncio.get_running_loop()), chave)
+        futuro = self._em_andamento_async.get(id_andamento)
+        if futuro is not None:
+            # shield: se quem espera for cancelado, a chamada do líder continua para os demais
+            return await asyncio.shield(futuro)
+
+        futuro = self._em_andamento_async[id_andamento] = asyncio.get_running_loop().create_future()
+        try:
+            valor = await self._calcular_entre_processos_async(chave, calcular)
+            futuro.set_result(valor)
+            return valor
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except BaseException as e:
+            futuro.set_exception(e)
+            futuro.exception()  # Marca como lida: sem aviso de "exception was never retrieved"
+            raise
+        finally:
+            self._em_andamento_async.pop(id_andamento, None)
+
+    async def _calcular_entre_processos_async(self, chave, calcular):
+        trava = f"{chave}:calculando"
+        espera = settings.CACHE_IA_ESPERA_MAXIMA
+        try:
+            dono = await self.compartilhado.aadd(trava, 1, espera)
+        except Exception:
+            dono = True
+
+        if not dono:
+            limite = time.monotonic() + espera
+            while time.monotonic() < limite:
+                await asyncio.sleep(settings.CACHE_IA_INTERVALO_ESPERA)
+                valor = await self._ler_async(chave)
+                if valor is not None:
+                    return valor
+                try:
+                    if await self.compartilhado.aget(trava) is None:
+                        break
+                except Exception:
+                    break
+            valor = await self._ler_async(chave)
+            if valor is not None:
+                return valor
+
+        try:
+            valor = await calcular()
+            await self.definir_async(chave, valor)
+            return valor
+        finally:
+            if dono:
+                try:
+                    await self.compartilhado.adelete(trava)
+                except Exception:
+                    pass
+
+    def _guardar_local(self, chave, valor):
+        with self._lock:
+            self._local[chave] = (time.monotonic() + self.ttl, valor)
+            self._local.move_to_end(chave)
+            while len(self._local) > self.max_local:
+                self._local.popitem(last=False)  # Remove o menos usado
+
+    def limpar_local(self):
+        with self._lock:
+            self._local.clear()
+
+    # --- Versão do glossário (invalida o cache do Tradutor Cultural) ---
+    # Fica no banco (VersaoGlossario), não no cache: o incr do cache não é atômico e a chave pode ser expulsa
+
+    @staticmethod
+    def versao_glossario():
+        from .models import VersaoGlossario
+        return VersaoGlossario.atual()
+
+    async def versao_glossario_async(self):
+        return await sync_to_async(self.versao_glossario)()
+
+    @staticmethod
+    def nova_versao_glossario():
+        """Retorna: a nova versão."""
+        from .models import VersaoGlossario
+        return VersaoGlossario.nova()
+
+
+cache_ia = CacheIA()
@@ -0,0 +1,58 @@
+# core/campos.py
+
+import zlib
+
+from django.db import models
+
+
+class TextoComprimidoField(models.BinaryField):
+    """
+    Texto guardado comprimido (zlib) em uma coluna binária.
+    Para o código é um campo de texto comum: recebe e devolve str.
+    Transcrições e atas são muito repetitivas e encolhem de 5 a 10 vezes.
+    """
+    description = "Texto comprimido com zlib"
+
+    def __init__(self, *args, nivel=6, **kwargs):
+        self.nivel = nivel
+        kwargs.setdefault('default', '')
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.nivel != 6:
+            kwargs['nivel'] = self.nivel
+        return name, path, args, kwargs
+
+    def _check_str_default_value(self):
+        return []  # O valor padrão aqui é texto (''), não bytes
+
+    def from_db_value(self, value, expression, connection):
+        return self.to_python(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, str):
+            return value
+        dados = bytes(value)  # PostgreSQL devolve memoryview
+        if not dados:
+            return ''
+        try:
+            return zlib.decompress(dados).decode('utf-8')
+        except zlib.error:
+            # Valor antigo gravado sem compressão (ex: copiado direto de uma coluna de texto)
+            return dados.decode('utf-8', errors='replace')
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return zlib.compress(value.encode('utf-8'), self.nivel) if value else b''
+        return value
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if not prepared:
+            value = self.get_prep_value(value)
+        return super().get_db_prep_value(value, connection, prepared=True)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj) or ''
@@ -0,0 +1,438 @@
+# core/cliente_ia.py
+
+"""
+Acesso à OpenAI compartilhado por todo o IAService.
+- Um cliente síncrono e um async por processo, com pool de conexões HTTP (keep-alive) ajustado.
+  O async fica preso ao event loop do servidor ASGI e é fechado quando o loop termina; nos loops
+  de vida curta (async_to_sync no WSGI, runserver, testes) as chamadas async usam o síncrono numa thread.
+- Timeout por operação (settings.IA_TIMEOUTS): transcrição pode levar minutos, feedback não.
+- Retentativas com backoff exponencial + jitter, respeitando o Retry-After da API.
+- Disjuntor (circuit breaker): depois de várias falhas seguidas, falha na hora por um tempo
+  em vez de deixar cada requisição esperar o timeout.
+- Orçamento de tokens/requisições por minuto com faixas de prioridade (core/orcamento_ia.py).
+- Toda falha vira uma exceção tipada (ErroIA e subclasses), para quem chama decidir o que fazer.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import openai
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import metricas
+from .orcamento_ia import orcamento_ia
+
+try:
+    import httpx
+except ImportError:  # Versões mais novas do SDK da OpenAI usam o httpx2
+    import httpx2 as httpx
+
+logger = logging.getLogger(__name__)
+
+
+# --- Exceções ---
+
+class ErroIA(Exception):
+    """Base de todos os erros da camada de IA. `mensagem_usuario` pode ser exibida na tela."""
+    mensagem_usuario = "Não foi possível falar com a IA agora."
+
+    def __init__(self, mensagem, operacao=None):
+        super().__init__(mensagem)
+        self.operacao = operacao
+
+
+class ErroIATransitorio(ErroIA):
+    """Vale tentar de novo mais tarde (timeout, conexão, 429, 5xx)."""
+
+    def __init__(self, mensagem, operacao=None, tentar_novamente_em=None):
+        super().__init__(mensagem, operacao)
+        self.tentar_novamente_em = tentar_novamente_em  # segundos, quando a API informa (Retry-After)
+
+
+class LimiteTaxaIA(ErroIATransitorio):
+    mensagem_usuario = "A IA está com muita demanda. Tente novamente em instantes."
+
+
+class TempoEsgotadoIA(ErroIATransitorio):
+    mensagem_usuario = "A IA demorou demais para responder. Tente novamente."
+
+
+class IAIndisponivel(ErroIATransitorio):
+    """O disjuntor está aberto: nem tentamos chamar a API."""
+    mensagem_usuario = "A IA está temporariamente indisponível. Tente novamente em alguns segundos."
+
+
+class ErroIARequisicao(ErroIA):
+    """A API recusou o pedido (chave inválida, conteúdo rejeitado, arquivo inválido). Repetir não adianta."""
+    mensagem_usuario = "A IA recusou este pedido."
+
+
+def _retry_after(resposta):
+    """Lê o tempo de espera pedido pela API (retry-after-ms, retry-after em segundos ou data HTTP)."""
+    if resposta is None:
+        return None
+    cabecalhos = resposta.headers
+    try:
+        if cabecalhos.get('retry-after-ms'):
+            return float(cabecalhos['retry-after-ms']) / 1000
+        valor = cabecalhos.get('retry-after')
+        if not valor:
+            return None
+        try:
+            return float(valor)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def converter_erro(erro, operacao=None):
+    """Traduz exceções do SDK/rede para a hierarquia ErroIA."""
+    if isinstance(erro, ErroIA):
+        return erro
+    if isinstance(erro, openai.APITimeoutError):
+        return TempoEsgotadoIA(str(erro), operacao)
+    if isinstance(erro, openai.RateLimitError):
+        return LimiteTaxaIA(str(erro), operacao, _retry_after(erro.response))
+    if isinstance(erro, openai.APIStatusError):
+        if erro.status_code in (408, 409) or erro.status_code >= 500:
+            return ErroIATransitorio(str(erro), operacao, _retry_after(erro.response))
+        return ErroIARequisicao(str(erro), operacao)
+    if isinstance(erro, (openai.APIConnectionError, httpx.TransportError)):
+        return ErroIATransitorio(str(erro), operacao)
+    return ErroIA(f"{type(erro).__name__}: {erro}", operacao)
+
+
+# --- Disjuntor ---
+
+class Disjuntor:
+    """
+    Fechado: chamadas normais. Depois de `falhas_para_abrir` falhas transitórias seguidas, abre.
+    Aberto: toda chamada falha na hora (IAIndisponivel) durante `pausa` segundos.
+    Meio-aberto: passada a pausa, uma única chamada de teste decide se fecha ou reabre.
+    Estado por processo (cada worker/servidor observa a API por conta própria).
+    """
+    FECHADO, ABERTO, MEIO_ABERTO = 'fechado', 'aberto', 'meio-aberto'
+
+    def __init__(self, falhas_para_abrir=None, pausa=None):
+        self.falhas_para_abrir = falhas_para_abrir or settings.IA_DISJUNTOR_FALHAS
+        self.pausa = pausa or settings.IA_DISJUNTOR_PAUSA
+        self.estado = self.FECHADO
+        self.falhas = 0
+        self.aberto_em = 0.0
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+    def segundos_para_reabrir(self):
+        """Retorna: quanto falta para a próxima chamada de teste (0 se o disjuntor deixa passar)."""
+        with self._lock:
+            if self.estado != self.ABERTO:
+                return 0.0
+            return max(0.0, self.aberto_em + self.pausa - time.monotonic())
+
+    def antes_da_chamada(self, operacao=None):
+        with self._lock:
+            if self.estado == self.ABERTO:
+                restante = self.aberto_em + self.pausa - time.monotonic()
+                if restante > 0:
+                    raise IAIndisponivel("Disjuntor da IA aberto.", operacao, restante)
+                self.estado = self.MEIO_ABERTO
+                self._teste_em_andamento = False
+            if self.estado == self.MEIO_ABERTO:
+                if self._teste_em_andamento:
+                    raise IAIndisponivel("Disjuntor da IA em teste.", operacao, 1.0)
+                self._teste_em_andamento = True
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self.estado = self.FECHADO
+            self.falhas = 0
+            self._teste_em_andamento = False
+
+    def cancelar_teste(self):
+        with self._lock:
+            self._teste_em_andamento = False
+
+    def registrar_falha(self):
+        with self._lock:
+            self.falhas += 1
+            if self.estado == self.MEIO_ABERTO or self.falhas >= self.falhas_para_abrir:
+                if self.estado != self.ABERTO:
+                    logger.warning("Disjuntor da IA aberto por %ss após %s falha(s) seguida(s).", self.pausa, self.falhas)
+                self.estado = self.ABERTO
+                self.aberto_em = time.monotonic()
+            self._teste_em_andamento = False
+
+
+# --- Cliente ---
+
+_FIM = object()
+
+
+class _StreamEmThread:
+    """Stream do cliente síncrono lido como async: cada evento é esperado numa thread, fora do event loop."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._eventos = iter(stream)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        evento = await sync_to_async(next, thread_sensitive=False)(self._eventos, _FIM)
+        if evento is _FIM:
+            raise StopAsyncIteration
+        return evento
+
+    async def close(self):
+        await sync_to_async(self._stream.close, thread_sensitive=False)()
+
+
+class ClienteIA:
+    """
+    Uso:
+        resposta = cliente_ia.chamar('vies', lambda c: c.chat.completions.create(...), tokens=n)
+        resposta = await cliente_ia.chamar_async('vies', lambda c: c.chat.completions.create(...), tokens=n)
+    `c` já vem com o timeout da operação. As retentativas do SDK ficam desligadas: quem repete é esta camada.
+    `tokens` é a estimativa do prompt, reservada no orçamento antes da chamada.
+    """
+
+    def __init__(self):
+        self.disjuntor = Disjuntor()
+        self._sync = None
+        # As conexões do pool async só valem no loop em que foram abertas: o cliente async é um só,
+        # preso ao loop da thread principal (servidor ASGI), e `_guarda` o fecha quando esse loop termina
+        self._async = None
+        self._guarda = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _limites():
+        return httpx.Limits(
+            max_connections=settings.IA_MAX_CONEXOES,
+            max_keepalive_connections=settings.IA_MAX_CONEXOES_OCIOSAS,
+            keepalive_expiry=settings.IA_KEEPALIVE_SEGUNDOS,
+        )
+
+    @property
+    def sync(self):
+        with self._lock:
+            if self._sync is None:
+                self._sync = openai.OpenAI(
+                    api_key=settings.OPENAI_API_KEY,
+                    base_url=settings.OPENAI_BASE_URL,
+                    max_retries=0,
+                    http_client=openai.DefaultHttpxClient(limits=self._limites()),
+                )
+            return self._sync
+
+    async def cliente_async(self):
+        """
+        Retorna: o AsyncOpenAI do processo, ou None se o loop atual não é o do servidor ASGI
+        (quem chama usa então o cliente síncrono numa thread).
+        Só o loop da thread principal dura o processo inteiro; os outros são de uma requisição só
+        (async_to_sync) e abririam um pool de conexões novo a cada chamada.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return None
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._async is not None and self._async[0] is loop:
+                return self._async[1]
+            cliente = openai.AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL,
+                max_retries=0,
+                http_client=openai.DefaultAsyncHttpxClient(limits=self._limites()),
+            )
+            self._async = (loop, cliente)
+        # Um gerador async parado no yield: o loop chama aclose() nos geradores vivos ao terminar
+        # (shutdown_asyncgens: asyncio.run, uvicorn, asgiref), e o finally fecha o pool no próprio loop
+        self._guarda = self._fechar_com_o_loop(loop, cliente)
+        await anext(self._guarda)
+        return cliente
+
+    async def _fechar_com_o_loop(self, loop, cliente):
+        try:
+            yield
+        finally:
+            with self._lock:
+                if self._async == (loop, cliente):
+                    self._async = None
+            await cliente.close()
+
+    def reiniciar(self):
+        """Descarta os clientes (ex: depois de trocar OPENAI_BASE_URL) e fecha o disjuntor."""
+        with self._lock:
+            if self._sync is not None:
+                self._sync.close()
+            self._sync = None
+            # O async, se houver, é fechado no próprio loop quando a guarda for coletada ou o loop terminar
+            self._async = None
+            self._guarda = None
+        self.disjuntor = Disjuntor()
+
+    @staticmethod
+    def timeout(operacao):
+        segundos = settings.IA_TIMEOUTS.get(operacao, settings.IA_TIMEOUTS['padrao'])
+        return openai.Timeout(segundos, connect=settings.IA_TIMEOUT_CONEXAO)
+
+    @staticmethod
+    def espera(tentativa, erro):
+        """Backoff exponencial com jitter total; se a API pediu um tempo (Retry-After), usa o dela."""
+        if getattr(erro, 'tentar_novamente_em', None):
+            return min(erro.tentar_novamente_em, settings.IA_ESPERA_MAXIMA)
+        teto = min(settings.IA_ESPERA_MAXIMA, settings.IA_ESPERA_BASE * 2 ** (tentativa - 1))
+        return random.uniform(0, teto)
+
+    def _registrar_resultado(self, erro):
+        if isinstance(erro, ErroIATransitorio):
+            self.disjuntor.registrar_falha()
+        else:
+            # Erro do nosso pedido (4xx): a API respondeu, então está no ar
+            self.disjuntor.registrar_sucesso()
+
+    @staticmethod
+    def _sem_orcamento(operacao):
+        return LimiteTaxaIA("Orçamento de IA por minuto esgotado.", operacao)
+
+    @staticmethod
+    def _tokens_usados(resultado):
+        uso = getattr(resultado, 'usage', None)
+        return getattr(uso, 'total_tokens', None)
+
+    async def registrar_uso_async(self, operacao, reserva, uso, modelo=''):
+        """Para streams: o uso real (`usage`) só chega no último evento, depois que abrir_stream_async() já retornou."""
+        metricas.registrar_uso_ia(operacao, uso, modelo)
+        await orcamento_ia.registrar_uso_async(reserva, getattr(uso, 'total_tokens', None))
+
+    def chamar(self, operacao, funcao, tokens=0):
+        resultado, reserva = self.abrir_stream(operacao, funcao, tokens)
+        orcamento_ia.registrar_uso(reserva, self._tokens_usados(resultado))
+        return resultado
+
+    async def chamar_async(self, operacao, funcao, tokens=0):
+        resultado, reserva = await self.abrir_stream_async(operacao, funcao, tokens)
+        await orcamento_ia.registrar_uso_async(reserva, self._tokens_usados(resultado))
+        return resultado
+
+    def abrir_stream(self, operacao, funcao, tokens=0):
+        """
+        Como chamar(), para respostas em streaming, em que o uso real só chega no fim.
+        Retorna: (resultado, Reserva do orçamento); depois de ler o stream, passe a reserva para registrar_uso_async().
+        """
+        inicio = time.perf_counter()
+        try:
+            resultado, reserva = self._chamar(operacao, funcao, tokens)
+        except ErroIA as erro:
+            metricas.registrar_erro_ia(operacao, erro, time.perf_counter() - inicio)
+            raise
+        metricas.registrar_resposta_ia(operacao, resultado, time.perf_counter() - inicio)
+        return resultado, reserva
+
+    async def abrir_stream_async(self, operacao, funcao, tokens=0):
+        inicio = time.perf_counter()
+        try:
+            resultado, reserva = await self._chamar_async(operacao, funcao, tokens)
+        except ErroIA as erro:
+            metricas.registrar_erro_ia(operacao, erro, time.perf_counter() - inicio)
+            raise
+        metricas.registrar_resposta_ia(operacao, resultado, time.perf_counter() - inicio)
+        return resultado, reserva
+
+    def _reservar(self, operacao, tokens):
+        """
+        Reserva no orçamento uma tentativa. Cada retentativa é mais uma requisição à API e reserva
+        de novo: as que falharam também contam no limite da conta, justamente quando ele está apertado.
+        """
+        reserva = orcamento_ia.admitir(operacao, tokens)
+        if reserva is None:
+            raise self._sem_orcamento(operacao)
+        try:
+            self.disjuntor.antes_da_chamada(operacao)
+        except IAIndisponivel:
+            orcamento_ia.devolver(reserva)  # A requisição nem saiu
+            raise
+        return reserva
+
+    async def _reservar_async(self, operacao, tokens):
+        reserva = await orcamento_ia.admitir_async(operacao, tokens)
+        if reserva is None:
+            raise self._sem_orcamento(operacao)
+        try:
+            self.disjuntor.antes_da_chamada(operacao)
+        except IAIndisponivel:
+            await orcamento_ia.devolver_async(reserva)
+            raise
+        return reserva
+
+    def _chamar(self, operacao, funcao, tokens):
+        cliente = self.sync.with_options(timeout=self.timeout(operacao))
+        tentativas = settings.IA_TENTATIVAS
+        for tentativa in range(1, tentativas + 1):
+            reserva = self._reservar(operacao, tokens)
+            try:
+                resultado = funcao(cliente)
+            except Exception as e:
+                erro = converter_erro(e, operacao)
+                self._registrar_resultado(erro)
+                if not isinstance(erro, ErroIATransitorio) or tentativa == tentativas:
+                    raise erro from e
+                espera = self.espera(tentativa, erro)
+                metricas.IA_RETENTATIVAS.incrementar(operacao=operacao, tipo=type(erro).__name__)
+                logger.warning(
+                    "IA (%s) falhou na tentativa %s/%s: %s. Nova tentativa em %.1fs.",
+                    operacao, tentativa, tentativas, e, espera,
+                )
+                time.sleep(espera)
+                continue
+            self.disjuntor.registrar_sucesso()
+            return resultado, reserva
+
+    @staticmethod
+    def _em_thread(funcao):
+        """Adapta `funcao` (escrita para o cliente async) para rodar com o síncrono, numa thread."""
+        async def chamar(cliente):
+            resultado = await sync_to_async(funcao, thread_sensitive=False)(cliente)
+            return _StreamEmThread(resultado) if isinstance(resultado, openai.Stream) else resultado
+        return chamar
+
+    async def _chamar_async(self, operacao, funcao, tokens):
+        cliente = await self.cliente_async()
+        if cliente is None:
+            cliente = self.sync.with_options(timeout=self.timeout(operacao))
+            funcao = self._em_thread(funcao)
+        else:
+            cliente = cliente.with_options(timeout=self.timeout(operacao))
+        tentativas = settings.IA_TENTATIVAS
+        for tentativa in range(1, tentativas + 1):
+            reserva = await self._reservar_async(operacao, tokens)
+            try:
+                resultado = await funcao(cliente)
+            except asyncio.CancelledError:
+                self.disjuntor.cancelar_teste()  # Requisição abandonada não diz nada sobre a API
+                raise
+            except Exception as e:
+                erro = converter_erro(e, operacao)
+                self._registrar_resultado(erro)
+                if not isinstance(erro, ErroIATransitorio) or tentativa == tentativas:
+                    raise erro from e
+                espera = self.espera(tentativa, erro)
+                metricas.IA_RETENTATIVAS.incrementar(operacao=operacao, tipo=type(erro).__name__)
+                logger.warning(
+                    "IA (%s) falhou na tentativa %s/%s: %s. Nova tentativa em %.1fs.",
+                    operacao, tentativa, tentativas, e, espera,
+                )
+                await asyncio.sleep(espera)
+                continue
+            self.disjuntor.registrar_sucesso()
+            return resultado, reserva
+
+
+cliente_ia = ClienteIA()
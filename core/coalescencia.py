@@ -0,0 +1,108 @@
+# core/coalescencia.py
+
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import SequenciaSessao
+
+
+class CoalescedorSessao:
+    """
+    Garante no máximo uma análise de IA em andamento por sessão e por funcionalidade.
+    Cada requisição recebe um número de sequência; se outra mais nova da mesma sessão
+    chegar, a antiga é considerada 'superada' e deve ser descartada.
+    A sequência fica no banco (SequenciaSessao, incremento atômico) e a trava da análise
+    em andamento no cache compartilhado ('ia'), então funciona entre processos.
+
+    Uso (em views async: await CoalescedorSessao.criar_async(...) e os métodos *_async):
+        coalescedor = CoalescedorSessao(request, 'feedback')
+        if not coalescedor.aguardar_vez():
+            return HttpResponse(status=204)  # Já existe texto mais novo
+        try:
+            ...chamada à IA...
+        finally:
+            coalescedor.liberar()
+    """
+
+    def __init__(self, request, escopo, alias='ia'):
+        if not request.session.session_key:
+            request.session.create()
+        self._configurar(request.session.session_key, escopo, alias)
+        self.sequencia = self._registrar()
+
+    @classmethod
+    async def criar_async(cls, request, escopo, alias='ia'):
+        """Construtor para views async (sessão e cache sem bloquear o event loop)."""
+        if not request.session.session_key:
+            await request.session.acreate()
+        coalescedor = cls.__new__(cls)
+        coalescedor._configurar(request.session.session_key, escopo, alias)
+        coalescedor.sequencia = await coalescedor._registrar_async()
+        return coalescedor
+
+    def _configurar(self, session_key, escopo, alias):
+        base = f"coalescencia:{escopo}:{session_key}"
+        self.chave_sequencia = base
+        self.chave_ativa = f"{base}:ativa"
+        self.cache = caches[alias]
+        self.dono_da_vez = False
+
+    def _registrar(self):
+        return SequenciaSessao.proxima(self.chave_sequencia)
+
+    def superada(self):
+        """True se outra requisição mais nova da mesma sessão já chegou."""
+        return SequenciaSessao.atual(self.chave_sequencia) > self.sequencia
+
+    def aguardar_vez(self):
+        """
+        Espera a análise anterior da sessão terminar.
+        Retorna: True quando esta requisição pode chamar a IA, False se foi superada no caminho.
+        """
+        espera = settings.COALESCENCIA_ESPERA_MAXIMA
+        limite = time.monotonic() + espera
+        while True:
+            if self.superada():
+                return False
+            if self.cache.add(self.chave_ativa, self.sequencia, espera):
+                self.dono_da_vez = True
+                return True
+            if time.monotonic() >= limite:
+                # A análise anterior travou: segue mesmo assim (a trava expira sozinha)
+                return True
+            time.sleep(settings.COALESCENCIA_INTERVALO)
+
+    def liberar(self):
+        if self.dono_da_vez and self.cache.get(self.chave_ativa) == self.sequencia:
+            self.cache.delete(self.chave_ativa)
+        self.dono_da_vez = False
+
+    # --- Versões async ---
+
+    async def _registrar_async(self):
+        return await sync_to_async(SequenciaSessao.proxima)(self.chave_sequencia)
+
+    async def superada_async(self):
+        return await sync_to_async(SequenciaSessao.atual)(self.chave_sequencia) > self.sequencia
+
+    async def aguardar_vez_async(self):
+        espera = settings.COALESCENCIA_ESPERA_MAXIMA
+        limite = time.monotonic() + espera
+        while True:
+            if await self.superada_async():
+                return False
+            if await self.cache.aadd(self.chave_ativa, self.sequencia, espera):
+                self.dono_da_vez = True
+                return True
+            if time.monotonic() >= limite:
+                return True
+            await asyncio.sleep(settings.COALESCENCIA_INTERVALO)
+
+    async def liberar_async(self):
+        if self.dono_da_vez and await self.cache.aget(self.chave_ativa) == self.sequencia:
+            await self.cache.adelete(self.chave_ativa)
+        self.dono_da_vez = False
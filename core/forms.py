@@ -1,9 +1,12 @@
 # hakaton2025/core/forms.py
 
 from django import forms
-from .models import ReuniaoAcessivel, AnaliseFeedback
+from .models import ReuniaoAcessivel, AnaliseFeedback, UploadAudio
 
 class ReuniaoForm(forms.ModelForm):
+    # Preenchido pelo JS do upload em blocos: o áudio já está no servidor, o form só se liga a ele
+    upload_id = forms.UUIDField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = ReuniaoAcessivel
         fields = ['titulo', 'data_reuniao', 'arquivo_audio', 'participantes']
@@ -14,6 +17,25 @@ class ReuniaoForm(forms.ModelForm):
             'participantes': forms.SelectMultiple(attrs={'class': 'form-control'})
         }
 
+    def clean_upload_id(self):
+        upload_id = self.cleaned_data.get('upload_id')
+        if upload_id is None:
+            return None
+        upload = UploadAudio.objects.filter(pk=upload_id).first()
+        if upload is None or not upload.concluido:
+            raise forms.ValidationError("O envio do áudio não foi concluído. Tente novamente.")
+        return upload
+
+    def save(self, commit=True):
+        reuniao = super().save(commit=False)
+        upload = self.cleaned_data.get('upload_id')
+        if upload is not None:
+            reuniao.arquivo_audio.name = upload.arquivo
+        if commit:
+            reuniao.save()
+            self.save_m2m()
+        return reuniao
+
 class FeedbackForm(forms.ModelForm):
     class Meta:
         model = AnaliseFeedback
@@ -23,11 +45,10 @@ class FeedbackForm(forms.ModelForm):
                 'class': 'form-control', 
                 'rows': 4,
                 'placeholder': 'Digite o feedback aqui para análise de viés...',
-                # Atributos HTMX para "mágica" em tempo real:
-                'hx-post': '/checar-feedback/',  # Chama a URL de análise
-                'hx-trigger': 'keyup changed delay:1s',  # Espera 1s após parar de digitar
-                'hx-target': '#resultado-analise',  # Onde o resultado vai aparecer
-                'hx-swap': 'innerHTML'
+                # Streaming: o resultado vai aparecendo enquanto a IA escreve (ver script em base.html)
+                'data-stream-url': '/checar-feedback/stream/',
+                'data-stream-target': '#resultado-analise',  # Onde o resultado vai aparecer
+                'data-stream-delay': '1000',  # Espera 1s após parar de digitar
             })
         }
 
@@ -41,4 +62,10 @@ class TradutorForm(forms.Form):
             'rows': 5, 
             'placeholder': 'Ex: Prezado time, o budget para o Q3 sofreu um churn...'
         })
+    )
+    reescrever = forms.BooleanField(
+        required=False,
+        label="Reescrever em linguagem simples (usa a IA)",
+        help_text="Sem marcar, termos do glossário são explicados na hora, sem IA.",
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
     )
\ No newline at end of file
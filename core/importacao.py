@@ -0,0 +1,290 @@
+# core/importacao.py
+
+"""
+Importação em lote de gravações antigas (python manage.py importar_reunioes).
+A origem é uma pasta (varrida recursivamente) ou um manifesto CSV/JSON com
+arquivo, título, data e usernames dos participantes.
+1. Cada arquivo tem o SHA-256 calculado e é copiado para o storage por conteúdo (em paralelo).
+2. As reuniões novas são criadas com bulk_create, em lotes (participantes e contadores do dashboard juntos).
+3. O processamento (Whisper + ata) usa a fila de sempre (FilaReunioes), restrita às reuniões importadas.
+Retomada: uma reunião com o mesmo áudio (hash) já existe -> não é criada de novo; as que já estão
+CONCLUIDO não são reprocessadas. Rodar o mesmo comando de novo depois de uma queda continua de onde parou.
+"""
+
+import csv
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, time
+
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import EstatisticaReunioes, ReuniaoAcessivel, mes_da_data
+from .storage import armazenamento_audio, calcular_sha256
+from .upload_retomavel import PASTA_AUDIOS
+
+EXTENSOES_AUDIO = ('.mp3', '.wav', '.m4a', '.mp4', '.ogg', '.oga', '.webm', '.flac')
+# Colunas aceitas no manifesto (a primeira de cada tupla é a canônica)
+COLUNAS = {
+    'arquivo': ('arquivo', 'caminho', 'file', 'path'),
+    'titulo': ('titulo', 'título', 'title'),
+    'data': ('data', 'data_reuniao', 'date'),
+    'participantes': ('participantes', 'participants'),
+}
+_RE_DATA_NO_NOME = re.compile(r'(\d{4})[-_.]?(\d{2})[-_.]?(\d{2})')
+_RE_SEPARADOR_NOMES = re.compile(r'[;,|]')
+
+
+class ErroManifesto(Exception):
+    """Origem ilegível (formato desconhecido, coluna obrigatória ausente, data inválida)."""
+
+
+@dataclass
+class EntradaImportacao:
+    caminho: str
+    titulo: str
+    data: datetime
+    participantes: list = field(default_factory=list)  # usernames
+    sha256: str = ''
+    nome_storage: str = ''
+
+
+# --- Leitura da origem ---
+
+def _data(valor, caminho, referencia):
+    """Data do manifesto; sem ela, a do nome do arquivo (ex: 2024-03-15_daily.mp3) ou a de modificação."""
+    if valor:
+        valor = str(valor).strip()
+        # Só o dia primeiro: parse_datetime também aceita AAAA-MM-DD (e daria meia-noite)
+        try:
+            dia = parse_date(valor)
+            data = datetime.combine(dia, time(9, 0)) if dia else parse_datetime(valor)
+        except ValueError:  # Formato certo, data impossível (ex: mês 13)
+            data = None
+        if data is None:
+            raise ErroManifesto(f"{referencia}: data inválida '{valor}' (use AAAA-MM-DD ou AAAA-MM-DDTHH:MM).")
+    else:
+        encontrado = _RE_DATA_NO_NOME.search(os.path.basename(caminho))
+        try:
+            data = datetime(*map(int, encontrado.groups()), 9, 0) if encontrado else None
+        except ValueError:
+            data = None
+        if data is None:
+            data = datetime.fromtimestamp(os.path.getmtime(caminho))
+    return timezone.make_aware(data) if timezone.is_naive(data) else data
+
+
+def _titulo(caminho):
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    return re.sub(r'[_\-.]+', ' ', nome).strip()[:200] or nome[:200]
+
+
+def _nomes(valor):
+    if isinstance(valor, (list, tuple)):
+        return [str(nome).strip() for nome in valor if str(nome).strip()]
+    return [nome.strip() for nome in _RE_SEPARADOR_NOMES.split(valor or '') if nome.strip()]
+
+
+def _campo(linha, nome):
+    for coluna in COLUNAS[nome]:
+        if linha.get(coluna) not in (None, ''):
+            return linha[coluna]
+    return None
+
+
+def _entrada(linha, pasta_base, referencia):
+    arquivo = _campo(linha, 'arquivo')
+    if not arquivo:
+        raise ErroManifesto(f"{referencia}: informe o arquivo de áudio (coluna 'arquivo').")
+    caminho = os.path.normpath(os.path.join(pasta_base, os.path.expanduser(str(arquivo))))
+    if not os.path.isfile(caminho):
+        raise ErroManifesto(f"{referencia}: arquivo não encontrado: {caminho}")
+    return EntradaImportacao(
+        caminho=caminho,
+        titulo=str(_campo(linha, 'titulo') or _titulo(caminho))[:200],
+        data=_data(_campo(linha, 'data'), caminho, referencia),
+        participantes=_nomes(_campo(linha, 'participantes')),
+    )
+
+
+def ler_pasta(pasta, participantes=()):
+    """Todos os áudios da pasta e subpastas, em ordem de caminho; título e data saem do nome do arquivo."""
+    entradas = []
+    for raiz, subpastas, arquivos in os.walk(pasta):
+        subpastas.sort()
+        for nome in sorted(arquivos):
+            if os.path.splitext(nome)[1].lower() in EXTENSOES_AUDIO:
+                caminho = os.path.join(raiz, nome)
+                entradas.append(EntradaImportacao(caminho, _titulo(caminho), _data(None, caminho, caminho), list(participantes)))
+    return entradas
+
+
+def ler_manifesto(caminho):
+    """
+    CSV com cabeçalho (arquivo, titulo, data, participantes separados por ';') ou JSON
+    (lista de objetos com as mesmas chaves, ou {"reunioes": [...]}). Caminhos relativos
+    partem da pasta do manifesto.
+    """
+    pasta_base = os.path.dirname(os.path.abspath(caminho))
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == '.csv':
+        with open(caminho, newline='', encoding='utf-8-sig') as arquivo:
+            amostra = arquivo.read(4096)
+            arquivo.seek(0)
+            try:
+                dialeto = csv.Sniffer().sniff(amostra, delimiters=',;\t')
+            except csv.Error:
+                dialeto = csv.excel
+            linhas = [
+                ({chave.strip().lower(): (valor or '').strip() for chave, valor in linha.items() if chave is not None}, numero)
+                for numero, linha in enumerate(csv.DictReader(arquivo, dialect=dialeto), start=2)
+            ]
+    elif extensao == '.json':
+        with open(caminho, encoding='utf-8') as arquivo:
+            try:
+                dados = json.load(arquivo)
+            except ValueError as e:
+                raise ErroManifesto(f"{caminho}: JSON inválido ({e}).") from e
+        if isinstance(dados, dict):
+            dados = dados.get('reunioes', [])
+        if not isinstance(dados, list) or not all(isinstance(item, dict) for item in dados):
+            raise ErroManifesto(f"{caminho}: esperado uma lista de objetos (ou {{\"reunioes\": [...]}}).")
+        linhas = [({chave.lower(): valor for chave, valor in item.items()}, numero) for numero, item in enumerate(dados, start=1)]
+    else:
+        raise ErroManifesto(f"{caminho}: manifesto deve ser .csv ou .json.")
+    return [_entrada(linha, pasta_base, f"{os.path.basename(caminho)}:{numero}") for linha, numero in linhas]
+
+
+def ler_origem(origem, participantes=()):
+    if os.path.isdir(origem):
+        return ler_pasta(origem, participantes)
+    if os.path.isfile(origem):
+        entradas = ler_manifesto(origem)
+        for entrada in entradas:
+            entrada.participantes = entrada.participantes or list(participantes)
+        return entradas
+    raise ErroManifesto(f"{origem}: pasta ou manifesto não encontrado.")
+
+
+# --- Armazenamento e criação das reuniões ---
+
+def armazenar(entrada):
+    """Calcula o hash e copia o áudio para o storage (se os mesmos bytes já estão lá, não copia)."""
+    with open(entrada.caminho, 'rb') as arquivo:
+        conteudo = File(arquivo, os.path.basename(entrada.caminho))
+        conteudo.sha256 = calcular_sha256(conteudo)  # O storage usa este hash em vez de ler o arquivo de novo
+        entrada.sha256 = conteudo.sha256
+        entrada.nome_storage = armazenamento_audio.save(f"{PASTA_AUDIOS}/{conteudo.name}", conteudo)
+    return entrada
+
+
+def armazenar_todas(entradas, threads, ao_armazenar=None):
+    """
+    Armazena em paralelo (leitura de disco). Arquivos com problema ficam de fora.
+    `ao_armazenar(entrada, erro)` é chamado a cada arquivo (para o progresso).
+    Retorna: (entradas armazenadas, na ordem original; lista de (entrada, erro) das que falharam).
+    """
+    def tarefa(entrada):
+        try:
+            armazenar(entrada)
+            erro = None
+        except OSError as e:
+            erro = e
+        if ao_armazenar:
+            ao_armazenar(entrada, erro)
+        return entrada, erro
+
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+        resultados = list(executor.map(tarefa, entradas))
+    return (
+        [entrada for entrada, erro in resultados if erro is None],
+        [(entrada, erro) for entrada, erro in resultados if erro is not None],
+    )
+
+
+def criar_reunioes(entradas, lote=500):
+    """
+    Cria com bulk_create as reuniões cujo áudio ainda não existe no banco (o hash é a chave da retomada).
+    bulk_create não dispara os signals: participantes e contadores do dashboard são gravados aqui.
+    Participantes cujo username não existe são ignorados.
+    Retorna: (pks de todas as reuniões das entradas, novas e já existentes; quantas foram criadas;
+    usernames não encontrados).
+    """
+    usuarios = dict(User.objects.filter(
+        username__in={nome for entrada in entradas for nome in entrada.participantes}
+    ).values_list('username', 'pk'))
+    desconhecidos = sorted({nome for entrada in entradas for nome in entrada.participantes} - set(usuarios))
+
+    Participantes = ReuniaoAcessivel.participantes.through
+    pks, criadas = [], 0
+    for inicio in range(0, len(entradas), lote):
+        bloco = entradas[inicio:inicio + lote]
+        with transaction.atomic():
+            existentes = dict(
+                ReuniaoAcessivel.objects
+                .filter(hash_audio__in=[entrada.sha256 for entrada in bloco])
+                .order_by('pk')
+                .values_list('hash_audio', 'pk')
+            )
+            novas = []
+            for entrada in bloco:
+                if entrada.sha256 in existentes:
+                    continue
+                existentes[entrada.sha256] = None  # O mesmo áudio duas vezes na origem vira uma reunião só
+                novas.append((entrada, ReuniaoAcessivel(
+                    titulo=entrada.titulo,
+                    data_reuniao=entrada.data,
+                    arquivo_audio=entrada.nome_storage,
+                    hash_audio=entrada.sha256,
+                    status_ia='PENDENTE',
+                )))
+            ReuniaoAcessivel.objects.bulk_create([reuniao for _, reuniao in novas])
+            Participantes.objects.bulk_create([
+                Participantes(reuniaoacessivel_id=reuniao.pk, user_id=usuarios[nome])
+                for entrada, reuniao in novas
+                for nome in dict.fromkeys(entrada.participantes)
+                if nome in usuarios
+            ])
+            por_mes = {}
+            for _, reuniao in novas:
+                mes = mes_da_data(reuniao.data_reuniao)
+                por_mes[mes] = (reuniao.data_reuniao, por_mes.get(mes, (None, 0))[1] + 1)
+            for data, quantidade in por_mes.values():
+                EstatisticaReunioes.incrementar(data, 'PENDENTE', quantidade)
+        pks.extend(pk for pk in existentes.values() if pk is not None)
+        pks.extend(reuniao.pk for _, reuniao in novas)
+        criadas += len(novas)
+    return list(dict.fromkeys(pks)), criadas, desconhecidos
+
+
+def reabrir_erros(pks):
+    """Devolve para a fila as reuniões importadas que terminaram em 'ERRO' (com as tentativas zeradas)."""
+    reabertas = 0
+    for pk, data_reuniao in list(ReuniaoAcessivel.objects.filter(pk__in=pks, status_ia='ERRO').values_list('pk', 'data_reuniao')):
+        with transaction.atomic():
+            if ReuniaoAcessivel.objects.filter(pk=pk, status_ia='ERRO').update(
+                status_ia='PENDENTE', tentativas_processamento=0, mensagem_erro='', updated_at=timezone.now(),
+            ):
+                EstatisticaReunioes.registrar_transicao((data_reuniao, 'ERRO'), (data_reuniao, 'PENDENTE'))
+                reabertas += 1
+    return reabertas
+
+
+def situacao(pks):
+    """Retorna: {status_ia: quantidade} das reuniões importadas."""
+    contagem = {}
+    for inicio in range(0, len(pks), 500):
+        linhas = (
+            ReuniaoAcessivel.objects.filter(pk__in=pks[inicio:inicio + 500])
+            .values('status_ia').annotate(total=Count('pk')).values_list('status_ia', 'total')
+        )
+        for status, total in linhas:
+            contagem[status] = contagem.get(status, 0) + total
+    return contagem
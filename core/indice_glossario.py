@@ -0,0 +1,261 @@
+# core/indice_glossario.py
+
+"""
+Índice em memória do Glossário Cultural para achar, em um texto, quais termos aparecem.
+Autômato Aho-Corasick sobre os termos normalizados (sem acento e sem diferenciar
+maiúsculas): uma única passada pelo texto, não importa quantos milhares de termos existam.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+
+from .cache import cache_ia
+
+
+@dataclass(frozen=True)
+class EntradaGlossario:
+    pk: int
+    termo_tecnico: str
+    explicacao_simples: str
+
+
+@dataclass(frozen=True)
+class Ocorrencia:
+    inicio: int  # posições no texto ORIGINAL (texto[inicio:fim] é o termo como foi escrito)
+    fim: int
+    entrada: EntradaGlossario
+
+
+# Siglas (KPI, OKR, Q3, B2B) e palavras com grafia estrangeira (deadline, workshop, feedback)
+_RE_SIGLA = re.compile(r'\b(?=[A-Z0-9]*[A-Z])[A-Z][A-Z0-9]{1,5}\b')
+_RE_PALAVRA = re.compile(r'\b[^\W\d_]{3,}\b')
+_PADROES_ESTRANGEIROS = re.compile(r'[kwy]|sh|th|ck|oo|ee|ing$|ly$|(?<![aeiou])[bdgpt]$', re.IGNORECASE)
+
+
+def _normalizar_caractere(c):
+    sem_acento = "".join(x for x in unicodedata.normalize('NFD', c) if not unicodedata.combining(x))
+    return sem_acento.casefold()
+
+
+def normalizar(texto):
+    """
+    Remove acentos e caixa mantendo o mapa de posições.
+    Retorna: (texto normalizado, lista onde mapa[i] = posição no original do caractere normalizado i).
+    """
+    partes, mapa = [], []
+    for posicao, c in enumerate(texto):
+        normalizado = _normalizar_caractere(c)
+        partes.append(normalizado)
+        mapa.extend([posicao] * len(normalizado))
+    return "".join(partes), mapa
+
+
+class AutomatoAhoCorasick:
+    def __init__(self, padroes):
+        """`padroes`: dict {texto normalizado: valor}."""
+        self.transicoes = [{}]
+        self.falha = [0]
+        self.saidas = [[]]  # por nó: lista de (tamanho do padrão, valor)
+
+        for padrao, valor in padroes.items():
+            no = 0
+            for c in padrao:
+                proximo = self.transicoes[no].get(c)
+                if proximo is None:
+                    proximo = len(self.transicoes)
+                    self.transicoes[no][c] = proximo
+                    self.transicoes.append({})
+                    self.falha.append(0)
+                    self.saidas.append([])
+                no = proximo
+            self.saidas[no].append((len(padrao), valor))
+
+        # Links de falha em largura (BFS); cada nó herda as saídas do seu sufixo
+        fila = deque(self.transicoes[0].values())
+        while fila:
+            no = fila.popleft()
+            for c, filho in self.transicoes[no].items():
+                fila.append(filho)
+                f = self.falha[no]
+                while f and c not in self.transicoes[f]:
+                    f = self.falha[f]
+                self.falha[filho] = self.transicoes[f].get(c, 0)
+                self.saidas[filho] = self.saidas[filho] + self.saidas[self.falha[filho]]
+
+    def buscar(self, texto):
+        """Gera (início, fim, valor) de todas as ocorrências, inclusive sobrepostas."""
+        no = 0
+        for i, c in enumerate(texto):
+            while no and c not in self.transicoes[no]:
+                no = self.falha[no]
+            no = self.transicoes[no].get(c, 0)
+            for tamanho, valor in self.saidas[no]:
+                yield i - tamanho + 1, i + 1, valor
+
+
+# Termos incluídos desde a última montagem do autômato principal ficam num autômato pequeno à parte,
+# remontado a cada inclusão; passando deste número, tudo volta para o principal
+LIMITE_RECENTES = 256
+
+
+def _termo(entrada):
+    return normalizar(entrada.termo_tecnico.strip())[0]
+
+
+class IndiceGlossario:
+    """
+    Mantido pelos signals de GlossarioCultural (core/signals.py): cada alteração feita
+    neste processo é aplicada direto na memória. Se a versão compartilhada do glossário
+    mostrar alterações feitas por outro processo, o índice é recarregado do banco uma vez.
+    Os autômatos guardam só o termo normalizado; a entrada (com a explicação) vem de `_padroes`:
+    - termo novo: entra no autômato dos recentes, sem remontar o principal;
+    - só a explicação mudou: basta trocar a entrada em `_padroes`;
+    - remoção ou termo renomeado: o principal é remontado no próximo uso.
+    """
+
+    def __init__(self):
+        self._entradas = {}  # pk -> EntradaGlossario
+        self._padroes = {}  # termo normalizado -> EntradaGlossario
+        self._automato = None
+        self._recentes = set()  # termos normalizados fora do autômato principal
+        self._automato_recentes = None
+        self._versao = None
+        self._lock = threading.Lock()
+
+    def _recarregar(self, versao):
+        from .models import GlossarioCultural
+
+        self._entradas = {
+            pk: EntradaGlossario(pk, termo, explicacao)
+            for pk, termo, explicacao in GlossarioCultural.objects.values_list('pk', 'termo_tecnico', 'explicacao_simples')
+        }
+        self._automato = None
+        self._versao = versao
+
+    def _montar(self):
+        self._padroes = {}
+        for entrada in self._entradas.values():
+            termo = _termo(entrada)
+            if termo:
+                self._padroes[termo] = entrada
+        self._automato = AutomatoAhoCorasick({termo: termo for termo in self._padroes})
+        self._recentes = set()
+        self._automato_recentes = None
+
+    def _automatos_atuais(self):
+        """Retorna: (autômatos a percorrer, dict termo normalizado -> entrada)."""
+        versao = cache_ia.versao_glossario()
+        with self._lock:
+            if versao != self._versao:
+                self._recarregar(versao)
+            if self._automato is None or len(self._recentes) > LIMITE_RECENTES:
+                self._montar()
+            if self._recentes and self._automato_recentes is None:
+                self._automato_recentes = AutomatoAhoCorasick({termo: termo for termo in self._recentes})
+            automatos = [self._automato]
+            if self._recentes:
+                automatos.append(self._automato_recentes)
+            return automatos, self._padroes
+
+    def aplicar_alteracao(self, versao_nova, pk, entrada=None):
+        """
+        Chamado pelos signals depois do commit. `entrada=None` significa remoção.
+        Se a versão compartilhada pulou mais de um passo, outro processo também alterou
+        o glossário: nesse caso o próximo uso recarrega tudo do banco.
+        """
+        with self._lock:
+            if self._versao is None or versao_nova != self._versao + 1:
+                self._versao = None
+                return
+            self._versao = versao_nova
+            anterior = self._entradas.pop(pk, None)
+            if entrada is not None:
+                self._entradas[pk] = entrada
+            if self._automato is None:
+                return  # Ainda nem foi montado: o próximo uso monta com tudo
+            if entrada is None or (anterior is not None and _termo(anterior) != _termo(entrada)):
+                self._automato = None  # Um termo precisa sair do autômato: remonta sob demanda, só da memória
+                return
+            termo = _termo(entrada)
+            if not termo:
+                return
+            if termo not in self._padroes:
+                self._recentes.add(termo)
+                self._automato_recentes = None
+            self._padroes[termo] = entrada
+
+    def encontrar(self, texto):
+        """
+        Localiza os termos do glossário no texto (palavras inteiras, sem diferenciar acento/caixa).
+        Em sobreposições vence o termo que começa antes e, empatado, o mais longo.
+        Retorna: lista de Ocorrencia em ordem de posição.
+        """
+        automatos, padroes = self._automatos_atuais()
+        normalizado, mapa = normalizar(texto)
+
+        candidatas = []
+        for inicio, fim, termo in (ocorrencia for automato in automatos for ocorrencia in automato.buscar(normalizado)):
+            entrada = padroes[termo]
+            antes = normalizado[inicio - 1] if inicio > 0 else ' '
+            depois = normalizado[fim] if fim < len(normalizado) else ' '
+            if antes.isalnum() or depois.isalnum():
+                continue  # 'TI' não deve casar dentro de 'aTIvo'
+            candidatas.append((inicio, -fim, entrada))
+
+        ocorrencias, ultimo_fim = [], 0
+        for inicio, menos_fim, entrada in sorted(candidatas, key=lambda c: (c[0], c[1])):
+            fim = -menos_fim
+            if inicio < ultimo_fim:
+                continue
+            ocorrencias.append(Ocorrencia(mapa[inicio], mapa[fim - 1] + 1, entrada))
+            ultimo_fim = fim
+        return ocorrencias
+
+    def jargao_nao_coberto(self, texto, ocorrencias=None):
+        """
+        Heurística para decidir se o texto precisa da IA: procura siglas e palavras com
+        grafia estrangeira que NÃO estão no glossário. Nomes próprios podem gerar falso positivo,
+        o que só faz o texto ir para a IA (o caminho seguro).
+        Retorna: lista das palavras suspeitas fora do glossário.
+        """
+        if ocorrencias is None:
+            ocorrencias = self.encontrar(texto)
+        cobertos = [(o.inicio, o.fim) for o in ocorrencias]
+
+        def coberto(m):
+            return any(inicio <= m.start() and m.end() <= fim for inicio, fim in cobertos)
+
+        suspeitas = [m.group() for m in _RE_SIGLA.finditer(texto) if not coberto(m)]
+        suspeitas += [
+            m.group() for m in _RE_PALAVRA.finditer(texto)
+            if not coberto(m) and _PADROES_ESTRANGEIROS.search(m.group()) and not m.group().isupper()
+        ]
+        return suspeitas
+
+    def anotar(self, texto, ocorrencias=None):
+        """
+        Anotação determinística no formato do Tradutor Cultural: Termo (**explicação**).
+        Retorna: o texto com a explicação inserida logo após cada termo do glossário.
+        """
+        if ocorrencias is None:
+            ocorrencias = self.encontrar(texto)
+        partes, cursor = [], 0
+        for o in ocorrencias:
+            partes.append(texto[cursor:o.fim])
+            partes.append(f" (**{o.entrada.explicacao_simples.strip()}**)")
+            cursor = o.fim
+        partes.append(texto[cursor:])
+        return "".join(partes)
+
+    def termos_presentes(self, texto):
+        """Retorna: entradas do glossário que aparecem no texto (sem repetição, na ordem em que aparecem)."""
+        vistas = {}
+        for ocorrencia in self.encontrar(texto):
+            vistas.setdefault(ocorrencia.entrada.pk, ocorrencia.entrada)
+        return list(vistas.values())
+
+
+indice_glossario = IndiceGlossario()
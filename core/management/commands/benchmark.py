@@ -0,0 +1,160 @@
+# core/management/commands/benchmark.py
+
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from core import benchmark
+from core.cliente_ia import cliente_ia
+from core.models import GlossarioCultural
+from core.openai_falso import ConfiguracaoFalsa, ServidorOpenAIFalso
+
+# Escalas: a completa é a de produção esperada; a de CI roda em poucos minutos e é a que vai para a baseline
+ESCALAS = {
+    'completa': {'reunioes': 100_000, 'termos': 50_000, 'usuarios': 500, 'horas_audio': 3.0,
+                 'requisicoes': 1000, 'concorrencia': 16, 'repeticoes': 1},
+    'ci': {'reunioes': 5_000, 'termos': 5_000, 'usuarios': 50, 'horas_audio': 0.25,
+           'requisicoes': 200, 'concorrencia': 4, 'repeticoes': 3},
+}
+CENARIOS = ('dashboard', 'glossario_busca', 'glossario_traducao', 'feedback', 'upload')
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de carga com a OpenAI simulada por um servidor local: dashboard, glossário, "
+        "checagem de feedback e o pipeline de upload de uma gravação longa, em um banco de teste separado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ci', action='store_true', help="Escala reduzida, para rodar a cada commit.")
+        parser.add_argument('--reunioes', type=int, help="Reuniões no banco de teste.")
+        parser.add_argument('--termos', type=int, help="Termos no glossário.")
+        parser.add_argument('--usuarios', type=int, help="Colaboradores (participantes das reuniões).")
+        parser.add_argument('--horas-audio', type=float, help="Duração da gravação do cenário de upload.")
+        parser.add_argument('--requisicoes', type=int, help="Requisições por cenário.")
+        parser.add_argument('--concorrencia', type=int, help="Requisições simultâneas (threads).")
+        parser.add_argument('--repeticoes', type=int,
+                            help="Execuções de cada cenário de carga; o relatório traz a mediana (o upload roda uma vez).")
+        parser.add_argument('--cenarios', default=','.join(CENARIOS), help=f"Separados por vírgula: {', '.join(CENARIOS)}.")
+        parser.add_argument('--latencia-chat', type=float, default=0.3, help="Segundos por resposta do chat simulado.")
+        parser.add_argument('--latencia-transcricao', type=float, default=1.0,
+                            help="Segundos por minuto de áudio na transcrição simulada.")
+        parser.add_argument('--taxa-erros', type=float, default=0.0, help="Fração das chamadas à IA que falham (429/5xx).")
+        parser.add_argument('--com-orcamento', action='store_true',
+                            help="Mantém o orçamento de tokens/minuto da IA (por padrão ele é desligado para medir a aplicação).")
+        parser.add_argument('--banco', help="Arquivo SQLite do banco de teste; reaproveitado (e completado) entre execuções.")
+        parser.add_argument('--saida', help="Grava o relatório completo em JSON neste arquivo.")
+        parser.add_argument('--salvar-baseline', metavar='ARQUIVO', help="Grava o resultado como nova baseline.")
+        parser.add_argument('--baseline', metavar='ARQUIVO', help="Compara com esta baseline e falha se houver regressão.")
+        parser.add_argument('--tolerancia', type=float, default=0.3, help="Piora aceita em relação à baseline (0.3 = 30%%).")
+
+    def handle(self, *args, **options):
+        escala = dict(ESCALAS['ci' if options['ci'] else 'completa'])
+        for chave in escala:
+            if options.get(chave) is not None:
+                escala[chave] = options[chave]
+        cenarios = [nome.strip() for nome in options['cenarios'].split(',') if nome.strip()]
+        desconhecidos = set(cenarios) - set(CENARIOS)
+        if desconhecidos:
+            raise CommandError(f"Cenários desconhecidos: {', '.join(sorted(desconhecidos))}.")
+        configuracao = ConfiguracaoFalsa(
+            latencia_chat=options['latencia_chat'],
+            latencia_transcricao=options['latencia_transcricao'],
+            taxa_erros=options['taxa_erros'],
+            semente=0,
+        )
+        relatorio = {'escala': escala, 'openai_falso': {
+            'latencia_chat': configuracao.latencia_chat,
+            'latencia_transcricao': configuracao.latencia_transcricao,
+            'taxa_erros': configuracao.taxa_erros,
+        }, 'cenarios': {}}
+
+        baseline = benchmark.ler_baseline(options['baseline']) if options['baseline'] else None
+        if baseline is not None and (baseline.get('escala'), baseline.get('openai_falso')) != (
+            relatorio['escala'], relatorio['openai_falso']
+        ):
+            raise CommandError("A baseline foi gerada com outra escala ou outra latência simulada; use os mesmos parâmetros.")
+
+        # Nunca no banco de verdade: um banco de teste (em arquivo, para as threads compartilharem)
+        pasta = tempfile.mkdtemp(prefix='benchmark-')
+        banco = options['banco'] or os.path.join(pasta, 'benchmark.sqlite3')
+        manter_banco = bool(options['banco'])
+        if connection.vendor == 'sqlite':
+            settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = banco
+        nome_original = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=manter_banco)
+
+        ajustes = {
+            'MEDIA_ROOT': os.path.join(pasta, 'media'),
+            'ALLOWED_HOSTS': ['testserver'],
+            'DEBUG': False,
+        }
+        if not options['com_orcamento']:
+            ajustes['IA_LIMITE_TOKENS_POR_MINUTO'] = 0
+        try:
+            with ServidorOpenAIFalso(configuracao) as servidor, override_settings(OPENAI_BASE_URL=servidor.url, **ajustes):
+                cliente_ia.reiniciar()
+                self._executar(escala, cenarios, pasta, relatorio)
+        finally:
+            cliente_ia.reiniciar()
+            connection.creation.destroy_test_db(nome_original, verbosity=0, keepdb=manter_banco)
+            shutil.rmtree(pasta, ignore_errors=True)
+
+        self._imprimir(relatorio)
+        if options['saida']:
+            benchmark.salvar_baseline(options['saida'], relatorio)
+        if options['salvar_baseline']:
+            benchmark.salvar_baseline(options['salvar_baseline'], relatorio)
+            self.stdout.write(self.style.SUCCESS(f"Baseline gravada em {options['salvar_baseline']}."))
+        if baseline is not None:
+            regressoes = benchmark.comparar(relatorio, baseline, options['tolerancia'])
+            if regressoes:
+                raise CommandError("Regressão em relação à baseline:\n  " + "\n  ".join(regressoes))
+            self.stdout.write(self.style.SUCCESS("Sem regressões em relação à baseline."))
+
+    def _executar(self, escala, cenarios, pasta, relatorio):
+        self.stdout.write("Populando o banco de teste...")
+        usuarios = benchmark.popular_usuarios(escala['usuarios'])
+        criadas = benchmark.popular_reunioes(escala['reunioes'], usuarios)
+        criados = benchmark.popular_glossario(escala['termos'])
+        self.stdout.write(f"  {criadas} reuniões e {criados} termos novos.")
+        termos = list(GlossarioCultural.objects.values_list('termo_tecnico', flat=True))
+        total, concorrencia = escala['requisicoes'], escala['concorrencia']
+
+        cargas = {
+            'dashboard': lambda: benchmark.cenario_dashboard(total, concorrencia),
+            'glossario_busca': lambda: benchmark.cenario_glossario_busca(total, concorrencia, termos),
+            'glossario_traducao': lambda: benchmark.cenario_glossario_traducao(total, concorrencia, termos),
+            'feedback': lambda: benchmark.cenario_feedback(total, concorrencia),
+        }
+        for nome in cenarios:
+            self.stdout.write(f"Cenário {nome}...")
+            if nome in cargas:
+                resultado = benchmark.Resultado.mediana([cargas[nome]() for _ in range(max(1, escala['repeticoes']))])
+            else:
+                # Uma vez só: repetir o mesmo áudio reaproveitaria a transcrição (mesmo hash)
+                caminho = benchmark.gerar_wav(os.path.join(pasta, 'gravacao.wav'), escala['horas_audio'] * 3600)
+                try:
+                    resultado = benchmark.cenario_upload(caminho, usuarios)
+                finally:
+                    os.remove(caminho)
+            relatorio['cenarios'][nome] = resultado.como_dict()
+
+    def _imprimir(self, relatorio):
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'cenário':<20}{'req':>6}{'erros':>7}{'erros IA':>10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+            f"{'p99 ms':>9}{'consultas':>11}{'RSS MB':>9}"
+        )
+        for nome, r in relatorio['cenarios'].items():
+            self.stdout.write(
+                f"{nome:<20}{r['requisicoes']:>6}{r['erros']:>7}{r['erros_ia']:>10}{r['vazao']:>9}{r['p50_ms']:>9}"
+                f"{r['p95_ms']:>9}{r['p99_ms']:>9}{r['consultas_media']:>6}/{r['consultas_max']:<4}{r['rss_pico_mb']:>9}"
+            )
+            if r['extras']:
+                self.stdout.write(f"  {json.dumps(r['extras'], ensure_ascii=False)}")
@@ -0,0 +1,168 @@
+# core/management/commands/importar_reunioes.py
+
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import importacao
+from core.tasks import FilaReunioes, usar_transacoes_imediatas
+
+
+def _duracao(segundos):
+    minutos, segundos = divmod(int(segundos), 60)
+    horas, minutos = divmod(minutos, 60)
+    return f"{horas}h{minutos:02d}min" if horas else f"{minutos}min{segundos:02d}s"
+
+
+class Relatorio:
+    """Escreve uma linha de progresso a cada `intervalo` segundos, numa thread, até ser encerrado."""
+
+    def __init__(self, escrever, linha, intervalo):
+        self._escrever = escrever
+        self._linha = linha
+        self._intervalo = intervalo
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, daemon=True, name='progresso-importacao')
+
+    def _executar(self):
+        try:
+            while not self._parar.wait(self._intervalo):
+                self._escrever(self._linha())
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+        self._escrever(self._linha())
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa gravações antigas em lote: uma pasta de áudios ou um manifesto CSV/JSON "
+        "(arquivo, titulo, data, participantes). Cria as reuniões e processa com a IA; "
+        "rodar de novo continua de onde parou, sem repetir o que já foi concluído."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('origem', help="Pasta com os áudios (varrida recursivamente) ou manifesto .csv/.json.")
+        parser.add_argument('--participantes', default='',
+                            help="Usernames separados por vírgula, usados quando a entrada não traz participantes.")
+        parser.add_argument('--threads', type=int, default=2, help="Reuniões processadas pela IA em paralelo.")
+        parser.add_argument('--threads-copia', type=int, default=4, help="Arquivos lidos/copiados em paralelo.")
+        parser.add_argument('--lote', type=int, default=500, help="Reuniões por bulk_create.")
+        parser.add_argument('--sem-processar', action='store_true',
+                            help="Só cria as reuniões (PENDENTE); o processamento fica com os workers (processar_reunioes).")
+        parser.add_argument('--liberar-travadas', action='store_true',
+                            help="Devolve à fila as reuniões importadas presas em 'Processando' (importação anterior "
+                                 "interrompida). Use só se nenhum worker estiver com elas.")
+        parser.add_argument('--reprocessar-erros', action='store_true',
+                            help="Devolve à fila as reuniões importadas que terminaram com erro.")
+        parser.add_argument('--intervalo-progresso', type=float, default=5, help="Segundos entre as linhas de progresso.")
+
+    def handle(self, *args, **options):
+        usar_transacoes_imediatas()
+        participantes = [nome.strip() for nome in options['participantes'].split(',') if nome.strip()]
+        try:
+            entradas = importacao.ler_origem(options['origem'], participantes)
+        except importacao.ErroManifesto as e:
+            raise CommandError(str(e))
+        if not entradas:
+            self.stdout.write(self.style.WARNING("Nenhum arquivo de áudio encontrado."))
+            return
+        self.stdout.write(f"{len(entradas)} gravação(ões) na origem.")
+
+        armazenadas, falhas = self._armazenar(entradas, options)
+        for entrada, erro in falhas:
+            self._avisar(f"Não foi possível ler {entrada.caminho}: {erro}")
+
+        pks, criadas, desconhecidos = importacao.criar_reunioes(armazenadas, max(1, options['lote']))
+        if desconhecidos:
+            self._avisar(f"Usuários não encontrados (ignorados): {', '.join(desconhecidos)}")
+        self.stdout.write(f"{criadas} reunião(ões) criada(s); {len(pks) - criadas} já existiam (mesmo áudio).")
+
+        if options['reprocessar_erros']:
+            self.stdout.write(f"{importacao.reabrir_erros(pks)} reunião(ões) com erro de volta à fila.")
+        if options['liberar_travadas']:
+            self.stdout.write(f"{FilaReunioes.liberar_travadas(pks=pks, timeout=0)} reunião(ões) travada(s) de volta à fila.")
+
+        if not options['sem_processar']:
+            self._processar(pks, options)
+
+        contagem = importacao.situacao(pks)
+        resumo = ", ".join(f"{status}: {total}" for status, total in sorted(contagem.items()))
+        self.stdout.write(self.style.SUCCESS(f"Importação: {resumo}."))
+        if contagem.get('ERRO'):
+            self.stdout.write(self.style.WARNING("Para tentar de novo as que falharam: --reprocessar-erros."))
+
+    def _avisar(self, mensagem):
+        self.stderr.write(mensagem, style_func=self.style.WARNING)
+
+    def _armazenar(self, entradas, options):
+        total = len(entradas)
+        feitos = {'arquivos': 0, 'bytes': 0, 'erros': 0}
+        trava = threading.Lock()
+        inicio = time.monotonic()
+
+        def ao_armazenar(entrada, erro):
+            with trava:
+                feitos['arquivos'] += 1
+                feitos['erros'] += erro is not None
+                if erro is None:
+                    feitos['bytes'] += os.path.getsize(entrada.caminho)
+
+        def linha():
+            decorrido = max(time.monotonic() - inicio, 1e-6)
+            return (
+                f"[cópia] {feitos['arquivos']}/{total} arquivos, {feitos['bytes'] / 1e6:.0f} MB "
+                f"({feitos['bytes'] / 1e6 / decorrido:.1f} MB/s), {feitos['erros']} com erro"
+            )
+
+        with Relatorio(self.stdout.write, linha, options['intervalo_progresso']):
+            return importacao.armazenar_todas(entradas, options['threads_copia'], ao_armazenar)
+
+    def _processar(self, pks, options):
+        parar = threading.Event()
+
+        def encerrar(signum, frame):
+            self.stdout.write("Encerrando após terminar as reuniões em andamento (rode de novo para continuar)...")
+            parar.set()
+
+        signal.signal(signal.SIGINT, encerrar)
+        signal.signal(signal.SIGTERM, encerrar)
+
+        inicio = time.monotonic()
+        finalizadas_no_inicio = sum(importacao.situacao(pks).get(status, 0) for status in ('CONCLUIDO', 'ERRO'))
+
+        def linha():
+            contagem = importacao.situacao(pks)
+            concluidas, erros = contagem.get('CONCLUIDO', 0), contagem.get('ERRO', 0)
+            pendentes = contagem.get('PENDENTE', 0) + contagem.get('PROCESSANDO', 0)
+            texto = (
+                f"[processamento] {concluidas + erros}/{len(pks)} finalizadas ({erros} com erro), "
+                f"{contagem.get('PROCESSANDO', 0)} em andamento, decorrido {_duracao(time.monotonic() - inicio)}"
+            )
+            novas = concluidas + erros - finalizadas_no_inicio
+            if novas and pendentes:
+                restante = (time.monotonic() - inicio) / novas * pendentes
+                texto += f", faltam ~{_duracao(restante)}"
+            return texto
+
+        threads = max(1, options['threads'])
+        with Relatorio(self.stdout.write, linha, options['intervalo_progresso']):
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                futuros = [
+                    executor.submit(FilaReunioes.executar_worker, parar=parar, pks=pks)
+                    for _ in range(threads)
+                ]
+                for futuro in futuros:
+                    futuro.result()
@@ -0,0 +1,88 @@
+# core/management/commands/limpar_audios_orfaos.py
+
+import os
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import ReuniaoAcessivel, UploadAudio
+from core.storage import armazenamento_audio
+
+PASTA_AUDIOS = 'reunioes/audio'
+
+
+class Command(BaseCommand):
+    help = "Remove arquivos de áudio que nenhuma ReuniaoAcessivel referencia mais (coleta de lixo)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Apenas lista o que seria removido.")
+        parser.add_argument(
+            '--idade-minima', type=int, default=60,
+            help="Ignora arquivos modificados há menos de N minutos (uploads ainda sendo salvos).",
+        )
+        parser.add_argument(
+            '--horas-uploads', type=int, default=24,
+            help="Descarta uploads em blocos sem atividade há mais de N horas (nunca ligados a uma reunião).",
+        )
+
+    def handle(self, *args, **options):
+        raiz = armazenamento_audio.path(PASTA_AUDIOS)
+        if not os.path.isdir(raiz):
+            self.stdout.write("Nenhum áudio armazenado.")
+            return
+
+        limite_uploads = timezone.now() - timedelta(hours=options['horas_uploads'])
+        if not options['dry_run']:
+            # Os arquivos deles viram órfãos e saem no laço abaixo
+            UploadAudio.objects.filter(updated_at__lt=limite_uploads).delete()
+
+        referenciados = set(
+            ReuniaoAcessivel.objects.exclude(arquivo_audio='').exclude(arquivo_audio__isnull=True)
+            .values_list('arquivo_audio', flat=True)
+        )
+        # Uploads em andamento (arquivo parcial) ou concluídos esperando o formulário
+        for upload in UploadAudio.objects.filter(updated_at__gte=limite_uploads).only('id', 'arquivo'):
+            referenciados.add(upload.arquivo or upload.nome_parcial)
+        limite = time.time() - options['idade_minima'] * 60
+
+        removidos, bytes_liberados = 0, 0
+        for pasta, _, arquivos in os.walk(raiz, topdown=False):
+            for nome in arquivos:
+                caminho = os.path.join(pasta, nome)
+                relativo = os.path.relpath(caminho, armazenamento_audio.location).replace(os.sep, '/')
+                if relativo in referenciados or os.path.getmtime(caminho) > limite:
+                    continue
+
+                if self._em_uso(relativo, limite):
+                    # Ganhou uma referência depois da leitura de `referenciados`
+                    continue
+
+                tamanho = os.path.getsize(caminho)
+                self.stdout.write(f"{'[dry-run] ' if options['dry_run'] else ''}Removendo {relativo}")
+                if not options['dry_run']:
+                    armazenamento_audio.delete(relativo)
+                removidos += 1
+                bytes_liberados += tamanho
+
+            # Remove shards vazios (ab/cd/) deixados para trás
+            if not options['dry_run'] and pasta != raiz and not os.listdir(pasta):
+                os.rmdir(pasta)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{removidos} arquivo(s) órfão(s), {bytes_liberados / (1024 * 1024):.1f} MB liberados."
+        ))
+
+    @staticmethod
+    def _em_uso(relativo, limite):
+        """Confere de novo, logo antes de apagar: reunião/upload apontando para o arquivo ou mtime recente."""
+        try:
+            if os.path.getmtime(armazenamento_audio.path(relativo)) > limite:
+                return True
+        except FileNotFoundError:
+            return True
+        return (
+            ReuniaoAcessivel.objects.filter(arquivo_audio=relativo).exists()
+            or UploadAudio.objects.filter(arquivo=relativo).exists()
+        )
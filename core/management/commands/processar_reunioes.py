@@ -0,0 +1,48 @@
+# core/management/commands/processar_reunioes.py
+
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from core.metricas import servir_metricas
+from core.tasks import FilaReunioes, usar_transacoes_imediatas
+
+
+class Command(BaseCommand):
+    help = "Worker da fila de reuniões: transcreve e gera as atas em segundo plano."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=1, help="Reuniões processadas em paralelo neste processo.")
+        parser.add_argument('--intervalo', type=float, default=None, help="Segundos de espera quando a fila está vazia.")
+        parser.add_argument('--uma-vez', action='store_true', help="Esvazia a fila e encerra (útil em cron/CI).")
+        parser.add_argument('--metricas-porta', type=int, default=None,
+                            help="Expõe as métricas do worker (formato Prometheus) nesta porta HTTP.")
+
+    def handle(self, *args, **options):
+        parar = threading.Event()
+
+        def encerrar(signum, frame):
+            self.stdout.write("Encerrando após terminar as reuniões em andamento...")
+            parar.set()
+
+        signal.signal(signal.SIGINT, encerrar)
+        signal.signal(signal.SIGTERM, encerrar)
+
+        if options['metricas_porta']:
+            servir_metricas(options['metricas_porta'])
+            self.stdout.write(f"Métricas em http://0.0.0.0:{options['metricas_porta']}/metrics")
+
+        usar_transacoes_imediatas()
+        threads = max(1, options['threads'])
+        self.stdout.write(f"Worker iniciado com {threads} thread(s).")
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futuros = [
+                executor.submit(FilaReunioes.executar_worker, options['uma_vez'], options['intervalo'], parar)
+                for _ in range(threads)
+            ]
+            total = sum(f.result() for f in futuros)
+
+        self.stdout.write(self.style.SUCCESS(f"{total} reunião(ões) processada(s)."))
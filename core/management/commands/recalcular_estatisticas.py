@@ -0,0 +1,15 @@
+# core/management/commands/recalcular_estatisticas.py
+
+from django.core.management.base import BaseCommand
+
+from core.models import EstatisticaReunioes
+
+
+class Command(BaseCommand):
+    help = "Reconstrói os contadores do dashboard (EstatisticaReunioes) a partir das reuniões cadastradas."
+
+    def handle(self, *args, **options):
+        totais = EstatisticaReunioes.recalcular()
+        for (mes, status), total in sorted(totais.items()):
+            self.stdout.write(f"{mes:%m/%Y} {status}: {total}")
+        self.stdout.write(self.style.SUCCESS(f"{sum(totais.values())} reuniões contabilizadas."))
@@ -0,0 +1,16 @@
+# core/management/commands/recalcular_participacao.py
+
+from django.core.management.base import BaseCommand
+
+from core.models import ContribuicaoReuniao
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói a análise de participação (autoria, apropriações e presença por pessoa, semana e "
+        "departamento) a partir das reuniões concluídas. Use uma vez para as reuniões já existentes."
+    )
+
+    def handle(self, *args, **options):
+        total = ContribuicaoReuniao.recalcular()
+        self.stdout.write(self.style.SUCCESS(f"{total} reuniões concluídas contabilizadas."))
@@ -0,0 +1,256 @@
+# core/metricas.py
+
+"""
+Métricas da aplicação no formato de texto do Prometheus, sem dependência externa.
+- Contadores e histogramas com rótulos, em memória do processo (thread-safe).
+- O processo web expõe as suas em /metrics; o worker, com `processar_reunioes --metricas-porta N`.
+  Cada processo é um alvo do Prometheus (com vários processos web, raspe cada um).
+O que é medido:
+- etapas do pipeline (upload, pré-processamento, transcrição, ata, processamento da reunião);
+- cada chamada à OpenAI (latência, tokens de prompt/resposta do campo `usage`, custo estimado, erros por tipo);
+- acertos e faltas do cache da IA;
+- latência e número de consultas ao banco por view (core/middleware.py) e a renderização de cada template.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+TIPO_CONTEUDO = 'text/plain; version=0.0.4; charset=utf-8'
+BALDES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+BALDES_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _rotulos(nomes, valores, extra=()):
+    pares = [*zip(nomes, valores), *extra]
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + '}'
+
+
+class Registro:
+    def __init__(self):
+        self._metricas = []
+
+    def registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def exportar(self):
+        """Retorna: todas as métricas no formato de texto do Prometheus."""
+        linhas = []
+        for metrica in self._metricas:
+            linhas.append(f'# HELP {metrica.nome} {metrica.ajuda}')
+            linhas.append(f'# TYPE {metrica.nome} {metrica.tipo}')
+            linhas.extend(metrica.linhas())
+        return '\n'.join(linhas) + '\n'
+
+
+registro = Registro()
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nome, ajuda, rotulos=()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores = {}
+        self._lock = threading.Lock()
+        registro.registrar(self)
+
+    def _chave(self, rotulos):
+        return tuple(str(rotulos.get(nome, '')) for nome in self.rotulos)
+
+    def _copia(self):
+        with self._lock:
+            return sorted((chave, list(valor) if isinstance(valor, list) else valor) for chave, valor in self._valores.items())
+
+
+class Contador(_Metrica):
+    tipo = 'counter'
+
+    def incrementar(self, valor=1, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def valores(self):
+        """Retorna: {valores dos rótulos: total} (ex: para comparar antes/depois de um benchmark)."""
+        return dict(self._copia())
+
+    def linhas(self):
+        for chave, valor in self._copia():
+            yield f'{self.nome}{_rotulos(self.rotulos, chave)} {_numero(valor)}'
+
+
+class Histograma(_Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nome, ajuda, rotulos=(), baldes=BALDES_SEGUNDOS):
+        super().__init__(nome, ajuda, rotulos)
+        self.baldes = tuple(baldes)
+
+    def observar(self, valor, **rotulos):
+        chave = self._chave(rotulos)
+        with self._lock:
+            # [contagem por balde (não cumulativa)..., soma, total]
+            estado = self._valores.get(chave)
+            if estado is None:
+                estado = self._valores[chave] = [0] * len(self.baldes) + [0.0, 0]
+            for indice, limite in enumerate(self.baldes):
+                if valor <= limite:
+                    estado[indice] += 1
+                    break
+            estado[-2] += valor
+            estado[-1] += 1
+
+    @contextmanager
+    def medir(self, **rotulos):
+        """Observa a duração (segundos) do bloco `with`, mesmo se ele levantar exceção."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **rotulos)
+
+    def valores(self):
+        """Retorna: {valores dos rótulos: (soma, contagem)}."""
+        return {chave: (estado[-2], estado[-1]) for chave, estado in self._copia()}
+
+    def linhas(self):
+        for chave, estado in self._copia():
+            acumulado = 0
+            for limite, contagem in zip(self.baldes, estado):
+                acumulado += contagem
+                yield f'{self.nome}_bucket{_rotulos(self.rotulos, chave, [("le", _numero(limite))])} {acumulado}'
+            yield f'{self.nome}_bucket{_rotulos(self.rotulos, chave, [("le", "+Inf")])} {estado[-1]}'
+            yield f'{self.nome}_sum{_rotulos(self.rotulos, chave)} {_numero(estado[-2])}'
+            yield f'{self.nome}_count{_rotulos(self.rotulos, chave)} {estado[-1]}'
+
+
+# --- Métricas da aplicação ---
+
+ETAPA_SEGUNDOS = Histograma(
+    'etapa_duracao_segundos', 'Duração de cada etapa do processamento das reuniões.', ['etapa'],
+)
+UPLOAD_BYTES = Contador('upload_audio_bytes_total', 'Bytes de áudio recebidos pelo upload em blocos.')
+REUNIOES_PROCESSADAS = Contador(
+    'reunioes_processadas_total', 'Reuniões processadas pelo worker, por status final (PENDENTE = volta para a fila).', ['status'],
+)
+
+IA_SEGUNDOS = Histograma(
+    'ia_chamada_duracao_segundos', 'Duração das chamadas à OpenAI, com retentativas.', ['operacao', 'resultado'],
+)
+IA_TOKENS = Contador('ia_tokens_total', 'Tokens informados pela API (campo usage).', ['operacao', 'tipo'])
+IA_AUDIO_SEGUNDOS = Contador('ia_audio_segundos_total', 'Segundos de áudio enviados à transcrição.', ['operacao'])
+IA_CUSTO = Contador('ia_custo_dolares_total', 'Custo estimado das chamadas à OpenAI (US$, tabela IA_PRECOS).', ['operacao'])
+IA_ERROS = Contador('ia_erros_total', 'Chamadas à OpenAI que falharam, por tipo de erro.', ['operacao', 'tipo'])
+IA_RETENTATIVAS = Contador('ia_retentativas_total', 'Tentativas repetidas após falha transitória.', ['operacao', 'tipo'])
+IA_CACHE = Contador('ia_cache_total', 'Consultas ao cache da IA.', ['operacao', 'resultado'])
+
+HTTP_SEGUNDOS = Histograma(
+    'http_requisicao_duracao_segundos', 'Latência das requisições por view.', ['view', 'metodo', 'status'],
+)
+HTTP_CONSULTAS = Histograma(
+    'http_requisicao_consultas_banco', 'Consultas ao banco por requisição.', ['view'], baldes=BALDES_CONSULTAS,
+)
+TEMPLATE_SEGUNDOS = Histograma('template_renderizacao_segundos', 'Tempo de renderização de cada template.', ['template'])
+
+
+# --- Registro das respostas da OpenAI ---
+
+def _preco(modelo):
+    """Preço (US$ por 1M de tokens de entrada e de saída) do modelo; 'gpt-4o-mini-2024-07-18' usa o de 'gpt-4o-mini'."""
+    candidatos = [nome for nome in settings.IA_PRECOS if modelo.startswith(nome)]
+    return settings.IA_PRECOS[max(candidatos, key=len)] if candidatos else None
+
+
+def registrar_uso_ia(operacao, uso, modelo='', segundos_audio=None):
+    """Tokens e custo de uma resposta (também usado pelos streams, cujo `usage` chega no último evento)."""
+    custo = 0.0
+    if uso is not None:
+        entrada = getattr(uso, 'prompt_tokens', None) or getattr(uso, 'input_tokens', None) or 0
+        saida = getattr(uso, 'completion_tokens', None) or getattr(uso, 'output_tokens', None) or 0
+        IA_TOKENS.incrementar(entrada, operacao=operacao, tipo='prompt')
+        IA_TOKENS.incrementar(saida, operacao=operacao, tipo='resposta')
+        preco = _preco(modelo or '')
+        if preco:
+            custo += (entrada * preco[0] + saida * preco[1]) / 1_000_000
+    if segundos_audio:
+        IA_AUDIO_SEGUNDOS.incrementar(segundos_audio, operacao=operacao)
+        custo += segundos_audio / 60 * settings.IA_PRECO_TRANSCRICAO_MINUTO
+    if custo:
+        IA_CUSTO.incrementar(custo, operacao=operacao)
+
+
+def registrar_resposta_ia(operacao, resposta, segundos):
+    IA_SEGUNDOS.observar(segundos, operacao=operacao, resultado='ok')
+    # Streams ainda não têm `usage` aqui: o uso é registrado no fim do stream
+    registrar_uso_ia(
+        operacao,
+        getattr(resposta, 'usage', None),
+        getattr(resposta, 'model', None) or '',
+        getattr(resposta, 'duration', None),  # verbose_json do Whisper
+    )
+
+
+def registrar_erro_ia(operacao, erro, segundos):
+    IA_SEGUNDOS.observar(segundos, operacao=operacao, resultado='erro')
+    IA_ERROS.incrementar(operacao=operacao, tipo=type(erro).__name__)
+
+
+# --- Renderização de templates ---
+
+class TemplateMedido(Template):
+    def render(self, context=None, request=None):
+        with TEMPLATE_SEGUNDOS.medir(template=self.origin.template_name):
+            return super().render(context, request)
+
+
+class TemplatesMedidos(DjangoTemplates):
+    """Backend de templates do Django que mede o tempo de cada render (settings.TEMPLATES)."""
+
+    def from_string(self, template_code):
+        return TemplateMedido(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TemplateMedido(template.template, self)
+
+
+# --- Exposição fora do Django (worker) ---
+
+class _RespostaMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        corpo = registro.exportar().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', TIPO_CONTEUDO)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass  # Uma linha por raspagem do Prometheus só polui a saída do worker
+
+
+def servir_metricas(porta, endereco=''):
+    """Sobe um servidor HTTP em segundo plano que responde as métricas deste processo em qualquer caminho."""
+    servidor = ThreadingHTTPServer((endereco, porta), _RespostaMetricas)
+    threading.Thread(target=servidor.serve_forever, daemon=True, name='metricas').start()
+    return servidor
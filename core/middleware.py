@@ -0,0 +1,79 @@
+# core/middleware.py
+
+"""
+Mede cada requisição: latência e número de consultas ao banco por view (core/metricas.py).
+As consultas são contadas por um execute_wrapper instalado em cada conexão nova; o contador
+fica num ContextVar, então vale também para views async (sync_to_async leva o contexto junto).
+A resposta leva um cabeçalho Server-Timing, visível na aba Network do navegador.
+"""
+
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metricas import HTTP_CONSULTAS, HTTP_SEGUNDOS
+
+_consultas = ContextVar('consultas_requisicao', default=None)
+
+
+def _contar_consulta(execute, sql, params, many, context):
+    contador = _consultas.get()
+    if contador is not None:
+        contador[0] += 1
+    return execute(sql, params, many, context)
+
+
+def _instalar(conexao):
+    if _contar_consulta not in conexao.execute_wrappers:
+        conexao.execute_wrappers.append(_contar_consulta)
+
+
+@receiver(connection_created)
+def _instalar_contador(sender, connection, **kwargs):
+    _instalar(connection)
+
+
+class MetricasRequisicaoMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Conexões abertas antes deste módulo ser importado não passaram pelo connection_created
+        for conexao in connections.all(initialized_only=True):
+            _instalar(conexao)
+        contador = [0]
+        token, inicio = _consultas.set(contador), time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _consultas.reset(token)
+        return self._registrar(request, response, time.perf_counter() - inicio, contador[0])
+
+    async def __acall__(self, request):
+        contador = [0]
+        token, inicio = _consultas.set(contador), time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _consultas.reset(token)
+        return self._registrar(request, response, time.perf_counter() - inicio, contador[0])
+
+    @staticmethod
+    def _registrar(request, response, segundos, consultas):
+        rota = getattr(request, 'resolver_match', None)
+        view = rota.view_name if rota else 'nao_encontrada'
+        HTTP_SEGUNDOS.observar(segundos, view=view, metodo=request.method, status=response.status_code)
+        HTTP_CONSULTAS.observar(consultas, view=view)
+        response['Server-Timing'] = f'app;dur={segundos * 1000:.1f}, db;desc="{consultas} consultas"'
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reuniaoacessivel',
+            name='mensagem_erro',
+            field=models.TextField(blank=True, help_text='Último erro registrado pelo worker.'),
+        ),
+        migrations.AddField(
+            model_name='reuniaoacessivel',
+            name='processamento_iniciado_em',
+            field=models.DateTimeField(blank=True, help_text='Quando um worker reivindicou a reunião.', null=True),
+        ),
+        migrations.AddField(
+            model_name='reuniaoacessivel',
+            name='tentativas_processamento',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='reuniaoacessivel',
+            name='status_ia',
+            field=models.CharField(choices=[('PENDENTE', 'Pendente'), ('PROCESSANDO', 'Processando IA...'), ('CONCLUIDO', 'Concluído'), ('ERRO', 'Erro no Processamento')], db_index=True, default='PENDENTE', max_length=20),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:49
+
+import os
+
+import core.storage
+from django.db import migrations, models
+
+
+def mover_audios_para_hash(apps, schema_editor):
+    """
+    Copia os áudios legados (reunioes/audio/AAAA-MM-DD/) para o caminho por hash.
+    Os arquivos antigos ficam no disco até rodar: python manage.py limpar_audios_orfaos
+    """
+    ReuniaoAcessivel = apps.get_model('core', 'ReuniaoAcessivel')
+    armazenamento = core.storage.armazenamento_audio
+
+    for reuniao in ReuniaoAcessivel.objects.exclude(arquivo_audio='').exclude(arquivo_audio__isnull=True).iterator():
+        antigo = reuniao.arquivo_audio.name
+        if core.storage.ArmazenamentoPorConteudo.hash_do_caminho(antigo) or not armazenamento.exists(antigo):
+            continue
+        with armazenamento.open(antigo) as arquivo:
+            novo = armazenamento.save(f"reunioes/audio/{os.path.basename(antigo)}", arquivo)
+        ReuniaoAcessivel.objects.filter(pk=reuniao.pk).update(
+            arquivo_audio=novo,
+            hash_audio=core.storage.ArmazenamentoPorConteudo.hash_do_caminho(novo),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_fila_processamento_reunioes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reuniaoacessivel',
+            name='hash_audio',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 do áudio (deduplicação).', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='reuniaoacessivel',
+            name='arquivo_audio',
+            field=models.FileField(blank=True, null=True, storage=core.storage.ArmazenamentoPorConteudo(), upload_to='reunioes/audio/', verbose_name='Gravação (MP3/WAV)'),
+        ),
+        migrations.RunPython(mover_audios_para_hash, migrations.RunPython.noop),
+    ]
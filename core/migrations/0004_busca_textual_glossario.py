@@ -0,0 +1,85 @@
+"""
+Índice de busca textual do Glossário Cultural (ver core/busca_glossario.py).
+SQLite: tabela FTS5 com conteúdo externo + triggers que a mantêm sincronizada em
+qualquer INSERT/UPDATE/DELETE (inclusive bulk_create, update() e admin).
+PostgreSQL: extensão unaccent + índice GIN sobre a mesma expressão usada na consulta.
+"""
+
+from django.db import migrations
+
+COLUNAS = "termo_tecnico, explicacao_simples, exemplo_uso, tags"
+NOVAS = "new.termo_tecnico, new.explicacao_simples, new.exemplo_uso, new.tags"
+ANTIGAS = "old.termo_tecnico, old.explicacao_simples, old.exemplo_uso, old.tags"
+
+SQLITE_CRIAR = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS core_glossario_fts USING fts5(
+        {COLUNAS},
+        content='core_glossariocultural', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_glossario_fts_ai AFTER INSERT ON core_glossariocultural BEGIN
+        INSERT INTO core_glossario_fts(rowid, {COLUNAS}) VALUES (new.id, {NOVAS});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_glossario_fts_ad AFTER DELETE ON core_glossariocultural BEGIN
+        INSERT INTO core_glossario_fts(core_glossario_fts, rowid, {COLUNAS}) VALUES ('delete', old.id, {ANTIGAS});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_glossario_fts_au AFTER UPDATE ON core_glossariocultural BEGIN
+        INSERT INTO core_glossario_fts(core_glossario_fts, rowid, {COLUNAS}) VALUES ('delete', old.id, {ANTIGAS});
+        INSERT INTO core_glossario_fts(rowid, {COLUNAS}) VALUES (new.id, {NOVAS});
+    END""",
+    # Indexa os termos que já existiam antes da migração
+    "INSERT INTO core_glossario_fts(core_glossario_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REMOVER = [
+    "DROP TRIGGER IF EXISTS core_glossario_fts_ai",
+    "DROP TRIGGER IF EXISTS core_glossario_fts_ad",
+    "DROP TRIGGER IF EXISTS core_glossario_fts_au",
+    "DROP TABLE IF EXISTS core_glossario_fts",
+]
+
+POSTGRES_CRIAR = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() não é IMMUTABLE; o wrapper permite usá-la em índice
+    """CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS
+        $$ SELECT public.unaccent('public.unaccent', $1) $$
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT""",
+    # Mesma expressão de _BuscaPostgres.DOCUMENTO, para o planner usar o índice
+    """CREATE INDEX IF NOT EXISTS core_glossario_busca_gin ON core_glossariocultural USING gin ((
+        setweight(to_tsvector('portuguese', f_unaccent(termo_tecnico)), 'A') ||
+        setweight(to_tsvector('portuguese', f_unaccent(tags)), 'B') ||
+        setweight(to_tsvector('portuguese', f_unaccent(explicacao_simples)), 'C') ||
+        setweight(to_tsvector('portuguese', f_unaccent(exemplo_uso)), 'D')
+    ))""",
+]
+
+POSTGRES_REMOVER = [
+    "DROP INDEX IF EXISTS core_glossario_busca_gin",
+    "DROP FUNCTION IF EXISTS f_unaccent(text)",
+]
+
+
+def _executar(schema_editor, sqlite, postgres):
+    vendor = schema_editor.connection.vendor
+    comandos = sqlite if vendor == 'sqlite' else postgres if vendor == 'postgresql' else []
+    for sql in comandos:
+        schema_editor.execute(sql)
+
+
+def criar_indice(apps, schema_editor):
+    _executar(schema_editor, SQLITE_CRIAR, POSTGRES_CRIAR)
+
+
+def remover_indice(apps, schema_editor):
+    _executar(schema_editor, SQLITE_REMOVER, POSTGRES_REMOVER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_audio_enderecado_por_conteudo'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:04
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def popular_estatisticas(apps, schema_editor):
+    # Mesma regra de core.models.mes_da_data (modelos históricos não têm os métodos)
+    ReuniaoAcessivel = apps.get_model('core', 'ReuniaoAcessivel')
+    EstatisticaReunioes = apps.get_model('core', 'EstatisticaReunioes')
+    totais = {}
+    for data, status in ReuniaoAcessivel.objects.values_list('data_reuniao', 'status_ia').iterator():
+        if timezone.is_aware(data):
+            data = timezone.localtime(data)
+        chave = (data.date().replace(day=1), status)
+        totais[chave] = totais.get(chave, 0) + 1
+    EstatisticaReunioes.objects.bulk_create([
+        EstatisticaReunioes(mes=mes, status_ia=status, total=total) for (mes, status), total in totais.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_busca_textual_glossario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstatisticaReunioes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primeiro dia do mês da reunião.')),
+                ('status_ia', models.CharField(choices=[('PENDENTE', 'Pendente'), ('PROCESSANDO', 'Processando IA...'), ('CONCLUIDO', 'Concluído'), ('ERRO', 'Erro no Processamento')], max_length=20)),
+                ('total', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='reuniaoacessivel',
+            index=models.Index(fields=['-data_reuniao', '-id'], name='reuniao_data_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='estatisticareunioes',
+            constraint=models.UniqueConstraint(fields=('mes', 'status_ia'), name='estatistica_mes_status_unica'),
+        ),
+        migrations.RunPython(popular_estatisticas, migrations.RunPython.noop),
+    ]
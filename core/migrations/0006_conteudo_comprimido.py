@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:06
+
+import core.campos
+import django.db.models.deletion
+from django.db import migrations, models
+
+LOTE = 200  # Reuniões por lote: limita a memória (cada transcrição pode ter vários MB)
+
+
+def _lotes(queryset):
+    ultimo_pk = 0
+    while True:
+        lote = list(queryset.filter(pk__gt=ultimo_pk).order_by('pk')[:LOTE])
+        if not lote:
+            return
+        yield lote
+        ultimo_pk = lote[-1].pk
+
+
+def comprimir_conteudo(apps, schema_editor):
+    ReuniaoAcessivel = apps.get_model('core', 'ReuniaoAcessivel')
+    ConteudoReuniao = apps.get_model('core', 'ConteudoReuniao')
+    campos = ReuniaoAcessivel.objects.only('pk', 'transcricao_completa', 'resumo_executivo')
+    for lote in _lotes(campos):
+        ConteudoReuniao.objects.bulk_create([
+            ConteudoReuniao(reuniao_id=r.pk, transcricao=r.transcricao_completa, ata=r.resumo_executivo)
+            for r in lote
+            if r.transcricao_completa or r.resumo_executivo
+        ])
+
+
+def descomprimir_conteudo(apps, schema_editor):
+    ReuniaoAcessivel = apps.get_model('core', 'ReuniaoAcessivel')
+    ConteudoReuniao = apps.get_model('core', 'ConteudoReuniao')
+    for lote in _lotes(ConteudoReuniao.objects.all()):
+        for conteudo in lote:
+            ReuniaoAcessivel.objects.filter(pk=conteudo.pk).update(
+                transcricao_completa=conteudo.transcricao, resumo_executivo=conteudo.ata,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_estatisticas_dashboard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConteudoReuniao',
+            fields=[
+                ('reuniao', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='conteudo', serialize=False, to='core.reuniaoacessivel')),
+                ('transcricao', core.campos.TextoComprimidoField(blank=True, default='', verbose_name='Transcrição Literal (Whisper)')),
+                ('ata', core.campos.TextoComprimidoField(blank=True, default='', verbose_name='Ata Inteligente (GPT)')),
+            ],
+        ),
+        migrations.RunPython(comprimir_conteudo, descomprimir_conteudo),
+        migrations.RemoveField(
+            model_name='reuniaoacessivel',
+            name='resumo_executivo',
+        ),
+        migrations.RemoveField(
+            model_name='reuniaoacessivel',
+            name='transcricao_completa',
+        ),
+    ]
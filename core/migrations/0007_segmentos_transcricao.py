@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_conteudo_comprimido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SegmentoTranscricao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordem', models.PositiveIntegerField()),
+                ('inicio_ms', models.PositiveIntegerField()),
+                ('fim_ms', models.PositiveIntegerField()),
+                ('texto', models.TextField()),
+                ('falante', models.CharField(blank=True, help_text='Opcional: quem está falando, quando conhecido.', max_length=100)),
+                ('reuniao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segmentos', to='core.reuniaoacessivel')),
+            ],
+            options={
+                'ordering': ['reuniao', 'ordem'],
+                'constraints': [models.UniqueConstraint(fields=('reuniao', 'ordem'), name='segmento_reuniao_ordem_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_segmentos_transcricao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumoIA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minuto', models.BigIntegerField(help_text='Minutos desde a época Unix (time.time() // 60).', unique=True)),
+                ('tokens', models.IntegerField(default=0)),
+                ('requisicoes', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_orcamento_ia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reuniaoacessivel',
+            name='relatorio_audio',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Pré-processamento do Áudio'),
+        ),
+    ]
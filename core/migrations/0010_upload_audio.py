@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:20
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_relatorio_audio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadAudio',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nome_original', models.CharField(max_length=255)),
+                ('tamanho', models.BigIntegerField(help_text='Tamanho total do arquivo em bytes.')),
+                ('recebidos', models.BigIntegerField(default=0, help_text='Bytes já gravados (próximo offset esperado).')),
+                ('arquivo', models.CharField(blank=True, help_text='Nome final no storage (preenchido ao concluir).', max_length=255)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
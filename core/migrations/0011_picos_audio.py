@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_upload_audio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conteudoreuniao',
+            name='picos',
+            field=models.BinaryField(blank=True, default=b'', verbose_name='Picos da Forma de Onda'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_picos_audio'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipacaoColaborador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reunioes', models.IntegerField(default=0, verbose_name='Reuniões')),
+                ('ideias', models.IntegerField(default=0, verbose_name='Ideias Creditadas')),
+                ('ideias_chat', models.IntegerField(default=0, verbose_name='Ideias via Chat')),
+                ('apropriacoes_sofridas', models.IntegerField(default=0, help_text='Ideias desta pessoa apropriadas por outra.')),
+                ('apropriacoes_cometidas', models.IntegerField(default=0, help_text='Ideias de outra pessoa apropriadas por esta.')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='participacao', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipacaoDepartamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reunioes', models.IntegerField(default=0, verbose_name='Reuniões')),
+                ('ideias', models.IntegerField(default=0, verbose_name='Ideias Creditadas')),
+                ('ideias_chat', models.IntegerField(default=0, verbose_name='Ideias via Chat')),
+                ('apropriacoes_sofridas', models.IntegerField(default=0, help_text='Ideias desta pessoa apropriadas por outra.')),
+                ('apropriacoes_cometidas', models.IntegerField(default=0, help_text='Ideias de outra pessoa apropriadas por esta.')),
+                ('departamento', models.CharField(max_length=100)),
+                ('semana', models.DateField(help_text='Segunda-feira da semana.')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('departamento', 'semana'), name='participacao_depto_semana_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ContribuicaoReuniao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reunioes', models.IntegerField(default=0, verbose_name='Reuniões')),
+                ('ideias', models.IntegerField(default=0, verbose_name='Ideias Creditadas')),
+                ('ideias_chat', models.IntegerField(default=0, verbose_name='Ideias via Chat')),
+                ('apropriacoes_sofridas', models.IntegerField(default=0, help_text='Ideias desta pessoa apropriadas por outra.')),
+                ('apropriacoes_cometidas', models.IntegerField(default=0, help_text='Ideias de outra pessoa apropriadas por esta.')),
+                ('semana', models.DateField()),
+                ('departamento', models.CharField(blank=True, max_length=100)),
+                ('reuniao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contribuicoes', to='core.reuniaoacessivel')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contribuicoes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('reuniao', 'user'), name='contribuicao_reuniao_user_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ParticipacaoSemanal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reunioes', models.IntegerField(default=0, verbose_name='Reuniões')),
+                ('ideias', models.IntegerField(default=0, verbose_name='Ideias Creditadas')),
+                ('ideias_chat', models.IntegerField(default=0, verbose_name='Ideias via Chat')),
+                ('apropriacoes_sofridas', models.IntegerField(default=0, help_text='Ideias desta pessoa apropriadas por outra.')),
+                ('apropriacoes_cometidas', models.IntegerField(default=0, help_text='Ideias de outra pessoa apropriadas por esta.')),
+                ('semana', models.DateField(help_text='Segunda-feira da semana.')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participacao_semanal', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'semana'), name='participacao_user_semana_unica')],
+            },
+        ),
+    ]
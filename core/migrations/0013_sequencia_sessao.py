@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_participacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenciaSessao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=200, unique=True)),
+                ('valor', models.BigIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_sequencia_sessao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reuniaoacessivel',
+            name='processar_apos',
+            field=models.DateTimeField(blank=True, help_text='Devolvida por falha passageira da IA: só volta a ser reivindicada depois disto.', null=True),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_reuniao_processar_apos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoGlossario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valor', models.BigIntegerField()),
+            ],
+        ),
+    ]
@@ -1,10 +1,25 @@
-from django.db import models
+import re
+import time
+import unicodedata
+import uuid
+from datetime import timedelta
+
+from django.db import connection, models, transaction
+from django.db.models import F
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .campos import TextoComprimidoField
+from .storage import ArmazenamentoPorConteudo, armazenamento_audio
+
 # --- Utilitários ---
 def audio_upload_path(instance, filename):
-    """Gera um caminho organizado: media/reunioes/audio/ID_DA_REUNIAO/arquivo.mp3"""
+    """
+    Caminho legado (por data): media/reunioes/audio/AAAA-MM-DD/arquivo.mp3
+    Mantido apenas porque a migração 0001 o referencia; os novos uploads
+    usam o ArmazenamentoPorConteudo (core/storage.py).
+    """
     # Como o ID ainda não existe na criação, usamos 'temp' ou tratamos depois, 
     # mas para hackathon o ID costuma funcionar se salvar em duas etapas ou usar UUID.
     # Vamos simplificar salvando por data.
@@ -85,23 +100,550 @@ class ReuniaoAcessivel(TimeStampedModel):
     participantes = models.ManyToManyField(User, related_name='reunioes')
     
     # Arquivo de áudio (Input)
-    arquivo_audio = models.FileField(upload_to=audio_upload_path, blank=True, null=True, verbose_name="Gravação (MP3/WAV)")
+    # Gravado em reunioes/audio/ab/cd/<sha256>.mp3: o mesmo áudio enviado duas vezes ocupa um único arquivo
+    arquivo_audio = models.FileField(upload_to='reunioes/audio/', storage=armazenamento_audio, blank=True, null=True, verbose_name="Gravação (MP3/WAV)")
+    hash_audio = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 do áudio (deduplicação).")
+    # Resultado do pré-processamento antes do Whisper (core/audio.py): bytes e segundos economizados
+    relatorio_audio = models.JSONField(default=dict, blank=True, verbose_name="Pré-processamento do Áudio")
     
     # Campos preenchidos pela IA (Output)
-    transcricao_completa = models.TextField(blank=True, verbose_name="Transcrição Literal (Whisper)")
-    
-    resumo_executivo = models.TextField(blank=True, verbose_name="Ata Inteligente (GPT)")
-    
-    # O Pulo do Gato: JSON que guarda quem deu qual ideia.
-    # Ex: {"Pedro": ["Sugeriu mudar o layout", "Alertou sobre o bug"], "Mariana": ["Definiu o prazo"]}
+    # transcricao_completa e resumo_executivo (textos grandes) ficam em ConteudoReuniao,
+    # comprimidos e fora desta tabela; veja as propriedades abaixo.
+
+    # O Pulo do Gato: a ata em JSON, com quem deu qual ideia (core/services.py, FORMATO_ATA).
+    # Ex: {"resumo": "...", "decisoes": ["Adiar o deploy"],
+    #      "autoria": [{"autor": "Pedro", "ideia": "Sugeriu mudar o layout", "canal": "Chat"}],
+    #      "apropriacoes": [{"autor": "Pedro", "por": "Carlos", "ideia": "Mudar o layout"}],
+    #      "atencao": ["Fluidez da conversa foi mantida."]}
+    # Consultável no PostgreSQL: .filter(pontos_destaque__autoria__contains=[{"autor": "Pedro"}])
     pontos_destaque = models.JSONField(default=dict, blank=True, verbose_name="Atribuição de Créditos")
 
-    status_ia = models.CharField(max_length=20, choices=STATUS_PROCESSAMENTO, default='PENDENTE')
+    status_ia = models.CharField(max_length=20, choices=STATUS_PROCESSAMENTO, default='PENDENTE', db_index=True)
+
+    # Controle da fila de processamento (worker em segundo plano)
+    processamento_iniciado_em = models.DateTimeField(null=True, blank=True, help_text="Quando um worker reivindicou a reunião.")
+    tentativas_processamento = models.PositiveSmallIntegerField(default=0)
+    processar_apos = models.DateTimeField(null=True, blank=True, help_text="Devolvida por falha passageira da IA: só volta a ser reivindicada depois disto.")
+    mensagem_erro = models.TextField(blank=True, help_text="Último erro registrado pelo worker.")
+
+    class Meta:
+        indexes = [
+            # Paginação por chave do dashboard: ORDER BY data_reuniao DESC, id DESC
+            models.Index(fields=['-data_reuniao', '-id'], name='reuniao_data_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._lembrar_estado()
+        return instancia
+
+    def _lembrar_estado(self):
+        # Estado gravado no banco; o signal compara com ele para atualizar EstatisticaReunioes
+        deferidos = self.get_deferred_fields()
+        if 'status_ia' in deferidos or 'data_reuniao' in deferidos:
+            self._estado_salvo = None
+        else:
+            self._estado_salvo = (self.data_reuniao, self.status_ia)
+
+    def save(self, *args, **kwargs):
+        # Grava o arquivo antes para saber o hash (o storage endereça pelo conteúdo)
+        if self.arquivo_audio and not self.arquivo_audio._committed:
+            self.arquivo_audio.save(self.arquivo_audio.name, self.arquivo_audio.file, save=False)
+        self.hash_audio = ArmazenamentoPorConteudo.hash_do_caminho(self.arquivo_audio.name) if self.arquivo_audio else ''
+        super().save(*args, **kwargs)
+
+        if getattr(self, '_conteudo_alterado', False):
+            conteudo = self._obter_conteudo()
+            conteudo.reuniao = self
+            conteudo.save()
+            self._conteudo_novo = None
+            self._conteudo_alterado = False
+
+    def _obter_conteudo(self):
+        """Carrega ConteudoReuniao só no primeiro acesso (uma consulta; depois fica em cache na instância)."""
+        if self.pk is not None:
+            try:
+                return self.conteudo
+            except ConteudoReuniao.DoesNotExist:
+                pass
+        if getattr(self, '_conteudo_novo', None) is None:
+            self._conteudo_novo = ConteudoReuniao()
+        return self._conteudo_novo
+
+    def _alterar_conteudo(self, campo, valor):
+        setattr(self._obter_conteudo(), campo, valor)
+        self._conteudo_alterado = True
+
+    @property
+    def transcricao_completa(self):
+        """Transcrição Literal (Whisper)"""
+        return self._obter_conteudo().transcricao
+
+    @transcricao_completa.setter
+    def transcricao_completa(self, valor):
+        self._alterar_conteudo('transcricao', valor or '')
+
+    @property
+    def resumo_executivo(self):
+        """Ata Inteligente (GPT) em HTML, de reuniões processadas antes de pontos_destaque"""
+        return self._obter_conteudo().ata
+
+    @resumo_executivo.setter
+    def resumo_executivo(self, valor):
+        self._alterar_conteudo('ata', valor or '')
+
+    @property
+    def picos_audio(self):
+        """Forma de onda (bytes); servida à parte, em reuniao/<pk>/picos/"""
+        return bytes(self._obter_conteudo().picos)
+
+    @picos_audio.setter
+    def picos_audio(self, valor):
+        self._alterar_conteudo('picos', valor or b'')
+
+    @property
+    def processamento_finalizado(self):
+        return self.status_ia in ('CONCLUIDO', 'ERRO')
 
     def __str__(self):
         return f"{self.titulo} - {self.data_reuniao.strftime('%d/%m/%Y')}"
 
 
+class UploadAudio(TimeStampedModel):
+    """
+    Upload retomável do áudio, em blocos (core/upload_retomavel.py).
+    Enquanto chega, o arquivo fica em reunioes/audio/parciais/<id>.part; ao completar,
+    é movido para o caminho endereçado pelo hash e o formulário de upload se liga a ele.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    nome_original = models.CharField(max_length=255)
+    tamanho = models.BigIntegerField(help_text="Tamanho total do arquivo em bytes.")
+    recebidos = models.BigIntegerField(default=0, help_text="Bytes já gravados (próximo offset esperado).")
+    arquivo = models.CharField(max_length=255, blank=True, help_text="Nome final no storage (preenchido ao concluir).")
+
+    def __str__(self):
+        return f"{self.nome_original} ({self.recebidos}/{self.tamanho} bytes)"
+
+    @property
+    def concluido(self):
+        return bool(self.arquivo)
+
+    @property
+    def nome_parcial(self):
+        return f"reunioes/audio/parciais/{self.pk}.part"
+
+
+class ConteudoReuniao(models.Model):
+    """
+    Textos grandes gerados pela IA para uma reunião (transcrição e ata), comprimidos.
+    Ficam fora de ReuniaoAcessivel para que listagens e filtros não carreguem megabytes
+    por linha; só são lidos quando alguém acessa reuniao.transcricao_completa/resumo_executivo.
+    """
+    reuniao = models.OneToOneField(ReuniaoAcessivel, on_delete=models.CASCADE, primary_key=True, related_name='conteudo')
+    transcricao = TextoComprimidoField(blank=True, verbose_name="Transcrição Literal (Whisper)")
+    ata = TextoComprimidoField(blank=True, verbose_name="Ata Inteligente (GPT)")
+    # Forma de onda do player: um byte (0-255) por fatia do áudio, calculado uma vez no processamento
+    picos = models.BinaryField(blank=True, default=b'', verbose_name="Picos da Forma de Onda")
+
+    def __str__(self):
+        return f"Conteúdo de {self.reuniao_id}"
+
+
+class SegmentoTranscricao(models.Model):
+    """
+    Um trecho da transcrição com seus tempos no áudio (saída verbose_json do Whisper).
+    Tempos em milissegundos inteiros: compacto e sem erro de arredondamento de float.
+    A página de detalhes carrega os segmentos em janelas (HTMX), então reuniões de
+    várias horas não viram um único bloco gigante de texto.
+    """
+    reuniao = models.ForeignKey(ReuniaoAcessivel, on_delete=models.CASCADE, related_name='segmentos')
+    ordem = models.PositiveIntegerField()
+    inicio_ms = models.PositiveIntegerField()
+    fim_ms = models.PositiveIntegerField()
+    texto = models.TextField()
+    falante = models.CharField(max_length=100, blank=True, help_text="Opcional: quem está falando, quando conhecido.")
+
+    class Meta:
+        ordering = ['reuniao', 'ordem']
+        constraints = [
+            # Também é o índice usado para buscar cada janela (reuniao_id = ? AND ordem >= ?)
+            models.UniqueConstraint(fields=['reuniao', 'ordem'], name='segmento_reuniao_ordem_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.reuniao_id} #{self.ordem} [{self.inicio_ms / 1000:.1f}s]"
+
+    @property
+    def inicio_segundos(self):
+        return self.inicio_ms / 1000
+
+    @classmethod
+    def substituir(cls, reuniao, segmentos):
+        """
+        Troca todos os segmentos da reunião.
+        `segmentos`: dicts {'inicio', 'fim', 'texto'} com tempos em segundos e 'falante' opcional.
+        """
+        cls.objects.filter(reuniao=reuniao).delete()
+        cls.objects.bulk_create(
+            (
+                cls(
+                    reuniao=reuniao,
+                    ordem=ordem,
+                    inicio_ms=max(0, round(seg['inicio'] * 1000)),
+                    fim_ms=max(0, round(seg['fim'] * 1000)),
+                    texto=seg['texto'],
+                    falante=seg.get('falante') or '',
+                )
+                for ordem, seg in enumerate(s for s in segmentos if s['texto'])
+            ),
+            batch_size=1000,
+        )
+
+    @staticmethod
+    def como_dicts(reuniao_id):
+        """Retorna: os segmentos de uma reunião no mesmo formato aceito por substituir()."""
+        return [
+            {'inicio': inicio / 1000, 'fim': fim / 1000, 'texto': texto, 'falante': falante}
+            for inicio, fim, texto, falante in SegmentoTranscricao.objects
+            .filter(reuniao_id=reuniao_id).values_list('inicio_ms', 'fim_ms', 'texto', 'falante').iterator()
+        ]
+
+
+def mes_da_data(data):
+    """Primeiro dia do mês (no fuso local) de uma data/hora."""
+    if timezone.is_aware(data):
+        data = timezone.localtime(data)
+    return data.date().replace(day=1)
+
+
+def semana_da_data(data):
+    """Segunda-feira (no fuso local) da semana de uma data/hora."""
+    if timezone.is_aware(data):
+        data = timezone.localtime(data)
+    data = data.date()
+    return data - timedelta(days=data.weekday())
+
+
+class EstatisticaReunioes(models.Model):
+    """
+    Contadores desnormalizados do dashboard: quantas reuniões existem por mês e por status.
+    Mantidos a cada mudança de estado (core/signals.py e core/tasks.py), então o dashboard
+    lê algumas dezenas de linhas em vez de contar a tabela de reuniões inteira.
+    Se um dia divergirem: python manage.py recalcular_estatisticas
+    """
+    mes = models.DateField(help_text="Primeiro dia do mês da reunião.")
+    status_ia = models.CharField(max_length=20, choices=ReuniaoAcessivel.STATUS_PROCESSAMENTO)
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['mes', 'status_ia'], name='estatistica_mes_status_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.mes:%m/%Y} - {self.status_ia}: {self.total}"
+
+    @classmethod
+    def incrementar(cls, data_reuniao, status_ia, delta):
+        if not delta:
+            return
+        mes = mes_da_data(data_reuniao)
+        with transaction.atomic():
+            # UPDATE atômico (F) para não perder incrementos de workers concorrentes
+            if not cls.objects.filter(mes=mes, status_ia=status_ia).update(total=F('total') + delta):
+                cls.objects.get_or_create(mes=mes, status_ia=status_ia)
+                cls.objects.filter(mes=mes, status_ia=status_ia).update(total=F('total') + delta)
+
+    @classmethod
+    def registrar_transicao(cls, antes, depois):
+        """
+        `antes`/`depois`: tuplas (data_reuniao, status_ia) ou None (reunião inexistente).
+        """
+        if antes == depois:
+            return
+        if antes is not None:
+            cls.incrementar(antes[0], antes[1], -1)
+        if depois is not None:
+            cls.incrementar(depois[0], depois[1], 1)
+
+    @classmethod
+    def recalcular(cls):
+        """Reconstrói todos os contadores a partir da tabela de reuniões (consulta completa; uso administrativo)."""
+        totais = {}
+        for data, status in ReuniaoAcessivel.objects.values_list('data_reuniao', 'status_ia').iterator():
+            chave = (mes_da_data(data), status)
+            totais[chave] = totais.get(chave, 0) + 1
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create([cls(mes=mes, status_ia=status, total=total) for (mes, status), total in totais.items()])
+        return totais
+
+
+class ContadoresParticipacao(models.Model):
+    """Contadores de participação; a mesma estrutura serve aos agregados por pessoa, semana e departamento."""
+    CAMPOS = ('reunioes', 'ideias', 'ideias_chat', 'apropriacoes_sofridas', 'apropriacoes_cometidas')
+
+    reunioes = models.IntegerField(default=0, verbose_name="Reuniões")
+    ideias = models.IntegerField(default=0, verbose_name="Ideias Creditadas")
+    ideias_chat = models.IntegerField(default=0, verbose_name="Ideias via Chat")
+    apropriacoes_sofridas = models.IntegerField(default=0, help_text="Ideias desta pessoa apropriadas por outra.")
+    apropriacoes_cometidas = models.IntegerField(default=0, help_text="Ideias de outra pessoa apropriadas por esta.")
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def somar(cls, chave, valores):
+        """Soma `valores` ({campo: delta}) à linha identificada por `chave`, criando-a se preciso."""
+        atualizacao = {campo: F(campo) + delta for campo, delta in valores.items() if delta}
+        if not atualizacao:
+            return
+        # UPDATE atômico (F), como em EstatisticaReunioes: workers concorrentes não perdem incrementos
+        if not cls.objects.filter(**chave).update(**atualizacao):
+            cls.objects.get_or_create(**chave)
+            cls.objects.filter(**chave).update(**atualizacao)
+
+
+class ParticipacaoColaborador(ContadoresParticipacao):
+    """Totais de cada pessoa: a lista de colaboradores lê uma linha por pessoa, qualquer que seja o número de reuniões."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='participacao')
+
+    def __str__(self):
+        return f"{self.user}: {self.ideias} ideias em {self.reunioes} reuniões"
+
+
+class ParticipacaoSemanal(ContadoresParticipacao):
+    """Participação de cada pessoa por semana."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='participacao_semanal')
+    semana = models.DateField(help_text="Segunda-feira da semana.")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'semana'], name='participacao_user_semana_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.semana:%d/%m/%Y}"
+
+
+class ParticipacaoDepartamento(ContadoresParticipacao):
+    """Participação somada por departamento e semana (o departamento da pessoa na data da reunião)."""
+    departamento = models.CharField(max_length=100)
+    semana = models.DateField(help_text="Segunda-feira da semana.")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['departamento', 'semana'], name='participacao_depto_semana_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.departamento} - {self.semana:%d/%m/%Y}"
+
+
+def _normalizar_nome(nome):
+    """'Pedro.Henrique' e 'pedro henrique' viram a mesma chave (sem acentos, minúsculas)."""
+    nome = unicodedata.normalize('NFKD', str(nome or '')).encode('ascii', 'ignore').decode()
+    return ' '.join(re.sub(r'[._\-]+', ' ', nome).lower().split())
+
+
+class ContribuicaoReuniao(ContadoresParticipacao):
+    """
+    O que cada participante somou aos agregados por causa de uma reunião CONCLUIDO.
+    Guardar a parcela permite desfazê-la: reprocessar ou excluir a reunião corrige os
+    agregados sem recontar as outras reuniões.
+    Se um dia divergirem: python manage.py recalcular_participacao
+    """
+    reuniao = models.ForeignKey(ReuniaoAcessivel, on_delete=models.CASCADE, related_name='contribuicoes')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contribuicoes')
+    semana = models.DateField()
+    departamento = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['reuniao', 'user'], name='contribuicao_reuniao_user_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} em {self.reuniao_id}"
+
+    def _aplicar(self, sinal):
+        valores = {campo: sinal * getattr(self, campo) for campo in self.CAMPOS}
+        ParticipacaoColaborador.somar({'user_id': self.user_id}, valores)
+        ParticipacaoSemanal.somar({'user_id': self.user_id, 'semana': self.semana}, valores)
+        if self.departamento:
+            ParticipacaoDepartamento.somar({'departamento': self.departamento, 'semana': self.semana}, valores)
+
+    @staticmethod
+    def _identificador(participantes):
+        """
+        Retorna: função nome -> pk do participante, para os nomes escritos pela IA na ata
+        (username, nome completo ou primeiro nome). Nomes ambíguos não são atribuídos a ninguém.
+        """
+        nomes = {}
+        for user in participantes:
+            for nome in {user.username, user.get_full_name(), user.first_name, re.split(r'[._\-]', user.username)[0]}:
+                chave = _normalizar_nome(nome)
+                if chave:
+                    nomes[chave] = user.pk if nomes.get(chave, user.pk) == user.pk else None
+
+        def identificar(nome):
+            chave = _normalizar_nome(nome)
+            return nomes.get(chave) or nomes.get(chave.split(' ')[0] if chave else '')
+
+        return identificar
+
+    @classmethod
+    def _calcular(cls, reuniao):
+        semana = semana_da_data(reuniao.data_reuniao)
+        participantes = list(reuniao.participantes.select_related('perfil'))
+        contribuicoes = {}
+        for user in participantes:
+            try:
+                departamento = user.perfil.departamento
+            except PerfilColaborador.DoesNotExist:
+                departamento = ''
+            contribuicoes[user.pk] = cls(reuniao=reuniao, user=user, semana=semana, departamento=departamento, reunioes=1)
+
+        identificar = cls._identificador(participantes)
+        ata = reuniao.pontos_destaque or {}
+        for item in ata.get('autoria') or []:
+            contribuicao = contribuicoes.get(identificar(item.get('autor')))
+            if contribuicao:
+                contribuicao.ideias += 1
+                contribuicao.ideias_chat += item.get('canal') == 'Chat'
+        for item in ata.get('apropriacoes') or []:
+            autor, por = identificar(item.get('autor')), identificar(item.get('por'))
+            if autor == por:
+                continue
+            if autor in contribuicoes:
+                contribuicoes[autor].apropriacoes_sofridas += 1
+            if por in contribuicoes:
+                contribuicoes[por].apropriacoes_cometidas += 1
+        return list(contribuicoes.values())
+
+    @classmethod
+    def sincronizar(cls, reuniao, remover=False):
+        """
+        Troca a parcela da reunião nos agregados pela atual: só reuniões CONCLUIDO contam,
+        e chamar de novo (reprocessamento) não conta em dobro. `remover`: a reunião vai ser excluída.
+        """
+        with transaction.atomic():
+            antigas = list(cls.objects.select_for_update().filter(reuniao=reuniao))
+            novas = [] if remover or reuniao.status_ia != 'CONCLUIDO' else cls._calcular(reuniao)
+            if not antigas and not novas:
+                return
+            for contribuicao in antigas:
+                contribuicao._aplicar(-1)
+            cls.objects.filter(pk__in=[c.pk for c in antigas]).delete()
+            cls.objects.bulk_create(novas)
+            for contribuicao in novas:
+                contribuicao._aplicar(1)
+
+    @classmethod
+    def recalcular(cls):
+        """Reconstrói parcelas e agregados a partir das reuniões concluídas (uso administrativo)."""
+        with transaction.atomic():
+            for modelo in (cls, ParticipacaoColaborador, ParticipacaoSemanal, ParticipacaoDepartamento):
+                modelo.objects.all().delete()
+            reunioes = ReuniaoAcessivel.objects.filter(status_ia='CONCLUIDO').only(
+                'pk', 'data_reuniao', 'status_ia', 'pontos_destaque'
+            )
+            total = 0
+            for reuniao in reunioes.iterator():
+                cls.sincronizar(reuniao)
+                total += 1
+        return total
+
+
+class ConsumoIA(models.Model):
+    """
+    Consumo da OpenAI por janela de um minuto, compartilhado por todos os processos
+    (views e workers). Base do controle de admissão em core/orcamento_ia.py.
+    """
+    minuto = models.BigIntegerField(unique=True, help_text="Minutos desde a época Unix (time.time() // 60).")
+    tokens = models.IntegerField(default=0)
+    requisicoes = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Minuto {self.minuto}: {self.tokens} tokens, {self.requisicoes} requisições"
+
+    @classmethod
+    def reservar(cls, minuto, tokens, limite_tokens, limite_requisicoes):
+        """
+        Soma `tokens` e uma requisição à janela, só se couber nos limites.
+        A condição fica no próprio UPDATE: processos concorrentes nunca estouram o orçamento juntos.
+        Retorna: True se reservou.
+        """
+        def tentar():
+            return cls.objects.filter(
+                minuto=minuto,
+                tokens__lte=limite_tokens - tokens,
+                requisicoes__lte=limite_requisicoes - 1,
+            ).update(tokens=F('tokens') + tokens, requisicoes=F('requisicoes') + 1)
+
+        if tentar():
+            return True
+        _, criada = cls.objects.get_or_create(minuto=minuto)
+        if criada:
+            # Uma vez por minuto: descarta as janelas antigas
+            cls.objects.filter(minuto__lt=minuto - 60).delete()
+        return bool(tentar())
+
+    @classmethod
+    def ajustar(cls, minuto, tokens, requisicoes=0):
+        """Corrige a janela com a diferença entre o consumo real e o reservado (pode ser negativa)."""
+        if tokens or requisicoes:
+            cls.objects.filter(minuto=minuto).update(
+                tokens=F('tokens') + tokens, requisicoes=F('requisicoes') + requisicoes,
+            )
+
+
+class SequenciaSessao(models.Model):
+    """
+    Número de sequência por sessão e funcionalidade, usado pelo CoalescedorSessao (core/coalescencia.py).
+    O incremento é uma única instrução no banco: duas requisições simultâneas da mesma sessão
+    nunca recebem o mesmo número (o incr do cache do Django é um get seguido de set).
+    """
+    chave = models.CharField(max_length=200, unique=True)
+    valor = models.BigIntegerField(default=0)
+    atualizado_em = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.chave}: {self.valor}"
+
+    @classmethod
+    def proxima(cls, chave):
+        """Incrementa a sequência da chave (começando em 1) e devolve o novo valor."""
+        agora = timezone.now()
+        if connection.vendor in ('sqlite', 'postgresql'):
+            # Upsert com RETURNING: lê o valor incrementado na mesma instrução, sem janela de corrida
+            tabela = connection.ops.quote_name(cls._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {tabela} (chave, valor, atualizado_em) VALUES (%s, 1, %s) "
+                    f"ON CONFLICT (chave) DO UPDATE SET valor = {tabela}.valor + 1, atualizado_em = excluded.atualizado_em "
+                    f"RETURNING valor",
+                    [chave, connection.ops.adapt_datetimefield_value(agora)],
+                )
+                valor = cursor.fetchone()[0]
+        else:
+            with transaction.atomic():
+                # O UPDATE trava a linha até o fim da transação: a leitura abaixo vê o próprio incremento
+                if not cls.objects.filter(chave=chave).update(valor=F('valor') + 1, atualizado_em=agora):
+                    cls.objects.create(chave=chave, valor=1, atualizado_em=agora)
+                valor = cls.objects.filter(chave=chave).values_list('valor', flat=True).get()
+        if valor == 1:
+            # Sessão nova: descarta as sequências de sessões paradas há mais de um dia
+            cls.objects.filter(atualizado_em__lt=agora - timedelta(days=1)).delete()
+        return valor
+
+    @classmethod
+    def atual(cls, chave):
+        """Último número entregue para a chave (0 se nenhum)."""
+        return cls.objects.filter(chave=chave).values_list('valor', flat=True).first() or 0
+
+
 class GlossarioCultural(TimeStampedModel):
     """
     Banco de dados para o 'Tradutor Cultural'.
@@ -117,6 +659,34 @@ class GlossarioCultural(TimeStampedModel):
         return self.termo_tecnico
 
 
+class VersaoGlossario(models.Model):
+    """
+    Versão do Glossário Cultural: entra na chave do cache do Tradutor Cultural e mostra ao índice
+    em memória (core/indice_glossario.py) quando outro processo alterou os termos.
+    Uma linha só, incrementada com F() numa única instrução: alterações simultâneas nunca recebem
+    a mesma versão (o incr do cache do Django é um get seguido de set).
+    """
+    valor = models.BigIntegerField()
+
+    def __str__(self):
+        return str(self.valor)
+
+    @classmethod
+    def atual(cls):
+        # Valor inicial baseado no relógio: se a tabela for recriada, a versão nunca coincide
+        # com uma antiga que ainda esteja nas chaves do cache compartilhado
+        return cls.objects.get_or_create(pk=1, defaults={'valor': time.time_ns()})[0].valor
+
+    @classmethod
+    def nova(cls):
+        """Incrementa a versão e devolve o novo valor."""
+        with transaction.atomic():
+            # O UPDATE trava a linha até o fim da transação: a leitura abaixo vê o próprio incremento
+            if not cls.objects.filter(pk=1).update(valor=F('valor') + 1):
+                return cls.atual()
+            return cls.objects.filter(pk=1).values_list('valor', flat=True).get()
+
+
 class AnaliseFeedback(TimeStampedModel):
     """
     Ferramenta de Mentoria para Líderes.
@@ -0,0 +1,279 @@
+# core/openai_falso.py
+
+"""
+Servidor local que imita os dois endpoints da OpenAI usados pelo projeto, para benchmarks
+e testes de carga sem custo nem limite de taxa (python manage.py benchmark):
+  POST /v1/audio/transcriptions  -> verbose_json com segmentos a cada SEGUNDOS_POR_SEGMENTO
+  POST /v1/chat/completions      -> ata/ata_parcial em JSON (response_format), texto nos demais;
+                                    stream=True responde em SSE, com o `usage` no último evento
+Latência, variação e taxa de erros (429/5xx, com Retry-After) são configuráveis.
+Aponte a aplicação para ele com OPENAI_BASE_URL=http://127.0.0.1:<porta>/v1.
+"""
+
+import json
+import random
+import re
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SEGUNDOS_POR_SEGMENTO = 6
+BYTES_POR_SEGUNDO_COMPRIMIDO = 4000  # mp3 a 32 kbps (AUDIO_BITRATE_TRANSCRICAO)
+TAMANHO_LEITURA = 256 * 1024
+
+_FRASES = (
+    "Vamos revisar o cronograma da sprint.",
+    "Acho que o deploy pode ficar para quinta-feira.",
+    "Sugiro dividirmos a tarefa em duas partes.",
+    "Alguém conferiu os números do último trimestre?",
+    "Precisamos alinhar isso com o time de produto.",
+    "A ideia que foi dada no chat resolve o problema do cadastro.",
+    "Concordo, mas o orçamento ainda não foi aprovado.",
+    "Vou mandar o resumo por e-mail depois da reunião.",
+)
+_RE_PARTICIPANTES = re.compile(r'Participantes[^:\n]*:\s*([^\n]+)')
+
+
+@dataclass
+class ConfiguracaoFalsa:
+    latencia_chat: float = 0.3  # segundos por chamada de chat (sem stream: a resposta inteira)
+    latencia_transcricao: float = 1.0  # segundos por minuto de áudio enviado
+    variacao: float = 0.25  # fração aleatória para mais ou para menos em cada latência
+    taxa_erros: float = 0.0  # fração das chamadas que falham
+    status_erros: tuple = (429, 500, 503)
+    retry_after_ms: int = 200  # enviado nos erros, como a API real faz
+    pedacos_stream: int = 20  # a latência do chat é dividida entre os pedaços do stream
+    semente: int = None  # fixa a sequência de latências e erros (execuções comparáveis entre si)
+
+    def __post_init__(self):
+        self.aleatorio = random.Random(self.semente)
+
+    def latencia(self, base):
+        return max(0.0, base * self.aleatorio.uniform(1 - self.variacao, 1 + self.variacao))
+
+
+def _estimar_tokens(texto):
+    return max(1, len(texto) // 4)
+
+
+def _duracao_audio(inicio_corpo, tamanho):
+    """Segundos de áudio no corpo multipart: lê o cabeçalho WAV, se houver; senão supõe mp3 a 32 kbps."""
+    inicio = inicio_corpo.find(b'RIFF')
+    if inicio >= 0 and inicio_corpo[inicio + 8:inicio + 12] == b'WAVE':
+        bytes_por_segundo = struct.unpack_from('<I', inicio_corpo, inicio + 28)[0]
+        if bytes_por_segundo:
+            return (tamanho - inicio - 44) / bytes_por_segundo
+    return tamanho / BYTES_POR_SEGUNDO_COMPRIMIDO
+
+
+def _participantes(mensagens):
+    for mensagem in mensagens:
+        encontrado = _RE_PARTICIPANTES.search(str(mensagem.get('content') or ''))
+        if encontrado:
+            nomes = [nome.strip() for nome in encontrado.group(1).split(',') if nome.strip()]
+            if nomes:
+                return nomes
+    return ['Participante']
+
+
+def transcricao(duracao):
+    segmentos = []
+    inicio = 0.0
+    while inicio < duracao:
+        fim = min(duracao, inicio + SEGUNDOS_POR_SEGMENTO)
+        segmentos.append({
+            'id': len(segmentos), 'seek': int(inicio * 100), 'start': round(inicio, 2), 'end': round(fim, 2),
+            'text': ' ' + random.choice(_FRASES), 'tokens': [], 'temperature': 0.0,
+            'avg_logprob': -0.2, 'compression_ratio': 1.3, 'no_speech_prob': 0.01,
+        })
+        inicio = fim
+    return {
+        'task': 'transcribe', 'language': 'portuguese', 'duration': round(duracao, 2),
+        'text': ''.join(seg['text'] for seg in segmentos).strip(), 'segments': segmentos,
+    }
+
+
+def conteudo_chat(pedido):
+    """Texto da resposta: JSON no formato pedido em response_format (ata, ata_parcial) ou HTML simples."""
+    formato = (pedido.get('response_format') or {}).get('json_schema') or {}
+    if formato.get('name') in ('ata', 'ata_parcial'):
+        nomes = _participantes(pedido.get('messages') or [])
+        ata = {
+            'decisoes': [random.choice(_FRASES)],
+            'autoria': [
+                {'autor': nome, 'ideia': random.choice(_FRASES), 'canal': random.choice(('Chat', 'Voz'))}
+                for nome in nomes
+            ],
+            'apropriacoes': [],
+            'atencao': ["Fluidez da conversa foi mantida."],
+        }
+        if len(nomes) > 1 and random.random() < 0.2:
+            ata['apropriacoes'].append({'autor': nomes[0], 'por': nomes[1], 'ideia': random.choice(_FRASES)})
+        if formato['name'] == 'ata':
+            ata = {'resumo': ' '.join(random.sample(_FRASES, 3)), **ata}
+        return json.dumps(ata, ensure_ascii=False)
+    return "<span class='text-success'>✅ Feedback Inclusivo e Aprovado!</span> " + ' '.join(random.sample(_FRASES, 4))
+
+
+class _RespostaOpenAI(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, como a API real (o pool do cliente reaproveita conexões)
+    configuracao = ConfiguracaoFalsa()
+
+    def log_message(self, *args):
+        pass
+
+    def _ler_corpo(self, guardar=None):
+        """
+        Lê o corpo inteiro da requisição, mas só guarda os primeiros `guardar` bytes (None = tudo):
+        o áudio de horas não precisa ficar na memória, só o cabeçalho e o tamanho.
+        Retorna: (bytes guardados, tamanho total).
+        """
+        partes, total = [], 0
+
+        def receber(dados):
+            nonlocal total
+            if guardar is None or total < guardar:
+                partes.append(dados if guardar is None else dados[:guardar - total])
+            total += len(dados)
+
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            while True:
+                tamanho = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                if not tamanho:
+                    self.rfile.readline()
+                    break
+                while tamanho > 0:
+                    dados = self.rfile.read(min(TAMANHO_LEITURA, tamanho))
+                    receber(dados)
+                    tamanho -= len(dados)
+                self.rfile.readline()
+        else:
+            restante = int(self.headers.get('Content-Length') or 0)
+            while restante > 0:
+                dados = self.rfile.read(min(TAMANHO_LEITURA, restante))
+                if not dados:
+                    break
+                receber(dados)
+                restante -= len(dados)
+        return b''.join(partes), total
+
+    def _json(self, status, dados, cabecalhos=()):
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        for nome, valor in cabecalhos:
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _falhar(self):
+        status = self.configuracao.aleatorio.choice(self.configuracao.status_erros)
+        tipo = 'rate_limit_exceeded' if status == 429 else 'server_error'
+        self._json(
+            status,
+            {'error': {'message': f"Erro simulado ({status}).", 'type': tipo, 'param': None, 'code': tipo}},
+            [('retry-after-ms', str(self.configuracao.retry_after_ms))],
+        )
+
+    def do_POST(self):
+        transcrevendo = self.path.endswith('/audio/transcriptions')
+        corpo, tamanho = self._ler_corpo(guardar=TAMANHO_LEITURA if transcrevendo else None)
+        configuracao = self.configuracao
+        if configuracao.aleatorio.random() < configuracao.taxa_erros:
+            time.sleep(configuracao.latencia(configuracao.latencia_chat) / 10)
+            return self._falhar()
+
+        if transcrevendo:
+            duracao = _duracao_audio(corpo, tamanho)
+            time.sleep(configuracao.latencia(configuracao.latencia_transcricao * duracao / 60))
+            return self._json(200, transcricao(duracao))
+        if not self.path.endswith('/chat/completions'):
+            return self._json(404, {'error': {'message': f"Rota desconhecida: {self.path}", 'type': 'invalid_request_error'}})
+
+        pedido = json.loads(corpo or b'{}')
+        conteudo = conteudo_chat(pedido)
+        modelo = pedido.get('model') or 'gpt-4o-mini'
+        prompt = sum(_estimar_tokens(str(m.get('content') or '')) for m in pedido.get('messages') or [])
+        uso = {'prompt_tokens': prompt, 'completion_tokens': _estimar_tokens(conteudo),
+               'total_tokens': prompt + _estimar_tokens(conteudo)}
+        base = {'id': f'chatcmpl-falso-{random.getrandbits(48):x}', 'created': int(time.time()), 'model': modelo}
+
+        if pedido.get('stream'):
+            return self._stream(base, conteudo, uso, (pedido.get('stream_options') or {}).get('include_usage'))
+
+        time.sleep(configuracao.latencia(configuracao.latencia_chat))
+        self._json(200, {
+            **base, 'object': 'chat.completion',
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'logprobs': None,
+                         'message': {'role': 'assistant', 'content': conteudo, 'refusal': None}}],
+            'usage': uso,
+        })
+
+    def _stream(self, base, conteudo, uso, incluir_uso):
+        quantidade = max(1, self.configuracao.pedacos_stream)
+        tamanho = max(1, -(-len(conteudo) // quantidade))
+        intervalo = self.configuracao.latencia(self.configuracao.latencia_chat) / quantidade
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')  # Sem Content-Length: o fim do corpo é o fim da conexão
+        self.end_headers()
+
+        def evento(dados):
+            self.wfile.write(f"data: {json.dumps(dados, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        fragmento = {**base, 'object': 'chat.completion.chunk'}
+        try:
+            for posicao in range(0, len(conteudo), tamanho):
+                time.sleep(intervalo)
+                evento({**fragmento, 'choices': [{'index': 0, 'finish_reason': None,
+                                                  'delta': {'content': conteudo[posicao:posicao + tamanho]}}]})
+            evento({**fragmento, 'choices': [{'index': 0, 'finish_reason': 'stop', 'delta': {}}]})
+            if incluir_uso:
+                evento({**fragmento, 'choices': [], 'usage': uso})
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # O cliente desistiu do stream (ex: o usuário voltou a digitar)
+        self.close_connection = True
+
+
+class ServidorOpenAIFalso:
+    """
+    Uso:
+        with ServidorOpenAIFalso(ConfiguracaoFalsa(latencia_chat=0.5, taxa_erros=0.02)) as servidor:
+            settings.OPENAI_BASE_URL = servidor.url
+    """
+
+    def __init__(self, configuracao=None, porta=0, endereco='127.0.0.1'):
+        tratador = type('RespostaOpenAI', (_RespostaOpenAI,), {'configuracao': configuracao or ConfiguracaoFalsa()})
+        self._servidor = ThreadingHTTPServer((endereco, porta), tratador)
+        self._servidor.daemon_threads = True
+        self._thread = None
+
+    @property
+    def configuracao(self):
+        return self._servidor.RequestHandlerClass.configuracao
+
+    @property
+    def url(self):
+        endereco, porta = self._servidor.server_address[:2]
+        return f'http://{endereco}:{porta}/v1'
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True, name='openai-falso')
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
@@ -0,0 +1,121 @@
+# core/orcamento_ia.py
+
+"""
+Controle de admissão das chamadas de chat à OpenAI, compartilhado entre processos (tabela ConsumoIA).
+- Orçamento por minuto de tokens (TPM) e de requisições (RPM), abaixo dos limites da conta.
+- Duas faixas: 'interativa' (feedback e tradutor: alguém esperando na tela) e 'fundo'
+  (atas geradas pelos workers). A faixa de fundo só usa até (1 - IA_RESERVA_INTERATIVA)
+  do orçamento; o restante fica garantido para a interativa. Um lote de uploads
+  esgota a parte dele e espera a próxima janela, sem travar a caixa de feedback.
+- A reserva usa os tokens do prompt; depois da resposta a janela em que ela foi feita é
+  corrigida com o uso real (diferença contra o que foi de fato reservado).
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import ConsumoIA
+
+FAIXA_INTERATIVA = 'interativa'
+FAIXA_FUNDO = 'fundo'
+
+
+@dataclass(frozen=True)
+class Reserva:
+    """O que admitir() tirou do orçamento. Faixa vazia: a operação não passa pelo orçamento."""
+    faixa: str = ''
+    minuto: int = 0
+    tokens: int = 0
+
+
+class OrcamentoIA:
+
+    @staticmethod
+    def faixa(operacao):
+        """Retorna: a faixa da operação, ou None se ela não passa pelo orçamento (ex: transcrição)."""
+        if not settings.IA_LIMITE_TOKENS_POR_MINUTO:
+            return None
+        return settings.IA_FAIXAS.get(operacao)
+
+    @staticmethod
+    def _limites(faixa):
+        fracao = 1.0 if faixa == FAIXA_INTERATIVA else 1.0 - settings.IA_RESERVA_INTERATIVA
+        return (
+            int(settings.IA_LIMITE_TOKENS_POR_MINUTO * fracao),
+            int(settings.IA_LIMITE_REQUISICOES_POR_MINUTO * fracao),
+        )
+
+    @classmethod
+    def _tentar(cls, faixa, tokens):
+        """Retorna: a Reserva se a chamada foi admitida, ou os segundos até a próxima janela."""
+        agora = time.time()
+        minuto = int(agora // 60)
+        limite_tokens, limite_requisicoes = cls._limites(faixa)
+        # Um pedido maior que o orçamento inteiro da faixa ainda passa, sozinho, numa janela vazia
+        reservados = min(tokens, limite_tokens)
+        if ConsumoIA.reservar(minuto, reservados, limite_tokens, limite_requisicoes):
+            return Reserva(faixa, minuto, reservados)
+        # Jitter: processos que esperavam não voltam todos no mesmo instante
+        return (minuto + 1) * 60 - agora + random.uniform(0, 1)
+
+    def admitir(self, operacao, tokens):
+        """
+        Bloqueia até a chamada caber no orçamento da sua faixa.
+        Retorna: a Reserva (passe-a para registrar_uso depois da resposta), ou None se a
+        espera passaria de IA_ORCAMENTO_ESPERA_MAXIMA (quem chamou desiste).
+        """
+        faixa = self.faixa(operacao)
+        if faixa is None:
+            return Reserva()
+        limite = time.monotonic() + settings.IA_ORCAMENTO_ESPERA_MAXIMA[faixa]
+        while True:
+            resultado = self._tentar(faixa, tokens)
+            if isinstance(resultado, Reserva):
+                return resultado
+            if time.monotonic() + resultado > limite:
+                return None
+            time.sleep(resultado)
+
+    async def admitir_async(self, operacao, tokens):
+        faixa = self.faixa(operacao)
+        if faixa is None:
+            return Reserva()
+        limite = time.monotonic() + settings.IA_ORCAMENTO_ESPERA_MAXIMA[faixa]
+        while True:
+            resultado = await sync_to_async(self._tentar)(faixa, tokens)
+            if isinstance(resultado, Reserva):
+                return resultado
+            if time.monotonic() + resultado > limite:
+                return None
+            await asyncio.sleep(resultado)
+
+    def registrar_uso(self, reserva, usados):
+        """
+        Corrige a janela da reserva com a diferença entre o uso real (usage.total_tokens) e o
+        que foi reservado: a janela termina com o consumo real, nunca abaixo dele.
+        """
+        if usados is None or not reserva.faixa:
+            return
+        ConsumoIA.ajustar(reserva.minuto, usados - reserva.tokens)
+
+    async def registrar_uso_async(self, reserva, usados):
+        if usados is None or not reserva.faixa:
+            return
+        await sync_to_async(ConsumoIA.ajustar)(reserva.minuto, usados - reserva.tokens)
+
+    def devolver(self, reserva):
+        """Desfaz uma reserva cuja requisição não chegou a ser enviada."""
+        if reserva.faixa:
+            ConsumoIA.ajustar(reserva.minuto, -reserva.tokens, requisicoes=-1)
+
+    async def devolver_async(self, reserva):
+        if reserva.faixa:
+            await sync_to_async(ConsumoIA.ajustar)(reserva.minuto, -reserva.tokens, requisicoes=-1)
+
+
+orcamento_ia = OrcamentoIA()
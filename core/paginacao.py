@@ -0,0 +1,67 @@
+# core/paginacao.py
+
+"""
+Paginação por chave (keyset) para listas ordenadas por data, do mais novo para o mais antigo.
+Em vez de OFFSET (que obriga o banco a percorrer todas as linhas anteriores), cada página
+começa logo depois da última linha da página anterior: custo constante em qualquer página,
+desde que exista um índice em (campo DESC, id DESC).
+"""
+
+from dataclasses import dataclass, field
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def codificar_cursor(data, pk):
+    return f"{data.isoformat()}_{pk}"
+
+
+def decodificar_cursor(cursor):
+    """Retorna: (datetime, pk) ou None se o cursor for inválido."""
+    try:
+        texto_data, texto_pk = (cursor or '').rsplit('_', 1)
+        data = parse_datetime(texto_data)
+        return (data, int(texto_pk)) if data else None
+    except ValueError:
+        return None
+
+
+@dataclass
+class PaginaKeyset:
+    itens: list = field(default_factory=list)
+    cursor_anterior: str = ''  # Vazio quando já é a página mais recente
+    cursor_proximo: str = ''  # Vazio quando não há itens mais antigos
+
+
+def paginar_por_data(queryset, campo, por_pagina, antes=None, depois=None):
+    """
+    `antes`: cursor da última linha mostrada (avança para itens mais antigos).
+    `depois`: cursor da primeira linha mostrada (volta para itens mais novos).
+    """
+    chave_antes, chave_depois = decodificar_cursor(antes), decodificar_cursor(depois)
+
+    if chave_depois:
+        data, pk = chave_depois
+        # Busca em ordem crescente a partir do cursor e inverte no final
+        filtro = Q(**{f'{campo}__gte': data}) & (Q(**{f'{campo}__gt': data}) | Q(pk__gt=pk))
+        linhas = list(queryset.filter(filtro).order_by(campo, 'pk')[:por_pagina + 1])
+        tem_mais_novos = len(linhas) > por_pagina
+        itens = linhas[:por_pagina][::-1]
+        tem_mais_antigos = True
+    else:
+        if chave_antes:
+            data, pk = chave_antes
+            # O '<=' isolado permite ao banco posicionar direto no índice (o OR sozinho vira varredura)
+            queryset = queryset.filter(Q(**{f'{campo}__lte': data}) & (Q(**{f'{campo}__lt': data}) | Q(pk__lt=pk)))
+        linhas = list(queryset.order_by(f'-{campo}', '-pk')[:por_pagina + 1])
+        tem_mais_antigos = len(linhas) > por_pagina
+        itens = linhas[:por_pagina]
+        tem_mais_novos = chave_antes is not None
+
+    pagina = PaginaKeyset(itens=itens)
+    if itens and tem_mais_novos:
+        pagina.cursor_anterior = codificar_cursor(getattr(itens[0], campo), itens[0].pk)
+    if itens and tem_mais_antigos:
+        pagina.cursor_proximo = codificar_cursor(getattr(itens[-1], campo), itens[-1].pk)
+    return pagina
@@ -1,38 +1,288 @@
 # core/services.py
 
-import openai
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from .models import GlossarioCultural
+from django.core.files import File
+from .audio import AudioIndisponivel, dividir_em_trechos, pasta_temporaria
+from .cache import cache_ia, versao_prompt
+from .cliente_ia import ErroIARequisicao, cliente_ia, converter_erro
+from .indice_glossario import indice_glossario
+from .metricas import ETAPA_SEGUNDOS
+from .storage import calcular_sha256
+from .tokens import dividir_por_tokens, estimar_tokens
+
+logger = logging.getLogger(__name__)
+
+# Os clientes da OpenAI (sync e async, com pool, timeouts, retentativas e disjuntor)
+# ficam em core/cliente_ia.py. Toda falha chega aqui como ErroIA e é repassada a quem chamou.
+
+PROMPT_WHISPER = "Esta é uma reunião corporativa técnica. Identifique os falantes se possível."
+
+# Ata inteligente em JSON validado pela API (Structured Outputs). O resultado vai para
+# ReuniaoAcessivel.pontos_destaque e o HTML é montado pelo template (core/partials/ata_reuniao.html).
+CANAIS_AUTORIA = ("Chat", "Voz")
+_LISTA_TEXTOS = {"type": "array", "items": {"type": "string"}}
+_AUTORIA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "autor": {"type": "string"},
+            "ideia": {"type": "string"},
+            "canal": {"type": "string", "enum": list(CANAIS_AUTORIA)},
+        },
+        "required": ["autor", "ideia", "canal"],
+        "additionalProperties": False,
+    },
+}
+# Apropriação: "autor" teve a ideia, "por" tentou tomá-la para si
+_APROPRIACOES = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {"autor": {"type": "string"}, "por": {"type": "string"}, "ideia": {"type": "string"}},
+        "required": ["autor", "por", "ideia"],
+        "additionalProperties": False,
+    },
+}
 
-# Inicializa o cliente da OpenAI com a chave configurada no settings.py
-# (que por sua vez pega do .env)
-client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+
+def _formato_json(nome, propriedades):
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": nome,
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": propriedades,
+                "required": list(propriedades),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+FORMATO_ATA_PARCIAL = _formato_json("ata_parcial", {
+    "decisoes": _LISTA_TEXTOS, "autoria": _AUTORIA, "apropriacoes": _APROPRIACOES, "atencao": _LISTA_TEXTOS,
+})
+FORMATO_ATA = _formato_json("ata", {
+    "resumo": {"type": "string"}, "decisoes": _LISTA_TEXTOS, "autoria": _AUTORIA,
+    "apropriacoes": _APROPRIACOES, "atencao": _LISTA_TEXTOS,
+})
+
+# Mentoria de Feedback (análise de viés)
+PROMPT_VIES = """
+        Você é um Mentor Sênior em Liderança Inclusiva e Psicologia Organizacional.
+        Sua missão é educar os gestores sobre vieses inconscientes de forma profunda e específica.
+        
+        Analise o feedback abaixo.
+        
+        REGRAS PARA A EXPLICAÇÃO DO VIÉS (SEJA DETALHISTA):
+        Se encontrar problemas, não dê respostas genéricas.
+        1. Identifique o trecho exato: Cite as palavras usadas (ex: "O uso do termo 'emocional'...").
+        2. Explique o conceito: Diga qual viés está agindo (ex: "Double Bind" de gênero, "Glass Ceiling", "Estereótipo de Agressividade").
+        3. Explique o impacto: Por que isso desmotiva? Por que é injusto? (ex: "Ao comparar com Pedro, você invalida a jornada individual da Mariana").
+        
+        REGRAS PARA A REESCRITA:
+        1. Remova qualquer comparação com outros colegas.
+        2. Troque julgamentos de personalidade por observações de fatos/resultados.
+        3. Mantenha um tom de desenvolvimento (Growth Mindset).
+
+        FORMATO DE SAÍDA (HTML):
+        Se houver viés, retorne:
+        <div class='alert alert-warning'>
+           <h5 class='alert-heading'><i class='bi bi-exclamation-triangle'></i> Análise de Viés Detectada:</h5>
+           <ul class='mb-3'>
+               <li>[Explicação detalhada do ponto 1]</li>
+               <li>[Explicação detalhada do ponto 2]</li>
+           </ul>
+           <hr>
+           <strong>💡 Sugestão de Reescrita (Focada em Fatos):</strong><br>
+           <em>"[Texto reescrito]"</em>
+        </div>
+
+        Se for neutro: "<span class='text-success'>✅ Feedback Inclusivo e Aprovado!</span>"
+        """
+
+# Caminhos do Tradutor Cultural (informados na resposta para medir a taxa de acerto local)
+CAMINHO_LOCAL = 'local'
+CAMINHO_IA = 'ia'
+
+# Template do Tradutor Cultural: o glossário entra em {contexto_glossario}
+PROMPT_TRADUTOR = """
+        Você é um assistente que ajuda funcionários a entender termos corporativos.
+        Use este Glossário como referência:
+        {contexto_glossario}
+        
+        REGRAS CRÍTICAS DE FORMATAÇÃO (SIGA ESTRITAMENTE):
+        1. NÃO substitua o termo original pela tradução. Mantenha o termo em inglês/sigla no texto.
+        2. Adicione a explicação IMEDIATAMENTE APÓS o termo original.
+        3. Use o formato: TermoOriginal (**Explicação**)
+        
+        EXEMPLOS DE O QUE FAZER E O QUE NÃO FAZER:
+        
+        Texto Original: "Preciso do report ASAP."
+        
+        ❌ ERRADO (Não inverta):
+        "Preciso do relatório (**report**) assim que possível (**ASAP**)."
+        
+        ✅ CERTO (Mantenha a ordem):
+        "Preciso do report (**relatório**) ASAP (**assim que possível**)."
+        
+        Texto Original: "O Churn subiu."
+        ✅ CERTO: "O Churn (**taxa de cancelamento**) subiu."
+        """
 
 class IAService:
     """
     Camada de Serviço que isola toda a lógica de Inteligência Artificial.
     Isso mantém as Views limpas e facilita a manutenção.
+    Falhas da IA levantam ErroIA (core/cliente_ia.py); nenhum método devolve texto de erro.
     """
 
     @staticmethod
-    def transcrever_reuniao(caminho_arquivo_audio):
+    def _transcrever_arquivo(caminho_arquivo_audio, prompt):
         """
-        Recebe o caminho físico do arquivo de áudio (MP3/WAV) e envia para o Whisper.
-        Retorna: String com o texto completo transcrito.
+        Uma chamada ao Whisper com timestamps (verbose_json).
+        Retorna: (texto, lista de segmentos {'inicio', 'fim', 'texto'}) relativos ao arquivo.
         """
-        try:
-            with open(caminho_arquivo_audio, "rb") as audio_file:
+        caminho = Path(caminho_arquivo_audio)
+        # Arquivo aberto em vez de lido para a memória: o envio lê em blocos
+        with caminho.open('rb') as arquivo:
+            def transcrever(c):
+                arquivo.seek(0)  # Cada retentativa reenvia o arquivo do início
                 # O modelo 'whisper-1' é o estado da arte para Speech-to-Text
-                transcript = client.audio.transcriptions.create(
-                    model="whisper-1", 
-                    file=audio_file,
+                return c.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=(caminho.name, arquivo),
                     language="pt", # Força português para melhorar a precisão
-                    prompt="Esta é uma reunião corporativa técnica. Identifique os falantes se possível."
+                    prompt=prompt,
+                    response_format="verbose_json",
                 )
-            return transcript.text
-        except Exception as e:
-            print(f"Erro na Transcrição: {e}")
-            return "Erro: Não foi possível transcrever o áudio. Verifique o formato do arquivo."
+            transcript = cliente_ia.chamar('transcricao', transcrever)
+        return IAService._ler_transcricao(transcript)
+
+    @staticmethod
+    def _ler_transcricao(transcript):
+        segmentos = [
+            {'inicio': seg.start, 'fim': seg.end, 'texto': seg.text.strip()}
+            for seg in (getattr(transcript, 'segments', None) or [])
+        ]
+        return transcript.text, segmentos
+
+    @staticmethod
+    def _ajustar_tempos(segmentos, trecho):
+        # Corrige os timestamps: o Whisper conta a partir do início do trecho, que saiu
+        # do áudio preparado (sem os silêncios); o mapa devolve o tempo na gravação original.
+        # Devolve cópias: os segmentos originais podem ser os guardados no cache
+        return [
+            {
+                **seg,
+                'inicio': round(trecho.tempo_original(seg['inicio']), 3),
+                'fim': round(trecho.tempo_original(seg['fim']), 3),
+            }
+            for seg in segmentos
+        ]
+
+    @staticmethod
+    def _juntar_trechos(resultados):
+        texto = "\n".join(t.strip() for t, _ in resultados if t.strip())
+        segmentos = [seg for _, segs in resultados for seg in segs]
+        return texto, segmentos
+
+    @staticmethod
+    def _exportar_trecho(trecho):
+        try:
+            return trecho.exportar()
+        except AudioIndisponivel as e:
+            # Uma segunda chance só para este trecho; os outros seguem normalmente
+            logger.warning("Falha ao exportar o trecho %s, tentando de novo: %s", trecho.indice, e)
+            return trecho.exportar()
+
+    @staticmethod
+    def _chave_trecho(trecho):
+        # Pelo conteúdo do trecho exportado: quando a reunião volta para a fila, os trechos que
+        # já tinham sido transcritos saem do cache e só os que falharam vão de novo ao Whisper
+        with open(trecho.caminho, 'rb') as arquivo:
+            sha256 = calcular_sha256(File(arquivo))
+        return cache_ia.chave('transcricao_trecho', sha256, 'whisper-1', 0, versao_prompt(PROMPT_WHISPER))
+
+    @staticmethod
+    def _transcrever_trecho(trecho):
+        """
+        Exporta e transcreve um trecho. As retentativas são por chamada (cliente_ia) e o
+        resultado fica no cache da IA: se um trecho falhar, só ele é reenviado depois,
+        sem perder o que os outros já transcreveram.
+        """
+        IAService._exportar_trecho(trecho)
+        texto, segmentos = cache_ia.obter_ou_calcular(
+            IAService._chave_trecho(trecho),
+            lambda: IAService._transcrever_arquivo(trecho.caminho, PROMPT_WHISPER),
+        )
+        return texto, IAService._ajustar_tempos(segmentos, trecho)
+
+    @staticmethod
+    def _resultados_em_ordem(trechos, resultados):
+        """
+        `resultados`: resultado ou exceção de cada trecho, na ordem. Todos os trechos já
+        terminaram (e os bons estão no cache); só então a primeira falha é levantada.
+        """
+        falhas = [(t, r) for t, r in zip(trechos, resultados) if isinstance(r, BaseException)]
+        for trecho, erro in falhas:
+            logger.error("Trecho %s de %s falhou: %s", trecho.indice + 1, len(trechos), erro, exc_info=erro)
+        if falhas:
+            raise falhas[0][1]
+        return resultados
+
+    @staticmethod
+    @ETAPA_SEGUNDOS.medir(etapa='transcricao')
+    def transcrever_reuniao_segmentos(caminho_arquivo_audio):
+        """
+        Prepara o áudio (mono 16 kHz, sem silêncios longos, formato compacto), divide gravações
+        longas nas pausas de fala (ffmpeg), transcreve os trechos em paralelo e junta tudo na
+        ordem original com os timestamps da gravação original.
+        Sem ffmpeg/pydub, faz uma única chamada com o arquivo inteiro.
+        Retorna: (texto completo, lista de segmentos com tempos absolutos, RelatorioAudio
+        do pré-processamento, com os picos da forma de onda, ou None).
+        """
+        with pasta_temporaria() as pasta:
+            try:
+                trechos, relatorio = dividir_em_trechos(caminho_arquivo_audio, pasta)
+            except AudioIndisponivel as e:
+                logger.warning("Transcrição sem pré-processamento: %s", e)
+                return (*IAService._transcrever_arquivo(caminho_arquivo_audio, PROMPT_WHISPER), None)
+
+            with ThreadPoolExecutor(max_workers=settings.TRANSCRICAO_MAX_THREADS) as executor:
+                futuros = [executor.submit(IAService._transcrever_trecho, t) for t in trechos]
+            resultados = IAService._resultados_em_ordem(trechos, [f.exception() or f.result() for f in futuros])
+            relatorio.bytes_finais = sum(t.tamanho for t in trechos)
+
+        return (*IAService._juntar_trechos(resultados), IAService._registrar_relatorio(relatorio))
+
+    @staticmethod
+    def _registrar_relatorio(relatorio):
+        logger.info(
+            "Áudio preparado: %.1f MB -> %.1f MB, %.0fs de silêncio removidos",
+            relatorio.bytes_originais / 1e6, relatorio.bytes_finais / 1e6, relatorio.segundos_removidos,
+        )
+        return relatorio
+
+    @staticmethod
+    def transcrever_reuniao(caminho_arquivo_audio):
+        """
+        Recebe o caminho físico do arquivo de áudio (MP3/WAV) e envia para o Whisper.
+        Retorna: String com o texto completo transcrito (levanta ErroIA se falhar).
+        """
+        texto, _, _ = IAService.transcrever_reuniao_segmentos(caminho_arquivo_audio)
+        return texto
 
     # @staticmethod
     # def gerar_ata_inteligente(texto_transcrito, lista_participantes="Desconhecidos"): # <--- ADICIONE ESTE 2º PARÂMETRO
@@ -99,12 +349,8 @@ class IAService:
 
 
     @staticmethod
-    def gerar_ata_inteligente(texto_transcrito, lista_participantes="Desconhecidos"):
-        """
-        Gera a Ata Inclusiva. 
-        AJUSTE: Agora detecta APROPRIAÇÃO DE IDEIAS (Bropriating) e evita alucinar interrupções.
-        """
-        prompt_sistema = f"""
+    def _prompt_ata(lista_participantes):
+        return f"""
         Você é um Especialista em Dinâmica de Grupo e Inclusão.
         Sua missão é identificar a VERDADEIRA autoria das ideias e proteger participantes de apropriação.
 
@@ -116,7 +362,8 @@ class IAService:
         1. DETECÇÃO DE APROPRIAÇÃO ("Bropriating"):
            - Se a Pessoa A der uma ideia e a Pessoa B disser logo em seguida algo como "Exatamente o que eu ia dizer", "Eu já sabia disso", "Como eu disse antes" (sem ter dito), ou apenas repetir a ideia com outras palavras:
            - A CRÉDITO É 100% DA PESSOA A.
-           - NÃO coloque a Pessoa B no "Mapa de Autoria" para essa ideia específica. Coloque a ação da Pessoa B nos "Pontos de Atenção" como "Comportamento de Apropriação".
+           - NÃO coloque a Pessoa B em "autoria" para essa ideia específica. Coloque a ação da Pessoa B em "atencao" como "Comportamento de Apropriação"
+             e registre o caso em "apropriacoes" (autor = Pessoa A, por = Pessoa B).
 
         2. INTERRUPÇÕES (Sem Alucinação):
            - Só marque interrupção se alguém foi CORTADO no meio de uma frase e não conseguiu concluir.
@@ -126,150 +373,457 @@ class IAService:
         3. PEDRO (PCD/Chat):
            - Se houver menção de leitura de chat ("O Pedro disse..."), a autoria é EXCLUSIVA do Pedro. Quem leu foi apenas o porta-voz.
 
-        FORMATO DE SAÍDA (HTML Bootstrap 5):
-        Não use Markdown. Retorne HTML puro.
+        FORMATO DE SAÍDA (JSON):
+        - resumo: um parágrafo objetivo com o propósito da reunião e as decisões finais.
+        - decisoes: as decisões tomadas, uma por item.
+        - autoria: uma entrada por ideia, com o autor ORIGINAL, a ideia resumida e o canal (Chat ou Voz).
+        - apropriacoes: cada caso de apropriação (autor original, quem se apropriou, ideia). Sem casos: [].
+        - atencao: comportamentos de apropriação, interrupções reais ou falhas que atrapalharam a inclusão.
+          Ex: "Carlos tentou validar a ideia de Pedro como se fosse dele ("Eu já sabia"), mas o crédito original foi mantido."
+          Sem ocorrências: ["Fluidez da conversa foi mantida."]
+        """
 
-        Estrutura:
-        <div class="mb-4">
-            <h4 class="text-primary"><i class="bi bi-clipboard-data"></i> Resumo Executivo</h4>
-            <p>[Resumo objetivo das decisões]</p>
-        </div>
+    @staticmethod
+    def _prompt_ata_parcial(lista_participantes, indice, total):
+        return f"""
+        Você é um Especialista em Dinâmica de Grupo e Inclusão.
+        Você recebe o trecho {indice} de {total} de uma transcrição de reunião.
+        O começo do trecho pode repetir o fim do anterior, só para dar contexto.
+        Participantes: {lista_participantes}
 
-        <div class="mb-4">
-            <h4 class="text-success"><i class="bi bi-lightbulb"></i> Mapa de Autoria Real (Quem teve a ideia)</h4>
-            <ul class="list-group">
-                <li class="list-group-item d-flex justify-content-between align-items-center">
-                    <div>
-                        <strong>[Nome do Autor Original]</strong>: [A ideia resumida]
-                    </div>
-                    <span class="badge bg-primary rounded-pill">[Canal: Chat/Voz]</span>
-                </li>
-            </ul>
-        </div>
+        Aplique as mesmas regras de autoria da ata: crédito para quem teve a ideia primeiro,
+        apropriação ("Eu já sabia", "Como eu disse") vai para atenção, leitura de chat ("O Pedro disse...")
+        é autoria de quem escreveu. Só marque interrupção se alguém foi cortado no meio da frase.
 
-        <div class="card border-warning mb-3">
-            <div class="card-header bg-warning text-dark fw-bold">
-                <i class="bi bi-exclamation-triangle"></i> Análise de Comportamento & Apropriação
-            </div>
-            <div class="card-body">
-                <ul class="mb-0">
-                    <li>[Ex: Carlos tentou validar a ideia de Pedro como se fosse dele ("Eu já sabia"), mas o crédito original foi mantido.]</li>
-                    <li>[Ex: Nenhuma interrupção brusca detectada.]</li>
-                </ul>
-            </div>
-        </div>
+        Responda em JSON: decisoes (lista), autoria (autor, ideia, canal Chat ou Voz),
+        apropriacoes (autor original, por quem se apropriou, ideia) e atencao (lista).
         """
 
+    @staticmethod
+    def _extrair_parcial(janela, lista_participantes, indice, total):
+        """
+        Fase MAP: extrai autoria, decisões e pontos de atenção de uma janela da transcrição.
+        Retorna: dict com as listas 'decisoes', 'autoria', 'apropriacoes' e 'atencao'.
+        """
+        prompt_sistema = IAService._prompt_ata_parcial(lista_participantes, indice, total)
+        mensagens = [
+            {"role": "system", "content": prompt_sistema},
+            {"role": "user", "content": f"Trecho da transcrição:\n\n{janela}"}
+        ]
+        response = cliente_ia.chamar('ata_parcial', lambda c: c.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=mensagens,
+            temperature=0.2,
+            response_format=FORMATO_ATA_PARCIAL,
+        ), tokens=IAService._tokens(mensagens))
+        return IAService._ler_parcial(response.choices[0].message.content)
+
+    @staticmethod
+    def _ler_parcial(conteudo):
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini", # Se puder usar gpt-4o (sem mini) fica ainda mais inteligente
-                messages=[
-                    {"role": "system", "content": prompt_sistema},
-                    {"role": "user", "content": f"Transcrição:\n\n{texto_transcrito[:20000]}"}
-                ],
-                temperature=0.2 # Temperatura baixa para ser mais analítico e menos "criativo"
-            )
-            
-            content = response.choices[0].message.content
-            content = content.replace("```html", "").replace("```", "").strip()
-            return content
+            parcial = json.loads(conteudo)
+        except (TypeError, ValueError):
+            parcial = {}
+        return {chave: parcial.get(chave) or [] for chave in ('decisoes', 'autoria', 'apropriacoes', 'atencao')}
 
-        except Exception as e:
-            return f"<div class='alert alert-danger'>Erro: {str(e)}</div>"
+    @staticmethod
+    def _chave_ata(texto_transcrito, lista_participantes):
+        prompt_sistema = IAService._prompt_ata(lista_participantes)
+        chave = cache_ia.chave(
+            'ata', texto_transcrito, "gpt-4o-mini", 0.2,
+            versao_prompt(
+                prompt_sistema, IAService._prompt_ata_parcial(lista_participantes, 0, 0),
+                settings.ATA_TOKENS_POR_JANELA, settings.ATA_SOBREPOSICAO_TOKENS,
+            ),
+        )
+        return chave, prompt_sistema
 
     @staticmethod
-    def analisar_vies_feedback(texto_feedback):
+    def _conteudo_reduce(parciais):
+        # Fase REDUCE: a ata final é montada a partir das extrações parciais, em ordem
+        return (
+            "A transcrição era longa e foi analisada em trechos consecutivos. "
+            "Junte as extrações abaixo (em ordem cronológica) em uma única ata, "
+            "removendo duplicatas e mantendo o crédito com o autor original:\n\n"
+            + json.dumps(parciais, ensure_ascii=False)
+        )
+
+    @staticmethod
+    def _ler_ata(response):
         """
-        Analisa viés com explicação detalhada e pedagógica.
+        Valida a ata devolvida pela API (o schema já é garantido; aqui só sobram recusa e corte por tamanho).
+        Retorna: dict com 'resumo', 'decisoes', 'autoria', 'apropriacoes' e 'atencao'.
         """
-        prompt_sistema = """
-        Você é um Mentor Sênior em Liderança Inclusiva e Psicologia Organizacional.
-        Sua missão é educar os gestores sobre vieses inconscientes de forma profunda e específica.
-        
-        Analise o feedback abaixo.
-        
-        REGRAS PARA A EXPLICAÇÃO DO VIÉS (SEJA DETALHISTA):
-        Se encontrar problemas, não dê respostas genéricas.
-        1. Identifique o trecho exato: Cite as palavras usadas (ex: "O uso do termo 'emocional'...").
-        2. Explique o conceito: Diga qual viés está agindo (ex: "Double Bind" de gênero, "Glass Ceiling", "Estereótipo de Agressividade").
-        3. Explique o impacto: Por que isso desmotiva? Por que é injusto? (ex: "Ao comparar com Pedro, você invalida a jornada individual da Mariana").
+        mensagem = response.choices[0].message
+        try:
+            ata = json.loads(mensagem.content)
+        except (TypeError, ValueError):
+            motivo = getattr(mensagem, 'refusal', None) or f"resposta incompleta ({response.choices[0].finish_reason})"
+            raise ErroIARequisicao(f"A IA não devolveu a ata em JSON: {motivo}", 'ata')
+
+        def textos(valor):
+            return [str(item).strip() for item in valor or [] if str(item).strip()]
+
+        return {
+            'resumo': str(ata.get('resumo') or '').strip(),
+            'decisoes': textos(ata.get('decisoes')),
+            'autoria': [
+                {
+                    'autor': str(item.get('autor') or '').strip(),
+                    'ideia': str(item.get('ideia') or '').strip(),
+                    'canal': item.get('canal') if item.get('canal') in CANAIS_AUTORIA else 'Voz',
+                }
+                for item in ata.get('autoria') or [] if isinstance(item, dict) and item.get('ideia')
+            ],
+            'apropriacoes': [
+                {campo: str(item.get(campo) or '').strip() for campo in ('autor', 'por', 'ideia')}
+                for item in ata.get('apropriacoes') or [] if isinstance(item, dict) and item.get('autor')
+            ],
+            'atencao': textos(ata.get('atencao')),
+        }
+
+    @staticmethod
+    @ETAPA_SEGUNDOS.medir(etapa='ata')
+    def gerar_ata_inteligente(texto_transcrito, lista_participantes="Desconhecidos"):
+        """
+        Gera a Ata Inclusiva. 
+        AJUSTE: Agora detecta APROPRIAÇÃO DE IDEIAS (Bropriating) e evita alucinar interrupções.
+        Transcrições que não cabem em ATA_TOKENS_POR_JANELA seguem em map-reduce:
+        cada janela (sobreposta à anterior em ATA_SOBREPOSICAO_TOKENS) é analisada em
+        paralelo e uma chamada final junta tudo na ata.
+        Retorna: dict no formato FORMATO_ATA (vai para reuniao.pontos_destaque).
+        """
+        chave, prompt_sistema = IAService._chave_ata(texto_transcrito, lista_participantes)
+
+        def gerar():
+            janelas = dividir_por_tokens(
+                texto_transcrito, settings.ATA_TOKENS_POR_JANELA, sobreposicao_tokens=settings.ATA_SOBREPOSICAO_TOKENS,
+            )
+
+            if len(janelas) <= 1:
+                conteudo_usuario = f"Transcrição:\n\n{texto_transcrito}"
+            else:
+                with ThreadPoolExecutor(max_workers=settings.ATA_MAX_THREADS) as executor:
+                    parciais = list(executor.map(
+                        lambda args: IAService._extrair_parcial(args[1], lista_participantes, args[0], len(janelas)),
+                        enumerate(janelas, start=1),
+                    ))
+                conteudo_usuario = IAService._conteudo_reduce(parciais)
+
+            mensagens = [
+                {"role": "system", "content": prompt_sistema},
+                {"role": "user", "content": conteudo_usuario}
+            ]
+            response = cliente_ia.chamar('ata', lambda c: c.chat.completions.create(
+                model="gpt-4o-mini", # Se puder usar gpt-4o (sem mini) fica ainda mais inteligente
+                messages=mensagens,
+                temperature=0.2, # Temperatura baixa para ser mais analítico e menos "criativo"
+                response_format=FORMATO_ATA,
+            ), tokens=IAService._tokens(mensagens))
+            
+            return IAService._ler_ata(response)
+
+        # Erros (ErroIA) sobem para o worker, que decide entre tentar de novo e marcar ERRO
+        return cache_ia.obter_ou_calcular(chave, gerar)
+
+    @staticmethod
+    def _mensagens_vies(texto_feedback):
+        return [
+            {"role": "system", "content": PROMPT_VIES},
+            {"role": "user", "content": f"Texto do Feedback: '{texto_feedback}'"}
+        ]
+
+    @staticmethod
+    def _mensagens_tradutor(texto_complexo):
+        # Só os termos que aparecem no texto vão para o prompt (índice Aho-Corasick em memória)
+        termos_no_texto = indice_glossario.termos_presentes(texto_complexo)
+        # Cria o contexto
+        contexto_glossario = "\n".join([f"- {t.termo_tecnico}: {t.explicacao_simples}" for t in termos_no_texto])
+        if not contexto_glossario:
+            contexto_glossario = "(Nenhum termo do glossário aparece neste texto; explique o jargão com suas palavras.)"
         
-        REGRAS PARA A REESCRITA:
-        1. Remova qualquer comparação com outros colegas.
-        2. Troque julgamentos de personalidade por observações de fatos/resultados.
-        3. Mantenha um tom de desenvolvimento (Growth Mindset).
+        prompt_sistema = PROMPT_TRADUTOR.format(contexto_glossario=contexto_glossario)
+        return [
+            {"role": "system", "content": prompt_sistema},
+            {"role": "user", "content": texto_complexo}
+        ]
 
-        FORMATO DE SAÍDA (HTML):
-        Se houver viés, retorne:
-        <div class='alert alert-warning'>
-           <h5 class='alert-heading'><i class='bi bi-exclamation-triangle'></i> Análise de Viés Detectada:</h5>
-           <ul class='mb-3'>
-               <li>[Explicação detalhada do ponto 1]</li>
-               <li>[Explicação detalhada do ponto 2]</li>
-           </ul>
-           <hr>
-           <strong>💡 Sugestão de Reescrita (Focada em Fatos):</strong><br>
-           <em>"[Texto reescrito]"</em>
-        </div>
+    @staticmethod
+    def _chave_tradutor(texto_complexo):
+        return cache_ia.chave(
+            'tradutor', texto_complexo, "gpt-4o-mini", 0.1,
+            versao_prompt(PROMPT_TRADUTOR), extra=cache_ia.versao_glossario(),
+        )
 
-        Se for neutro: "<span class='text-success'>✅ Feedback Inclusivo e Aprovado!</span>"
+    @staticmethod
+    def _tokens(mensagens):
+        """Estimativa dos tokens do prompt, reservada no orçamento de IA antes da chamada."""
+        return sum(estimar_tokens(m["content"]) for m in mensagens)
+
+    @staticmethod
+    def analisar_vies_feedback(texto_feedback):
         """
+        Analisa viés com explicação detalhada e pedagógica.
+        """
+        chave = cache_ia.chave('vies', texto_feedback, "gpt-4o-mini", 0.3, versao_prompt(PROMPT_VIES))
 
-        try:
-            response = client.chat.completions.create(
+        def analisar():
+            mensagens = IAService._mensagens_vies(texto_feedback)
+            response = cliente_ia.chamar('vies', lambda c: c.chat.completions.create(
                 model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": prompt_sistema},
-                    {"role": "user", "content": f"Texto do Feedback: '{texto_feedback}'"}
-                ],
+                messages=mensagens,
                 temperature=0.3 # Um pouco mais alto para permitir explicações mais fluídas
-            )
+            ), tokens=IAService._tokens(mensagens))
             return response.choices[0].message.content
-        except Exception as e:
-            return "<span class='text-danger'>Erro ao conectar com a IA de análise.</span>"
+
+        # Textos idênticos colados ao mesmo tempo compartilham uma única chamada
+        return cache_ia.obter_ou_calcular(chave, analisar)
+
+    @staticmethod
+    def anotar_glossario_local(texto_complexo):
+        """
+        Caminho rápido do Tradutor Cultural, sem IA: insere Termo (**explicação**) direto do glossário.
+        Retorna: o texto anotado, ou None se houver jargão fora do glossário (precisa da IA).
+        """
+        ocorrencias = indice_glossario.encontrar(texto_complexo)
+        if indice_glossario.jargao_nao_coberto(texto_complexo, ocorrencias):
+            return None
+        return indice_glossario.anotar(texto_complexo, ocorrencias)
+
+    @staticmethod
+    def traduzir(texto_complexo, reescrever=False):
+        """
+        Ponto de entrada do Tradutor Cultural: tenta a anotação local e só chama a IA
+        quando há jargão não coberto ou o usuário pediu uma reescrita de verdade.
+        Retorna: (texto traduzido, caminho) onde caminho é CAMINHO_LOCAL ou CAMINHO_IA.
+        """
+        if not reescrever:
+            anotado = IAService.anotar_glossario_local(texto_complexo)
+            if anotado is not None:
+                return anotado, CAMINHO_LOCAL
+        return IAService.tradutor_cultural(texto_complexo), CAMINHO_IA
 
     @staticmethod
     def tradutor_cultural(texto_complexo):
         """
         RAG: Busca termos e traduz mantendo a ordem estrita: TermoOriginal (**Tradução**)
+        A chave do cache inclui a versão do glossário (muda a cada termo salvo/removido).
         """
-        todos_termos = GlossarioCultural.objects.all()
-        # Cria o contexto
-        contexto_glossario = "\n".join([f"- {t.termo_tecnico}: {t.explicacao_simples}" for t in todos_termos])
-        
-        prompt_sistema = f"""
-        Você é um assistente que ajuda funcionários a entender termos corporativos.
-        Use este Glossário como referência:
-        {contexto_glossario}
-        
-        REGRAS CRÍTICAS DE FORMATAÇÃO (SIGA ESTRITAMENTE):
-        1. NÃO substitua o termo original pela tradução. Mantenha o termo em inglês/sigla no texto.
-        2. Adicione a explicação IMEDIATAMENTE APÓS o termo original.
-        3. Use o formato: TermoOriginal (**Explicação**)
-        
-        EXEMPLOS DE O QUE FAZER E O QUE NÃO FAZER:
-        
-        Texto Original: "Preciso do report ASAP."
-        
-        ❌ ERRADO (Não inverta):
-        "Preciso do relatório (**report**) assim que possível (**ASAP**)."
-        
-        ✅ CERTO (Mantenha a ordem):
-        "Preciso do report (**relatório**) ASAP (**assim que possível**)."
-        
-        Texto Original: "O Churn subiu."
-        ✅ CERTO: "O Churn (**taxa de cancelamento**) subiu."
-        """
+        chave = IAService._chave_tradutor(texto_complexo)
 
-        try:
-            response = client.chat.completions.create(
+        def traduzir():
+            mensagens = IAService._mensagens_tradutor(texto_complexo)
+            response = cliente_ia.chamar('tradutor', lambda c: c.chat.completions.create(
                 model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": prompt_sistema},
-                    {"role": "user", "content": texto_complexo}
-                ],
+                messages=mensagens,
                 temperature=0.1 # Temperatura baixíssima para reduzir criatividade e forçar obediência
-            )
+            ), tokens=IAService._tokens(mensagens))
             return response.choices[0].message.content
+
+        return cache_ia.obter_ou_calcular(chave, traduzir)
+
+    # --- Versões async (AsyncOpenAI) para as views ASGI ---
+    # Mesmos prompts, chaves de cache e formatos de retorno das versões síncronas acima.
+
+    @staticmethod
+    async def _transcrever_arquivo_async(caminho_arquivo_audio, prompt):
+        caminho = Path(caminho_arquivo_audio)
+        with caminho.open('rb') as arquivo:
+            def transcrever(c):
+                arquivo.seek(0)
+                return c.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=(caminho.name, arquivo),
+                    language="pt",
+                    prompt=prompt,
+                    response_format="verbose_json",
+                )
+            transcript = await cliente_ia.chamar_async('transcricao', transcrever)
+        return IAService._ler_transcricao(transcript)
+
+    @staticmethod
+    async def _transcrever_trecho_async(trecho):
+        await asyncio.to_thread(IAService._exportar_trecho, trecho)
+        chave = await asyncio.to_thread(IAService._chave_trecho, trecho)
+        texto, segmentos = await cache_ia.obter_ou_calcular_async(
+            chave, lambda: IAService._transcrever_arquivo_async(trecho.caminho, PROMPT_WHISPER),
+        )
+        return texto, IAService._ajustar_tempos(segmentos, trecho)
+
+    @staticmethod
+    async def transcrever_reuniao_segmentos_async(caminho_arquivo_audio):
+        with ETAPA_SEGUNDOS.medir(etapa='transcricao'), pasta_temporaria() as pasta:
+            try:
+                # ffmpeg é trabalho de CPU e disco: roda fora do event loop
+                trechos, relatorio = await asyncio.to_thread(dividir_em_trechos, caminho_arquivo_audio, pasta)
+            except AudioIndisponivel as e:
+                logger.warning("Transcrição sem pré-processamento: %s", e)
+                return (*await IAService._transcrever_arquivo_async(caminho_arquivo_audio, PROMPT_WHISPER), None)
+
+            limite = asyncio.Semaphore(settings.TRANSCRICAO_MAX_THREADS)
+
+            async def transcrever(trecho):
+                async with limite:
+                    return await IAService._transcrever_trecho_async(trecho)
+
+            # gather preserva a ordem dos trechos; return_exceptions deixa os outros terminarem
+            resultados = IAService._resultados_em_ordem(
+                trechos, await asyncio.gather(*(transcrever(t) for t in trechos), return_exceptions=True),
+            )
+            relatorio.bytes_finais = sum(t.tamanho for t in trechos)
+
+        return (*IAService._juntar_trechos(resultados), IAService._registrar_relatorio(relatorio))
+
+    @staticmethod
+    async def transcrever_reuniao_async(caminho_arquivo_audio):
+        texto, _, _ = await IAService.transcrever_reuniao_segmentos_async(caminho_arquivo_audio)
+        return texto
+
+    @staticmethod
+    async def _extrair_parcial_async(janela, lista_participantes, indice, total):
+        prompt_sistema = IAService._prompt_ata_parcial(lista_participantes, indice, total)
+        mensagens = [
+            {"role": "system", "content": prompt_sistema},
+            {"role": "user", "content": f"Trecho da transcrição:\n\n{janela}"}
+        ]
+        response = await cliente_ia.chamar_async('ata_parcial', lambda c: c.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=mensagens,
+            temperature=0.2,
+            response_format=FORMATO_ATA_PARCIAL,
+        ), tokens=IAService._tokens(mensagens))
+        return IAService._ler_parcial(response.choices[0].message.content)
+
+    @staticmethod
+    async def gerar_ata_inteligente_async(texto_transcrito, lista_participantes="Desconhecidos"):
+        chave, prompt_sistema = IAService._chave_ata(texto_transcrito, lista_participantes)
+
+        async def gerar():
+            janelas = dividir_por_tokens(
+                texto_transcrito, settings.ATA_TOKENS_POR_JANELA, sobreposicao_tokens=settings.ATA_SOBREPOSICAO_TOKENS,
+            )
+
+            if len(janelas) <= 1:
+                conteudo_usuario = f"Transcrição:\n\n{texto_transcrito}"
+            else:
+                limite = asyncio.Semaphore(settings.ATA_MAX_THREADS)
+
+                async def extrair(indice, janela):
+                    async with limite:
+                        return await IAService._extrair_parcial_async(janela, lista_participantes, indice, len(janelas))
+
+                parciais = await asyncio.gather(*(extrair(i, j) for i, j in enumerate(janelas, start=1)))
+                conteudo_usuario = IAService._conteudo_reduce(parciais)
+
+            mensagens = [
+                {"role": "system", "content": prompt_sistema},
+                {"role": "user", "content": conteudo_usuario}
+            ]
+            response = await cliente_ia.chamar_async('ata', lambda c: c.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=mensagens,
+                temperature=0.2,
+                response_format=FORMATO_ATA,
+            ), tokens=IAService._tokens(mensagens))
+            return IAService._ler_ata(response)
+
+        with ETAPA_SEGUNDOS.medir(etapa='ata'):
+            return await cache_ia.obter_ou_calcular_async(chave, gerar)
+
+    @staticmethod
+    async def _chave_tradutor_async(texto_complexo):
+        return cache_ia.chave(
+            'tradutor', texto_complexo, "gpt-4o-mini", 0.1,
+            versao_prompt(PROMPT_TRADUTOR), extra=await cache_ia.versao_glossario_async(),
+        )
+
+    @staticmethod
+    async def _stream_chat_async(operacao, chave, montar_mensagens, temperatura):
+        """
+        Chamada em streaming: gera os pedaços do texto conforme o modelo responde.
+        `montar_mensagens` (async) só é chamado se a resposta não estiver em cache.
+        Se o consumidor parar de ler (aclosing; ex: usuário digitou de novo), a conexão com a API é fechada.
+        A resposta completa vai para o cache, como nas versões sem streaming.
+        Falhas (inclusive no meio do texto) levantam ErroIA; nada incompleto vai para o cache.
+        """
+        em_cache = await cache_ia.obter_async(chave)
+        if em_cache is not None:
+            yield em_cache
+            return
+
+        partes, stream, uso = [], None, None
+        mensagens = await montar_mensagens()
+        tokens = IAService._tokens(mensagens)
+        try:
+            # Só a abertura do stream é repetida: depois do 1º pedaço, repetir duplicaria o texto na tela
+            stream, reserva = await cliente_ia.abrir_stream_async(operacao, lambda c: c.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=mensagens,
+                temperature=temperatura,
+                stream=True,
+                stream_options={"include_usage": True},  # Último evento traz o uso real (para o orçamento)
+            ), tokens=tokens)
+            async for evento in stream:
+                uso = evento.usage or uso
+                if not evento.choices:
+                    continue
+                pedaco = evento.choices[0].delta.content
+                if pedaco:
+                    partes.append(pedaco)
+                    yield pedaco
         except Exception as e:
-            return "Erro na tradução cultural."
\ No newline at end of file
+            logger.exception("Erro no streaming da IA: %s", e)
+            raise converter_erro(e, operacao) from e
+        finally:
+            if stream is not None:
+                await stream.close()
+
+        await cliente_ia.registrar_uso_async(operacao, reserva, uso, "gpt-4o-mini")
+        await cache_ia.definir_async(chave, "".join(partes))
+
+    @staticmethod
+    def analisar_vies_feedback_stream_async(texto_feedback):
+        """Versão em streaming de analisar_vies_feedback (gerador async de pedaços do HTML)."""
+        chave = cache_ia.chave('vies', texto_feedback, "gpt-4o-mini", 0.3, versao_prompt(PROMPT_VIES))
+
+        async def mensagens():
+            return IAService._mensagens_vies(texto_feedback)
+
+        return IAService._stream_chat_async('vies', chave, mensagens, 0.3)
+
+    @staticmethod
+    async def tradutor_cultural_stream_async(texto_complexo):
+        """Versão em streaming de tradutor_cultural (gerador async de pedaços do texto traduzido)."""
+        chave = await IAService._chave_tradutor_async(texto_complexo)
+        # O índice do glossário pode precisar recarregar do banco (ORM síncrono)
+        mensagens = sync_to_async(IAService._mensagens_tradutor)
+        async with aclosing(IAService._stream_chat_async('tradutor', chave, lambda: mensagens(texto_complexo), 0.1)) as pedacos:
+            async for pedaco in pedacos:
+                yield pedaco
+
+    @staticmethod
+    async def anotar_glossario_local_async(texto_complexo):
+        return await sync_to_async(IAService.anotar_glossario_local)(texto_complexo)
+
+    @staticmethod
+    async def traduzir_async(texto_complexo, reescrever=False):
+        if not reescrever:
+            anotado = await IAService.anotar_glossario_local_async(texto_complexo)
+            if anotado is not None:
+                return anotado, CAMINHO_LOCAL
+        return await IAService.tradutor_cultural_async(texto_complexo), CAMINHO_IA
+
+    @staticmethod
+    async def tradutor_cultural_async(texto_complexo):
+        chave = await IAService._chave_tradutor_async(texto_complexo)
+
+        async def traduzir():
+            mensagens = await sync_to_async(IAService._mensagens_tradutor)(texto_complexo)
+            response = await cliente_ia.chamar_async('tradutor', lambda c: c.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=mensagens,
+                temperature=0.1
+            ), tokens=IAService._tokens(mensagens))
+            return response.choices[0].message.content
+
+        return await cache_ia.obter_ou_calcular_async(chave, traduzir)
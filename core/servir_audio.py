@@ -0,0 +1,104 @@
+# core/servir_audio.py
+
+"""
+Entrega do áudio das reuniões com suporte a HTTP Range (206 Partial Content).
+O player só baixa o trecho que vai tocar: abrir a página e pular para o minuto 50
+de uma gravação longa não exige baixar o arquivo inteiro.
+- Com AUDIO_SENDFILE_CABECALHO configurado (ex: 'X-Accel-Redirect' no Nginx), o Django só
+  autoriza e o servidor web entrega os bytes (inclusive os ranges), via sendfile.
+- Sem ele: arquivo inteiro por FileResponse (wsgi.file_wrapper, que usa sendfile quando o
+  servidor suporta) e ranges lidos por mmap, em blocos, sem carregar o arquivo na memória.
+Os arquivos são endereçados pelo SHA-256 (core/storage.py): o hash serve de ETag e nunca muda.
+"""
+
+import mimetypes
+import mmap
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date
+
+from .storage import armazenamento_audio
+
+TAMANHO_BLOCO = 256 * 1024
+_RE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeInvalido(Exception):
+    """Range fora do arquivo: responde 416."""
+
+
+def interpretar_range(cabecalho, tamanho):
+    """
+    Aceita um único intervalo ('bytes=100-199', 'bytes=100-' ou 'bytes=-500').
+    Retorna: (início, fim inclusivo) ou None para responder o arquivo inteiro
+    (sem cabeçalho, sintaxe desconhecida ou vários intervalos, como a RFC 9110 permite).
+    """
+    if not cabecalho:
+        return None
+    encontrado = _RE_RANGE.match(cabecalho.strip())
+    if not encontrado or encontrado.groups() == ('', ''):
+        return None
+    inicio, fim = encontrado.groups()
+    if inicio == '':
+        # Sufixo: os últimos N bytes
+        inicio, fim = max(0, tamanho - int(fim)), tamanho - 1
+    else:
+        inicio, fim = int(inicio), min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio >= tamanho or inicio > fim:
+        raise RangeInvalido()
+    return inicio, fim
+
+
+def _ler_intervalo(caminho, inicio, fim):
+    with open(caminho, 'rb') as arquivo, mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+        for posicao in range(inicio, fim + 1, TAMANHO_BLOCO):
+            yield mapa[posicao:min(posicao + TAMANHO_BLOCO, fim + 1)]
+
+
+def resposta_audio(request, nome, etag=None):
+    """
+    Monta a resposta (200, 206, 304 ou 416) para o arquivo `nome` do storage de áudio.
+    `etag`: o hash do conteúdo; arquivos legados (sem hash) usam data e tamanho.
+    """
+    caminho = armazenamento_audio.path(nome)
+    estado = os.stat(caminho)
+    tamanho = estado.st_size
+    tipo = mimetypes.guess_type(nome)[0] or 'application/octet-stream'
+    etag = f'"{etag}"' if etag else f'"{int(estado.st_mtime)}-{tamanho}"'
+
+    if request.headers.get('If-None-Match') == etag:
+        resposta = HttpResponse(status=304)
+    elif settings.AUDIO_SENDFILE_CABECALHO:
+        resposta = HttpResponse(content_type=tipo)
+        if settings.AUDIO_SENDFILE_CABECALHO.lower() == 'x-sendfile':
+            resposta['X-Sendfile'] = caminho  # Apache/Lighttpd: caminho no disco
+        else:
+            resposta[settings.AUDIO_SENDFILE_CABECALHO] = settings.AUDIO_SENDFILE_PREFIXO + nome  # Nginx: location interna
+    else:
+        try:
+            intervalo = interpretar_range(request.headers.get('Range'), tamanho)
+        except RangeInvalido:
+            resposta = HttpResponse(status=416)
+            resposta['Content-Range'] = f'bytes */{tamanho}'
+            return resposta
+        if intervalo and request.headers.get('If-Range', etag) != etag:
+            intervalo = None  # O cliente tem uma versão antiga guardada: manda o arquivo inteiro
+
+        if intervalo is None:
+            resposta = FileResponse(open(caminho, 'rb'), content_type=tipo)
+        else:
+            inicio, fim = intervalo
+            corpo = _ler_intervalo(caminho, inicio, fim) if request.method != 'HEAD' else []
+            resposta = StreamingHttpResponse(corpo, status=206, content_type=tipo)
+            resposta['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+            resposta['Content-Length'] = fim - inicio + 1
+
+    resposta['Accept-Ranges'] = 'bytes'
+    resposta['ETag'] = etag
+    resposta['Last-Modified'] = http_date(estado.st_mtime)
+    # O conteúdo de um nome endereçado por hash nunca muda
+    resposta['Cache-Control'] = f'private, max-age={settings.AUDIO_CACHE_SEGUNDOS}'
+    return resposta
@@ -0,0 +1,84 @@
+# core/signals.py
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import cache_ia
+from .indice_glossario import EntradaGlossario, indice_glossario
+from .models import ContribuicaoReuniao, EstatisticaReunioes, GlossarioCultural, ReuniaoAcessivel
+
+
+@receiver([post_save, post_delete], sender=GlossarioCultural)
+def glossario_alterado(sender, instance, **kwargs):
+    """
+    Qualquer mudança no glossário muda a versão usada na chave do cache do Tradutor Cultural
+    e é aplicada no índice de termos em memória (sem reconsultar a tabela).
+    """
+    removido = kwargs.get('signal') is post_delete
+    entrada = None if removido else EntradaGlossario(instance.pk, instance.termo_tecnico, instance.explicacao_simples)
+    pk = instance.pk
+
+    def aplicar():
+        indice_glossario.aplicar_alteracao(cache_ia.nova_versao_glossario(), pk, entrada)
+
+    # Só depois do commit: um rollback não pode deixar o índice diferente do banco
+    transaction.on_commit(aplicar)
+
+
+@receiver(pre_save, sender=ReuniaoAcessivel)
+def reuniao_antes_de_salvar(sender, instance, **kwargs):
+    # Instância montada sem passar pelo banco (ou com status adiado): busca o estado gravado
+    if instance.pk and getattr(instance, '_estado_salvo', None) is None:
+        instance._estado_salvo = (
+            ReuniaoAcessivel.objects.filter(pk=instance.pk).values_list('data_reuniao', 'status_ia').first()
+        )
+
+
+@receiver(post_save, sender=ReuniaoAcessivel)
+def reuniao_salva(sender, instance, created, update_fields=None, **kwargs):
+    """Mantém os contadores do dashboard (EstatisticaReunioes) a cada mudança de mês/status."""
+    antes = None if created else instance._estado_salvo
+    depois = (instance.data_reuniao, instance.status_ia)
+    if antes is not None and update_fields is not None:
+        # Só os campos listados foram gravados; o resto continua como estava no banco
+        depois = (
+            instance.data_reuniao if 'data_reuniao' in update_fields else antes[0],
+            instance.status_ia if 'status_ia' in update_fields else antes[1],
+        )
+    EstatisticaReunioes.registrar_transicao(antes, depois)
+    instance._estado_salvo = depois
+
+
+@receiver(m2m_changed, sender=ReuniaoAcessivel.participantes.through)
+def participantes_alterados(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Adicionar/remover participantes não passa pelo save() da reunião: atualiza updated_at
+    aqui para o ETag/Last-Modified e o cache de fragmento da página de detalhes mudarem.
+    update() direto: não dispara post_save (os contadores do dashboard não mudam).
+    """
+    if reverse and action == 'pre_clear':
+        # clear() pelo lado do usuário não informa quais reuniões perdeu: guarda antes
+        instance._reunioes_antes_do_clear = list(instance.reunioes.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        pks = [instance.pk]
+    elif action == 'post_clear':
+        pks = getattr(instance, '_reunioes_antes_do_clear', [])
+    else:
+        pks = pk_set or []
+    ReuniaoAcessivel.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=ReuniaoAcessivel)
+def reuniao_removida(sender, instance, **kwargs):
+    antes = getattr(instance, '_estado_salvo', None) or (instance.data_reuniao, instance.status_ia)
+    EstatisticaReunioes.registrar_transicao(antes, None)
+
+
+@receiver(pre_delete, sender=ReuniaoAcessivel)
+def reuniao_sendo_removida(sender, instance, **kwargs):
+    """Desfaz a parcela da reunião nos agregados de participação antes das contribuições irem em cascata."""
+    ContribuicaoReuniao.sincronizar(instance, remover=True)
@@ -0,0 +1,126 @@
+# core/storage.py
+
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+TAMANHO_BLOCO_HASH = 1024 * 1024
+
+
+def calcular_sha256(conteudo):
+    """Calcula o SHA-256 de um File do Django lendo em blocos (sem carregar tudo na memória)."""
+    hash_sha256 = hashlib.sha256()
+    if hasattr(conteudo, 'seek'):
+        conteudo.seek(0)
+    for bloco in conteudo.chunks(TAMANHO_BLOCO_HASH):
+        hash_sha256.update(bloco)
+    if hasattr(conteudo, 'seek'):
+        conteudo.seek(0)
+    return hash_sha256.hexdigest()
+
+
+class ArmazenamentoPorConteudo(FileSystemStorage):
+    """
+    Storage endereçado por conteúdo (Content-Addressed Storage).
+    O arquivo é gravado em <pasta do upload_to>/ab/cd/<sha256>.<ext>, então
+    dois uploads com os mesmos bytes apontam para o mesmo arquivo no disco.
+    """
+
+    def caminho_para_hash(self, pasta, sha256, extensao):
+        # Shard em dois níveis para não acumular milhares de arquivos no mesmo diretório
+        return os.path.join(pasta, sha256[:2], sha256[2:4], f"{sha256}{extensao.lower()}")
+
+    @staticmethod
+    def hash_do_caminho(nome):
+        """Extrai o SHA-256 de um caminho gerado por este storage ('' se for um caminho legado)."""
+        base = os.path.splitext(os.path.basename(nome or ''))[0]
+        if len(base) == 64 and all(c in '0123456789abcdef' for c in base):
+            return base
+        return ''
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            from django.core.files import File
+            content = File(content, name)
+
+        # Os upload handlers abaixo já calculam o hash enquanto o arquivo chega
+        sha256 = getattr(content, 'sha256', None) or calcular_sha256(content)
+        pasta, nome_original = os.path.split(name)
+        destino = self.caminho_para_hash(pasta, sha256, os.path.splitext(nome_original)[1])
+
+        if self.exists(destino):
+            self.tocar(destino)
+            return destino
+
+        salvo = self._save(destino, content)
+        if salvo != destino:
+            # Corrida: outro processo gravou o mesmo conteúdo entre o exists() e o _save()
+            self.delete(salvo)
+            self.tocar(destino)
+        return destino
+
+    def tocar(self, nome):
+        """
+        Atualiza o mtime de um arquivo reaproveitado. O limpar_audios_orfaos só apaga arquivos
+        antigos: sem isto, um áudio velho que acabou de ganhar uma reunião nova (ainda fora da
+        lista de referenciados que ele leu) seria removido.
+        """
+        try:
+            os.utime(self.path(nome))
+        except FileNotFoundError:
+            pass
+
+    def adotar(self, nome_local, pasta, extensao, sha256):
+        """
+        Move um arquivo que já está dentro deste storage (ex: upload em blocos concluído)
+        para o seu caminho endereçado pelo hash. É um rename: os bytes não são copiados.
+        Retorna: o nome final no storage.
+        """
+        destino = self.caminho_para_hash(pasta, sha256, extensao)
+        if self.exists(destino):
+            self.delete(nome_local)  # Mesmo conteúdo já armazenado
+            self.tocar(destino)
+            return destino
+
+        caminho_destino = self.path(destino)
+        os.makedirs(os.path.dirname(caminho_destino), exist_ok=True)
+        os.replace(self.path(nome_local), caminho_destino)
+        if self.file_permissions_mode is not None:
+            os.chmod(caminho_destino, self.file_permissions_mode)
+        return destino
+
+
+class HashSHA256Mixin:
+    """Calcula o SHA-256 do upload bloco a bloco, enquanto ele é recebido."""
+
+    def new_file(self, *args, **kwargs):
+        self.hash_sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        resultado = super().receive_data_chunk(raw_data, start)
+        if resultado is None:
+            # Este handler consumiu o bloco (os seguintes não o verão)
+            self.hash_sha256.update(raw_data)
+        return resultado
+
+    def file_complete(self, file_size):
+        arquivo = super().file_complete(file_size)
+        if arquivo is not None:
+            arquivo.sha256 = self.hash_sha256.hexdigest()
+        return arquivo
+
+
+class HashMemoryFileUploadHandler(HashSHA256Mixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashTemporaryFileUploadHandler(HashSHA256Mixin, TemporaryFileUploadHandler):
+    pass
+
+
+armazenamento_audio = ArmazenamentoPorConteudo()
@@ -0,0 +1,315 @@
+# core/tasks.py
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cliente_ia import ErroIATransitorio, cliente_ia
+from .metricas import ETAPA_SEGUNDOS, REUNIOES_PROCESSADAS
+from .models import ConteudoReuniao, ContribuicaoReuniao, EstatisticaReunioes, ReuniaoAcessivel, SegmentoTranscricao
+from .services import IAService
+
+logger = logging.getLogger(__name__)
+
+# mensagem_erro aparece na página da reunião: texto fixo; a exceção (com traceback) vai para o log
+MENSAGEM_NOVA_TENTATIVA = "A IA está indisponível no momento; o processamento será repetido automaticamente."
+MENSAGEM_ERRO = "Não foi possível processar esta reunião."
+
+
+def usar_transacoes_imediatas(alias=DEFAULT_DB_ALIAS):
+    """
+    Para processos com vários workers em threads (processar_reunioes, importar_reunioes) no SQLite:
+    cada transação já começa com o lock de escrita (BEGIN IMMEDIATE) e espera a vez, em vez de
+    falhar com "database is locked" quando uma transação que leu tenta escrever enquanto outra thread escreve.
+    Vale só para o processo que chama: o servidor web continua com o modo padrão.
+    """
+    conexao = connections[alias]
+    if conexao.vendor != 'sqlite':
+        return
+    # settings_dict é compartilhado pelas conexões de todas as threads e lido ao conectar
+    opcoes = conexao.settings_dict.setdefault('OPTIONS', {})
+    opcoes.setdefault('transaction_mode', 'IMMEDIATE')
+    opcoes.setdefault('timeout', settings.REUNIAO_WORKER_SQLITE_TIMEOUT)
+    conexao.close()
+
+
+class Batimento:
+    """
+    Enquanto o worker processa uma reunião, renova processamento_iniciado_em a cada
+    REUNIAO_WORKER_BATIMENTO segundos (numa thread): liberar_travadas só devolve para a fila
+    uma reunião cujo worker parou de dar sinal, por mais longo que seja o processamento.
+    O último valor gravado é a posse da reunião: se ela foi liberada (e talvez reivindicada
+    por outro worker), a renovação condicional não encontra a linha e o batimento para.
+    """
+
+    def __init__(self, reuniao, intervalo=None):
+        self.reuniao = reuniao
+        self.posse = reuniao.processamento_iniciado_em
+        self.intervalo = settings.REUNIAO_WORKER_BATIMENTO if intervalo is None else intervalo
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._rodar, name=f"batimento-{reuniao.pk}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._parar.set()
+        self._thread.join()
+
+    def renovar(self):
+        """
+        Renova a posse com um UPDATE condicional (dentro de uma transação, a linha fica travada até o commit).
+        Retorna: True se a reunião continua com este worker.
+        """
+        agora = timezone.now()
+        renovada = ReuniaoAcessivel.objects.filter(
+            pk=self.reuniao.pk, status_ia='PROCESSANDO', processamento_iniciado_em=self.posse,
+        ).update(processamento_iniciado_em=agora)
+        if renovada:
+            self.posse = agora
+        return bool(renovada)
+
+    def _rodar(self):
+        try:
+            while not self._parar.wait(self.intervalo):
+                if not self.renovar():
+                    logger.warning("Reunião %s não está mais com este worker; batimento encerrado.", self.reuniao.pk)
+                    return
+        except Exception:
+            # Sem batimento a reunião pode voltar para a fila; o save final confere a posse de novo
+            logger.exception("Falha no batimento da reunião %s.", self.reuniao.pk)
+        finally:
+            connection.close()
+
+
+class FilaReunioes:
+    """
+    Fila de processamento apoiada no próprio banco de dados.
+    Cada ReuniaoAcessivel em 'PENDENTE' é um job; os workers
+    (python manage.py processar_reunioes) reivindicam as linhas com lock,
+    então vários processos podem rodar em paralelo sem pegar a mesma reunião.
+    """
+
+    @staticmethod
+    def reivindicar_proxima(pks=None):
+        """
+        Reivindica a reunião pendente mais antiga e a marca como 'PROCESSANDO'.
+        Reuniões esperando para tentar de novo (processar_apos no futuro) ficam de fora.
+        `pks`: restringe a fila a estas reuniões (ex: as de uma importação em lote).
+        Retorna: a ReuniaoAcessivel reivindicada ou None se a fila estiver vazia.
+        """
+        with transaction.atomic():
+            # No PostgreSQL o SKIP LOCKED faz cada worker pular linhas já travadas por outro.
+            # No SQLite o select_for_update é ignorado, por isso o UPDATE condicional abaixo
+            # é quem garante que só um worker ganha a reunião.
+            candidatas = (
+                ReuniaoAcessivel.objects
+                .select_for_update(skip_locked=True)
+                .filter(status_ia='PENDENTE')
+                .filter(Q(processar_apos__isnull=True) | Q(processar_apos__lte=timezone.now()))
+                .order_by('created_at')
+            )
+            if pks is not None:
+                candidatas = candidatas.filter(pk__in=pks)
+            for pk in list(candidatas.values_list('pk', flat=True)[:5]):
+                reivindicada = ReuniaoAcessivel.objects.filter(pk=pk, status_ia='PENDENTE').update(
+                    status_ia='PROCESSANDO',
+                    processamento_iniciado_em=timezone.now(),
+                    processar_apos=None,
+                    updated_at=timezone.now(),
+                )
+                if reivindicada:
+                    reuniao = ReuniaoAcessivel.objects.get(pk=pk)
+                    # update() não dispara signals: os contadores do dashboard são ajustados aqui
+                    EstatisticaReunioes.registrar_transicao((reuniao.data_reuniao, 'PENDENTE'), (reuniao.data_reuniao, 'PROCESSANDO'))
+                    return reuniao
+        return None
+
+    @staticmethod
+    def liberar_travadas(pks=None, timeout=None):
+        """
+        Devolve para a fila reuniões que ficaram em 'PROCESSANDO' além do limite
+        (ex: o worker morreu no meio). Depois de esgotar as tentativas, marca como 'ERRO'.
+        `pks`/`timeout`: só estas reuniões, com outro limite em segundos (0 = todas as em
+        processamento; só quando se sabe que nenhum worker está com elas).
+        Retorna: quantidade de reuniões liberadas.
+        """
+        timeout = settings.REUNIAO_WORKER_TIMEOUT if timeout is None else timeout
+        limite = timezone.now() - timedelta(seconds=timeout)
+        travadas = ReuniaoAcessivel.objects.filter(status_ia='PROCESSANDO', processamento_iniciado_em__lt=limite)
+        if pks is not None:
+            travadas = travadas.filter(pk__in=pks)
+        travadas = travadas.values_list('pk', 'data_reuniao', 'tentativas_processamento')
+
+        liberadas = 0
+        for pk, data_reuniao, tentativas in list(travadas):
+            if tentativas >= settings.REUNIAO_WORKER_MAX_TENTATIVAS:
+                novo_status = 'ERRO'
+                campos = {'mensagem_erro': 'Processamento excedeu o tempo limite.'}
+            else:
+                novo_status = 'PENDENTE'
+                campos = {'processamento_iniciado_em': None}
+            with transaction.atomic():
+                # Condicional: outro worker pode ter liberado ou concluído a mesma reunião
+                if ReuniaoAcessivel.objects.filter(pk=pk, status_ia='PROCESSANDO').update(
+                    status_ia=novo_status, updated_at=timezone.now(), **campos
+                ):
+                    EstatisticaReunioes.registrar_transicao((data_reuniao, 'PROCESSANDO'), (data_reuniao, novo_status))
+                    liberadas += 1
+        return liberadas
+
+    @staticmethod
+    def espera_para_tentar_de_novo(tentativas, erro):
+        """Segundos até a reunião voltar a ser reivindicada depois de uma falha passageira da IA."""
+        espera = min(settings.REUNIAO_WORKER_ESPERA_MAXIMA, settings.REUNIAO_WORKER_ESPERA_BASE * 2 ** (tentativas - 1))
+        return max(espera, erro.tentar_novamente_em or 0)
+
+    @staticmethod
+    def transcricao_existente(reuniao):
+        """
+        Procura outra reunião com o mesmo hash de áudio já transcrita.
+        Retorna: (texto, segmentos, picos da forma de onda) copiados dela ou None se o áudio é inédito.
+        """
+        if not reuniao.hash_audio:
+            return None
+        # Os textos ficam comprimidos (não dá para filtrar pelo conteúdo no SQL): confere os candidatos aqui
+        candidatas = (
+            ConteudoReuniao.objects
+            .filter(reuniao__hash_audio=reuniao.hash_audio, reuniao__status_ia='CONCLUIDO')
+            .exclude(reuniao=reuniao.pk)
+            .only('pk', 'transcricao', 'picos')[:5]
+        )
+        for conteudo in candidatas:
+            # 'Erro:' só aparece em reuniões antigas, de quando a transcrição devolvia a falha como texto
+            if conteudo.transcricao and not conteudo.transcricao.startswith('Erro:'):
+                return conteudo.transcricao, SegmentoTranscricao.como_dicts(conteudo.pk), bytes(conteudo.picos)
+        return None
+
+    @classmethod
+    @ETAPA_SEGUNDOS.medir(etapa='processamento')
+    def processar(cls, reuniao):
+        """
+        Executa o pipeline de IA (Whisper + GPT) para uma reunião já reivindicada.
+        Falha transitória da IA (rede, limite de taxa, disjuntor aberto) devolve a reunião
+        para a fila enquanto houver tentativas; as demais falhas marcam 'ERRO'.
+        Se a reunião deixou de ser deste worker no meio do caminho (liberada por falta de
+        batimento), o resultado é descartado: o outro worker é quem grava o status.
+        """
+        reuniao.tentativas_processamento += 1
+        reuniao.save(update_fields=['tentativas_processamento', 'updated_at'])
+
+        with Batimento(reuniao) as batimento:
+            segmentos = cls._executar_pipeline(reuniao)
+
+        with transaction.atomic():
+            # Posse conferida e linha travada até o commit: o status só sai de 'PROCESSANDO'
+            # uma vez, e os contadores de EstatisticaReunioes (post_save) não contam duas vezes
+            if not batimento.renovar():
+                logger.warning("Reunião %s foi liberada durante o processamento; resultado descartado.", reuniao.pk)
+                return reuniao
+            reuniao.save()
+            if segmentos is not None:
+                SegmentoTranscricao.substituir(reuniao, segmentos)
+            # Autoria e participação por pessoa/semana/departamento (só conta reunião CONCLUIDO)
+            ContribuicaoReuniao.sincronizar(reuniao)
+        REUNIOES_PROCESSADAS.incrementar(status=reuniao.status_ia)
+        return reuniao
+
+    @classmethod
+    def _executar_pipeline(cls, reuniao):
+        """
+        Preenche a reunião (em memória) com a transcrição e a ata, ou com o status de erro.
+        Retorna: os segmentos da transcrição ou None se falhou.
+        """
+        try:
+            # 1. Nomes dos participantes: "Pedro.Henrique, Carlos.Junior, Admin"
+            nomes_participantes = ", ".join([p.username for p in reuniao.participantes.all()])
+
+            # 2. Áudio preparado (mono 16 kHz, sem silêncios longos) e transcrito com timestamps (Whisper).
+            #    Se o mesmo áudio já foi transcrito, reaproveita.
+            existente = cls.transcricao_existente(reuniao)
+            if existente is None:
+                texto, segmentos, relatorio = IAService.transcrever_reuniao_segmentos(reuniao.arquivo_audio.path)
+                if relatorio is not None:
+                    reuniao.relatorio_audio = relatorio.como_dict()
+                    reuniao.picos_audio = relatorio.picos
+            else:
+                texto, segmentos, reuniao.picos_audio = existente
+            reuniao.transcricao_completa = texto
+
+            # 3. Ata com contexto dos participantes, em JSON (o HTML é montado pelo template).
+            #    Limpa a ata em HTML de um processamento antigo.
+            reuniao.pontos_destaque = IAService.gerar_ata_inteligente(texto, nomes_participantes)
+            reuniao.resumo_executivo = ''
+
+            reuniao.status_ia = 'CONCLUIDO'
+            reuniao.mensagem_erro = ''
+            return segmentos
+        except ErroIATransitorio as e:
+            if reuniao.tentativas_processamento < settings.REUNIAO_WORKER_MAX_TENTATIVAS:
+                espera = cls.espera_para_tentar_de_novo(reuniao.tentativas_processamento, e)
+                logger.warning("IA indisponível para a reunião %s, volta para a fila em %ss: %s", reuniao.pk, espera, e)
+                reuniao.status_ia = 'PENDENTE'
+                reuniao.mensagem_erro = MENSAGEM_NOVA_TENTATIVA
+                reuniao.processamento_iniciado_em = None
+                # Sem espera, o próximo worker livre pegaria a reunião de volta na hora
+                reuniao.processar_apos = timezone.now() + timedelta(seconds=espera)
+            else:
+                logger.exception("Erro no processamento da reunião %s: %s", reuniao.pk, e)
+                reuniao.status_ia = 'ERRO'
+                reuniao.mensagem_erro = MENSAGEM_ERRO
+        except Exception as e:
+            logger.exception("Erro no processamento da reunião %s: %s", reuniao.pk, e)
+            reuniao.status_ia = 'ERRO'
+            reuniao.mensagem_erro = MENSAGEM_ERRO
+        return None
+
+    @classmethod
+    def executar_worker(cls, uma_vez=False, intervalo=None, parar=None, pks=None):
+        """
+        Laço principal de um worker: reivindica, processa e repete.
+        `parar` é um threading.Event opcional para encerrar o laço de fora.
+        `pks`: processa só estas reuniões e encerra quando não houver mais nenhuma pendente
+        (esperando o disjuntor reabrir e as que aguardam processar_apos, ao contrário de `uma_vez`).
+        Retorna: quantidade de reuniões processadas.
+        """
+        intervalo = settings.REUNIAO_WORKER_INTERVALO if intervalo is None else intervalo
+        processadas = 0
+
+        while not (parar and parar.is_set()):
+            close_old_connections()
+            cls.liberar_travadas()
+
+            # Disjuntor aberto: reivindicar agora só faria a reunião falhar e voltar para a fila
+            pausa = cliente_ia.disjuntor.segundos_para_reabrir()
+            if pausa > 0:
+                if uma_vez:
+                    break
+                if parar:
+                    parar.wait(pausa)
+                else:
+                    time.sleep(pausa)
+                continue
+
+            reuniao = cls.reivindicar_proxima(pks)
+            if reuniao is None:
+                if uma_vez or (pks is not None and not ReuniaoAcessivel.objects.filter(pk__in=pks, status_ia='PENDENTE').exists()):
+                    break
+                if parar:
+                    parar.wait(intervalo)
+                else:
+                    time.sleep(intervalo)
+                continue
+
+            cls.processar(reuniao)
+            processadas += 1
+
+        close_old_connections()
+        return processadas
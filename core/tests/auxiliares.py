@@ -0,0 +1,83 @@
+# core/tests/auxiliares.py
+
+import shutil
+import tempfile
+import threading
+from datetime import datetime, timezone as tz
+
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+
+from ..models import ReuniaoAcessivel
+from ..tasks import usar_transacoes_imediatas
+
+DATA_PADRAO = datetime(2024, 3, 12, 14, 0, tzinfo=tz.utc)
+
+# Cache da IA em memória: threads dos testes sem disputar o banco pela tabela cache_ia
+CACHES_LOCAIS = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'ia': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'testes-ia'},
+}
+
+
+def criar_reuniao(**campos):
+    campos.setdefault('titulo', 'Reunião de teste')
+    campos.setdefault('data_reuniao', DATA_PADRAO)
+    return ReuniaoAcessivel.objects.create(**campos)
+
+
+class MidiaTemporariaMixin:
+    """MEDIA_ROOT numa pasta temporária, apagada no fim de cada teste."""
+
+    def setUp(self):
+        super().setUp()
+        pasta = tempfile.mkdtemp(prefix='teste_midia_')
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        configuracao = override_settings(MEDIA_ROOT=pasta)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.midia = pasta
+
+
+def em_paralelo(funcao, threads):
+    """
+    Executa `funcao(indice)` em `threads` threads que começam juntas (barreira).
+    Retorna: (resultados na ordem dos índices, exceções levantadas).
+    """
+    barreira = threading.Barrier(threads)
+    resultados = [None] * threads
+    erros = []
+
+    def executar(indice):
+        try:
+            barreira.wait()
+            resultados[indice] = funcao(indice)
+        except Exception as e:
+            erros.append(e)
+        finally:
+            connection.close()
+
+    trabalhadores = [threading.Thread(target=executar, args=(i,)) for i in range(threads)]
+    for trabalhador in trabalhadores:
+        trabalhador.start()
+    for trabalhador in trabalhadores:
+        trabalhador.join()
+    return resultados, erros
+
+
+class TesteConcorrente(TransactionTestCase):
+    """
+    Base dos testes com várias threads no banco. As transações começam como nos workers
+    (BEGIN IMMEDIATE no SQLite, ver usar_transacoes_imediatas); o modo é restaurado no fim.
+    """
+
+    def setUp(self):
+        super().setUp()
+        opcoes = dict(connection.settings_dict['OPTIONS'])
+        self.addCleanup(self._restaurar_opcoes, opcoes)
+        usar_transacoes_imediatas()
+
+    @staticmethod
+    def _restaurar_opcoes(opcoes):
+        connection.settings_dict['OPTIONS'] = opcoes
+        connection.close()
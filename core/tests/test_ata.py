@@ -0,0 +1,226 @@
+# core/tests/test_ata.py
+
+import json
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..cache import cache_ia
+from ..cliente_ia import ErroIARequisicao, cliente_ia
+from ..models import ReuniaoAcessivel
+from ..services import IAService
+from ..tokens import dividir_por_tokens, estimar_tokens
+from .auxiliares import CACHES_LOCAIS, criar_reuniao
+
+FRASES = [f"Frase número {i} da reunião de planejamento, com algum conteúdo." for i in range(40)]
+
+
+class ClienteFalso:
+    """Faz o papel do cliente da OpenAI em cliente_ia.chamar: guarda os pedidos e responde pelo formato pedido."""
+
+    def __init__(self, respostas):
+        self.respostas = respostas  # nome do json_schema -> função(pedido) -> conteúdo
+        self.pedidos = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **pedido):
+        self.pedidos.append(pedido)
+        conteudo = self.respostas[pedido['response_format']['json_schema']['name']](pedido)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=conteudo), finish_reason='stop')])
+
+    def chamar(self, operacao, funcao, tokens=0):
+        return funcao(self)
+
+    def operacoes(self):
+        return [pedido['response_format']['json_schema']['name'] for pedido in self.pedidos]
+
+
+def ata(**campos):
+    return json.dumps({'resumo': '', 'decisoes': [], 'autoria': [], 'apropriacoes': [], 'atencao': [], **campos})
+
+
+class DividirPorTokensTests(SimpleTestCase):
+
+    def test_janelas_respeitam_o_limite_e_o_fim_das_frases(self):
+        texto = " ".join(FRASES)
+        limite = estimar_tokens(" ".join(FRASES[:5]))
+
+        janelas = dividir_por_tokens(texto, limite)
+
+        self.assertGreater(len(janelas), 5)
+        for janela in janelas:
+            self.assertLessEqual(estimar_tokens(janela), limite)
+            self.assertTrue(janela.endswith('conteúdo.'))
+        # Nada se perde nem se repete: as janelas, em ordem, refazem o texto
+        self.assertEqual(" ".join(janelas), texto)
+
+    def test_frase_maior_que_o_limite_vira_janelas_proprias(self):
+        longa = " ".join(["palavra"] * 200) + "."
+        janelas = dividir_por_tokens(f"Antes. {longa} Depois.", 50)
+
+        self.assertEqual(janelas[0], "Antes.")
+        self.assertEqual(janelas[-1], "Depois.")
+        self.assertGreater(len(janelas), 3)
+        self.assertEqual("".join(janelas[1:-1]), longa)  # Cortada por caracteres, sem perder nada
+
+    def test_pedacos_da_frase_longa_cabem_no_limite(self):
+        longa = "x" * 1000
+        for limite in (1, 2, 3, 7, 50, 101):
+            with self.subTest(limite=limite):
+                pedacos = dividir_por_tokens(longa, limite)
+                self.assertEqual("".join(pedacos), longa)
+                for pedaco in pedacos:
+                    self.assertLessEqual(estimar_tokens(pedaco), limite)
+
+    def test_janelas_se_sobrepoem_dentro_do_limite(self):
+        texto = " ".join(FRASES)
+        tokens_frase = max(estimar_tokens(frase) for frase in FRASES)
+        limite = tokens_frase * 5
+
+        janelas = dividir_por_tokens(texto, limite, sobreposicao_tokens=tokens_frase * 2)
+
+        sem_sobreposicao = dividir_por_tokens(texto, limite)
+        self.assertGreater(len(janelas), len(sem_sobreposicao))
+        for anterior, janela in zip(janelas, janelas[1:]):
+            self.assertLessEqual(estimar_tokens(janela), limite)
+            # As duas últimas frases da janela anterior abrem a seguinte
+            self.assertTrue(janela.startswith(". ".join(anterior.split(". ")[-2:])))
+        self.assertTrue(janelas[0].startswith(FRASES[0]))
+        self.assertTrue(janelas[-1].endswith(FRASES[-1]))
+
+    def test_sobreposicao_maior_que_o_limite_nao_repete_janelas(self):
+        texto = " ".join(FRASES)
+        limite = estimar_tokens(FRASES[0]) * 3
+
+        janelas = dividir_por_tokens(texto, limite, sobreposicao_tokens=limite * 2)
+
+        # Cada janela traz ao menos uma frase nova, e nenhuma passa do limite
+        self.assertEqual(len(janelas), len(FRASES) - 2)
+        for indice, janela in enumerate(janelas):
+            self.assertLessEqual(estimar_tokens(janela), limite)
+            self.assertTrue(janela.endswith(FRASES[indice + 2]))
+
+    def test_texto_curto_ou_vazio(self):
+        self.assertEqual(dividir_por_tokens("Só uma frase.", 100), ["Só uma frase."])
+        self.assertEqual(dividir_por_tokens("  \n ", 100), [])
+
+
+@override_settings(CACHES=CACHES_LOCAIS, ATA_MAX_THREADS=3)
+class AtaMapReduceTests(SimpleTestCase):
+
+    def setUp(self):
+        caches['ia'].clear()
+        cache_ia.limpar_local()
+        self.addCleanup(cache_ia.limpar_local)
+        self.cliente = ClienteFalso({
+            'ata_parcial': lambda pedido: json.dumps({
+                'decisoes': [pedido['messages'][1]['content'].split()[-1]],  # A última palavra de cada janela
+                'autoria': [], 'apropriacoes': [], 'atencao': [],
+            }),
+            'ata': lambda pedido: ata(resumo='Ata final', decisoes=['Adiar o deploy']),
+        })
+        chamar = mock.patch.object(cliente_ia, 'chamar', side_effect=self.cliente.chamar)
+        chamar.start()
+        self.addCleanup(chamar.stop)
+
+    def test_transcricao_curta_vai_numa_chamada_so(self):
+        resultado = IAService.gerar_ata_inteligente("Ana sugeriu adiar o deploy.", "Ana, Bia")
+
+        self.assertEqual(self.cliente.operacoes(), ['ata'])
+        self.assertEqual(self.cliente.pedidos[0]['messages'][1]['content'], "Transcrição:\n\nAna sugeriu adiar o deploy.")
+        self.assertIn("Ana, Bia", self.cliente.pedidos[0]['messages'][0]['content'])
+        self.assertEqual(resultado['decisoes'], ['Adiar o deploy'])
+
+    def test_transcricao_longa_junta_as_parciais_em_ordem(self):
+        texto = " ".join(FRASES)
+        limite = estimar_tokens(" ".join(FRASES[:10]))
+        with override_settings(ATA_TOKENS_POR_JANELA=limite, ATA_SOBREPOSICAO_TOKENS=limite // 5):
+            janelas = dividir_por_tokens(texto, limite, sobreposicao_tokens=limite // 5)
+            resultado = IAService.gerar_ata_inteligente(texto, "Ana")
+
+        self.assertGreater(len(janelas), 2)
+        self.assertEqual(self.cliente.operacoes(), ['ata_parcial'] * len(janelas) + ['ata'])
+        reduce = self.cliente.pedidos[-1]['messages'][1]['content']
+        parciais = json.loads(reduce[reduce.index('['):])
+        self.assertEqual([p['decisoes'] for p in parciais], [[janela.split()[-1]] for janela in janelas])
+        self.assertEqual(resultado['resumo'], 'Ata final')
+
+    def test_resultado_fica_em_cache(self):
+        IAService.gerar_ata_inteligente("Ana sugeriu adiar o deploy.", "Ana")
+        IAService.gerar_ata_inteligente("Ana  sugeriu adiar o deploy. ", "Ana")
+
+        self.assertEqual(self.cliente.operacoes(), ['ata'])
+
+
+def resposta_ata(conteudo, finish_reason='stop', refusal=None):
+    mensagem = SimpleNamespace(content=conteudo, refusal=refusal)
+    return SimpleNamespace(choices=[SimpleNamespace(message=mensagem, finish_reason=finish_reason)])
+
+
+class LerAtaTests(SimpleTestCase):
+
+    def test_recusa_e_json_cortado_viram_erro(self):
+        casos = [
+            (resposta_ata(None, refusal='Não posso ajudar com isso.'), 'Não posso ajudar'),
+            (resposta_ata('{"resumo": "Reunião sobre o dep', finish_reason='length'), 'incompleta (length)'),
+        ]
+        for resposta, motivo in casos:
+            with self.subTest(motivo=motivo), self.assertRaises(ErroIARequisicao) as contexto:
+                IAService._ler_ata(resposta)
+            self.assertIn(motivo, str(contexto.exception))
+
+    def test_saida_fora_do_formato_e_normalizada(self):
+        resultado = IAService._ler_ata(resposta_ata(json.dumps({
+            'resumo': '  Planejamento do trimestre  ',
+            'decisoes': ['Adiar o deploy', '  ', 3],
+            'autoria': [
+                {'autor': 'Pedro', 'ideia': 'Mudar o layout', 'canal': 'Telepatia'},
+                {'autor': 'Ana'},  # sem ideia: descartada
+                'texto solto',
+            ],
+            'apropriacoes': [{'autor': 'Pedro', 'por': 'Carlos'}, {'por': 'Carlos', 'ideia': 'x'}],
+            'atencao': None,
+        })))
+
+        self.assertEqual(resultado, {
+            'resumo': 'Planejamento do trimestre',
+            'decisoes': ['Adiar o deploy', '3'],
+            'autoria': [{'autor': 'Pedro', 'ideia': 'Mudar o layout', 'canal': 'Voz'}],
+            'apropriacoes': [{'autor': 'Pedro', 'por': 'Carlos', 'ideia': ''}],
+            'atencao': [],
+        })
+
+
+class AtaNaPaginaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.reuniao = criar_reuniao(status_ia='CONCLUIDO', pontos_destaque={
+            'resumo': 'Resumo <script>alert(1)</script>', 'decisoes': ['Adiar o deploy'],
+            'autoria': [{'autor': 'Pedro', 'ideia': 'Mudar o layout', 'canal': 'Chat'}], 'atencao': [],
+        })
+        self.url = reverse('detalhe_reuniao', args=[self.reuniao.pk])
+
+    def test_ata_renderizada_com_escape(self):
+        resposta = self.client.get(self.url)
+
+        self.assertContains(resposta, 'Resumo &lt;script&gt;alert(1)&lt;/script&gt;')
+        self.assertContains(resposta, '<strong>Pedro</strong>: Mudar o layout', html=False)
+        self.assertNotContains(resposta, 'Análise de Comportamento')  # atencao vazia: seção omitida
+
+    def test_fragmento_em_cache_ate_o_proximo_save(self):
+        ReuniaoAcessivel.objects.filter(pk=self.reuniao.pk).update(updated_at=self.reuniao.updated_at - timedelta(hours=1))
+        self.client.get(self.url)
+        # update() não muda o updated_at: o fragmento continua o mesmo
+        ReuniaoAcessivel.objects.filter(pk=self.reuniao.pk).update(pontos_destaque={'resumo': 'Nova ata'})
+        self.assertNotContains(self.client.get(self.url), 'Nova ata')
+
+        ReuniaoAcessivel.objects.get(pk=self.reuniao.pk).save()
+
+        resposta = self.client.get(self.url)
+        self.assertContains(resposta, 'Nova ata')
+        self.assertNotContains(resposta, 'Adiar o deploy')
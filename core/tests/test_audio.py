@@ -0,0 +1,65 @@
+# core/tests/test_audio.py
+
+from django.test import SimpleTestCase
+
+from ..audio import MapaTempos, TrechoAudio
+from ..services import IAService
+
+# Gravação original de 20 s com silêncio em 0-2 s, 5-9 s e 12-15 s: ficam 3 blocos com fala
+# (início no preparado, início no original, duração)
+BLOCOS = [(0, 2000, 3000), (3000, 9000, 3000), (6000, 15000, 5000)]
+
+
+class MapaTemposTests(SimpleTestCase):
+
+    def setUp(self):
+        self.mapa = MapaTempos(BLOCOS)
+
+    def test_instante_vai_para_o_bloco_certo(self):
+        casos = {
+            0: 2000,       # silêncio inicial removido
+            2999: 4999,
+            3000: 9000,    # na emenda, já é o bloco seguinte
+            4500: 10500,
+            6000: 15000,
+            10999: 19999,
+        }
+        for preparado, original in casos.items():
+            with self.subTest(ms=preparado):
+                self.assertEqual(self.mapa.para_original(preparado), original)
+
+    def test_fora_do_audio_preparado_fica_na_borda(self):
+        self.assertEqual(self.mapa.para_original(-50), 2000)
+        self.assertEqual(self.mapa.para_original(12000), 20000)
+
+    def test_sem_blocos_nao_desloca(self):
+        self.assertEqual(MapaTempos([]).para_original(1234), 1234)
+        self.assertEqual(MapaTempos([]).partes_originais(1000, 4000), [(1000, 3000)])
+
+    def test_partes_originais_de_um_intervalo(self):
+        self.assertEqual(self.mapa.partes_originais(0, 11000), [(2000, 3000), (9000, 3000), (15000, 5000)])
+        self.assertEqual(self.mapa.partes_originais(2500, 7000), [(4500, 500), (9000, 3000), (15000, 1000)])
+        self.assertEqual(self.mapa.partes_originais(3000, 6000), [(9000, 3000)])
+        self.assertEqual(self.mapa.partes_originais(11000, 12000), [])
+
+    def test_duracoes_das_partes_somam_o_intervalo(self):
+        for inicio, fim in ((0, 11000), (1234, 9876), (2999, 3001)):
+            with self.subTest(intervalo=(inicio, fim)):
+                self.assertEqual(sum(d for _, d in self.mapa.partes_originais(inicio, fim)), fim - inicio)
+
+
+class TemposDosTrechosTests(SimpleTestCase):
+
+    def test_segmentos_do_whisper_voltam_para_a_gravacao_original(self):
+        # Segundo trecho do áudio preparado: começa em 4 s (que no original é 10 s)
+        trecho = TrechoAudio(1, 4.0, 11.0, '/tmp/trecho_0001.mp3', MapaTempos(BLOCOS))
+        segmentos = [
+            {'inicio': 0.0, 'fim': 1.5, 'texto': 'Bloco do meio.'},
+            {'inicio': 1.9, 'fim': 2.5, 'texto': 'Atravessa o silêncio removido.'},
+            {'inicio': 6.9994, 'fim': 7.0, 'texto': 'Fim.'},
+        ]
+
+        ajustados = IAService._ajustar_tempos(segmentos, trecho)
+
+        self.assertEqual([(s['inicio'], s['fim']) for s in ajustados], [(10.0, 11.5), (11.9, 15.5), (19.999, 20.0)])
+        self.assertEqual(segmentos[0]['inicio'], 0.0)  # Os originais (do cache) não mudam
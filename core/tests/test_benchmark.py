@@ -0,0 +1,73 @@
+# core/tests/test_benchmark.py
+
+from django.test import SimpleTestCase, override_settings
+
+from .. import benchmark
+from ..cliente_ia import cliente_ia
+from ..models import ReuniaoAcessivel
+from ..openai_falso import ConfiguracaoFalsa, ServidorOpenAIFalso
+from .auxiliares import CACHES_LOCAIS, TesteConcorrente
+
+
+def cenario(**numeros):
+    return {'requisicoes': 100, 'erros': 0, 'p50_ms': 100.0, 'p95_ms': 200.0, 'vazao': 50.0,
+            'rss_pico_mb': 100.0, 'consultas_media': 3.0, 'segundos': 2.0, **numeros}
+
+
+class CompararBaselineTests(SimpleTestCase):
+
+    def comparar(self, **numeros):
+        return benchmark.comparar({'cenarios': {'dashboard': cenario(**numeros)}}, {'cenarios': {'dashboard': cenario()}}, 0.3)
+
+    def test_dentro_da_tolerancia(self):
+        self.assertEqual(self.comparar(p95_ms=255.0, vazao=36.0, consultas_media=3.9), [])
+        # Poucos ms acima, mesmo passando da tolerância, é ruído
+        self.assertEqual(self.comparar(p50_ms=115.0), [])
+
+    def test_regressoes(self):
+        self.assertEqual(self.comparar(p95_ms=300.0, vazao=30.0, consultas_media=30.0, erros=2), [
+            'dashboard.p95_ms: 300.0 > 200.0 (+30%)',
+            'dashboard.vazao: 30.0 < 50.0 (-30%)',
+            'dashboard.consultas_media: 30.0 > 3.0 (+30%)',
+            'dashboard.erros: 2 > 0',
+        ])
+
+    def test_amostra_pequena_compara_o_tempo_total(self):
+        self.assertEqual(self.comparar(requisicoes=5, p95_ms=900.0, segundos=2.5), [])
+        self.assertEqual(self.comparar(requisicoes=5, segundos=3.0), ['dashboard.segundos: 3.0 > 2.0 (+30%)'])
+
+    def test_percentil_e_mediana(self):
+        self.assertEqual(benchmark.percentil([1, 2, 3, 4], 50), 2)
+        self.assertEqual(benchmark.percentil([1, 2, 3, 4], 99), 4)
+        self.assertEqual(benchmark.percentil([], 95), 0.0)
+        resultados = [benchmark.Resultado(p50_ms=p) for p in (10.0, 50.0, 20.0)]
+        self.assertEqual(benchmark.Resultado.mediana(resultados).p50_ms, 20.0)
+
+
+@override_settings(CACHES=CACHES_LOCAIS, IA_LIMITE_TOKENS_POR_MINUTO=0)
+class CenarioComServidorFalsoTests(TesteConcorrente):
+    """Uma rodada curta do benchmark contra o servidor falso: garante que ele continua rodando de ponta a ponta."""
+
+    def setUp(self):
+        super().setUp()
+        servidor = ServidorOpenAIFalso(ConfiguracaoFalsa(latencia_chat=0, semente=0))
+        self.url = servidor.__enter__().url
+        self.addCleanup(servidor.__exit__, None, None, None)
+        configuracao = override_settings(OPENAI_BASE_URL=self.url)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        cliente_ia.reiniciar()
+        self.addCleanup(cliente_ia.reiniciar)
+
+    def test_cenarios_de_carga(self):
+        usuarios = benchmark.popular_usuarios(3)
+        self.assertEqual(benchmark.popular_reunioes(20, usuarios, lote=7), 20)
+        self.assertEqual(benchmark.popular_glossario(10, lote=4), 10)
+        self.assertEqual(ReuniaoAcessivel.objects.count(), 20)
+
+        dashboard = benchmark.cenario_dashboard(4, 2)
+        feedback = benchmark.cenario_feedback(4, 2)
+
+        for resultado in (dashboard, feedback):
+            self.assertEqual((resultado.requisicoes, resultado.erros, resultado.erros_ia), (4, 0, 0))
+        self.assertGreater(dashboard.consultas_max, 0)  # Lidas do Server-Timing de cada resposta
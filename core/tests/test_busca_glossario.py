@@ -0,0 +1,94 @@
+# core/tests/test_busca_glossario.py
+
+from unittest import skipUnless
+
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import TestCase
+
+from ..busca_glossario import buscar_glossario
+from ..models import GlossarioCultural
+
+
+def termos(consulta):
+    return [item['termo_tecnico'] for item in buscar_glossario(consulta)[:50]]
+
+
+class BuscaGlossarioTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.budget = GlossarioCultural.objects.create(
+            termo_tecnico='Budget', explicacao_simples='Orçamento disponível para um projeto.', tags='Financeiro',
+        )
+        cls.churn = GlossarioCultural.objects.create(
+            termo_tecnico='Churn', explicacao_simples='Taxa de cancelamento de clientes; afeta o budget do ano.',
+            tags='Métricas',
+        )
+        cls.daily = GlossarioCultural.objects.create(
+            termo_tecnico='Daily', explicacao_simples='Reunião rápida diária da equipe.', tags='Ágil',
+        )
+
+    def test_prefixo_e_ranking_por_coluna(self):
+        # Termo pesa mais que a explicação
+        self.assertEqual(termos('budg'), ['Budget', 'Churn'])
+
+    def test_ignora_acentos(self):
+        self.assertEqual(termos('reuniao'), ['Daily'])
+        self.assertEqual(termos('ÁGIL'), ['Daily'])
+        self.assertEqual(termos('orcamento'), ['Budget'])
+
+    def test_todas_as_palavras_precisam_aparecer(self):
+        self.assertEqual(termos('taxa clientes'), ['Churn'])
+        self.assertEqual(termos('taxa equipe'), [])
+
+    def test_sintaxe_do_fts_e_neutralizada(self):
+        self.assertEqual(termos('"budget*)'), ['Budget', 'Churn'])
+        # Operadores viram palavras comuns (e precisam aparecer no texto)
+        self.assertEqual(termos('budget OR daily'), [])
+        self.assertEqual(termos('   '), [])
+
+    def test_destaque_escapa_html(self):
+        GlossarioCultural.objects.create(termo_tecnico='Deploy <b>', explicacao_simples='Publicar <script>x</script> em produção.')
+
+        item = buscar_glossario('deploy')[0]
+
+        self.assertEqual(item['termo_html'], '<mark>Deploy</mark> &lt;b&gt;')
+        self.assertNotIn('<script>', buscar_glossario('publicar')[0]['trecho_html'])
+
+    def test_pagina_com_count_e_fatias(self):
+        GlossarioCultural.objects.bulk_create(
+            GlossarioCultural(termo_tecnico=f'Sigla {i:02d}', explicacao_simples='Sigla interna.') for i in range(25)
+        )
+        pagina = Paginator(buscar_glossario('sigla'), 10).page(3)
+
+        self.assertEqual(pagina.paginator.count, 25)
+        self.assertEqual(len(pagina.object_list), 5)
+
+
+@skipUnless(connection.vendor == 'sqlite', "triggers do índice FTS5 (SQLite)")
+class IndiceFTSTests(TestCase):
+
+    def setUp(self):
+        self.termo = GlossarioCultural.objects.create(termo_tecnico='Roadmap', explicacao_simples='Plano de entregas.')
+
+    def test_update_reindexa(self):
+        self.termo.termo_tecnico = 'Backlog'
+        self.termo.save()
+
+        self.assertEqual(termos('roadmap'), [])
+        self.assertEqual(termos('backlog'), ['Backlog'])
+
+    def test_update_pelo_queryset_reindexa(self):
+        GlossarioCultural.objects.filter(pk=self.termo.pk).update(explicacao_simples='Lista priorizada.')
+
+        self.assertEqual(termos('entregas'), [])
+        self.assertEqual(termos('priorizada'), ['Roadmap'])
+
+    def test_delete_remove_do_indice(self):
+        self.termo.delete()
+
+        self.assertEqual(termos('roadmap'), [])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM core_glossario_fts")
+            self.assertEqual(cursor.fetchone()[0], 0)
@@ -0,0 +1,172 @@
+# core/tests/test_cache.py
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..cache import CacheIA, cache_ia, normalizar_entrada
+from ..cliente_ia import ErroIATransitorio, cliente_ia
+from ..models import GlossarioCultural
+from ..services import IAService
+from .auxiliares import CACHES_LOCAIS, em_paralelo
+
+
+@override_settings(CACHES=CACHES_LOCAIS, CACHE_IA_ESPERA_MAXIMA=5, CACHE_IA_INTERVALO_ESPERA=0.01)
+class CacheIATests(SimpleTestCase):
+
+    def setUp(self):
+        caches['ia'].clear()
+        self.cache = CacheIA(max_local=2, ttl=60)
+        self.chave = self.cache.chave('vies', 'texto', 'gpt-4o-mini', 0.2, 'v1')
+
+    def test_chave_ignora_espacos_e_forma_dos_acentos(self):
+        decomposto = 'reunião  de\n equipe'
+        self.assertEqual(normalizar_entrada(decomposto), 'reunião de equipe')
+        self.assertEqual(
+            self.cache.chave('vies', decomposto, 'm', 0, 'v'),
+            self.cache.chave('vies', ' reunião de equipe ', 'm', 0, 'v'),
+        )
+        self.assertNotEqual(self.cache.chave('vies', 'a', 'm', 0, 'v1'), self.cache.chave('vies', 'a', 'm', 0, 'v2'))
+
+    def test_lru_local_descarta_o_menos_usado(self):
+        for chave in ('ia:x:1', 'ia:x:2'):
+            self.cache.definir(chave, chave)
+        self.cache.obter('ia:x:1')
+        self.cache.definir('ia:x:3', 'ia:x:3')
+
+        self.assertEqual(list(self.cache._local), ['ia:x:1', 'ia:x:3'])
+        # Fora do LRU, ainda vem do cache compartilhado
+        self.assertEqual(self.cache.obter('ia:x:2'), 'ia:x:2')
+
+    def test_item_local_expirado_e_buscado_de_novo(self):
+        cache = CacheIA(max_local=2, ttl=0)
+        cache.definir('ia:x:1', 'valor')
+        caches['ia'].set('ia:x:1', 'novo')
+
+        self.assertEqual(cache.obter('ia:x:1'), 'novo')
+
+    def test_cache_fora_do_ar_vira_falta(self):
+        cache = CacheIA(alias='inexistente')
+        with self.assertLogs('core.cache', 'WARNING') as logs:
+            cache.definir('ia:x:1', 'valor')
+            cache.limpar_local()
+            self.assertIsNone(cache.obter('ia:x:1'))
+        self.assertIn('Cache IA indisponível', logs.output[0])
+
+    def test_chamadas_simultaneas_calculam_uma_vez(self):
+        chamadas, liberar = [], threading.Event()
+
+        def calcular():
+            chamadas.append(1)
+            liberar.wait(5)
+            return {'resposta': 42}
+
+        threading.Timer(0.2, liberar.set).start()
+        resultados, erros = em_paralelo(lambda indice: self.cache.obter_ou_calcular(self.chave, calcular), 8)
+
+        self.assertEqual(erros, [])
+        self.assertEqual(len(chamadas), 1)
+        self.assertEqual(resultados, [{'resposta': 42}] * 8)
+        self.assertEqual(caches['ia'].get(self.chave), {'resposta': 42})
+
+    def test_falha_chega_a_todos_e_nada_fica_guardado(self):
+        liberar = threading.Event()
+
+        def calcular():
+            liberar.wait(5)
+            raise RuntimeError('IA fora do ar')
+
+        threading.Timer(0.2, liberar.set).start()
+        _, erros = em_paralelo(lambda indice: self.cache.obter_ou_calcular(self.chave, calcular), 4)
+
+        self.assertEqual([str(e) for e in erros], ['IA fora do ar'] * 4)
+        self.assertIsNone(self.cache.obter(self.chave))
+        self.assertEqual(self.cache.obter_ou_calcular(self.chave, lambda: 'ok'), 'ok')
+
+    def test_espera_o_resultado_de_outro_processo(self):
+        caches['ia'].add(f"{self.chave}:calculando", 1)
+        threading.Timer(0.1, lambda: caches['ia'].set(self.chave, 'do outro processo')).start()
+
+        valor = self.cache.obter_ou_calcular(self.chave, lambda: self.fail("não deveria chamar a IA"))
+
+        self.assertEqual(valor, 'do outro processo')
+
+    def test_outro_processo_falhou_calcula_aqui(self):
+        trava = f"{self.chave}:calculando"
+        caches['ia'].add(trava, 1)
+        threading.Timer(0.1, lambda: caches['ia'].delete(trava)).start()
+
+        self.assertEqual(self.cache.obter_ou_calcular(self.chave, lambda: 'local'), 'local')
+        self.assertIsNone(caches['ia'].get(trava))
+
+    def test_async_corrotinas_dividem_a_chamada(self):
+        chamadas = []
+
+        async def calcular():
+            chamadas.append(1)
+            await asyncio.sleep(0.05)
+            return 'resposta'
+
+        async def cenario():
+            return await asyncio.gather(*(self.cache.obter_ou_calcular_async(self.chave, calcular) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(cenario()), ['resposta'] * 5)
+        self.assertEqual(len(chamadas), 1)
+
+    def test_async_quem_espera_cancelado_nao_derruba_o_lider(self):
+        async def calcular():
+            await asyncio.sleep(0.05)
+            return 'resposta'
+
+        async def cenario():
+            lider = asyncio.ensure_future(self.cache.obter_ou_calcular_async(self.chave, calcular))
+            await asyncio.sleep(0)
+            seguidor = asyncio.ensure_future(self.cache.obter_ou_calcular_async(self.chave, calcular))
+            await asyncio.sleep(0.01)
+            seguidor.cancel()
+            return await lider
+
+        inicio = time.monotonic()
+        self.assertEqual(asyncio.run(cenario()), 'resposta')
+        self.assertLess(time.monotonic() - inicio, 2)
+
+
+@override_settings(CACHES=CACHES_LOCAIS)
+class CacheTradutorTests(TestCase):
+
+    def setUp(self):
+        caches['ia'].clear()
+        cache_ia.limpar_local()
+        self.addCleanup(cache_ia.limpar_local)
+        resposta = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='resposta'))])
+        self.create = mock.Mock(return_value=resposta)
+        falso = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self.create)))
+        chamar = mock.patch.object(cliente_ia, 'chamar', side_effect=lambda operacao, funcao, tokens=0: funcao(falso))
+        chamar.start()
+        self.addCleanup(chamar.stop)
+
+    def test_mudanca_no_glossario_invalida_a_traducao(self):
+        self.assertEqual(IAService.tradutor_cultural('Manda o report ASAP.'), 'resposta')
+        IAService.tradutor_cultural('Manda o  report ASAP.')
+        self.assertEqual(self.create.call_count, 1)
+
+        versao = cache_ia.versao_glossario()
+        with self.captureOnCommitCallbacks(execute=True):
+            GlossarioCultural.objects.create(termo_tecnico='ASAP', explicacao_simples='O quanto antes')
+        self.assertNotEqual(cache_ia.versao_glossario(), versao)
+
+        IAService.tradutor_cultural('Manda o report ASAP.')
+        self.assertEqual(self.create.call_count, 2)
+        self.assertIn('ASAP: O quanto antes', self.create.call_args.kwargs['messages'][0]['content'])
+
+    def test_erro_da_ia_nao_fica_guardado(self):
+        self.create.side_effect = [ErroIATransitorio('fora do ar'), self.create.return_value]
+
+        with self.assertRaises(ErroIATransitorio):
+            IAService.analisar_vies_feedback('Ele é muito emotivo.')
+        self.assertEqual(IAService.analisar_vies_feedback('Ele é muito emotivo.'), 'resposta')
@@ -0,0 +1,214 @@
+# core/tests/test_cliente_ia.py
+
+import asyncio
+import threading
+import time
+from unittest import mock
+
+import openai
+from django.test import SimpleTestCase, override_settings
+
+from ..cliente_ia import (
+    ClienteIA, Disjuntor, ErroIA, ErroIARequisicao, ErroIATransitorio, IAIndisponivel, LimiteTaxaIA, TempoEsgotadoIA,
+    converter_erro,
+)
+from ..openai_falso import ConfiguracaoFalsa, ServidorOpenAIFalso
+
+try:
+    import httpx
+except ImportError:  # Versões mais novas do SDK da OpenAI usam o httpx2
+    import httpx2 as httpx
+
+REQUISICAO = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+
+
+def erro_status(classe, status, **cabecalhos):
+    return classe('erro', response=httpx.Response(status, headers=cabecalhos, request=REQUISICAO), body=None)
+
+
+@mock.patch('core.cliente_ia.time', wraps=time)
+class DisjuntorTests(SimpleTestCase):
+
+    def abrir(self, relogio):
+        relogio.monotonic.return_value = 1000.0
+        disjuntor = Disjuntor(falhas_para_abrir=3, pausa=30)
+        with self.assertLogs('core.cliente_ia', 'WARNING'):
+            for _ in range(3):
+                disjuntor.antes_da_chamada()
+                disjuntor.registrar_falha()
+        return disjuntor
+
+    def test_abre_depois_de_falhas_seguidas(self, relogio):
+        disjuntor = self.abrir(relogio)
+
+        relogio.monotonic.return_value = 1010.0
+        with self.assertRaises(IAIndisponivel) as contexto:
+            disjuntor.antes_da_chamada('vies')
+        self.assertEqual(contexto.exception.tentar_novamente_em, 20.0)
+        self.assertEqual(disjuntor.segundos_para_reabrir(), 20.0)
+
+    def test_sucesso_zera_a_contagem(self, relogio):
+        disjuntor = Disjuntor(falhas_para_abrir=3, pausa=30)
+        for _ in range(2):
+            disjuntor.registrar_falha()
+        disjuntor.registrar_sucesso()
+        disjuntor.registrar_falha()
+        self.assertEqual(disjuntor.estado, Disjuntor.FECHADO)
+
+    def test_depois_da_pausa_uma_unica_chamada_de_teste(self, relogio):
+        disjuntor = self.abrir(relogio)
+        relogio.monotonic.return_value = 1030.0
+
+        disjuntor.antes_da_chamada()
+        with self.assertRaises(IAIndisponivel):
+            disjuntor.antes_da_chamada()
+
+        disjuntor.registrar_sucesso()
+        disjuntor.antes_da_chamada()
+        disjuntor.antes_da_chamada()
+        self.assertEqual(disjuntor.estado, Disjuntor.FECHADO)
+
+    def test_falha_no_teste_reabre(self, relogio):
+        disjuntor = self.abrir(relogio)
+        relogio.monotonic.return_value = 1030.0
+        disjuntor.antes_da_chamada()
+
+        with self.assertLogs('core.cliente_ia', 'WARNING'):
+            disjuntor.registrar_falha()
+
+        self.assertEqual(disjuntor.estado, Disjuntor.ABERTO)
+        self.assertEqual(disjuntor.segundos_para_reabrir(), 30.0)
+
+    def test_teste_cancelado_libera_outra_chamada(self, relogio):
+        disjuntor = self.abrir(relogio)
+        relogio.monotonic.return_value = 1030.0
+        disjuntor.antes_da_chamada()
+
+        disjuntor.cancelar_teste()
+
+        disjuntor.antes_da_chamada()
+
+
+class ConverterErroTests(SimpleTestCase):
+
+    def test_hierarquia(self):
+        casos = [
+            (openai.APITimeoutError(request=REQUISICAO), TempoEsgotadoIA),
+            (openai.APIConnectionError(request=REQUISICAO), ErroIATransitorio),
+            (httpx.ConnectError('recusada'), ErroIATransitorio),
+            (erro_status(openai.RateLimitError, 429), LimiteTaxaIA),
+            (erro_status(openai.InternalServerError, 503), ErroIATransitorio),
+            (erro_status(openai.ConflictError, 409), ErroIATransitorio),
+            (erro_status(openai.BadRequestError, 400), ErroIARequisicao),
+            (erro_status(openai.AuthenticationError, 401), ErroIARequisicao),
+            (ValueError('inesperado'), ErroIA),
+        ]
+        for erro, esperado in casos:
+            with self.subTest(erro=type(erro).__name__):
+                self.assertIs(type(converter_erro(erro, 'vies')), esperado)
+
+    def test_retry_after(self):
+        self.assertEqual(converter_erro(erro_status(openai.RateLimitError, 429, **{'retry-after-ms': '1500'}))
+                         .tentar_novamente_em, 1.5)
+        self.assertEqual(converter_erro(erro_status(openai.RateLimitError, 429, **{'retry-after': '3'}))
+                         .tentar_novamente_em, 3.0)
+        self.assertIsNone(converter_erro(erro_status(openai.RateLimitError, 429, **{'retry-after': 'logo'}))
+                          .tentar_novamente_em)
+
+    @override_settings(IA_ESPERA_BASE=1.0, IA_ESPERA_MAXIMA=30)
+    def test_espera(self):
+        self.assertEqual(ClienteIA.espera(1, ErroIATransitorio('x', tentar_novamente_em=90)), 30)
+        self.assertEqual(ClienteIA.espera(1, ErroIATransitorio('x', tentar_novamente_em=2)), 2)
+        for tentativa, teto in ((1, 1), (3, 4), (10, 30)):
+            self.assertLessEqual(ClienteIA.espera(tentativa, ErroIATransitorio('x')), teto)
+
+
+# 'transcricao' fica fora do orçamento por minuto: estes testes não usam o banco
+@override_settings(IA_TENTATIVAS=3, IA_ESPERA_BASE=0, IA_DISJUNTOR_FALHAS=10)
+class RetentativasTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cliente = ClienteIA()
+        self.addCleanup(self.cliente.reiniciar)
+        self.chamadas = 0
+
+    def falhar_com(self, erro):
+        def funcao(cliente):
+            self.chamadas += 1
+            raise erro
+        return funcao
+
+    def test_erro_transitorio_repete_ate_esgotar(self):
+        with self.assertLogs('core.cliente_ia', 'WARNING') as logs, self.assertRaises(ErroIATransitorio):
+            self.cliente.chamar('transcricao', self.falhar_com(erro_status(openai.InternalServerError, 500)))
+        self.assertEqual(self.chamadas, 3)
+        self.assertEqual(len(logs.records), 2)
+
+    def test_pedido_recusado_nao_repete(self):
+        with self.assertRaises(ErroIARequisicao):
+            self.cliente.chamar('transcricao', self.falhar_com(erro_status(openai.BadRequestError, 400)))
+        self.assertEqual(self.chamadas, 1)
+        self.assertEqual(self.cliente.disjuntor.falhas, 0)
+
+    def test_servidor_falso_responde_pelo_cliente_real(self):
+        with ServidorOpenAIFalso(ConfiguracaoFalsa(latencia_chat=0, semente=1)) as servidor, \
+                override_settings(OPENAI_BASE_URL=servidor.url, IA_LIMITE_TOKENS_POR_MINUTO=None):
+            self.cliente.reiniciar()
+            resposta = self.cliente.chamar('vies', lambda c: c.chat.completions.create(
+                model='gpt-4o-mini', messages=[{'role': 'user', 'content': 'Olá'}],
+            ))
+        self.assertTrue(resposta.choices[0].message.content)
+        self.assertGreater(resposta.usage.total_tokens, 0)
+
+
+@override_settings(IA_LIMITE_TOKENS_POR_MINUTO=None)
+class ClienteAsyncTests(SimpleTestCase):
+
+    def setUp(self):
+        servidor = ServidorOpenAIFalso(ConfiguracaoFalsa(latencia_chat=0, semente=1))
+        configuracao = override_settings(OPENAI_BASE_URL=servidor.__enter__().url)
+        self.addCleanup(servidor.__exit__, None, None, None)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.cliente = ClienteIA()
+        self.addCleanup(self.cliente.reiniciar)
+
+    @staticmethod
+    def conversar(c, **opcoes):
+        return c.chat.completions.create(model='gpt-4o-mini', messages=[{'role': 'user', 'content': 'Olá'}], **opcoes)
+
+    def test_chamadas_no_mesmo_loop_reusam_o_cliente(self):
+        async def cenario():
+            clientes = []
+            for _ in range(2):
+                resposta = await self.cliente.chamar_async('vies', self.conversar)
+                self.assertTrue(resposta.choices[0].message.content)
+                clientes.append(await self.cliente.cliente_async())
+            return clientes
+
+        primeiro, segundo = asyncio.run(cenario())
+
+        self.assertIs(primeiro, segundo)
+        # O loop terminou: o pool foi fechado junto, e o próximo loop abre outro
+        self.assertTrue(primeiro.is_closed())
+        self.assertIsNone(self.cliente._async)
+
+    def test_loop_fora_da_thread_principal_usa_o_cliente_sincrono(self):
+        resultado = {}
+
+        async def cenario():
+            resultado['cliente_async'] = await self.cliente.cliente_async()
+            stream, reserva = await self.cliente.abrir_stream_async('vies', lambda c: self.conversar(c, stream=True))
+            try:
+                resultado['pedacos'] = [e.choices[0].delta.content async for e in stream if e.choices]
+            finally:
+                await stream.close()
+
+        thread = threading.Thread(target=asyncio.run, args=(cenario(),))
+        thread.start()
+        thread.join()
+
+        self.assertIsNone(resultado['cliente_async'])
+        self.assertGreater(len(resultado['pedacos']), 1)
+        self.assertIsNotNone(self.cliente._sync)
+        self.assertIsNone(self.cliente._async)
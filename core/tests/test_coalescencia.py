@@ -0,0 +1,93 @@
+# core/tests/test_coalescencia.py
+
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..coalescencia import CoalescedorSessao
+from ..models import SequenciaSessao
+from .auxiliares import CACHES_LOCAIS, TesteConcorrente, em_paralelo
+
+
+class SequenciaSessaoTests(TestCase):
+
+    def test_comeca_em_um_e_incrementa_por_chave(self):
+        self.assertEqual(SequenciaSessao.atual('a'), 0)
+        self.assertEqual([SequenciaSessao.proxima('a') for _ in range(3)], [1, 2, 3])
+        self.assertEqual(SequenciaSessao.proxima('b'), 1)
+        self.assertEqual(SequenciaSessao.atual('a'), 3)
+
+    def test_sessao_nova_descarta_as_paradas(self):
+        SequenciaSessao.proxima('parada')
+        SequenciaSessao.proxima('ativa')
+        SequenciaSessao.objects.filter(chave='parada').update(atualizado_em=timezone.now() - timedelta(days=2))
+
+        SequenciaSessao.proxima('ativa')
+        self.assertTrue(SequenciaSessao.objects.filter(chave='parada').exists())
+
+        SequenciaSessao.proxima('nova')
+        self.assertFalse(SequenciaSessao.objects.filter(chave='parada').exists())
+
+
+class SequenciaSessaoConcorrenteTests(TesteConcorrente):
+
+    def test_nunca_repete_numero(self):
+        resultados, erros = em_paralelo(lambda indice: [SequenciaSessao.proxima('s') for _ in range(25)], 8)
+
+        self.assertEqual(erros, [])
+        numeros = sorted(n for lista in resultados for n in lista)
+        self.assertEqual(numeros, list(range(1, 201)))
+
+
+@override_settings(CACHES=CACHES_LOCAIS, COALESCENCIA_ESPERA_MAXIMA=2, COALESCENCIA_INTERVALO=0.01)
+class CoalescedorSessaoTests(TestCase):
+
+    def setUp(self):
+        sessao = SessionStore()
+        sessao.create()
+        self.request = SimpleNamespace(session=sessao)
+
+    def test_requisicao_mais_nova_supera_a_anterior(self):
+        antiga = CoalescedorSessao(self.request, 'feedback')
+        nova = CoalescedorSessao(self.request, 'feedback')
+
+        self.assertEqual(nova.sequencia, antiga.sequencia + 1)
+        self.assertTrue(antiga.superada())
+        self.assertFalse(antiga.aguardar_vez())
+        self.assertTrue(nova.aguardar_vez())
+        nova.liberar()
+
+    def test_escopos_e_sessoes_independentes(self):
+        feedback = CoalescedorSessao(self.request, 'feedback')
+        CoalescedorSessao(self.request, 'tradutor')
+        outra_sessao = SessionStore()
+        outra_sessao.create()
+        CoalescedorSessao(SimpleNamespace(session=outra_sessao), 'feedback')
+
+        self.assertFalse(feedback.superada())
+
+    def test_espera_a_analise_anterior_terminar(self):
+        primeira = CoalescedorSessao(self.request, 'feedback')
+        self.assertTrue(primeira.aguardar_vez())
+        segunda = CoalescedorSessao(self.request, 'feedback')
+
+        liberada = threading.Timer(0.1, primeira.liberar)
+        liberada.start()
+        self.assertTrue(segunda.aguardar_vez())
+        liberada.join()
+        self.assertTrue(segunda.dono_da_vez)
+        self.assertEqual(segunda.cache.get(segunda.chave_ativa), segunda.sequencia)
+        segunda.liberar()
+
+    def test_liberar_so_apaga_a_propria_trava(self):
+        primeira = CoalescedorSessao(self.request, 'feedback')
+        self.assertTrue(primeira.aguardar_vez())
+        primeira.cache.set(primeira.chave_ativa, primeira.sequencia + 1)  # Trava expirou e outra assumiu
+
+        primeira.liberar()
+
+        self.assertEqual(primeira.cache.get(primeira.chave_ativa), primeira.sequencia + 1)
@@ -0,0 +1,100 @@
+# core/tests/test_conteudo_comprimido.py
+
+import zlib
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from ..models import ConteudoReuniao, ReuniaoAcessivel
+from .auxiliares import DATA_PADRAO, criar_reuniao
+
+TRANSCRICAO = "Ana: vamos adiar o deploy. Pedro (chat): concordo, o ambiente de homologação caiu. " * 200
+
+
+class TextoComprimidoTests(TestCase):
+
+    def test_ida_e_volta_comprimida(self):
+        reuniao = criar_reuniao()
+        reuniao.transcricao_completa = TRANSCRICAO
+        reuniao.resumo_executivo = "<p>Ata com acentuação: ação, decisão, 💡</p>"
+        reuniao.save()
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT transcricao FROM core_conteudoreuniao WHERE reuniao_id = %s", [reuniao.pk])
+            bruto = bytes(cursor.fetchone()[0])
+        self.assertLess(len(bruto), len(TRANSCRICAO.encode('utf-8')) / 5)
+        self.assertEqual(zlib.decompress(bruto).decode('utf-8'), TRANSCRICAO)
+
+        relida = ReuniaoAcessivel.objects.get(pk=reuniao.pk)
+        self.assertEqual(relida.transcricao_completa, TRANSCRICAO)
+        self.assertEqual(relida.resumo_executivo, "<p>Ata com acentuação: ação, decisão, 💡</p>")
+
+    def test_vazio_e_sem_conteudo(self):
+        reuniao = criar_reuniao()
+        self.assertEqual(reuniao.transcricao_completa, '')
+        self.assertFalse(ConteudoReuniao.objects.filter(pk=reuniao.pk).exists())
+
+        reuniao.transcricao_completa = None
+        reuniao.save()
+        self.assertEqual(ConteudoReuniao.objects.get(pk=reuniao.pk).transcricao, '')
+
+    def test_bytes_sem_compressao_sao_lidos_como_texto(self):
+        reuniao = criar_reuniao()
+        reuniao.transcricao_completa = TRANSCRICAO
+        reuniao.save()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE core_conteudoreuniao SET transcricao = %s WHERE reuniao_id = %s",
+                ["Transcrição antiga, sem compressão.".encode('utf-8'), reuniao.pk],
+            )
+
+        relida = ReuniaoAcessivel.objects.get(pk=reuniao.pk)
+        self.assertEqual(relida.transcricao_completa, "Transcrição antiga, sem compressão.")
+
+    def test_listagem_nao_le_os_textos(self):
+        reuniao = criar_reuniao()
+        reuniao.transcricao_completa = TRANSCRICAO
+        reuniao.save()
+
+        with self.assertNumQueries(1):
+            titulos = [r.titulo for r in ReuniaoAcessivel.objects.all()]
+        self.assertEqual(titulos, ['Reunião de teste'])
+
+
+class MigracaoConteudoTests(TransactionTestCase):
+    """A 0006 move os textos para ConteudoReuniao (e volta, se desfeita) sem perder nada."""
+
+    antes = [('core', '0005_estatisticas_dashboard')]
+    depois = [('core', '0006_conteudo_comprimido')]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.ultima = self.executor.loader.graph.leaf_nodes('core')
+        self.addCleanup(self.migrar, self.ultima)
+        self.migrar(self.antes)
+
+    def migrar(self, alvo):
+        self.executor.loader.build_graph()
+        self.executor.migrate(alvo)
+        return self.executor.loader.project_state(alvo).apps
+
+    def test_textos_vao_para_conteudo_e_voltam(self):
+        apps = self.executor.loader.project_state(self.antes).apps
+        Reuniao = apps.get_model('core', 'ReuniaoAcessivel')
+        com_texto = Reuniao.objects.create(titulo='Longa', data_reuniao=DATA_PADRAO,
+                                           transcricao_completa=TRANSCRICAO, resumo_executivo='<p>Ata</p>')
+        sem_texto = Reuniao.objects.create(titulo='Vazia', data_reuniao=DATA_PADRAO)
+
+        apps = self.migrar(self.depois)
+        Conteudo = apps.get_model('core', 'ConteudoReuniao')
+        self.assertEqual(list(Conteudo.objects.values_list('pk', 'transcricao', 'ata')),
+                         [(com_texto.pk, TRANSCRICAO, '<p>Ata</p>')])
+        self.assertFalse(Conteudo.objects.filter(pk=sem_texto.pk).exists())
+
+        apps = self.migrar(self.antes)
+        Reuniao = apps.get_model('core', 'ReuniaoAcessivel')
+        self.assertEqual(
+            list(Reuniao.objects.order_by('pk').values_list('transcricao_completa', 'resumo_executivo')),
+            [(TRANSCRICAO, '<p>Ata</p>'), ('', '')],
+        )
@@ -0,0 +1,109 @@
+# core/tests/test_detalhe_reuniao.py
+
+from datetime import timedelta
+
+from django.contrib import messages
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import ReuniaoAcessivel
+from ..views import detalhe_reuniao
+from .auxiliares import criar_reuniao
+
+
+class DetalheReuniaoTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.reuniao = criar_reuniao(status_ia='CONCLUIDO')
+        self.url = reverse('detalhe_reuniao', args=[self.reuniao.pk])
+        self.ana = User.objects.create(username='ana.souza')
+        self.bia = User.objects.create(username='bia')
+
+    def envelhecer(self):
+        """Volta o updated_at uma hora: a próxima mudança precisa produzir um valor novo."""
+        antigo = ReuniaoAcessivel.objects.get(pk=self.reuniao.pk).updated_at - timedelta(hours=1)
+        ReuniaoAcessivel.objects.filter(pk=self.reuniao.pk).update(updated_at=antigo)
+        return antigo
+
+    def atualizada(self):
+        return ReuniaoAcessivel.objects.get(pk=self.reuniao.pk).updated_at
+
+    def test_visita_repetida_recebe_304(self):
+        primeira = self.client.get(self.url)
+
+        self.assertEqual(primeira.status_code, 200)
+        self.assertTrue(primeira['ETag'])
+        self.assertTrue(primeira['Last-Modified'])
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': primeira['ETag']}).status_code, 304)
+
+    def test_save_muda_o_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.envelhecer()
+
+        self.reuniao.titulo = 'Outro título'
+        self.reuniao.save()
+
+        resposta = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, 'Outro título')
+
+    def test_participantes_alterados_pelos_dois_lados_mudam_o_updated_at(self):
+        operacoes = [
+            ('add', lambda: self.reuniao.participantes.add(self.ana, self.bia)),
+            ('remove', lambda: self.reuniao.participantes.remove(self.bia)),
+            ('clear', lambda: self.reuniao.participantes.clear()),
+            ('add reverso', lambda: self.ana.reunioes.add(self.reuniao)),
+            ('remove reverso', lambda: self.ana.reunioes.remove(self.reuniao)),
+            ('set reverso', lambda: self.bia.reunioes.set([self.reuniao])),
+            ('clear reverso', lambda: self.bia.reunioes.clear()),
+        ]
+        for nome, operacao in operacoes:
+            with self.subTest(nome):
+                antigo = self.envelhecer()
+                operacao()
+                self.assertGreater(self.atualizada(), antigo)
+
+    def test_participante_novo_aparece_sem_esperar_o_cache(self):
+        etag = self.client.get(self.url)['ETag']
+        self.envelhecer()
+
+        self.reuniao.participantes.add(self.ana)
+
+        resposta = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, 'ana.souza')
+
+    def test_mensagem_pendente_desliga_os_validadores(self):
+        etag = self.client.get(self.url)['ETag']
+        request = RequestFactory().get(self.url, headers={'If-None-Match': etag})
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+        request._messages = FallbackStorage(request)
+        messages.success(request, 'Reunião enviada!')
+
+        resposta = detalhe_reuniao(request, pk=self.reuniao.pk)
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotIn('ETag', resposta)
+        self.assertNotIn('Last-Modified', resposta)
+        self.assertIn('Reunião enviada!', resposta.content.decode())
+
+    def test_consultas_nao_crescem_com_os_participantes(self):
+        def consultas():
+            cache.clear()
+            with CaptureQueriesContext(connection) as capturadas:
+                self.assertEqual(self.client.get(self.url).status_code, 200)
+            return len(capturadas)
+
+        self.reuniao.participantes.add(self.ana)
+        com_um = consultas()
+        self.reuniao.participantes.add(*(User.objects.create(username=f'u{i}') for i in range(5)))
+
+        self.assertEqual(consultas(), com_um)
@@ -0,0 +1,236 @@
+# core/tests/test_fila.py
+
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..cliente_ia import ErroIATransitorio
+from ..models import EstatisticaReunioes, ReuniaoAcessivel, SegmentoTranscricao
+from ..services import IAService
+from ..tasks import MENSAGEM_ERRO, MENSAGEM_NOVA_TENTATIVA, Batimento, FilaReunioes
+from .auxiliares import TesteConcorrente, criar_reuniao, em_paralelo
+
+
+def contadores():
+    return {status: total for status, total in EstatisticaReunioes.objects.values_list('status_ia', 'total') if total}
+
+
+def travar(reuniao, ha_segundos, tentativas=1):
+    ReuniaoAcessivel.objects.filter(pk=reuniao.pk).update(
+        status_ia='PROCESSANDO',
+        processamento_iniciado_em=timezone.now() - timedelta(seconds=ha_segundos),
+        tentativas_processamento=tentativas,
+    )
+    EstatisticaReunioes.registrar_transicao((reuniao.data_reuniao, 'PENDENTE'), (reuniao.data_reuniao, 'PROCESSANDO'))
+
+
+class ReivindicarProximaTests(TestCase):
+
+    def test_reivindica_a_mais_antiga_e_marca_processando(self):
+        nova, antiga = criar_reuniao(titulo='nova'), criar_reuniao(titulo='antiga')
+        ReuniaoAcessivel.objects.filter(pk=antiga.pk).update(created_at=nova.created_at - timedelta(minutes=1))
+
+        reuniao = FilaReunioes.reivindicar_proxima()
+
+        self.assertEqual(reuniao.pk, antiga.pk)
+        self.assertEqual(reuniao.status_ia, 'PROCESSANDO')
+        self.assertIsNotNone(reuniao.processamento_iniciado_em)
+        self.assertEqual(contadores(), {'PENDENTE': 1, 'PROCESSANDO': 1})
+
+    def test_fila_vazia(self):
+        criar_reuniao(status_ia='CONCLUIDO')
+        self.assertIsNone(FilaReunioes.reivindicar_proxima())
+
+    def test_espera_processar_apos(self):
+        reuniao = criar_reuniao()
+        ReuniaoAcessivel.objects.filter(pk=reuniao.pk).update(processar_apos=timezone.now() + timedelta(minutes=1))
+        self.assertIsNone(FilaReunioes.reivindicar_proxima())
+
+        ReuniaoAcessivel.objects.filter(pk=reuniao.pk).update(processar_apos=timezone.now() - timedelta(seconds=1))
+        reivindicada = FilaReunioes.reivindicar_proxima()
+        self.assertEqual(reivindicada.pk, reuniao.pk)
+        self.assertIsNone(reivindicada.processar_apos)
+
+    def test_restringe_aos_pks(self):
+        fora, dentro = criar_reuniao(), criar_reuniao()
+        self.assertEqual(FilaReunioes.reivindicar_proxima(pks=[dentro.pk]).pk, dentro.pk)
+        self.assertIsNone(FilaReunioes.reivindicar_proxima(pks=[dentro.pk]))
+        self.assertEqual(ReuniaoAcessivel.objects.get(pk=fora.pk).status_ia, 'PENDENTE')
+
+
+@override_settings(REUNIAO_WORKER_TIMEOUT=3600, REUNIAO_WORKER_MAX_TENTATIVAS=3)
+class LiberarTravadasTests(TestCase):
+
+    def test_so_libera_alem_do_timeout(self):
+        travada, em_andamento = criar_reuniao(), criar_reuniao()
+        travar(travada, 3601)
+        travar(em_andamento, 3500)
+
+        self.assertEqual(FilaReunioes.liberar_travadas(), 1)
+
+        travada.refresh_from_db()
+        self.assertEqual(travada.status_ia, 'PENDENTE')
+        self.assertIsNone(travada.processamento_iniciado_em)
+        self.assertEqual(ReuniaoAcessivel.objects.get(pk=em_andamento.pk).status_ia, 'PROCESSANDO')
+        self.assertEqual(contadores(), {'PENDENTE': 1, 'PROCESSANDO': 1})
+
+    def test_tentativas_esgotadas_vira_erro(self):
+        reuniao = criar_reuniao()
+        travar(reuniao, 7200, tentativas=3)
+
+        self.assertEqual(FilaReunioes.liberar_travadas(), 1)
+
+        reuniao.refresh_from_db()
+        self.assertEqual(reuniao.status_ia, 'ERRO')
+        self.assertEqual(reuniao.mensagem_erro, 'Processamento excedeu o tempo limite.')
+        self.assertEqual(contadores(), {'ERRO': 1})
+
+    def test_timeout_zero_so_nos_pks(self):
+        minha, de_outro_worker = criar_reuniao(), criar_reuniao()
+        travar(minha, 1)
+        travar(de_outro_worker, 1)
+
+        self.assertEqual(FilaReunioes.liberar_travadas(pks=[minha.pk], timeout=0), 1)
+        self.assertEqual(ReuniaoAcessivel.objects.get(pk=de_outro_worker.pk).status_ia, 'PROCESSANDO')
+
+    def test_nao_mexe_em_reuniao_concluida(self):
+        reuniao = criar_reuniao(status_ia='CONCLUIDO')
+        ReuniaoAcessivel.objects.filter(pk=reuniao.pk).update(processamento_iniciado_em=timezone.now() - timedelta(days=1))
+        self.assertEqual(FilaReunioes.liberar_travadas(), 0)
+
+
+@override_settings(REUNIAO_WORKER_MAX_TENTATIVAS=3)
+class ProcessarTests(TestCase):
+
+    def setUp(self):
+        criar_reuniao(arquivo_audio='reunioes/audio/reuniao.mp3')
+        self.reuniao = FilaReunioes.reivindicar_proxima()
+        ata = mock.patch.object(IAService, 'gerar_ata_inteligente', return_value={'resumo': 'Tudo certo.'})
+        ata.start()
+        self.addCleanup(ata.stop)
+
+    def transcrever(self, durante=None):
+        def transcrever(caminho):
+            if durante:
+                durante()
+            return 'Bom dia', [{'inicio': 0.0, 'fim': 1.0, 'texto': 'Bom dia'}], None
+        return mock.patch.object(IAService, 'transcrever_reuniao_segmentos', side_effect=transcrever)
+
+    def test_conclui_e_conta_uma_vez(self):
+        with self.transcrever():
+            FilaReunioes.processar(self.reuniao)
+
+        self.assertEqual(ReuniaoAcessivel.objects.get(pk=self.reuniao.pk).status_ia, 'CONCLUIDO')
+        self.assertEqual(SegmentoTranscricao.objects.count(), 1)
+        self.assertEqual(contadores(), {'CONCLUIDO': 1})
+
+    @override_settings(REUNIAO_WORKER_ESPERA_BASE=60)
+    def test_falha_passageira_volta_para_a_fila_com_espera(self):
+        def fora_do_ar():
+            raise ErroIATransitorio('503')
+
+        with self.transcrever(durante=fora_do_ar), self.assertLogs('core.tasks', 'WARNING'):
+            FilaReunioes.processar(self.reuniao)
+
+        gravada = ReuniaoAcessivel.objects.get(pk=self.reuniao.pk)
+        self.assertEqual((gravada.status_ia, gravada.tentativas_processamento), ('PENDENTE', 1))
+        self.assertEqual(gravada.mensagem_erro, MENSAGEM_NOVA_TENTATIVA)
+        self.assertGreater(gravada.processar_apos, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(contadores(), {'PENDENTE': 1})
+        self.assertIsNone(FilaReunioes.reivindicar_proxima())
+
+    def test_detalhes_do_erro_so_no_log(self):
+        def falha_interna():
+            raise RuntimeError('/srv/midia/reunioes/audio/x.mp3: permissão negada')
+
+        with self.transcrever(durante=falha_interna), self.assertLogs('core.tasks', 'ERROR') as logs:
+            FilaReunioes.processar(self.reuniao)
+
+        gravada = ReuniaoAcessivel.objects.get(pk=self.reuniao.pk)
+        self.assertEqual((gravada.status_ia, gravada.mensagem_erro), ('ERRO', MENSAGEM_ERRO))
+        self.assertIn('permissão negada', logs.output[0])
+        self.assertIsNotNone(logs.records[0].exc_info)  # Com traceback
+        resposta = self.client.get(reverse('detalhe_reuniao', args=[self.reuniao.pk]))
+        self.assertContains(resposta, MENSAGEM_ERRO)
+        self.assertNotContains(resposta, 'permissão negada')
+
+    @override_settings(REUNIAO_WORKER_ESPERA_BASE=60, REUNIAO_WORKER_ESPERA_MAXIMA=150)
+    def test_espera_dobra_ate_o_teto_e_respeita_o_retry_after(self):
+        erro = ErroIATransitorio('429')
+        self.assertEqual([FilaReunioes.espera_para_tentar_de_novo(n, erro) for n in (1, 2, 3)], [60, 120, 150])
+        erro.tentar_novamente_em = 600
+        self.assertEqual(FilaReunioes.espera_para_tentar_de_novo(1, erro), 600)
+
+    def test_reuniao_liberada_no_meio_descarta_o_resultado(self):
+        def outro_worker_assume():
+            FilaReunioes.liberar_travadas(timeout=0)
+            FilaReunioes.reivindicar_proxima()
+
+        with self.transcrever(durante=outro_worker_assume), self.assertLogs('core.tasks', 'WARNING'):
+            FilaReunioes.processar(self.reuniao)
+
+        # O status é do outro worker; nada deste processamento foi gravado nem contado
+        self.assertEqual(ReuniaoAcessivel.objects.get(pk=self.reuniao.pk).status_ia, 'PROCESSANDO')
+        self.assertEqual(SegmentoTranscricao.objects.count(), 0)
+        self.assertEqual(contadores(), {'PROCESSANDO': 1})
+
+
+class BatimentoTests(TesteConcorrente):
+
+    def setUp(self):
+        super().setUp()
+        criar_reuniao()
+        self.reuniao = FilaReunioes.reivindicar_proxima()
+
+    def test_renova_enquanto_processa(self):
+        reivindicada_em = self.reuniao.processamento_iniciado_em
+        limite = time.monotonic() + 5
+        with Batimento(self.reuniao, intervalo=0.01) as batimento:
+            while batimento.posse == reivindicada_em and time.monotonic() < limite:
+                time.sleep(0.01)
+
+        self.assertGreater(batimento.posse, reivindicada_em)
+        self.assertEqual(ReuniaoAcessivel.objects.get(pk=self.reuniao.pk).processamento_iniciado_em, batimento.posse)
+
+    def test_para_quando_a_reuniao_e_liberada(self):
+        FilaReunioes.liberar_travadas(timeout=0)
+
+        with self.assertLogs('core.tasks', 'WARNING'), Batimento(self.reuniao, intervalo=0.01) as batimento:
+            batimento._thread.join(5)
+
+        self.assertFalse(batimento.renovar())
+        self.assertIsNone(ReuniaoAcessivel.objects.get(pk=self.reuniao.pk).processamento_iniciado_em)
+
+
+class FilaConcorrenteTests(TesteConcorrente):
+
+    def test_threads_nunca_pegam_a_mesma_reuniao(self):
+        pks = {criar_reuniao(titulo=f"r{i}").pk for i in range(20)}
+
+        def trabalhar(indice):
+            pegas = []
+            while (reuniao := FilaReunioes.reivindicar_proxima()) is not None:
+                pegas.append(reuniao.pk)
+            return pegas
+
+        resultados, erros = em_paralelo(trabalhar, 6)
+
+        self.assertEqual(erros, [])
+        pegas = [pk for lista in resultados for pk in lista]
+        self.assertEqual(sorted(pegas), sorted(pks))
+        self.assertEqual(contadores(), {'PROCESSANDO': 20})
+
+    @override_settings(REUNIAO_WORKER_MAX_TENTATIVAS=3)
+    def test_liberacoes_simultaneas_contam_cada_reuniao_uma_vez(self):
+        for i in range(10):
+            travar(criar_reuniao(titulo=f"r{i}"), 60)
+
+        resultados, erros = em_paralelo(lambda indice: FilaReunioes.liberar_travadas(timeout=0), 4)
+
+        self.assertEqual(erros, [])
+        self.assertEqual(sum(resultados), 10)
+        self.assertEqual(contadores(), {'PENDENTE': 10})
@@ -0,0 +1,172 @@
+# core/tests/test_importacao.py
+
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone as tz
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from .. import importacao
+from ..models import EstatisticaReunioes, ReuniaoAcessivel
+from .auxiliares import MidiaTemporariaMixin, TesteConcorrente
+
+
+class OrigemMixin:
+    """Pasta temporária com os áudios e manifestos de cada teste."""
+
+    def setUp(self):
+        super().setUp()
+        self.origem = tempfile.mkdtemp(prefix='teste_importacao_')
+        self.addCleanup(shutil.rmtree, self.origem, ignore_errors=True)
+
+    def arquivo(self, nome, conteudo=b'audio'):
+        caminho = os.path.join(self.origem, nome)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        with open(caminho, 'wb') as saida:
+            saida.write(conteudo)
+        return caminho
+
+
+class LeituraOrigemTests(OrigemMixin, TestCase):
+
+    def test_pasta_recursiva_com_data_e_titulo_do_nome(self):
+        self.arquivo('b/2024-03-15_daily_time.mp3')
+        self.arquivo('a/retro.WAV')
+        self.arquivo('a/notas.txt')
+
+        entradas = importacao.ler_origem(self.origem, ['ana'])
+
+        self.assertEqual([os.path.relpath(e.caminho, self.origem) for e in entradas],
+                         ['a/retro.WAV', 'b/2024-03-15_daily_time.mp3'])
+        self.assertEqual(entradas[1].titulo, '2024 03 15 daily time')
+        self.assertEqual(entradas[1].data.date().isoformat(), '2024-03-15')
+        self.assertEqual(entradas[0].participantes, ['ana'])
+
+    def test_manifesto_csv(self):
+        self.arquivo('sub/a.mp3')
+        self.arquivo('b.mp3')
+        with open(os.path.join(self.origem, 'lista.csv'), 'w', encoding='utf-8') as manifesto:
+            manifesto.write('Arquivo;Título;Data;Participantes\n'
+                            'sub/a.mp3;Planejamento;2024-02-10T14:00:00+00:00;ana, bia\n'
+                            'b.mp3;;2024-02-11;\n')
+
+        primeira, segunda = importacao.ler_origem(os.path.join(self.origem, 'lista.csv'), ['padrao'])
+
+        self.assertEqual(primeira.titulo, 'Planejamento')
+        self.assertEqual(primeira.data, datetime(2024, 2, 10, 14, 0, tzinfo=tz.utc))
+        self.assertEqual(primeira.participantes, ['ana', 'bia'])
+        self.assertEqual(segunda.titulo, 'b')
+        self.assertEqual((segunda.data.date().isoformat(), segunda.data.hour), ('2024-02-11', 9))
+        self.assertEqual(segunda.participantes, ['padrao'])
+
+    def test_manifesto_json(self):
+        self.arquivo('a.mp3')
+        caminho = os.path.join(self.origem, 'lista.json')
+        with open(caminho, 'w', encoding='utf-8') as manifesto:
+            json.dump({'reunioes': [{'arquivo': 'a.mp3', 'titulo': 'J', 'participantes': ['ana']}]}, manifesto)
+
+        [entrada] = importacao.ler_origem(caminho)
+
+        self.assertEqual((entrada.titulo, entrada.participantes), ('J', ['ana']))
+
+    def test_manifesto_invalido(self):
+        self.arquivo('a.mp3')
+        casos = {
+            'sem_arquivo.csv': 'titulo\nX\n',
+            'inexistente.csv': 'arquivo\nnada.mp3\n',
+            'data.csv': 'arquivo,data\na.mp3,ontem\n',
+            'mes.csv': 'arquivo,data\na.mp3,2024-13-01\n',
+            'lista.json': '{"reunioes": [1, 2]}',
+            'quebrado.json': '{',
+            'lista.txt': 'a.mp3',
+        }
+        for nome, conteudo in casos.items():
+            with self.subTest(nome=nome):
+                caminho = os.path.join(self.origem, nome)
+                with open(caminho, 'w', encoding='utf-8') as manifesto:
+                    manifesto.write(conteudo)
+                with self.assertRaises(importacao.ErroManifesto):
+                    importacao.ler_origem(caminho)
+        with self.assertRaises(importacao.ErroManifesto):
+            importacao.ler_origem(os.path.join(self.origem, 'nao_existe'))
+
+
+class CriacaoReunioesTests(OrigemMixin, MidiaTemporariaMixin, TestCase):
+
+    def entradas(self, *itens):
+        return [
+            importacao.EntradaImportacao(self.arquivo(nome, conteudo), nome, datetime(2024, 3, 1, 9, tzinfo=tz.utc),
+                                         participantes)
+            for nome, conteudo, participantes in itens
+        ]
+
+    def test_arquivo_ilegivel_fica_de_fora(self):
+        entradas = self.entradas(('a.mp3', b'a', []), ('b.mp3', b'b', []))
+        os.remove(entradas[0].caminho)
+        progresso = []
+
+        armazenadas, falhas = importacao.armazenar_todas(entradas, 2, lambda e, erro: progresso.append(erro is None))
+
+        self.assertEqual(armazenadas, [entradas[1]])
+        self.assertEqual([entrada for entrada, _ in falhas], [entradas[0]])
+        self.assertIsInstance(falhas[0][1], OSError)
+        self.assertEqual(sorted(progresso), [False, True])
+
+    def test_mesmo_audio_vira_uma_reuniao_e_retomada_nao_duplica(self):
+        User.objects.create(username='ana')
+        entradas = self.entradas(('a.mp3', b'a', ['ana', 'fulano']), ('copia.mp3', b'a', ['ana']),
+                                 ('b.mp3', b'b', []))
+        armazenadas, _ = importacao.armazenar_todas(entradas, 2)
+
+        pks, criadas, desconhecidos = importacao.criar_reunioes(armazenadas, lote=2)
+
+        self.assertEqual((len(pks), criadas, desconhecidos), (2, 2, ['fulano']))
+        reuniao = ReuniaoAcessivel.objects.get(hash_audio=entradas[0].sha256)
+        self.assertEqual(list(reuniao.participantes.values_list('username', flat=True)), ['ana'])
+        self.assertEqual(EstatisticaReunioes.objects.get(status_ia='PENDENTE').total, 2)
+
+        self.assertEqual(importacao.criar_reunioes(armazenadas)[:2], (pks, 0))
+        self.assertEqual(ReuniaoAcessivel.objects.count(), 2)
+
+    def test_reabrir_erros(self):
+        armazenadas, _ = importacao.armazenar_todas(self.entradas(('a.mp3', b'a', []), ('b.mp3', b'b', [])), 1)
+        pks, _, _ = importacao.criar_reunioes(armazenadas)
+        ReuniaoAcessivel.objects.filter(pk=pks[0]).update(status_ia='ERRO', tentativas_processamento=3)
+        EstatisticaReunioes.recalcular()
+
+        self.assertEqual(importacao.reabrir_erros(pks), 1)
+
+        self.assertEqual(importacao.situacao(pks), {'PENDENTE': 2})
+        self.assertEqual(ReuniaoAcessivel.objects.get(pk=pks[0]).tentativas_processamento, 0)
+        self.assertFalse(EstatisticaReunioes.objects.filter(status_ia='ERRO', total__gt=0).exists())
+
+
+class ComandoImportarTests(OrigemMixin, MidiaTemporariaMixin, TesteConcorrente):
+
+    def importar(self, *args):
+        saida, erros = io.StringIO(), io.StringIO()
+        call_command('importar_reunioes', *args, '--sem-processar', stdout=saida, stderr=erros)
+        return saida.getvalue(), erros.getvalue()
+
+    def test_avisa_usuarios_desconhecidos_e_retoma(self):
+        self.arquivo('a.mp3', b'a')
+        self.arquivo('b.mp3', b'b')
+
+        saida, erros = self.importar(self.origem, '--participantes', 'fulano')
+
+        self.assertIn('2 reunião(ões) criada(s); 0 já existiam', saida)
+        self.assertIn('Usuários não encontrados (ignorados): fulano', erros)
+        self.assertIn('PENDENTE: 2', saida)
+
+        saida, _ = self.importar(self.origem)
+        self.assertIn('0 reunião(ões) criada(s); 2 já existiam', saida)
+
+    def test_origem_invalida(self):
+        with self.assertRaises(CommandError):
+            self.importar(os.path.join(self.origem, 'nao_existe'))
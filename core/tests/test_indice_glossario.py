@@ -0,0 +1,141 @@
+# core/tests/test_indice_glossario.py
+
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from ..indice_glossario import AutomatoAhoCorasick, IndiceGlossario, normalizar
+from ..models import GlossarioCultural, VersaoGlossario
+from .auxiliares import CACHES_LOCAIS, TesteConcorrente, em_paralelo
+
+
+class AutomatoTests(SimpleTestCase):
+
+    def test_normalizar_mantem_o_mapa_de_posicoes(self):
+        texto, mapa = normalizar('Reunião ÁGIL')
+        self.assertEqual(texto, 'reuniao agil')
+        self.assertEqual(mapa, list(range(12)))
+        # 'ß' vira 'ss': dois caracteres normalizados apontam para a mesma posição do original
+        self.assertEqual(normalizar('aßb'), ('assb', [0, 1, 1, 2]))
+
+    def test_encontra_padroes_sobrepostos_e_contidos(self):
+        automato = AutomatoAhoCorasick({'he': 1, 'she': 2, 'his': 3, 'hers': 4})
+
+        self.assertEqual(sorted(automato.buscar('ushers')), [(1, 4, 2), (2, 4, 1), (2, 6, 4)])
+        self.assertEqual(list(automato.buscar('xyz')), [])
+
+    def test_falha_volta_para_o_sufixo_certo(self):
+        automato = AutomatoAhoCorasick({'abcd': 'longo', 'bce': 'sufixo'})
+
+        self.assertEqual(list(automato.buscar('abce')), [(1, 4, 'sufixo')])
+
+    def test_sem_padroes(self):
+        self.assertEqual(list(AutomatoAhoCorasick({}).buscar('qualquer texto')), [])
+
+
+@override_settings(CACHES=CACHES_LOCAIS)
+class IndiceGlossarioTests(TestCase):
+
+    def setUp(self):
+        caches['ia'].clear()
+        for termo, explicacao in (('TI', 'Tecnologia da Informação'), ('Go Live', 'Colocar no ar'),
+                                  ('Go', 'Seguir'), ('Ação', 'Tarefa')):
+            GlossarioCultural.objects.create(termo_tecnico=termo, explicacao_simples=explicacao)
+        self.indice = IndiceGlossario()
+
+    def termos(self, texto):
+        return [(texto[o.inicio:o.fim], o.entrada.termo_tecnico) for o in self.indice.encontrar(texto)]
+
+    def test_ignora_acento_e_caixa_e_devolve_a_grafia_original(self):
+        self.assertEqual(self.termos('Cada ACAO e cada ação da ti'), [('ACAO', 'Ação'), ('ação', 'Ação'), ('ti', 'TI')])
+
+    def test_so_palavras_inteiras(self):
+        self.assertEqual(self.termos('O time ativo fez o Gol; TI2 não conta'), [])
+        self.assertEqual(self.termos('(TI), TI.'), [('TI', 'TI'), ('TI', 'TI')])
+
+    def test_sobreposicao_vence_o_mais_longo(self):
+        self.assertEqual(self.termos('O go live e o go'), [('go live', 'Go Live'), ('go', 'Go')])
+
+    def test_anotar_e_termos_presentes(self):
+        texto = 'A TI marcou o go live.'
+
+        self.assertEqual(self.indice.anotar(texto),
+                         'A TI (**Tecnologia da Informação**) marcou o go live (**Colocar no ar**).')
+        self.assertEqual([e.termo_tecnico for e in self.indice.termos_presentes(texto + ' TI')], ['TI', 'Go Live'])
+
+
+@override_settings(CACHES=CACHES_LOCAIS)
+class AlteracoesNoIndiceTests(TestCase):
+    """As alterações chegam pelos signals (depois do commit) e são aplicadas na memória."""
+
+    def setUp(self):
+        for termo, explicacao in (('TI', 'Tecnologia da Informação'), ('Go Live', 'Colocar no ar'), ('Ação', 'Tarefa')):
+            GlossarioCultural.objects.create(termo_tecnico=termo, explicacao_simples=explicacao)
+        self.indice = IndiceGlossario()
+        sinais = mock.patch('core.signals.indice_glossario', self.indice)
+        sinais.start()
+        self.addCleanup(sinais.stop)
+        self.indice.encontrar('')  # Monta o autômato principal
+        self.principal = self.indice._automato
+
+    def termos(self, texto):
+        return [(texto[o.inicio:o.fim], o.entrada.termo_tecnico) for o in self.indice.encontrar(texto)]
+
+    def alterar(self, funcao, *args, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return funcao(*args, **kwargs)
+
+    def test_termo_novo_entra_sem_remontar_o_principal(self):
+        self.alterar(GlossarioCultural.objects.create, termo_tecnico='KPI', explicacao_simples='Indicador')
+        self.alterar(GlossarioCultural.objects.create, termo_tecnico='Go Live Amanhã', explicacao_simples='Estreia')
+
+        self.assertEqual(self.termos('O KPI da TI e o go live amanha'),
+                         [('KPI', 'KPI'), ('TI', 'TI'), ('go live amanha', 'Go Live Amanhã')])
+        self.assertEqual(self.termos('O go live'), [('go live', 'Go Live')])
+        self.assertIs(self.indice._automato, self.principal)
+
+    def test_so_a_explicacao_mudou(self):
+        ti = GlossarioCultural.objects.get(termo_tecnico='TI')
+        ti.explicacao_simples = 'Área de tecnologia'
+        self.alterar(ti.save)
+
+        self.assertEqual(self.indice.anotar('A TI'), 'A TI (**Área de tecnologia**)')
+        self.assertIs(self.indice._automato, self.principal)
+
+    def test_remocao_e_termo_renomeado_remontam(self):
+        self.alterar(GlossarioCultural.objects.get(termo_tecnico='TI').delete)
+        acao = GlossarioCultural.objects.get(termo_tecnico='Ação')
+        acao.termo_tecnico = 'Tarefa'
+        self.alterar(acao.save)
+
+        self.assertEqual(self.termos('A TI fez a ação e a tarefa'), [('tarefa', 'Tarefa')])
+        self.assertIsNot(self.indice._automato, self.principal)
+
+    @mock.patch('core.indice_glossario.LIMITE_RECENTES', 2)
+    def test_muitos_termos_novos_voltam_para_o_principal(self):
+        for termo in ('KPI', 'OKR', 'SLA'):
+            self.alterar(GlossarioCultural.objects.create, termo_tecnico=termo, explicacao_simples=termo.lower())
+
+        self.assertEqual([t for t, _ in self.termos('KPI, OKR e SLA')], ['KPI', 'OKR', 'SLA'])
+        self.assertIsNot(self.indice._automato, self.principal)
+        self.assertEqual(self.indice._recentes, set())
+
+    def test_alteracao_de_outro_processo_recarrega_do_banco(self):
+        VersaoGlossario.nova()  # Outro processo alterou o glossário
+        GlossarioCultural.objects.filter(termo_tecnico='TI').update(explicacao_simples='Tecnologia')
+        self.alterar(GlossarioCultural.objects.create, termo_tecnico='KPI', explicacao_simples='Indicador')
+
+        self.assertEqual(self.indice.anotar('A TI e o KPI'), 'A TI (**Tecnologia**) e o KPI (**Indicador**)')
+
+
+class VersaoGlossarioTests(TesteConcorrente):
+
+    def test_alteracoes_simultaneas_recebem_versoes_distintas(self):
+        inicial = VersaoGlossario.atual()
+
+        versoes, erros = em_paralelo(lambda indice: VersaoGlossario.nova(), 8)
+
+        self.assertEqual(erros, [])
+        self.assertEqual(sorted(versoes), list(range(inicial + 1, inicial + 9)))
+        self.assertEqual(VersaoGlossario.atual(), inicial + 8)
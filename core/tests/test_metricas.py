@@ -0,0 +1,94 @@
+# core/tests/test_metricas.py
+
+import re
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .. import metricas
+from ..models import SegmentoTranscricao
+from .auxiliares import criar_reuniao
+
+
+def valor(texto, linha):
+    """Valor da linha `linha` (nome{rótulos}) na exposição do Prometheus, ou None."""
+    encontrado = re.search(rf'^{re.escape(linha)} (\S+)$', texto, re.MULTILINE)
+    return float(encontrado.group(1)) if encontrado else None
+
+
+class FormatoPrometheusTests(SimpleTestCase):
+
+    def setUp(self):
+        registro = mock.patch.object(metricas, 'registro', metricas.Registro())
+        self.registro = registro.start()
+        self.addCleanup(registro.stop)
+
+    def test_contador_com_rotulos_escapados(self):
+        contador = metricas.Contador('exemplo_total', 'Ajuda do exemplo.', ['rota', 'tipo'])
+        contador.incrementar(rota='a"b\\c\nd', tipo='x')
+        contador.incrementar(2.5, rota='a"b\\c\nd', tipo='x')
+        contador.incrementar(tipo='y')
+
+        self.assertEqual(self.registro.exportar(), (
+            '# HELP exemplo_total Ajuda do exemplo.\n'
+            '# TYPE exemplo_total counter\n'
+            'exemplo_total{rota="",tipo="y"} 1\n'
+            'exemplo_total{rota="a\\"b\\\\c\\nd",tipo="x"} 3.5\n'
+        ))
+
+    def test_histograma_cumulativo(self):
+        histograma = metricas.Histograma('espera_segundos', 'Espera.', baldes=(0.1, 1))
+        for segundos in (0.05, 0.5, 0.7, 3):
+            histograma.observar(segundos)
+
+        self.assertEqual(list(histograma.linhas()), [
+            'espera_segundos_bucket{le="0.1"} 1',
+            'espera_segundos_bucket{le="1"} 3',
+            'espera_segundos_bucket{le="+Inf"} 4',
+            'espera_segundos_sum 4.25',
+            'espera_segundos_count 4',
+        ])
+        self.assertEqual(histograma.valores(), {(): (4.25, 4)})
+
+    def test_medir_registra_mesmo_com_excecao(self):
+        histograma = metricas.Histograma('etapa_segundos', 'Etapa.', ['etapa'])
+        with self.assertRaises(ValueError), histograma.medir(etapa='falha'):
+            raise ValueError
+
+        self.assertEqual(histograma.valores()[('falha',)][1], 1)
+
+
+class RaspagemTests(TestCase):
+
+    def setUp(self):
+        self.reuniao = criar_reuniao()
+        SegmentoTranscricao.substituir(self.reuniao, [{'inicio': 0, 'fim': 1, 'texto': 'Bom dia.'}])
+
+    def test_requisicao_aparece_em_metrics(self):
+        linha = 'http_requisicao_consultas_banco_count{view="segmentos_reuniao"}'
+        antes = valor(self.client.get(reverse('metricas')).content.decode(), linha) or 0
+
+        resposta = self.client.get(reverse('segmentos_reuniao', args=[self.reuniao.pk]))
+        self.assertEqual(resposta['Server-Timing'].split(', ')[1], 'db;desc="1 consultas"')
+
+        raspagem = self.client.get(reverse('metricas'))
+        self.assertEqual(raspagem['Content-Type'], metricas.TIPO_CONTEUDO)
+        texto = raspagem.content.decode()
+        self.assertEqual(valor(texto, linha), antes + 1)
+        self.assertIn('# TYPE http_requisicao_duracao_segundos histogram', texto)
+        self.assertIsNotNone(valor(
+            texto, 'http_requisicao_duracao_segundos_count{view="segmentos_reuniao",metodo="GET",status="200"}',
+        ))
+        self.assertIsNotNone(valor(texto, 'template_renderizacao_segundos_count{template="core/partials/segmentos_transcricao.html"}'))
+
+    def test_consultas_de_cada_requisicao_sao_contadas_a_parte(self):
+        for a_partir in (0, 1):
+            resposta = self.client.get(reverse('segmentos_reuniao', args=[self.reuniao.pk]), {'a_partir': a_partir})
+            self.assertIn('db;desc="1 consultas"', resposta['Server-Timing'])
+
+    @override_settings(METRICAS_TOKEN='segredo')
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse('metricas')).status_code, 403)
+        resposta = self.client.get(reverse('metricas'), headers={'Authorization': 'Bearer segredo'})
+        self.assertEqual(resposta.status_code, 200)
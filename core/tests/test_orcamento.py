@@ -0,0 +1,150 @@
+# core/tests/test_orcamento.py
+
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from ..cliente_ia import ClienteIA, ErroIATransitorio, IAIndisponivel, LimiteTaxaIA
+from ..models import ConsumoIA
+from ..orcamento_ia import Reserva, orcamento_ia
+from .auxiliares import TesteConcorrente, em_paralelo
+
+MINUTO = 29_000_000
+AGORA = MINUTO * 60 + 10  # 10 s dentro da janela, longe da virada do minuto
+
+ORCAMENTO_PEQUENO = dict(
+    IA_LIMITE_TOKENS_POR_MINUTO=1000,
+    IA_LIMITE_REQUISICOES_POR_MINUTO=10,
+    IA_RESERVA_INTERATIVA=0.3,
+    IA_ORCAMENTO_ESPERA_MAXIMA={'interativa': 0, 'fundo': 0},
+)
+
+
+def janela(minuto=MINUTO):
+    return ConsumoIA.objects.filter(minuto=minuto).values_list('tokens', 'requisicoes').first()
+
+
+class ConsumoIATests(TestCase):
+
+    def test_reserva_ate_o_limite_exato(self):
+        self.assertTrue(ConsumoIA.reservar(MINUTO, 600, 1000, 10))
+        self.assertTrue(ConsumoIA.reservar(MINUTO, 400, 1000, 10))
+        self.assertFalse(ConsumoIA.reservar(MINUTO, 1, 1000, 10))
+        self.assertEqual(janela(), (1000, 2))
+
+    def test_limite_de_requisicoes(self):
+        self.assertTrue(ConsumoIA.reservar(MINUTO, 0, 1000, 2))
+        self.assertTrue(ConsumoIA.reservar(MINUTO, 0, 1000, 2))
+        self.assertFalse(ConsumoIA.reservar(MINUTO, 0, 1000, 2))
+        self.assertEqual(janela(), (0, 2))
+
+    def test_janela_nova_descarta_as_antigas(self):
+        ConsumoIA.reservar(MINUTO - 61, 10, 1000, 10)
+        ConsumoIA.reservar(MINUTO - 60, 10, 1000, 10)
+
+        ConsumoIA.reservar(MINUTO, 10, 1000, 10)
+
+        self.assertEqual(sorted(ConsumoIA.objects.values_list('minuto', flat=True)), [MINUTO - 60, MINUTO])
+
+    def test_ajustar_soma_a_diferenca(self):
+        ConsumoIA.reservar(MINUTO, 500, 1000, 10)
+        ConsumoIA.ajustar(MINUTO, -200)
+        ConsumoIA.ajustar(MINUTO, -300, requisicoes=-1)
+        self.assertEqual(janela(), (0, 0))
+
+
+class ConsumoIAConcorrenteTests(TesteConcorrente):
+
+    def test_processos_juntos_nao_estouram_o_limite(self):
+        resultados, erros = em_paralelo(lambda indice: ConsumoIA.reservar(MINUTO, 100, 1000, 50), 12)
+
+        self.assertEqual(erros, [])
+        self.assertEqual(resultados.count(True), 10)
+        self.assertEqual(janela(), (1000, 10))
+
+
+@override_settings(**ORCAMENTO_PEQUENO)
+@mock.patch('core.orcamento_ia.time', wraps=time)
+class OrcamentoIATests(TestCase):
+
+    def admitir(self, relogio, operacao, tokens):
+        relogio.time.return_value = AGORA
+        return orcamento_ia.admitir(operacao, tokens)
+
+    def test_fundo_deixa_a_reserva_interativa_livre(self, relogio):
+        self.assertEqual(self.admitir(relogio, 'ata', 700), Reserva('fundo', MINUTO, 700))
+        self.assertIsNone(self.admitir(relogio, 'ata', 1))
+        self.assertEqual(self.admitir(relogio, 'vies', 300), Reserva('interativa', MINUTO, 300))
+        self.assertIsNone(self.admitir(relogio, 'vies', 1))
+
+    def test_operacao_fora_do_orcamento(self, relogio):
+        self.assertEqual(self.admitir(relogio, 'transcricao', 10_000), Reserva())
+        self.assertFalse(ConsumoIA.objects.exists())
+
+    def test_pedido_maior_que_o_orcamento_passa_sozinho(self, relogio):
+        self.assertEqual(self.admitir(relogio, 'vies', 5000).tokens, 1000)
+        self.assertIsNone(self.admitir(relogio, 'vies', 5000))
+
+    def test_registrar_uso_corrige_contra_o_reservado(self, relogio):
+        reserva = self.admitir(relogio, 'vies', 300)
+
+        orcamento_ia.registrar_uso(reserva, 120)
+        self.assertEqual(janela(), (120, 1))
+
+        orcamento_ia.registrar_uso(reserva, None)
+        orcamento_ia.registrar_uso(Reserva(), 500)
+        self.assertEqual(janela(), (120, 1))
+
+    def test_devolver_desfaz_a_reserva(self, relogio):
+        orcamento_ia.devolver(self.admitir(relogio, 'ata', 250))
+        self.assertEqual(janela(), (0, 0))
+
+    @override_settings(IA_LIMITE_TOKENS_POR_MINUTO=None)
+    def test_sem_limite_nada_e_controlado(self, relogio):
+        self.assertEqual(self.admitir(relogio, 'vies', 10_000), Reserva())
+
+
+@override_settings(**ORCAMENTO_PEQUENO, IA_TENTATIVAS=3, IA_ESPERA_BASE=0, IA_DISJUNTOR_FALHAS=5)
+@mock.patch('core.orcamento_ia.time', wraps=time)
+class ClienteIAOrcamentoTests(TestCase):
+
+    def setUp(self):
+        self.cliente = ClienteIA()
+        self.addCleanup(self.cliente.reiniciar)
+        self.respostas = []
+
+    def funcao(self, cliente):
+        resposta = self.respostas.pop(0)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+    def test_cada_tentativa_reserva_e_o_uso_real_fecha_a_conta(self, relogio):
+        relogio.time.return_value = AGORA
+        self.respostas = [ErroIATransitorio('503'), ErroIATransitorio('503'),
+                          SimpleNamespace(usage=SimpleNamespace(total_tokens=50))]
+
+        with self.assertLogs('core.cliente_ia', 'WARNING'):
+            self.cliente.chamar('vies', self.funcao, tokens=100)
+
+        # As duas tentativas que falharam foram enviadas: contam nos limites da conta
+        self.assertEqual(janela(), (250, 3))
+
+    def test_sem_orcamento_desiste_sem_chamar(self, relogio):
+        relogio.time.return_value = AGORA
+        ConsumoIA.reservar(MINUTO, 1000, 1000, 10)
+
+        with self.assertRaises(LimiteTaxaIA):
+            self.cliente.chamar('vies', self.funcao, tokens=1)
+        self.assertEqual(janela(), (1000, 1))
+
+    def test_disjuntor_aberto_devolve_a_reserva(self, relogio):
+        relogio.time.return_value = AGORA
+        self.cliente.disjuntor.estado = self.cliente.disjuntor.ABERTO
+        self.cliente.disjuntor.aberto_em = time.monotonic()
+
+        with self.assertRaises(IAIndisponivel):
+            self.cliente.chamar('vies', self.funcao, tokens=100)
+        self.assertEqual(janela(), (0, 0))
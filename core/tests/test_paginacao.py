@@ -0,0 +1,82 @@
+# core/tests/test_paginacao.py
+
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import ReuniaoAcessivel
+from ..paginacao import codificar_cursor, decodificar_cursor, paginar_por_data
+from .auxiliares import DATA_PADRAO, criar_reuniao
+
+
+def paginar(antes=None, depois=None, por_pagina=4):
+    return paginar_por_data(ReuniaoAcessivel.objects.all(), 'data_reuniao', por_pagina, antes=antes, depois=depois)
+
+
+def pks(pagina):
+    return [reuniao.pk for reuniao in pagina.itens]
+
+
+class CursorTests(TestCase):
+
+    def test_ida_e_volta(self):
+        self.assertEqual(decodificar_cursor(codificar_cursor(DATA_PADRAO, 42)), (DATA_PADRAO, 42))
+
+    def test_cursor_invalido(self):
+        for cursor in (None, '', 'abc', '2024-03-12T14:00:00', 'x_1', '2024-03-12T14:00:00_abc', '2024-13-40T00:00:00_1'):
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decodificar_cursor(cursor))
+
+
+class PaginarPorDataTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # 10 reuniões em 6 horários: várias empatadas na data, desempatadas pelo pk
+        for i in range(10):
+            criar_reuniao(titulo=f"r{i}", data_reuniao=DATA_PADRAO + timedelta(hours=i // 2 + i % 3))
+        cls.ordem = list(ReuniaoAcessivel.objects.order_by('-data_reuniao', '-pk').values_list('pk', flat=True))
+
+    def test_avanca_sem_repetir_nem_pular(self):
+        vistos, pagina = [], paginar()
+        self.assertEqual(pagina.cursor_anterior, '')
+        paginas = [pagina]
+        while pagina.cursor_proximo:
+            vistos += pks(pagina)
+            pagina = paginar(antes=pagina.cursor_proximo)
+            paginas.append(pagina)
+        vistos += pks(pagina)
+
+        self.assertEqual(vistos, self.ordem)
+        self.assertEqual([len(p.itens) for p in paginas], [4, 4, 2])
+        self.assertTrue(all(p.cursor_anterior for p in paginas[1:]))
+
+    def test_volta_para_as_mesmas_paginas(self):
+        segunda = paginar(antes=paginar().cursor_proximo)
+        terceira = paginar(antes=segunda.cursor_proximo)
+
+        self.assertEqual(pks(paginar(depois=terceira.cursor_anterior)), pks(segunda))
+        primeira = paginar(depois=segunda.cursor_anterior)
+        self.assertEqual(pks(primeira), self.ordem[:4])
+        self.assertEqual(primeira.cursor_anterior, '')
+        self.assertTrue(primeira.cursor_proximo)
+
+    def test_ultima_pagina_exata(self):
+        pagina = paginar(por_pagina=5)
+        pagina = paginar(antes=pagina.cursor_proximo, por_pagina=5)
+
+        self.assertEqual(pks(pagina), self.ordem[5:])
+        self.assertEqual(pagina.cursor_proximo, '')
+
+    def test_cursor_invalido_mostra_a_primeira_pagina(self):
+        self.assertEqual(pks(paginar(antes='lixo')), self.ordem[:4])
+
+    @override_settings(DASHBOARD_REUNIOES_POR_PAGINA=4)
+    def test_dashboard_segue_o_cursor_da_url(self):
+        primeira = self.client.get(reverse('dashboard'))
+        cursor = primeira.context['pagina'].cursor_proximo
+
+        segunda = self.client.get(reverse('dashboard'), {'antes': cursor})
+
+        self.assertEqual(pks(segunda.context['pagina']), self.ordem[4:8])
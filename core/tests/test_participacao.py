@@ -0,0 +1,135 @@
+# core/tests/test_participacao.py
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from ..models import (
+    ContribuicaoReuniao, ParticipacaoColaborador, ParticipacaoDepartamento, ParticipacaoSemanal, PerfilColaborador,
+    ReuniaoAcessivel, semana_da_data,
+)
+from .auxiliares import DATA_PADRAO, TesteConcorrente, criar_reuniao, em_paralelo
+
+ATA = {
+    'autoria': [
+        {'autor': 'Ana Souza', 'canal': 'Chat'},
+        {'autor': 'pedro.henrique', 'canal': 'Voz'},
+        {'autor': 'Pedro', 'canal': 'Voz'},
+        {'autor': 'Fulano', 'canal': 'Voz'},
+    ],
+    'apropriacoes': [
+        {'autor': 'Ana', 'por': 'Pedro Henrique'},
+        {'autor': 'Ana', 'por': 'ana.souza'},  # A mesma pessoa: não conta
+    ],
+}
+
+
+def totais(modelo, **chave):
+    linha = modelo.objects.filter(**chave).values(*ContribuicaoReuniao.CAMPOS).first()
+    return linha and {campo: valor for campo, valor in linha.items() if valor}
+
+
+def semanais():
+    return list(ParticipacaoSemanal.objects.order_by('user', 'semana').values('user', 'semana', *ContribuicaoReuniao.CAMPOS))
+
+
+class ParticipacaoMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.ana = User.objects.create(username='ana.souza', first_name='Ana', last_name='Souza')
+        self.pedro = User.objects.create(username='pedro.henrique', first_name='Pedro', last_name='Henrique')
+        PerfilColaborador.objects.create(user=self.ana, cargo='Dev', departamento='TI')
+        PerfilColaborador.objects.create(user=self.pedro, cargo='Analista', departamento='RH')
+        self.semana = semana_da_data(DATA_PADRAO)
+
+    def reuniao_concluida(self, ata=ATA, **campos):
+        reuniao = criar_reuniao(status_ia='CONCLUIDO', pontos_destaque=ata, **campos)
+        reuniao.participantes.add(self.ana, self.pedro)
+        return reuniao
+
+
+class SincronizarTests(ParticipacaoMixin, TestCase):
+
+    def test_soma_por_pessoa_semana_e_departamento(self):
+        ContribuicaoReuniao.sincronizar(self.reuniao_concluida())
+
+        self.assertEqual(totais(ParticipacaoColaborador, user=self.ana),
+                         {'reunioes': 1, 'ideias': 1, 'ideias_chat': 1, 'apropriacoes_sofridas': 1})
+        self.assertEqual(totais(ParticipacaoColaborador, user=self.pedro),
+                         {'reunioes': 1, 'ideias': 2, 'apropriacoes_cometidas': 1})
+        self.assertEqual(totais(ParticipacaoSemanal, user=self.ana, semana=self.semana)['ideias_chat'], 1)
+        self.assertEqual(totais(ParticipacaoDepartamento, departamento='RH', semana=self.semana)['ideias'], 2)
+
+    def test_reprocessar_nao_conta_em_dobro(self):
+        reuniao = self.reuniao_concluida()
+        ContribuicaoReuniao.sincronizar(reuniao)
+        ContribuicaoReuniao.sincronizar(reuniao)
+
+        self.assertEqual(totais(ParticipacaoColaborador, user=self.pedro)['ideias'], 2)
+
+        reuniao.pontos_destaque = {'autoria': [{'autor': 'Ana', 'canal': 'Voz'}]}
+        ContribuicaoReuniao.sincronizar(reuniao)
+
+        self.assertEqual(totais(ParticipacaoColaborador, user=self.pedro), {'reunioes': 1})
+        self.assertEqual(totais(ParticipacaoColaborador, user=self.ana), {'reunioes': 1, 'ideias': 1})
+        self.assertEqual(ContribuicaoReuniao.objects.count(), 2)
+
+    def test_so_reunioes_concluidas_contam(self):
+        reuniao = self.reuniao_concluida()
+        ContribuicaoReuniao.sincronizar(reuniao)
+
+        reuniao.status_ia = 'ERRO'
+        ContribuicaoReuniao.sincronizar(reuniao)
+
+        self.assertFalse(ContribuicaoReuniao.objects.exists())
+        self.assertEqual(totais(ParticipacaoColaborador, user=self.ana), {})
+
+    def test_excluir_a_reuniao_desfaz_a_parcela(self):
+        reuniao = self.reuniao_concluida()
+        ContribuicaoReuniao.sincronizar(reuniao)
+        outra = self.reuniao_concluida(data_reuniao=DATA_PADRAO + timedelta(days=7))
+        ContribuicaoReuniao.sincronizar(outra)
+
+        reuniao.delete()
+
+        self.assertEqual(totais(ParticipacaoColaborador, user=self.pedro)['ideias'], 2)
+        self.assertEqual(totais(ParticipacaoSemanal, user=self.pedro, semana=self.semana), {})
+
+    def test_primeiro_nome_ambiguo_nao_e_atribuido(self):
+        outra_ana = User.objects.create(username='ana.lima', first_name='Ana', last_name='Lima')
+        reuniao = self.reuniao_concluida({'autoria': [{'autor': 'Ana', 'canal': 'Voz'},
+                                                      {'autor': 'Ana Lima', 'canal': 'Voz'}]})
+        reuniao.participantes.add(outra_ana)
+
+        ContribuicaoReuniao.sincronizar(reuniao)
+
+        self.assertEqual(totais(ParticipacaoColaborador, user=self.ana), {'reunioes': 1})
+        self.assertEqual(totais(ParticipacaoColaborador, user=outra_ana), {'reunioes': 1, 'ideias': 1})
+
+    def test_recalcular_chega_nos_mesmos_totais(self):
+        for dias in (0, 7, 8):
+            ContribuicaoReuniao.sincronizar(self.reuniao_concluida(data_reuniao=DATA_PADRAO + timedelta(days=dias)))
+        incrementais = semanais()
+
+        self.assertEqual(ContribuicaoReuniao.recalcular(), 3)
+
+        self.assertEqual(semanais(), incrementais)
+        self.assertEqual(totais(ParticipacaoColaborador, user=self.pedro)['reunioes'], 3)
+
+
+class SincronizarConcorrenteTests(ParticipacaoMixin, TesteConcorrente):
+
+    def test_workers_simultaneos_nao_perdem_incrementos(self):
+        reunioes = [self.reuniao_concluida(data_reuniao=DATA_PADRAO + timedelta(days=i % 2)) for i in range(8)]
+
+        def sincronizar(indice):
+            ContribuicaoReuniao.sincronizar(ReuniaoAcessivel.objects.get(pk=reunioes[indice].pk))
+
+        _, erros = em_paralelo(sincronizar, len(reunioes))
+
+        self.assertEqual(erros, [])
+        self.assertEqual(totais(ParticipacaoColaborador, user=self.pedro),
+                         {'reunioes': 8, 'ideias': 16, 'apropriacoes_cometidas': 8})
+        self.assertEqual(totais(ParticipacaoDepartamento, departamento='TI', semana=self.semana)['reunioes'], 8)
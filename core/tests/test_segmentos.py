@@ -0,0 +1,78 @@
+# core/tests/test_segmentos.py
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import SegmentoTranscricao
+from .auxiliares import criar_reuniao
+
+
+class SubstituirSegmentosTests(TestCase):
+
+    def setUp(self):
+        self.reuniao = criar_reuniao()
+
+    def test_grava_em_milissegundos_e_ignora_trechos_vazios(self):
+        SegmentoTranscricao.substituir(self.reuniao, [
+            {'inicio': -0.0004, 'fim': 1.2345, 'texto': 'Bom dia.'},
+            {'inicio': 1.2345, 'fim': 2.0, 'texto': ''},
+            {'inicio': 2.0, 'fim': 3.9996, 'texto': 'Vamos começar.', 'falante': 'Ana'},
+        ])
+
+        self.assertEqual(
+            list(SegmentoTranscricao.objects.values_list('ordem', 'inicio_ms', 'fim_ms', 'texto', 'falante')),
+            [(0, 0, 1234, 'Bom dia.', ''), (1, 2000, 4000, 'Vamos começar.', 'Ana')],
+        )
+        self.assertEqual(SegmentoTranscricao.como_dicts(self.reuniao.pk), [
+            {'inicio': 0.0, 'fim': 1.234, 'texto': 'Bom dia.', 'falante': ''},
+            {'inicio': 2.0, 'fim': 4.0, 'texto': 'Vamos começar.', 'falante': 'Ana'},
+        ])
+
+    def test_reprocessar_troca_todos_os_segmentos(self):
+        outra = criar_reuniao()
+        SegmentoTranscricao.substituir(outra, [{'inicio': 0, 'fim': 1, 'texto': 'Outra reunião.'}])
+        SegmentoTranscricao.substituir(self.reuniao, [{'inicio': i, 'fim': i + 1, 'texto': f'v1 {i}'} for i in range(3)])
+
+        SegmentoTranscricao.substituir(self.reuniao, [{'inicio': 0, 'fim': 1, 'texto': 'v2'}])
+
+        self.assertEqual([s['texto'] for s in SegmentoTranscricao.como_dicts(self.reuniao.pk)], ['v2'])
+        self.assertEqual(SegmentoTranscricao.objects.filter(reuniao=outra).count(), 1)
+
+
+@override_settings(TRANSCRICAO_SEGMENTOS_POR_JANELA=2)
+class JanelaSegmentosTests(TestCase):
+
+    def setUp(self):
+        self.reuniao = criar_reuniao()
+        SegmentoTranscricao.substituir(self.reuniao, [
+            {'inicio': inicio, 'fim': inicio + 5, 'texto': f'Trecho {i}'}
+            for i, inicio in enumerate((0, 65.5, 3725, 3730, 3800))
+        ])
+        self.url = reverse('segmentos_reuniao', args=[self.reuniao.pk])
+
+    def test_janela_com_link_para_a_proxima(self):
+        resposta = self.client.get(self.url)
+
+        self.assertContains(resposta, 'data-inicio="65.500"')
+        self.assertContains(resposta, '01:05')
+        self.assertNotContains(resposta, 'Trecho 2')
+        self.assertContains(resposta, f'{self.url}?a_partir=2')
+
+    def test_janelas_seguintes_e_ultima(self):
+        resposta = self.client.get(self.url, {'a_partir': 2})
+        self.assertContains(resposta, 'Trecho 2')
+        self.assertContains(resposta, '1:02:05')  # Com horas
+        self.assertContains(resposta, f'{self.url}?a_partir=4')
+
+        resposta = self.client.get(self.url, {'a_partir': 4})
+        self.assertContains(resposta, 'Trecho 4')
+        self.assertNotContains(resposta, 'a_partir=')
+
+    def test_posicao_invalida_volta_ao_inicio(self):
+        for a_partir in ('abc', '-3'):
+            with self.subTest(a_partir=a_partir):
+                self.assertContains(self.client.get(self.url, {'a_partir': a_partir}), 'Trecho 0')
+
+    def test_cada_janela_e_uma_consulta(self):
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'a_partir': 2})
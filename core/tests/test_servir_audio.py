@@ -0,0 +1,114 @@
+# core/tests/test_servir_audio.py
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..audio import calcular_picos
+from ..servir_audio import RangeInvalido, interpretar_range
+from .auxiliares import MidiaTemporariaMixin, criar_reuniao
+
+AUDIO = bytes(range(256)) * 4  # 1024 bytes
+
+
+class InterpretarRangeTests(SimpleTestCase):
+
+    def test_intervalos_validos(self):
+        casos = {
+            'bytes=0-0': (0, 0),
+            'bytes=100-199': (100, 199),
+            'bytes=100-': (100, 999),
+            'bytes=900-5000': (900, 999),  # Fim além do arquivo é cortado
+            'bytes=-1': (999, 999),
+            'bytes=-5000': (0, 999),  # Sufixo maior que o arquivo: o arquivo inteiro
+            ' bytes=999-999 ': (999, 999),
+        }
+        for cabecalho, esperado in casos.items():
+            with self.subTest(cabecalho=cabecalho):
+                self.assertEqual(interpretar_range(cabecalho, 1000), esperado)
+
+    def test_ignorados_respondem_o_arquivo_inteiro(self):
+        for cabecalho in (None, '', 'bytes=-', 'bytes=0-1,5-6', 'items=0-1', 'bytes=a-b', 'bytes 0-1'):
+            with self.subTest(cabecalho=cabecalho):
+                self.assertIsNone(interpretar_range(cabecalho, 1000))
+
+    def test_fora_do_arquivo(self):
+        for cabecalho, tamanho in (('bytes=1000-', 1000), ('bytes=1000-1001', 1000), ('bytes=5-4', 1000),
+                                   ('bytes=-0', 1000), ('bytes=0-', 0), ('bytes=-5', 0)):
+            with self.subTest(cabecalho=cabecalho, tamanho=tamanho), self.assertRaises(RangeInvalido):
+                interpretar_range(cabecalho, tamanho)
+
+
+class CalcularPicosTests(SimpleTestCase):
+
+    def test_normaliza_pelo_maior_pico(self):
+        self.assertEqual(calcular_picos([0, 10, 20, 40], quantidade=4), bytes([0, 63, 127, 255]))
+        self.assertEqual(calcular_picos([1, 4, 2, 8, 3], quantidade=2), bytes([127, 255]))
+        self.assertEqual(calcular_picos([0, 0], quantidade=4), bytes([0, 0]))
+        self.assertEqual(calcular_picos([], quantidade=4), b'')
+
+
+@override_settings(AUDIO_SENDFILE_CABECALHO=None)
+class AudioReuniaoTests(MidiaTemporariaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.reuniao = criar_reuniao(arquivo_audio=ContentFile(AUDIO, name='gravacao.mp3'))
+        self.url = reverse('audio_reuniao', args=[self.reuniao.pk])
+        self.etag = f'"{self.reuniao.hash_audio}"'
+
+    def test_arquivo_inteiro(self):
+        resposta = self.client.get(self.url)
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(b''.join(resposta.streaming_content), AUDIO)
+        self.assertEqual(resposta['Accept-Ranges'], 'bytes')
+        self.assertEqual(resposta['ETag'], self.etag)
+        self.assertEqual(resposta['Content-Type'], 'audio/mpeg')
+
+    def test_intervalo(self):
+        resposta = self.client.get(self.url, headers={'Range': 'bytes=1000-'})
+
+        self.assertEqual(resposta.status_code, 206)
+        self.assertEqual(resposta['Content-Range'], 'bytes 1000-1023/1024')
+        self.assertEqual(resposta['Content-Length'], '24')
+        self.assertEqual(b''.join(resposta.streaming_content), AUDIO[1000:])
+
+    def test_intervalo_fora_do_arquivo(self):
+        resposta = self.client.get(self.url, headers={'Range': 'bytes=1024-'})
+        self.assertEqual(resposta.status_code, 416)
+        self.assertEqual(resposta['Content-Range'], 'bytes */1024')
+
+    def test_if_range_antigo_manda_o_arquivo_inteiro(self):
+        resposta = self.client.get(self.url, headers={'Range': 'bytes=0-9', 'If-Range': '"outro"'})
+        self.assertEqual(resposta.status_code, 200)
+
+        resposta = self.client.get(self.url, headers={'Range': 'bytes=0-9', 'If-Range': self.etag})
+        self.assertEqual(resposta.status_code, 206)
+
+    def test_etag_igual_responde_304(self):
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': self.etag}).status_code, 304)
+
+    @override_settings(AUDIO_SENDFILE_CABECALHO='X-Accel-Redirect', AUDIO_SENDFILE_PREFIXO='/interna/')
+    def test_sendfile_delega_ao_servidor_web(self):
+        resposta = self.client.get(self.url, headers={'Range': 'bytes=0-9'})
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta['X-Accel-Redirect'], f'/interna/{self.reuniao.arquivo_audio.name}')
+        self.assertEqual(resposta.content, b'')
+
+    def test_sem_audio_ou_arquivo_sumido(self):
+        self.assertEqual(self.client.get(reverse('audio_reuniao', args=[criar_reuniao().pk])).status_code, 404)
+        self.reuniao.arquivo_audio.storage.delete(self.reuniao.arquivo_audio.name)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_picos_com_etag(self):
+        url = reverse('picos_reuniao', args=[self.reuniao.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.reuniao.picos_audio = bytes([0, 128, 255])
+        self.reuniao.save()
+        resposta = self.client.get(url)
+
+        self.assertEqual(resposta.content, bytes([0, 128, 255]))
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': resposta['ETag']}).status_code, 304)
@@ -0,0 +1,127 @@
+# core/tests/test_storage.py
+
+import hashlib
+import io
+import os
+import time
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..management.commands.limpar_audios_orfaos import Command as LimparAudiosOrfaos
+from ..models import ReuniaoAcessivel, UploadAudio
+from ..storage import ArmazenamentoPorConteudo, armazenamento_audio
+from ..tasks import FilaReunioes
+from .auxiliares import MidiaTemporariaMixin, criar_reuniao
+
+PASTA = 'reunioes/audio'
+
+
+def envelhecer(nome, horas=2):
+    antes = time.time() - horas * 3600
+    os.utime(armazenamento_audio.path(nome), (antes, antes))
+
+
+class ArmazenamentoPorConteudoTests(MidiaTemporariaMixin, TestCase):
+
+    def test_mesmo_conteudo_mesmo_arquivo(self):
+        sha256 = hashlib.sha256(b'audio').hexdigest()
+
+        primeiro = armazenamento_audio.save(f'{PASTA}/a.MP3', ContentFile(b'audio'))
+        segundo = armazenamento_audio.save(f'{PASTA}/b.mp3', ContentFile(b'audio'))
+
+        self.assertEqual(primeiro, f'{PASTA}/{sha256[:2]}/{sha256[2:4]}/{sha256}.mp3')
+        self.assertEqual(segundo, primeiro)
+        self.assertEqual(ArmazenamentoPorConteudo.hash_do_caminho(primeiro), sha256)
+        self.assertEqual(len(os.listdir(os.path.dirname(armazenamento_audio.path(primeiro)))), 1)
+
+    def test_hash_de_caminho_legado(self):
+        self.assertEqual(ArmazenamentoPorConteudo.hash_do_caminho('reunioes/audio/gravacao.mp3'), '')
+        self.assertEqual(ArmazenamentoPorConteudo.hash_do_caminho(None), '')
+
+    def test_reaproveitar_atualiza_o_mtime(self):
+        nome = armazenamento_audio.save(f'{PASTA}/a.mp3', ContentFile(b'audio'))
+        envelhecer(nome)
+
+        armazenamento_audio.save(f'{PASTA}/b.mp3', ContentFile(b'audio'))
+
+        self.assertGreater(os.path.getmtime(armazenamento_audio.path(nome)), time.time() - 60)
+
+    def test_adotar_conteudo_repetido_descarta_o_local_e_toca_o_existente(self):
+        nome = armazenamento_audio.save(f'{PASTA}/a.mp3', ContentFile(b'audio'))
+        envelhecer(nome)
+        local = armazenamento_audio.save(f'{PASTA}/parcial/x.part', io.BytesIO(b'audio'))
+        sha256 = ArmazenamentoPorConteudo.hash_do_caminho(nome)
+
+        self.assertEqual(armazenamento_audio.adotar(local, PASTA, '.mp3', sha256), nome)
+        self.assertFalse(armazenamento_audio.exists(local))
+        self.assertGreater(os.path.getmtime(armazenamento_audio.path(nome)), time.time() - 60)
+
+    def test_reuniao_guarda_o_hash(self):
+        reuniao = criar_reuniao(arquivo_audio=ContentFile(b'audio', name='gravacao.wav'))
+        self.assertEqual(reuniao.hash_audio, hashlib.sha256(b'audio').hexdigest())
+
+
+class TranscricaoExistenteTests(MidiaTemporariaMixin, TestCase):
+
+    def test_reaproveita_transcricao_do_mesmo_audio(self):
+        original = criar_reuniao(arquivo_audio=ContentFile(b'audio', name='a.wav'), status_ia='CONCLUIDO')
+        original.transcricao_completa = 'Olá a todos.'
+        original.save()
+        copia = criar_reuniao(arquivo_audio=ContentFile(b'audio', name='b.wav'))
+
+        texto, segmentos, picos = FilaReunioes.transcricao_existente(copia)
+
+        self.assertEqual(texto, 'Olá a todos.')
+        self.assertEqual((segmentos, picos), ([], b''))
+
+    def test_ignora_reuniao_ainda_nao_concluida(self):
+        criar_reuniao(arquivo_audio=ContentFile(b'audio', name='a.wav'), status_ia='PROCESSANDO')
+        copia = criar_reuniao(arquivo_audio=ContentFile(b'audio', name='b.wav'))
+        self.assertIsNone(FilaReunioes.transcricao_existente(copia))
+
+
+class LimparAudiosOrfaosTests(MidiaTemporariaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.orfao = armazenamento_audio.save(f'{PASTA}/a.mp3', ContentFile(b'orfao'))
+        self.usado = criar_reuniao(arquivo_audio=ContentFile(b'usado', name='b.mp3')).arquivo_audio.name
+        self.recente = armazenamento_audio.save(f'{PASTA}/c.mp3', ContentFile(b'recente'))
+        envelhecer(self.orfao)
+        envelhecer(self.usado)
+
+    def test_remove_so_orfaos_antigos(self):
+        call_command('limpar_audios_orfaos', stdout=io.StringIO())
+
+        self.assertFalse(armazenamento_audio.exists(self.orfao))
+        self.assertFalse(os.path.isdir(os.path.dirname(armazenamento_audio.path(self.orfao))))
+        self.assertTrue(armazenamento_audio.exists(self.usado))
+        self.assertTrue(armazenamento_audio.exists(self.recente))
+
+    def test_dry_run_nao_apaga(self):
+        saida = io.StringIO()
+        call_command('limpar_audios_orfaos', '--dry-run', stdout=saida)
+        self.assertIn(f'[dry-run] Removendo {self.orfao}', saida.getvalue())
+        self.assertTrue(armazenamento_audio.exists(self.orfao))
+
+    def test_confere_de_novo_antes_de_apagar(self):
+        limite = time.time() - 3600
+        self.assertFalse(LimparAudiosOrfaos._em_uso(self.orfao, limite))
+
+        # Referência criada depois da leitura da lista de referenciados
+        UploadAudio.objects.create(nome_original='a.mp3', tamanho=5, recebidos=5, arquivo=self.orfao)
+        self.assertTrue(LimparAudiosOrfaos._em_uso(self.orfao, limite))
+
+        UploadAudio.objects.all().delete()
+        ReuniaoAcessivel.objects.filter(arquivo_audio=self.usado).update(arquivo_audio=self.orfao)
+        self.assertTrue(LimparAudiosOrfaos._em_uso(self.orfao, limite))
+
+    def test_arquivo_reaproveitado_no_meio_da_coleta_fica(self):
+        ReuniaoAcessivel.objects.all().delete()
+        armazenamento_audio.save(f'{PASTA}/d.mp3', ContentFile(b'usado'))
+        self.assertTrue(LimparAudiosOrfaos._em_uso(self.usado, time.time() - 3600))
+
+    def test_arquivo_ja_removido_e_pulado(self):
+        self.assertTrue(LimparAudiosOrfaos._em_uso(f'{PASTA}/inexistente.mp3', time.time()))
@@ -0,0 +1,145 @@
+# core/tests/test_streaming.py
+
+from contextlib import aclosing
+from types import SimpleNamespace
+from unittest import mock
+
+import openai
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..cache import cache_ia
+from ..cliente_ia import cliente_ia
+from ..models import ConsumoIA, GlossarioCultural
+from ..services import IAService
+from .auxiliares import CACHES_LOCAIS
+
+PEDACOS = ['Manda o ', 'report', ' (**relatório**) ', '<b>já</b>']
+
+
+class StreamFalso(openai.Stream):
+    """Como o openai.Stream do cliente síncrono, sem rede."""
+
+    def __init__(self, pedacos):
+        self.eventos = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=p))], usage=None) for p in pedacos
+        ]
+        # Com include_usage, o último evento vem sem choices e com o uso real
+        self.eventos.append(SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=42)))
+        self.fechado = False
+
+    def __iter__(self):
+        return iter(self.eventos)
+
+    def close(self):
+        self.fechado = True
+
+
+@override_settings(CACHES=CACHES_LOCAIS)
+class TraduzirStreamTests(TestCase):
+
+    def setUp(self):
+        caches['ia'].clear()
+        cache_ia.limpar_local()
+        self.addCleanup(cache_ia.limpar_local)
+        self.streams = []
+
+        def create(**pedido):
+            self.assertTrue(pedido['stream'])
+            self.streams.append(StreamFalso(PEDACOS))
+            return self.streams[-1]
+
+        falso = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        falso.with_options = lambda **opcoes: falso
+        # Views async no TestCase rodam num loop de async_to_sync: a chamada usa o cliente síncrono numa thread
+        cliente = mock.patch.object(cliente_ia, '_sync', falso)
+        cliente.start()
+        self.addCleanup(cliente.stop)
+        self.url = reverse('traduzir_stream')
+
+    async def ler(self, resposta):
+        return [p.decode() async for p in resposta.streaming_content]
+
+    async def test_pedacos_chegam_separados_e_escapados(self):
+        resposta = await self.async_client.post(self.url, {'texto_complexo': 'Manda o report ASAP.'})
+
+        self.assertTrue(resposta.is_async)
+        pedacos = await self.ler(resposta)
+        self.assertIn('bi-robot', pedacos[0])  # Selo do caminho vem antes do texto
+        self.assertEqual(pedacos[1:], ['Manda o ', 'report', ' (**relatório**) ', '&lt;b&gt;já&lt;/b&gt;'])
+        self.assertEqual(resposta['X-Tradutor-Caminho'], 'ia')
+        self.assertEqual(resposta['X-Accel-Buffering'], 'no')
+        self.assertTrue(self.streams[0].fechado)
+
+    async def test_resposta_completa_vai_para_o_cache(self):
+        await self.ler(await self.async_client.post(self.url, {'texto_complexo': 'Manda o report ASAP.'}))
+        resposta = await self.async_client.post(self.url, {'texto_complexo': 'Manda o report ASAP.'})
+
+        pedacos = await self.ler(resposta)
+        self.assertEqual(pedacos[1:], ['Manda o report (**relatório**) &lt;b&gt;já&lt;/b&gt;'])
+        self.assertEqual(len(self.streams), 1)
+
+    async def test_uso_do_ultimo_evento_fecha_o_orcamento(self):
+        await self.ler(await self.async_client.post(self.url, {'texto_complexo': 'Manda o report ASAP.'}))
+
+        # A reserva foi pela estimativa do prompt; a janela termina com o total_tokens do stream
+        self.assertEqual([c async for c in ConsumoIA.objects.values_list('tokens', 'requisicoes')], [(42, 1)])
+
+    async def test_glossario_cobre_o_texto_sem_abrir_stream(self):
+        await GlossarioCultural.objects.acreate(termo_tecnico='ASAP', explicacao_simples='assim que possível')
+        resposta = await self.async_client.post(self.url, {'texto_complexo': 'Mande a planilha ASAP.'})
+
+        pedacos = await self.ler(resposta)
+        self.assertEqual(pedacos[1:], ['Mande a planilha ASAP (**assim que possível**).'])
+        self.assertEqual(resposta['X-Tradutor-Caminho'], 'local')
+        self.assertEqual(self.streams, [])
+
+    async def test_consumidor_que_para_de_ler_fecha_a_conexao(self):
+        async with aclosing(IAService.tradutor_cultural_stream_async('Manda o report ASAP.')) as pedacos:
+            self.assertEqual(await anext(pedacos), 'Manda o ')
+
+        self.assertTrue(self.streams[0].fechado)
+        chave = await IAService._chave_tradutor_async('Manda o report ASAP.')
+        self.assertIsNone(await cache_ia.obter_async(chave))  # Resposta incompleta
+
+    async def test_formulario_invalido(self):
+        self.assertEqual((await self.async_client.post(self.url, {})).status_code, 400)
+
+
+@override_settings(CACHES=CACHES_LOCAIS, COALESCENCIA_ESPERA_MAXIMA=2, COALESCENCIA_INTERVALO=0.01)
+class ChecarFeedbackStreamTests(TestCase):
+
+    def setUp(self):
+        caches['ia'].clear()
+        cache_ia.limpar_local()
+        self.addCleanup(cache_ia.limpar_local)
+        self.streams = []
+
+        def create(**pedido):
+            self.streams.append(StreamFalso(['<p>Viés ', 'de gênero', '</p>']))
+            return self.streams[-1]
+
+        falso = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        falso.with_options = lambda **opcoes: falso
+        # Views async no TestCase rodam num loop de async_to_sync: a chamada usa o cliente síncrono numa thread
+        cliente = mock.patch.object(cliente_ia, '_sync', falso)
+        cliente.start()
+        self.addCleanup(cliente.stop)
+        self.url = reverse('checar_feedback_stream')
+
+    async def test_card_chega_em_varios_pedacos(self):
+        resposta = await self.async_client.post(self.url, {'texto_original': 'Ela é emotiva demais.'})
+
+        self.assertTrue(resposta.is_async)
+        pedacos = [p.decode() async for p in resposta.streaming_content]
+        self.assertGreater(len(pedacos), 1)
+        self.assertIn('Análise de Viés', pedacos[0])
+        self.assertEqual(pedacos[1:], ['<p>Viés ', 'de gênero', '</p>', '</div>'])
+        self.assertTrue(self.streams[0].fechado)
+
+    async def test_texto_curto_nao_chama_a_ia(self):
+        resposta = await self.async_client.post(self.url, {'texto_original': 'Curto'})
+
+        self.assertContains(resposta, 'Digite mais para analisar')
+        self.assertEqual(self.streams, [])
@@ -0,0 +1,55 @@
+# core/tests/test_traducao_local.py
+
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from ..cache import cache_ia
+from ..cliente_ia import cliente_ia
+from ..indice_glossario import indice_glossario
+from ..models import GlossarioCultural
+from ..services import CAMINHO_IA, CAMINHO_LOCAL, IAService
+from .auxiliares import CACHES_LOCAIS
+
+
+def resposta(texto):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=texto))])
+
+
+@override_settings(CACHES=CACHES_LOCAIS)
+class TraducaoLocalTests(TestCase):
+
+    def setUp(self):
+        caches['ia'].clear()
+        cache_ia.limpar_local()
+        self.addCleanup(cache_ia.limpar_local)
+        GlossarioCultural.objects.create(termo_tecnico='Report', explicacao_simples='relatório')
+        GlossarioCultural.objects.create(termo_tecnico='ASAP', explicacao_simples='assim que possível')
+        chamar = mock.patch.object(cliente_ia, 'chamar', return_value=resposta('traduzido pela IA'))
+        self.chamar = chamar.start()
+        self.addCleanup(chamar.stop)
+
+    def test_jargao_coberto_pelo_glossario_nao_chama_a_ia(self):
+        texto, caminho = IAService.traduzir('Preciso do report ASAP, por favor.')
+
+        self.assertEqual(caminho, CAMINHO_LOCAL)
+        self.assertEqual(texto, 'Preciso do report (**relatório**) ASAP (**assim que possível**), por favor.')
+        self.chamar.assert_not_called()
+
+    def test_jargao_fora_do_glossario_vai_para_a_ia(self):
+        for frase in ('Preciso do report antes do workshop.', 'O KPI do report caiu.'):
+            with self.subTest(frase=frase):
+                self.assertEqual(IAService.traduzir(frase), ('traduzido pela IA', CAMINHO_IA))
+        self.assertEqual(self.chamar.call_count, 2)
+        self.assertEqual(indice_glossario.jargao_nao_coberto('O KPI do report caiu no workshop.'), ['KPI', 'workshop'])
+
+    def test_reescrever_sempre_usa_a_ia(self):
+        self.assertEqual(IAService.traduzir('Preciso do report ASAP.', reescrever=True), ('traduzido pela IA', CAMINHO_IA))
+
+        self.chamar.assert_called_once()
+        self.assertEqual(self.chamar.call_args.args[0], 'tradutor')
+
+    def test_texto_sem_jargao_fica_como_esta(self):
+        self.assertEqual(IAService.anotar_glossario_local('Vamos conversar amanhã cedo.'), 'Vamos conversar amanhã cedo.')
@@ -0,0 +1,167 @@
+# core/tests/test_transcricao.py
+
+import asyncio
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from ..audio import AudioIndisponivel, MapaTempos, TrechoAudio
+from ..benchmark import gerar_wav
+from ..cache import cache_ia
+from ..cliente_ia import ErroIATransitorio, cliente_ia
+from ..openai_falso import ConfiguracaoFalsa, ServidorOpenAIFalso
+from ..services import IAService
+from .auxiliares import CACHES_LOCAIS
+
+try:
+    import pydub
+except ImportError:
+    pydub = None
+
+
+class TemposTrechoTests(SimpleTestCase):
+
+    def test_mapa_pula_os_silencios_removidos(self):
+        # Fala em 0-2 s e 10-13 s da gravação original
+        mapa = MapaTempos([(0, 0, 2000), (2000, 10000, 3000)])
+        self.assertEqual(mapa.para_original(1500), 1500)
+        self.assertEqual(mapa.para_original(2000), 10000)
+        self.assertEqual(mapa.para_original(4500), 12500)
+        self.assertEqual(mapa.para_original(9999), 13000)
+        self.assertEqual(mapa.partes_originais(1000, 3000), [(1000, 1000), (10000, 1000)])
+
+    def test_segmentos_voltam_para_o_tempo_original_sem_alterar_o_cache(self):
+        trecho = TrechoAudio(1, 2.0, 5.0, '', MapaTempos([(0, 0, 2000), (2000, 10000, 3000)]))
+        segmentos = [{'inicio': 0.5, 'fim': 1.0, 'texto': 'oi'}]
+
+        ajustados = IAService._ajustar_tempos(segmentos, trecho)
+
+        self.assertEqual(ajustados, [{'inicio': 10.5, 'fim': 11.0, 'texto': 'oi'}])
+        self.assertEqual(segmentos, [{'inicio': 0.5, 'fim': 1.0, 'texto': 'oi'}])
+
+    def test_primeira_falha_so_depois_de_todos_os_trechos(self):
+        trechos = [TrechoAudio(i, 0, 1, '') for i in range(3)]
+        erro = ErroIATransitorio('fora do ar')
+        with self.assertLogs('core.services', 'ERROR') as logs, self.assertRaises(ErroIATransitorio):
+            IAService._resultados_em_ordem(trechos, [('a', []), erro, ValueError('outro')])
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(IAService._resultados_em_ordem(trechos[:1], [('a', [])]), [('a', [])])
+
+
+class SemPreprocessamentoTests(SimpleTestCase):
+
+    def test_sem_pydub_envia_o_arquivo_inteiro(self):
+        with mock.patch('core.services.dividir_em_trechos', side_effect=AudioIndisponivel('sem ffmpeg')), \
+                mock.patch.object(IAService, '_transcrever_arquivo', return_value=('tudo', [])) as transcrever, \
+                self.assertLogs('core.services', 'WARNING'):
+            self.assertEqual(IAService.transcrever_reuniao_segmentos('reuniao.wav'), ('tudo', [], None))
+        transcrever.assert_called_once_with('reuniao.wav', mock.ANY)
+
+
+
+class EnvioDoArquivoTests(SimpleTestCase):
+    """O áudio vai ao Whisper como arquivo aberto (lido em blocos pelo cliente HTTP), não como bytes."""
+
+    def setUp(self):
+        pasta = tempfile.mkdtemp(prefix='teste_envio_')
+        self.addCleanup(shutil.rmtree, pasta, ignore_errors=True)
+        self.gravacao = gerar_wav(os.path.join(pasta, 'reuniao.wav'), 3)
+        cliente_ia.reiniciar()
+        self.addCleanup(cliente_ia.reiniciar)
+
+    def test_servidor_falso_recebe_o_arquivo(self):
+        with ServidorOpenAIFalso(ConfiguracaoFalsa(latencia_transcricao=0, semente=1)) as servidor, \
+                override_settings(OPENAI_BASE_URL=servidor.url):
+            cliente_ia.reiniciar()
+            texto, segmentos = IAService._transcrever_arquivo(self.gravacao, 'prompt')
+            texto_async, _ = asyncio.run(IAService._transcrever_arquivo_async(self.gravacao, 'prompt'))
+
+        self.assertTrue(texto)
+        self.assertTrue(segmentos)
+        self.assertTrue(texto_async)
+
+    @override_settings(IA_TENTATIVAS=2, IA_ESPERA_BASE=0)
+    def test_retentativa_reenvia_o_arquivo_do_inicio(self):
+        enviados = []
+
+        def create(file, **pedido):
+            nome, arquivo = file
+            enviados.append(arquivo.read())
+            if len(enviados) == 1:
+                raise ErroIATransitorio('503')
+            return SimpleNamespace(text='oi', segments=[])
+
+        falso = SimpleNamespace(audio=SimpleNamespace(transcriptions=SimpleNamespace(create=create)))
+        falso.with_options = lambda **opcoes: falso
+        with mock.patch.object(cliente_ia, '_sync', falso), self.assertLogs('core.cliente_ia', 'WARNING'):
+            self.assertEqual(IAService._transcrever_arquivo(self.gravacao, 'prompt'), ('oi', []))
+
+        with open(self.gravacao, 'rb') as arquivo:
+            self.assertEqual(enviados, [arquivo.read()] * 2)
+
+@override_settings(
+    CACHES=CACHES_LOCAIS, TRANSCRICAO_TRECHO_SEGUNDOS=30, TRANSCRICAO_JANELA_CORTE_SEGUNDOS=10,
+)
+@skipUnless(shutil.which(settings.AUDIO_FFMPEG) and pydub is not None, "ffmpeg/pydub não disponíveis")
+class TranscricaoEmTrechosTests(SimpleTestCase):
+    """Gravação de ~95 s dividida em trechos de 30 s."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pasta = tempfile.mkdtemp(prefix='teste_transcricao_')
+        cls.gravacao = gerar_wav(os.path.join(cls.pasta, 'reuniao.wav'), 95)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.pasta, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache_ia.limpar_local()
+        self.addCleanup(cache_ia.limpar_local)
+        self.enviados = []
+        self.falhar = set()
+
+    def transcrever_falso(self, caminho, prompt):
+        nome = os.path.basename(caminho)
+        self.enviados.append(nome)
+        if nome in self.falhar:
+            self.falhar.discard(nome)
+            raise ErroIATransitorio('Whisper fora do ar')
+        return nome, [{'inicio': 0.0, 'fim': 1.0, 'texto': nome}]
+
+    def transcrever(self):
+        with mock.patch.object(IAService, '_transcrever_arquivo', side_effect=self.transcrever_falso):
+            return IAService.transcrever_reuniao_segmentos(self.gravacao)
+
+    def test_trechos_em_ordem_com_tempos_crescentes(self):
+        with self.assertLogs('core.services', 'INFO') as logs:
+            texto, segmentos, relatorio = self.transcrever()
+
+        self.assertGreaterEqual(len(segmentos), 3)
+        self.assertEqual(texto.split('\n'), [s['texto'] for s in segmentos])
+        self.assertEqual(texto.split('\n'), sorted(texto.split('\n')))
+        inicios = [s['inicio'] for s in segmentos]
+        self.assertEqual(inicios, sorted(inicios))
+        self.assertGreater(relatorio.bytes_finais, 0)
+        self.assertGreater(relatorio.segundos_removidos, 0)
+        self.assertIn('Áudio preparado', logs.output[-1])
+
+    def test_nova_tentativa_so_reenvia_o_trecho_que_falhou(self):
+        self.falhar = {'trecho_0001.mp3'}
+        with self.assertLogs('core.services', 'ERROR'), self.assertRaises(ErroIATransitorio):
+            self.transcrever()
+        total = len(self.enviados)
+
+        self.enviados.clear()
+        with self.assertLogs('core.services', 'INFO'):
+            texto, _, _ = self.transcrever()
+
+        self.assertEqual(self.enviados, ['trecho_0001.mp3'])
+        self.assertEqual(len(texto.split('\n')), total)
@@ -0,0 +1,141 @@
+# core/tests/test_upload_retomavel.py
+
+import hashlib
+import io
+import os
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import upload_retomavel
+from ..models import UploadAudio
+from ..storage import armazenamento_audio
+from ..upload_retomavel import ErroUpload
+from .auxiliares import MidiaTemporariaMixin
+
+AUDIO = bytes(range(256)) * 40  # 10240 bytes
+
+
+def sha256(dados):
+    return hashlib.sha256(dados).hexdigest()
+
+
+@override_settings(UPLOAD_AUDIO_TAMANHO_BLOCO_MAXIMO=4096)
+class ReceberBlocoTests(MidiaTemporariaMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.upload = upload_retomavel.iniciar('../gravacao.mp3', len(AUDIO))
+
+    def enviar(self, offset, dados=None, tamanho=None, checksum=None, upload=None):
+        dados = AUDIO[offset:offset + 4096] if dados is None else dados
+        return upload_retomavel.receber_bloco(
+            upload or self.upload, offset, io.BytesIO(dados), len(dados) if tamanho is None else tamanho, checksum,
+        )
+
+    def parcial(self):
+        with open(armazenamento_audio.path(self.upload.nome_parcial), 'rb') as arquivo:
+            return arquivo.read()
+
+    def assertErroUpload(self, status, recebidos, funcao, *args, **kwargs):
+        with self.assertRaises(ErroUpload) as contexto:
+            funcao(*args, **kwargs)
+        self.assertEqual((contexto.exception.status, contexto.exception.recebidos), (status, recebidos))
+
+    def test_blocos_em_ordem_concluem_no_storage_por_conteudo(self):
+        self.assertEqual(self.upload.nome_original, 'gravacao.mp3')
+        for offset in (0, 4096, 8192):
+            self.assertEqual(self.enviar(offset), sha256(AUDIO[offset:offset + 4096]))
+
+        self.upload.refresh_from_db()
+        self.assertTrue(self.upload.concluido)
+        self.assertEqual(self.upload.recebidos, len(AUDIO))
+        self.assertTrue(self.upload.arquivo.endswith(f"{sha256(AUDIO)}.mp3"))
+        with armazenamento_audio.open(self.upload.arquivo) as arquivo:
+            self.assertEqual(arquivo.read(), AUDIO)
+        self.assertFalse(armazenamento_audio.exists(self.upload.nome_parcial))
+        self.assertErroUpload(409, len(AUDIO), self.enviar, 8192)
+
+    def test_offset_fora_de_ordem_informa_o_certo(self):
+        self.enviar(0)
+        self.assertErroUpload(409, 4096, self.enviar, 8192)
+        self.assertErroUpload(409, 4096, self.enviar, 0)
+
+    def test_limites_do_bloco(self):
+        self.assertErroUpload(400, 0, self.enviar, 0, AUDIO[:4097])
+        self.assertErroUpload(400, 0, self.enviar, 0, b'')
+        self.enviar(0)
+        self.enviar(4096)
+        # Último bloco passando do tamanho declarado
+        self.assertErroUpload(400, 8192, self.enviar, 8192, AUDIO[8192:] + b'x')
+        self.enviar(8192, AUDIO[8192:])
+
+    def test_checksum_errado_descarta_o_bloco(self):
+        self.enviar(0)
+        self.assertErroUpload(422, 4096, self.enviar, 4096, checksum=sha256(b'outro'))
+        self.assertEqual(self.parcial(), AUDIO[:4096])
+
+        self.enviar(4096, checksum=sha256(AUDIO[4096:8192]).upper())
+        self.assertEqual(self.parcial(), AUDIO[:8192])
+
+    def test_bloco_incompleto_descarta_o_que_chegou(self):
+        self.enviar(0)
+        self.assertErroUpload(422, 4096, self.enviar, 4096, AUDIO[4096:5000], tamanho=4096)
+        self.assertEqual(self.parcial(), AUDIO[:4096])
+        self.assertEqual(UploadAudio.objects.get(pk=self.upload.pk).recebidos, 4096)
+
+    def test_sobra_de_tentativa_interrompida_e_sobrescrita(self):
+        self.enviar(0)
+        with open(armazenamento_audio.path(self.upload.nome_parcial), 'ab') as arquivo:
+            arquivo.write(b'lixo de um bloco que caiu no meio')
+
+        self.enviar(4096)
+
+        self.assertEqual(self.parcial(), AUDIO[:8192])
+
+    def test_bloco_duplicado_nao_avanca_duas_vezes(self):
+        copia = UploadAudio.objects.get(pk=self.upload.pk)  # Mesma requisição repetida pelo cliente
+        self.enviar(0)
+
+        self.assertErroUpload(409, 4096, self.enviar, 0, upload=copia)
+        self.assertEqual(UploadAudio.objects.get(pk=self.upload.pk).recebidos, 4096)
+        self.assertEqual(self.parcial(), AUDIO[:4096])
+
+    def test_parcial_removido_recomeca_do_zero(self):
+        self.enviar(0)
+        armazenamento_audio.delete(self.upload.nome_parcial)
+
+        self.assertErroUpload(409, 0, self.enviar, 4096)
+        self.upload.refresh_from_db()
+        self.assertEqual(self.upload.recebidos, 0)
+        self.enviar(0)
+
+    def test_iniciar_valida_nome_e_tamanho(self):
+        with self.assertRaises(ErroUpload):
+            upload_retomavel.iniciar('  ', 10)
+        with self.assertRaises(ErroUpload):
+            upload_retomavel.iniciar('a.mp3', 0)
+        with override_settings(UPLOAD_AUDIO_TAMANHO_MAXIMO=100), self.assertRaises(ErroUpload):
+            upload_retomavel.iniciar('a.mp3', 101)
+
+
+class UploadAudioViewsTests(MidiaTemporariaMixin, TestCase):
+
+    def test_envio_e_retomada_pela_api(self):
+        resposta = self.client.post(reverse('iniciar_upload_audio'), {'nome': 'a.wav', 'tamanho': 6})
+        self.assertEqual(resposta.status_code, 201)
+        url = reverse('upload_audio_bloco', args=[resposta.json()['id']])
+
+        def put(offset, dados, **cabecalhos):
+            return self.client.put(url, dados, content_type='application/octet-stream',
+                                   headers={'Upload-Offset': str(offset), **cabecalhos})
+
+        self.assertEqual(put(0, b'abc', **{'Upload-Checksum': sha256(b'abc')}).json()['recebidos'], 3)
+        fora_de_ordem = put(0, b'abc')
+        self.assertEqual((fora_de_ordem.status_code, fora_de_ordem.json()['recebidos']), (409, 3))
+        # Cliente reconectou: pergunta o offset e continua dali
+        self.assertEqual(self.client.get(url).json()['recebidos'], 3)
+        final = put(3, b'def')
+        self.assertTrue(final.json()['concluido'])
+        self.assertEqual(put('x', b'').status_code, 400)
+        self.assertTrue(os.path.exists(armazenamento_audio.path(UploadAudio.objects.get().arquivo)))
@@ -0,0 +1,45 @@
+# core/tests/test_views_assincronas.py
+
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..cache import cache_ia
+from ..models import GlossarioCultural
+from ..services import IAService
+from .auxiliares import CACHES_LOCAIS, criar_reuniao
+
+criar_reuniao_async = sync_to_async(criar_reuniao)
+
+
+@override_settings(CACHES=CACHES_LOCAIS, COALESCENCIA_ESPERA_MAXIMA=2, COALESCENCIA_INTERVALO=0.01)
+class ViewsAssincronasTests(TestCase):
+
+    def setUp(self):
+        caches['ia'].clear()
+        cache_ia.limpar_local()
+        self.addCleanup(cache_ia.limpar_local)
+
+    async def test_status_pede_recarga_quando_termina(self):
+        pendente = await criar_reuniao_async(status_ia='PROCESSANDO')
+        concluida = await criar_reuniao_async(status_ia='CONCLUIDO')
+
+        resposta = await self.async_client.get(reverse('status_reuniao', args=[pendente.pk]))
+        self.assertNotIn('HX-Refresh', resposta)
+        resposta = await self.async_client.get(reverse('status_reuniao', args=[concluida.pk]))
+        self.assertEqual(resposta['HX-Refresh'], 'true')
+        resposta = await self.async_client.get(reverse('status_reuniao', args=[concluida.pk + 1]))
+        self.assertEqual(resposta.status_code, 404)
+
+    async def test_glossario_resolve_localmente(self):
+        await GlossarioCultural.objects.acreate(termo_tecnico='ASAP', explicacao_simples='assim que possível')
+
+        with mock.patch.object(IAService, 'tradutor_cultural_async') as tradutor:
+            resposta = await self.async_client.post(reverse('glossario'), {'texto_complexo': 'Mande a planilha ASAP.'})
+
+        self.assertEqual(resposta['X-Tradutor-Caminho'], 'local')
+        self.assertContains(resposta, 'ASAP (**assim que possível**)')
+        tradutor.assert_not_called()
@@ -0,0 +1,99 @@
+# core/tokens.py
+
+"""
+Contagem e divisão de texto por tokens (e não por caracteres), para que o
+custo e a latência de cada chamada ao modelo sejam previsíveis.
+Usa o tiktoken quando instalado; senão, uma estimativa conservadora.
+"""
+
+import re
+
+try:
+    import tiktoken
+except ImportError:  # Opcional
+    tiktoken = None
+
+# Português fica em torno de 3,5 caracteres por token nos modelos da OpenAI
+CARACTERES_POR_TOKEN = 3.5
+
+_codificadores = {}
+
+
+def _codificador(modelo):
+    if tiktoken is None:
+        return None
+    if modelo not in _codificadores:
+        try:
+            _codificadores[modelo] = tiktoken.encoding_for_model(modelo)
+        except KeyError:
+            _codificadores[modelo] = tiktoken.get_encoding('o200k_base')
+    return _codificadores[modelo]
+
+
+def estimar_tokens(texto, modelo="gpt-4o-mini"):
+    codificador = _codificador(modelo)
+    if codificador is not None:
+        return len(codificador.encode(texto, disallowed_special=()))
+    return int(len(texto) / CARACTERES_POR_TOKEN) + 1
+
+
+def _cortar_frase(frase, limite_tokens, modelo):
+    """
+    Corta por caracteres uma frase maior que o limite, em pedaços de até `limite_tokens`.
+    O passo desconta o +1 da estimativa; com o tiktoken, o pedaço ainda encolhe até caber.
+    """
+    passo = max(1, int((limite_tokens - 1) * CARACTERES_POR_TOKEN))
+    pedacos, inicio = [], 0
+    while inicio < len(frase):
+        fim = min(inicio + passo, len(frase))
+        while fim - inicio > 1 and estimar_tokens(frase[inicio:fim], modelo) > limite_tokens:
+            fim -= max(1, (fim - inicio) // 10)
+        pedacos.append(frase[inicio:fim])
+        inicio = fim
+    return pedacos
+
+
+def dividir_por_tokens(texto, limite_tokens, modelo="gpt-4o-mini", sobreposicao_tokens=0):
+    """
+    Quebra o texto em janelas de até `limite_tokens`, respeitando o fim das frases.
+    Cada janela começa repetindo as últimas frases da anterior, até `sobreposicao_tokens`,
+    para que uma ideia dita na divisa entre duas janelas não perca o contexto.
+    Uma frase maior que o limite sozinha vira janelas próprias (cortada por caracteres).
+    Retorna: lista de strings, na ordem original.
+    """
+    frases = [f for f in re.split(r'(?<=[.!?\n])\s+', texto) if f.strip()]
+    janelas = []
+    atual, tokens_atual, novas = [], 0, 0  # `novas`: frases da janela que não vieram da sobreposição
+
+    def fechar(repetir=True):
+        nonlocal atual, tokens_atual, novas
+        if novas:
+            janelas.append(" ".join(frase for frase, _ in atual))
+        repetidas, tokens_repetidas = [], 0
+        for frase, tokens in reversed(atual if repetir else []):
+            if tokens_repetidas + tokens > sobreposicao_tokens:
+                break
+            repetidas.insert(0, (frase, tokens))
+            tokens_repetidas += tokens
+        atual, tokens_atual, novas = repetidas, tokens_repetidas, 0
+
+    for frase in frases:
+        tokens_frase = estimar_tokens(frase, modelo)
+
+        if tokens_frase > limite_tokens:
+            fechar(repetir=False)
+            janelas.extend(_cortar_frase(frase, limite_tokens, modelo))
+            continue
+
+        if tokens_atual + tokens_frase > limite_tokens and novas:
+            fechar()
+        # A sobreposição nunca ocupa o lugar de uma frase nova
+        while tokens_atual + tokens_frase > limite_tokens:
+            tokens_atual -= atual.pop(0)[1]
+
+        atual.append((frase, tokens_frase))
+        tokens_atual += tokens_frase
+        novas += 1
+
+    fechar(repetir=False)
+    return janelas
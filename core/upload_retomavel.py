@@ -0,0 +1,118 @@
+# core/upload_retomavel.py
+
+"""
+Upload retomável do áudio das reuniões, em blocos.
+  POST /upload/audio/            nome, tamanho               -> {id, recebidos, tamanho_bloco}
+  GET  /upload/audio/<id>/                                   -> {recebidos, tamanho, concluido}
+  PUT  /upload/audio/<id>/       corpo = bytes do bloco
+       Upload-Offset: posição do bloco no arquivo
+       Upload-Checksum: SHA-256 (hex) do bloco               -> {recebidos, concluido, sha256_bloco}
+Cada bloco vai direto do corpo da requisição para o arquivo parcial, dentro do storage
+de áudio (sem upload handlers, sem cópia inteira em memória nem arquivo temporário).
+Se a conexão cair, o cliente pergunta o offset (GET) e continua dali.
+"""
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .metricas import ETAPA_SEGUNDOS, UPLOAD_BYTES
+from .models import UploadAudio
+from .storage import armazenamento_audio, calcular_sha256
+
+PASTA_AUDIOS = 'reunioes/audio'
+TAMANHO_LEITURA = 64 * 1024
+
+
+class ErroUpload(Exception):
+    def __init__(self, mensagem, status=400, recebidos=None):
+        super().__init__(mensagem)
+        self.status = status
+        self.recebidos = recebidos
+
+
+def iniciar(nome, tamanho):
+    """Retorna: o novo UploadAudio (ainda sem bytes)."""
+    nome = os.path.basename(nome or '').strip()
+    if not nome:
+        raise ErroUpload("Informe o nome do arquivo.")
+    if tamanho <= 0 or tamanho > settings.UPLOAD_AUDIO_TAMANHO_MAXIMO:
+        raise ErroUpload("Tamanho de arquivo inválido.")
+    return UploadAudio.objects.create(nome_original=nome[:255], tamanho=tamanho)
+
+
+@ETAPA_SEGUNDOS.medir(etapa='upload_bloco')
+def receber_bloco(upload, offset, corpo, tamanho_bloco, checksum=None):
+    """
+    Grava `tamanho_bloco` bytes lidos de `corpo` (a requisição) na posição `offset`.
+    Offset diferente do esperado -> 409 com o offset certo; bloco incompleto ou com
+    checksum diferente é descartado (o arquivo volta ao tamanho anterior).
+    Retorna: o SHA-256 do bloco recebido.
+    """
+    if upload.concluido:
+        raise ErroUpload("Upload já concluído.", 409, upload.recebidos)
+    if offset != upload.recebidos:
+        raise ErroUpload("Offset fora de ordem.", 409, upload.recebidos)
+    if tamanho_bloco <= 0 or tamanho_bloco > settings.UPLOAD_AUDIO_TAMANHO_BLOCO_MAXIMO \
+            or offset + tamanho_bloco > upload.tamanho:
+        raise ErroUpload("Tamanho de bloco inválido.", 400, upload.recebidos)
+
+    caminho = armazenamento_audio.path(upload.nome_parcial)
+    if offset and not os.path.exists(caminho):
+        # Arquivo parcial removido (ex: limpar_audios_orfaos): recomeça do zero
+        UploadAudio.objects.filter(pk=upload.pk).update(recebidos=0, updated_at=timezone.now())
+        raise ErroUpload("Upload expirado; reenvie desde o início.", 409, 0)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    hash_bloco = hashlib.sha256()
+    with open(caminho, 'r+b' if os.path.exists(caminho) else 'wb') as destino:
+        destino.seek(offset)
+        destino.truncate()  # Descarta o que sobrou de uma tentativa interrompida deste bloco
+        lidos = 0
+        while lidos < tamanho_bloco:
+            dados = corpo.read(min(TAMANHO_LEITURA, tamanho_bloco - lidos))
+            if not dados:
+                break
+            destino.write(dados)
+            hash_bloco.update(dados)
+            lidos += len(dados)
+
+        sha256_bloco = hash_bloco.hexdigest()
+        if lidos != tamanho_bloco or (checksum and checksum.lower() != sha256_bloco):
+            destino.truncate(offset)
+            raise ErroUpload("Bloco incompleto ou corrompido; reenvie.", 422, offset)
+
+    # Condicional: uma requisição duplicada do mesmo bloco não avança o offset duas vezes
+    if not UploadAudio.objects.filter(pk=upload.pk, recebidos=offset).update(
+        recebidos=offset + lidos, updated_at=timezone.now()
+    ):
+        upload.refresh_from_db()
+        raise ErroUpload("Bloco já recebido.", 409, upload.recebidos)
+
+    upload.recebidos = offset + lidos
+    UPLOAD_BYTES.incrementar(lidos)
+    if upload.recebidos == upload.tamanho:
+        concluir(upload)
+    return sha256_bloco
+
+
+@ETAPA_SEGUNDOS.medir(etapa='upload_conclusao')
+def concluir(upload):
+    """Calcula o hash do arquivo completo e o move para o caminho definitivo (storage por conteúdo)."""
+    with open(armazenamento_audio.path(upload.nome_parcial), 'rb') as arquivo:
+        sha256 = calcular_sha256(File(arquivo))
+    extensao = os.path.splitext(upload.nome_original)[1]
+    upload.arquivo = armazenamento_audio.adotar(upload.nome_parcial, PASTA_AUDIOS, extensao, sha256)
+    upload.save(update_fields=['arquivo', 'updated_at'])
+
+
+def como_dict(upload):
+    return {
+        'id': str(upload.pk),
+        'recebidos': upload.recebidos,
+        'tamanho': upload.tamanho,
+        'concluido': upload.concluido,
+        'tamanho_bloco': settings.UPLOAD_AUDIO_TAMANHO_BLOCO,
+    }
@@ -7,17 +7,28 @@ urlpatterns = [
 
     # --- Funcionalidade 1: Escriba Inteligente (Reuniões) ---
     path('upload/', views.upload_reuniao, name='upload_reuniao'),
+    path('upload/audio/', views.iniciar_upload_audio, name='iniciar_upload_audio'),
+    path('upload/audio/<uuid:pk>/', views.upload_audio_bloco, name='upload_audio_bloco'),
     path('reuniao/<int:pk>/', views.detalhe_reuniao, name='detalhe_reuniao'),
+    path('reuniao/<int:pk>/status/', views.status_reuniao_htmx, name='status_reuniao'),
+    path('reuniao/<int:pk>/segmentos/', views.segmentos_reuniao_htmx, name='segmentos_reuniao'),
+    path('reuniao/<int:pk>/audio/', views.audio_reuniao, name='audio_reuniao'),
+    path('reuniao/<int:pk>/picos/', views.picos_reuniao, name='picos_reuniao'),
 
     # --- Funcionalidade 2: Mentoria de Feedback (Líderes) ---
     path('mentoria/', views.mentoria_feedback, name='mentoria_feedback'),
     
-    # Rota HTMX (Mágica Oculta): Chamada automaticamente enquanto digita
-    path('checar-feedback/', views.checar_feedback_htmx, name='checar_feedback'),
+    # Análise em streaming: chamada automaticamente enquanto digita (ver base.html)
+    path('checar-feedback/stream/', views.checar_feedback_stream, name='checar_feedback_stream'),
 
     # --- Funcionalidade 3: Tradutor Cultural (RAG) ---
     path('glossario/', views.glossario_cultural, name='glossario'),
+    path('glossario/traduzir/stream/', views.traduzir_stream, name='traduzir_stream'),
 
     # --- Funcionalidade 4: Gestão de Colaboradores (RH) ---
     path('colaboradores/', views.lista_colaboradores, name='lista_colaboradores'),
+    path('colaboradores/participacao/', views.analise_participacao, name='analise_participacao'),
+
+    # --- Observabilidade ---
+    path('metrics', views.metricas_prometheus, name='metricas'),
 ]
\ No newline at end of file
@@ -1,24 +1,70 @@
 # views.py
 
+import time
+from contextlib import aclosing
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib import messages
-from django.db import transaction
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+from django.utils.html import escape
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
 # Importação dos nossos módulos
-from .models import ReuniaoAcessivel, GlossarioCultural, PerfilColaborador
+from .models import (
+    ReuniaoAcessivel, GlossarioCultural, PerfilColaborador, EstatisticaReunioes, SegmentoTranscricao, UploadAudio,
+    ConteudoReuniao, ParticipacaoColaborador, ParticipacaoSemanal, ParticipacaoDepartamento, semana_da_data,
+)
 from .forms import ReuniaoForm, FeedbackForm, TradutorForm
-from .services import IAService  # Certifique-se de ter criado o services.py anteriormente!
+from .services import CAMINHO_IA, CAMINHO_LOCAL, IAService  # Certifique-se de ter criado o services.py anteriormente!
+from .cliente_ia import ErroIA
+from .coalescencia import CoalescedorSessao
+from .busca_glossario import buscar_glossario
+from .paginacao import paginar_por_data
+from . import upload_retomavel
+from .servir_audio import resposta_audio
+from . import metricas
 
 # --- VIEW 1: Dashboard Principal ---
 def dashboard(request):
     """
     Tela inicial. Mostra as últimas reuniões processadas e estatísticas rápidas.
+    A lista é paginada por chave (data_reuniao) e carrega só as colunas exibidas;
+    os números vêm dos contadores de EstatisticaReunioes, não de count() na tabela.
     """
-    reunioes = ReuniaoAcessivel.objects.all().order_by('-data_reuniao')
-    
+    pagina = paginar_por_data(
+        ReuniaoAcessivel.objects.only('pk', 'titulo', 'data_reuniao', 'status_ia'),
+        'data_reuniao',
+        settings.DASHBOARD_REUNIOES_POR_PAGINA,
+        antes=request.GET.get('antes'),
+        depois=request.GET.get('depois'),
+    )
+
+    estatisticas = list(EstatisticaReunioes.objects.filter(total__gt=0).order_by('-mes', 'status_ia'))
+    por_status = {}
+    por_mes = {}
+    for e in estatisticas:
+        por_status[e.status_ia] = por_status.get(e.status_ia, 0) + e.total
+        por_mes[e.mes] = por_mes.get(e.mes, 0) + e.total
+
     context = {
-        'reunioes': reunioes,
-        'total_reunioes': reunioes.count(),
+        'reunioes': pagina.itens,
+        'pagina': pagina,
+        'total_reunioes': sum(por_status.values()),
+        'total_por_status': [
+            (rotulo, por_status.get(status, 0)) for status, rotulo in ReuniaoAcessivel.STATUS_PROCESSAMENTO
+        ],
+        'total_por_mes': list(por_mes.items())[:settings.DASHBOARD_MESES_EXIBIDOS],
         'colaboradores_cadastrados': PerfilColaborador.objects.count()
     }
     return render(request, 'core/dashboard.html', context)
@@ -26,57 +72,198 @@ def dashboard(request):
 
 # --- VIEW 2: Upload e Processamento (O Coração do Sistema) ---
 def upload_reuniao(request):
+    """
+    Recebe o áudio e enfileira a reunião. A IA roda no worker
+    (python manage.py processar_reunioes), então o POST responde na hora.
+    """
     if request.method == 'POST':
         form = ReuniaoForm(request.POST, request.FILES)
         if form.is_valid():
             reuniao = form.save(commit=False)
-            reuniao.status_ia = 'PROCESSANDO'
+            reuniao.status_ia = 'PENDENTE'
             reuniao.save()
             
-            # IMPORTANTE: Salvar o Many-to-Many antes de usar
+            # IMPORTANTE: Salvar o Many-to-Many antes do worker usar
             form.save_m2m() 
 
-            try:
-                # 1. Pega os nomes dos participantes selecionados no form
-                # Cria uma string: "Pedro.Henrique, Carlos.Junior, Admin"
-                nomes_participantes = ", ".join([p.username for p in reuniao.participantes.all()])
-
-                # 2. Transcrição (Whisper)
-                caminho = reuniao.arquivo_audio.path
-                texto = IAService.transcrever_reuniao(caminho)
-                reuniao.transcricao_completa = texto
-
-                # 3. Passa os nomes para a IA (AGORA COM CONTEXTO!)
-                insights = IAService.gerar_ata_inteligente(texto, nomes_participantes)
-                reuniao.resumo_executivo = insights
-                
-                # ... (resto do código igual) ...
-                
-                # Sucesso!
-                reuniao.status_ia = 'CONCLUIDO'
-                reuniao.save()
-                
-                messages.success(request, f"Reunião '{reuniao.titulo}' processada com sucesso! Acessibilidade gerada.")
-                return redirect('detalhe_reuniao', pk=reuniao.pk)
-
-            except Exception as e:
-                reuniao.status_ia = 'ERRO'
-                reuniao.save()
-                messages.error(request, f"Erro ao processar IA: {str(e)}")
-                return redirect('dashboard')
+            upload = form.cleaned_data.get('upload_id')
+            if upload is not None:
+                upload.delete()  # O arquivo agora pertence à reunião
+
+            messages.success(request, f"Reunião '{reuniao.titulo}' enviada! A IA está gerando a acessibilidade em segundo plano.")
+            return redirect('detalhe_reuniao', pk=reuniao.pk)
     else:
         form = ReuniaoForm()
 
     return render(request, 'core/upload.html', {'form': form})
 
 
+# Upload retomável em blocos (core/upload_retomavel.py): o JS da página de upload envia o áudio
+# aos poucos enquanto o formulário é preenchido; no submit, só o upload_id vai junto.
+def iniciar_upload_audio(request):
+    if request.method != 'POST':
+        return HttpResponse(status=405)
+    try:
+        upload = upload_retomavel.iniciar(request.POST.get('nome'), int(request.POST.get('tamanho') or 0))
+    except ValueError:
+        return JsonResponse({'erro': "Tamanho de arquivo inválido."}, status=400)
+    except upload_retomavel.ErroUpload as e:
+        return JsonResponse({'erro': str(e)}, status=e.status)
+    return JsonResponse(upload_retomavel.como_dict(upload), status=201)
+
+
+def upload_audio_bloco(request, pk):
+    upload = get_object_or_404(UploadAudio, pk=pk)
+    if request.method == 'GET':
+        return JsonResponse(upload_retomavel.como_dict(upload))
+    if request.method != 'PUT':
+        return HttpResponse(status=405)
+
+    try:
+        sha256_bloco = upload_retomavel.receber_bloco(
+            upload,
+            offset=int(request.headers.get('Upload-Offset', '-1')),
+            corpo=request,  # Lido aos poucos direto do socket; request.body carregaria tudo na memória
+            tamanho_bloco=int(request.headers.get('Content-Length') or 0),
+            checksum=request.headers.get('Upload-Checksum'),
+        )
+    except ValueError:
+        return JsonResponse({'erro': "Cabeçalhos inválidos."}, status=400)
+    except upload_retomavel.ErroUpload as e:
+        return JsonResponse({'erro': str(e), 'recebidos': e.recebidos}, status=e.status)
+    return JsonResponse({**upload_retomavel.como_dict(upload), 'sha256_bloco': sha256_bloco})
+
+
 # --- VIEW 3: Detalhes da Reunião (Visão do Pedro/PCD) ---
+def _atualizacao_reuniao(request, pk):
+    """
+    updated_at da reunião (uma consulta por requisição, usada no ETag e no Last-Modified).
+    Com mensagens pendentes (ex: "Reunião enviada!") retorna None: a página precisa ser
+    renderizada para exibi-las, então não há validador nenhum e nunca sai um 304.
+    """
+    if not hasattr(request, '_reuniao_atualizada'):
+        request._reuniao_atualizada = None if messages.get_messages(request) else (
+            ReuniaoAcessivel.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+        )
+    return request._reuniao_atualizada
+
+
+def _etag_reuniao(request, pk):
+    atualizada = _atualizacao_reuniao(request, pk)
+    if atualizada is None:
+        return None
+    return f'"reuniao-{pk}-{atualizada.timestamp()}"'
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_etag_reuniao, last_modified_func=_atualizacao_reuniao)
 def detalhe_reuniao(request, pk):
     """
     Exibe a ata, a transcrição e o player de áudio.
+    Toda mudança na reunião (status, ata, transcrição) passa por save() e muda updated_at;
+    mudanças nos participantes também (signal m2m_changed em core/signals.py). Ele é
+    o ETag/Last-Modified (visita repetida recebe 304 sem renderizar nada) e entra
+    na chave do cache de fragmento do template.
+    """
+    # A ata em JSON (pontos_destaque) vem na mesma consulta e os participantes em uma segunda;
+    # a transcrição longa e a ata em HTML só são lidas para reuniões antigas (sem segmentos / sem pontos_destaque)
+    reuniao = get_object_or_404(
+        ReuniaoAcessivel.objects.select_related('conteudo').defer(
+            'conteudo__transcricao', 'conteudo__ata', 'conteudo__picos'
+        ).prefetch_related(
+            Prefetch('participantes', queryset=User.objects.only('username', 'first_name', 'last_name'))
+        ), pk=pk
+    )
+    context = {
+        'reuniao': reuniao,
+        # Só consulta os segmentos se o fragmento não estiver em cache
+        'janela': SimpleLazyObject(lambda: _janela_segmentos(reuniao.pk, 0)),
+        'cache_segundos': settings.DETALHE_CACHE_SEGUNDOS,
+    }
+    return render(request, 'core/detalhe_reuniao.html', context)
+
+
+def _formatar_tempo(ms):
+    segundos = ms // 1000
+    horas, resto = divmod(segundos, 3600)
+    return f"{horas}:{resto // 60:02d}:{resto % 60:02d}" if horas else f"{resto // 60:02d}:{resto % 60:02d}"
+
+
+def _janela_segmentos(reuniao_id, a_partir):
+    """
+    Uma janela de segmentos da transcrição a partir da posição `a_partir`.
+    Busca um a mais só para saber se existe próxima janela (sem count()).
+    """
+    tamanho = settings.TRANSCRICAO_SEGMENTOS_POR_JANELA
+    linhas = list(
+        SegmentoTranscricao.objects
+        .filter(reuniao_id=reuniao_id, ordem__gte=a_partir)
+        .order_by('ordem')
+        .values_list('ordem', 'inicio_ms', 'fim_ms', 'texto', 'falante')[:tamanho + 1]
+    )
+    segmentos = [
+        {
+            'ordem': ordem,
+            'inicio': inicio_ms / 1000,
+            'fim': fim_ms / 1000,
+            'rotulo': _formatar_tempo(inicio_ms),
+            'texto': texto,
+            'falante': falante,
+        }
+        for ordem, inicio_ms, fim_ms, texto, falante in linhas[:tamanho]
+    ]
+    proxima = linhas[tamanho][0] if len(linhas) > tamanho else None
+    return {'reuniao_id': reuniao_id, 'segmentos': segmentos, 'proxima': proxima}
+
+
+# Rota HTMX: próxima janela da transcrição, pedida quando o fim da lista aparece na tela
+def segmentos_reuniao_htmx(request, pk):
+    try:
+        a_partir = max(0, int(request.GET.get('a_partir', 0)))
+    except ValueError:
+        a_partir = 0
+    return render(request, 'core/partials/segmentos_transcricao.html', _janela_segmentos(pk, a_partir))
+
+
+# Áudio do player com suporte a Range: o navegador busca só o trecho que vai tocar (core/servir_audio.py)
+def audio_reuniao(request, pk):
+    reuniao = get_object_or_404(ReuniaoAcessivel.objects.only('pk', 'arquivo_audio', 'hash_audio'), pk=pk)
+    if not reuniao.arquivo_audio:
+        raise Http404("Reunião sem áudio.")
+    try:
+        return resposta_audio(request, reuniao.arquivo_audio.name, reuniao.hash_audio)
+    except FileNotFoundError:
+        raise Http404("Arquivo de áudio não encontrado.")
+
+
+# Forma de onda do player: bytes 0-255, um por fatia do áudio (desenhados pelo JS em base.html)
+def picos_reuniao(request, pk):
+    linha = ConteudoReuniao.objects.filter(reuniao_id=pk).values_list('picos', 'reuniao__hash_audio').first()
+    if not linha or not linha[0]:
+        raise Http404("Forma de onda ainda não calculada.")
+    picos, hash_audio = bytes(linha[0]), linha[1]
+    etag = f'"picos-{hash_audio or pk}-{len(picos)}"'
+    resposta = HttpResponse(status=304) if request.headers.get('If-None-Match') == etag else \
+        HttpResponse(picos, content_type='application/octet-stream')
+    resposta['ETag'] = etag
+    resposta['Cache-Control'] = f'private, max-age={settings.AUDIO_CACHE_SEGUNDOS}'
+    return resposta
+
+
+# Rota HTMX: consultada periodicamente pela página de detalhes enquanto a IA trabalha
+async def status_reuniao_htmx(request, pk):
     """
-    reuniao = get_object_or_404(ReuniaoAcessivel, pk=pk)
-    return render(request, 'core/detalhe_reuniao.html', {'reuniao': reuniao})
+    Retorna o selo de status. Quando o processamento termina,
+    pede ao HTMX para recarregar a página e exibir a ata.
+    Async: o polling de muitas páginas abertas não prende uma thread por requisição.
+    """
+    reuniao = await ReuniaoAcessivel.objects.only('pk', 'status_ia').filter(pk=pk).afirst()
+    if reuniao is None:
+        raise Http404("Reunião não encontrada.")
+    response = render(request, 'core/partials/status_reuniao.html', {'reuniao': reuniao})
+    if reuniao.processamento_finalizado:
+        response['HX-Refresh'] = 'true'
+    return response
 
 
 # --- VIEW 4: Mentoria de Feedback (Visão do Gestor) ---
@@ -88,60 +275,189 @@ def mentoria_feedback(request):
     return render(request, 'core/mentoria_feedback.html', {'form': form})
 
 
-# --- VIEW 5: Endpoint HTMX (Mágica Assíncrona) ---
-def checar_feedback_htmx(request):
+# --- VIEW 5: Análise de viés em streaming (chamada pelo formulário da mentoria) ---
+# O resultado aparece enquanto a IA escreve (menor tempo até o 1º byte)
+async def checar_feedback_stream(request):
     """
-    Esta view não retorna uma página inteira, apenas um pedaço de HTML.
-    É chamada automaticamente enquanto o usuário digita no formulário.
+    Não retorna uma página inteira, apenas o "card" da análise, em pedaços.
+    O front (base.html, data-stream-url) vai preenchendo o card a cada pedaço recebido.
+    Requisições superadas (o usuário continuou digitando) recebem 204 ou param no meio.
+    Async: a resposta é um gerador async, então o stream não prende uma thread enquanto a IA escreve.
     """
     texto = request.POST.get('texto_original', '')
-    
+
     if len(texto) < 10:
         return render(request, 'core/partials/analise_feedback_result.html', {'mensagem': 'Digite mais para analisar...'})
 
-    # Chama a IA para detectar viés
-    analise_ia = IAService.analisar_vies_feedback(texto)
-    
-    # Renderiza apenas o "card" com o resultado
-    return render(request, 'core/partials/analise_feedback_result.html', {'analise': analise_ia})
+    coalescedor = await CoalescedorSessao.criar_async(request, 'feedback')
+    if not await coalescedor.aguardar_vez_async():
+        return HttpResponse(status=204)
+
+    async def gerar():
+        try:
+            yield '<div class="w-100"><h5 class="mb-3">Análise de Viés:</h5>'
+            ultima_checagem = time.monotonic()
+            try:
+                # aclosing: ao desistir no meio, a conexão com a API é fechada na hora
+                async with aclosing(IAService.analisar_vies_feedback_stream_async(texto)) as pedacos:
+                    async for pedaco in pedacos:
+                        # Cancela se o usuário voltou a digitar (checa no máximo 2x por segundo)
+                        if time.monotonic() - ultima_checagem > 0.5:
+                            ultima_checagem = time.monotonic()
+                            if await coalescedor.superada_async():
+                                return
+                        yield pedaco
+            except ErroIA as e:
+                yield f"<p class='text-danger'>{escape(e.mensagem_usuario)}</p>"
+            yield '</div>'
+        finally:
+            await coalescedor.liberar_async()
+
+    return _resposta_stream(gerar())
+
+
+async def traduzir_stream(request):
+    """
+    Tradução Cultural em streaming (usada pelo formulário da página do glossário).
+    O texto vem escapado; o alvo no front usa white-space: pre-wrap.
+    """
+    form = TradutorForm(request.POST or None)
+    if request.method != 'POST' or not form.is_valid():
+        return HttpResponse(status=400)
+
+    texto_original = form.cleaned_data['texto_complexo']
+    anotado = None if form.cleaned_data['reescrever'] else await IAService.anotar_glossario_local_async(texto_original)
+    caminho = CAMINHO_IA if anotado is None else CAMINHO_LOCAL
+
+    async def gerar():
+        yield render_to_string('core/partials/caminho_traducao.html', {'caminho': caminho}).strip() + "\n"
+        if anotado is not None:
+            yield escape(anotado)
+            return
+        try:
+            async with aclosing(IAService.tradutor_cultural_stream_async(texto_original)) as pedacos:
+                async for pedaco in pedacos:
+                    yield escape(pedaco)
+        except ErroIA as e:
+            yield escape(f"\n{e.mensagem_usuario}")
+
+    response = _resposta_stream(gerar())
+    response['X-Tradutor-Caminho'] = caminho
+    return response
+
+
+def _resposta_stream(pedacos):
+    response = StreamingHttpResponse(pedacos, content_type='text/html; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Nginx: não segurar os pedaços no buffer
+    return response
 
 
 # --- VIEW 6: Tradutor Cultural (Visão da Mariana) ---
 # Substitua a função glossario_cultural antiga por esta nova versão completa:
 
-def glossario_cultural(request):
+async def glossario_cultural(request):
     """
     Exibe o glossário E TAMBÉM processa a tradução de textos inteiros.
+    Async: a chamada à IA não ocupa thread; banco e template rodam via sync_to_async.
     """
-    # 1. Lógica da Busca Simples (Glossário Visual)
-    query = request.GET.get('q')
-    termos = GlossarioCultural.objects.all()
-    if query:
-        termos = termos.filter(termo_tecnico__icontains=query)
+    # 1. Busca textual (índice FTS, sem acento, ordenada por relevância) ou listagem alfabética
+    query = request.GET.get('q', '').strip()
 
-    # 2. Lógica da Tradução (IA)
+    # 2. Lógica da Tradução (glossário local ou IA)
     traducao_resultado = None
+    caminho = None
+    erro_ia = None
     form = TradutorForm()
 
     if request.method == 'POST':
         form = TradutorForm(request.POST)
         if form.is_valid():
             texto_original = form.cleaned_data['texto_complexo']
-            # Chama o serviço de RAG que criamos
-            traducao_resultado = IAService.tradutor_cultural(texto_original)
+            # Tenta a anotação local; o serviço de RAG só entra se precisar
+            try:
+                traducao_resultado, caminho = await IAService.traduzir_async(texto_original, form.cleaned_data['reescrever'])
+            except ErroIA as e:
+                erro_ia = e.mensagem_usuario
 
     context = {
-        'termos': termos,
+        'query': query,
         'form': form,
-        'traducao': traducao_resultado
+        'traducao': traducao_resultado,
+        'caminho': caminho,
+        'erro_ia': erro_ia,
     }
+    response = await sync_to_async(_render_glossario)(request, context)
+    if caminho:
+        response['X-Tradutor-Caminho'] = caminho
+    return response
+
+
+def _render_glossario(request, context):
+    query = context['query']
+    if query:
+        resultados = buscar_glossario(query)
+    else:
+        resultados = GlossarioCultural.objects.only('termo_tecnico', 'tags', 'explicacao_simples').order_by('termo_tecnico')
+    context['termos'] = Paginator(resultados, settings.GLOSSARIO_POR_PAGINA).get_page(request.GET.get('page'))
     return render(request, 'core/glossario.html', context)
 
+
+# --- VIEW 7: Gestão de Colaboradores (RH) ---
 def lista_colaboradores(request):
     """
     Lista todos os perfis cadastrados para monitoramento de inclusão.
     """
     # Usamos select_related('user') para otimizar a busca no banco (boa prática!)
-    colaboradores = PerfilColaborador.objects.select_related('user').all()
+    # Os totais de participação vêm na mesma consulta: uma linha por pessoa, não uma por reunião
+    colaboradores = PerfilColaborador.objects.select_related('user', 'user__participacao').all()
     
     return render(request, 'core/lista_colaboradores.html', {'colaboradores': colaboradores})
+
+
+# --- VIEW 8: Análise de Participação (RH) ---
+def analise_participacao(request):
+    """
+    Autoria, apropriações e presença por departamento e por semana; com ?colaborador=<id>,
+    a série semanal de uma pessoa. Lê só os agregados (ContribuicaoReuniao e afins),
+    então o custo depende das semanas exibidas, não da quantidade de reuniões.
+    """
+    primeira = semana_da_data(timezone.now()) - timedelta(weeks=settings.PARTICIPACAO_SEMANAS_EXIBIDAS - 1)
+    semanas = [primeira + timedelta(weeks=i) for i in range(settings.PARTICIPACAO_SEMANAS_EXIBIDAS)]
+
+    por_departamento = {}
+    for linha in ParticipacaoDepartamento.objects.filter(semana__gte=primeira):
+        por_departamento.setdefault(linha.departamento, {})[linha.semana] = linha
+
+    colaborador = serie_colaborador = None
+    user_id = request.GET.get('colaborador', '')
+    if user_id.isdigit():
+        colaborador = get_object_or_404(PerfilColaborador.objects.select_related('user', 'user__participacao'), user_id=user_id)
+        por_semana = {l.semana: l for l in ParticipacaoSemanal.objects.filter(user_id=user_id, semana__gte=primeira)}
+        serie_colaborador = [(semana, por_semana.get(semana)) for semana in semanas]
+
+    context = {
+        'semanas': semanas,
+        'departamentos': [
+            (departamento, [linhas.get(semana) for semana in semanas])
+            for departamento, linhas in sorted(por_departamento.items())
+        ],
+        'ranking': ParticipacaoColaborador.objects.select_related('user').filter(ideias__gt=0)
+                   .order_by('-ideias', '-reunioes')[:settings.PARTICIPACAO_RANKING],
+        'colaborador': colaborador,
+        'serie_colaborador': serie_colaborador,
+    }
+    return render(request, 'core/analise_participacao.html', context)
+
+
+# --- VIEW 9: Métricas (Prometheus) ---
+def metricas_prometheus(request):
+    """
+    Métricas deste processo no formato de texto do Prometheus (core/metricas.py).
+    Com METRICAS_TOKEN definido, exige "Authorization: Bearer <token>".
+    """
+    if settings.METRICAS_TOKEN and not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {settings.METRICAS_TOKEN}'
+    ):
+        return HttpResponse(status=403)
+    return HttpResponse(metricas.registro.exportar(), content_type=metricas.TIPO_CONTEUDO)